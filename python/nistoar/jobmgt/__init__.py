@@ -69,6 +69,34 @@ The state of each job is persisted as part of its queue as a dictionary with the
     present after completion of the job, it records the epoch time (in seconds) of the job's completion.
 ``errors``
     a list of messages describing errors that led to a failed or killed execution
+``owner``
+    if present, the name of the user or agent that the job is run on behalf of.  Jobs are scheduled 
+    to give each owner a fair share of the job slots (see :py:mod:`nistoar.jobmgt.sched`).
+``limits``
+    if present, a dictionary of the resource limits to apply to the job process:  ``cpu`` (the 
+    maximum CPU time in seconds), ``memory`` (the maximum size of the process's virtual memory in 
+    bytes), and ``walltime`` (the maximum elapsed time in seconds).
+
+Each job's state data is saved to a file in the queue's directory named after the job's data
+identifier.  The transitions between states are also recorded into an index in the same directory (see
+:py:mod:`nistoar.jobmgt.index`) so that the queue can find the jobs it needs to act on without reading
+every job state file.  
+
+## Retention of completed jobs
+
+The state files of completed jobs are removed from the queue directory when the queue is restored
+(at start-up) and when :py:meth:`JobQueue.clean` is called.  By default, these files are moved into
+an archive directory rather than deleted; this is controlled by the ``retention`` queue configuration
+parameter, a dictionary with the following properties:
+``age``
+    the default minimum time in seconds since a job's completion before :py:meth:`JobQueue.clean` 
+    will remove its state file (default: 300).
+``archive``
+    if True (default), removed state files will be moved into the archive directory; if False, they 
+    will be deleted.
+``archive_dir``
+    the directory to move removed state files into (default: ``_archive`` within the queue directory).
+    Each archived file is named after the job's data identifier and its completion time.
 """
 import logging, os, shutil, threading, json, sys, time, asyncio, queue
 from asyncio import subprocess as sp
@@ -82,8 +110,10 @@ from random import randint
 
 import psutil
 
-from nistoar.pdr.utils import read_json, write_json, LockedFile
+from nistoar.pdr.utils import read_json, write_json, recover_writes, LockedFile
 from nistoar.base import config as cfgmod
+from .index import QueueIndex, DEF_MAX_ENTRIES as DEF_INDEX_MAX_ENTRIES
+from .sched import FairShareQueue
 
 PENDING = 0
 RUNNING = 1
@@ -159,6 +189,13 @@ class Job:
     def data_id(self):
         return self.info.get('dataid')
 
+    @property
+    def owner(self):
+        """
+        the name of the user or agent the job is run on behalf of, or None if not set
+        """
+        return self.info.get('owner')
+
     @priority.setter
     def priority(self, p):
         self.info['priority'] = p
@@ -198,11 +235,18 @@ class Job:
     def __ne__(self, other):
         return self._cmp(other) != 0
 
-    def save_to(self, outfile):
+    def save_to(self, outfile, index: QueueIndex=None):
         """
         persist the job state data to the given file
+        :param QueueIndex index:  the index of the queue directory to record the job's state into
         """
+        # an active job is indexed first so that the index never shows it as finished when it is not
+        active = self.state in (PENDING, RUNNING) or bool(self.info.get('relaunch'))
+        if index and active:
+            index.record(self.data_id, self.info)
         write_json(self.info, outfile)
+        if index and not active:
+            index.record(self.data_id, self.info)
         if not self.source:
             self.source = outfile
 
@@ -298,6 +342,23 @@ class JobQueue:
     Internally, a ``JobQueue`` contains an instance of a :py:class:`JobRunner` that handles the 
     execution.  By default, the ``JobRunner`` is triggered to start processing the queue when a 
     ``Job`` is placed on the queue via :py:meth:`submit` (if it is not processing already).  
+
+    This class looks for the following configuration parameters:
+
+    ``runner``
+         (dict) _optional_.  the configuration for the :py:class:`JobRunner`.
+    ``default_job_config``
+         (dict) _optional_.  the configuration to pass to each job, which is merged with the 
+         configuration provided when it is submitted.
+    ``retention``
+         (dict) _optional_.  the policy for removing the state files of completed jobs (see 
+         :py:mod:`nistoar.jobmgt`).
+    ``index_max_entries``
+         (int) _optional_.  the number of job state changes that may be recorded in the queue's index 
+         journal before it is compacted into a snapshot (default: 5000).
+    ``fairshare``
+         (dict) _optional_.  the configuration for scheduling jobs from different owners (see 
+         :py:class:`~nistoar.jobmgt.sched.FairShareQueue`).
     """
     def __init__(self, queuename: str, queuedir: Union[Path,str], execmodule: Union[ModuleType,str],
                  config: Mapping=None, log: Logger=None, resume: bool=True):
@@ -315,9 +376,11 @@ class JobQueue:
             log = logging.getLogger(queuedir.name)
         self.log = log
 
-        self.pq = queue.PriorityQueue()
+        self.index = QueueIndex(self.qdir, self.cfg.get('index_max_entries', DEF_INDEX_MAX_ENTRIES))
+        self.pq = FairShareQueue(self.cfg.get('fairshare'))
         self.runner = JobRunner(self.name, self.qdir, self.pq,
                                 self.log.getChild("runner"), self.cfg.get("runner"))
+        self.runner.index = self.index
         self._restore_queue(resume)
 
     def _restore_queue(self, trigger=True):
@@ -332,31 +395,97 @@ class JobQueue:
         with LockedFile(lockfile, 'w') as fd:
             json.dump({"pid": os.getpid(), "cmd": sys.argv[0], "args": sys.argv[1:]}, fd)
         self.log.info("Checking for zombie jobs...")
-        
-        for f in os.listdir(self.qdir):
-            if not f.endswith(".json") or f.startswith(".") or f.startswith('_'):
+        # job processes may still be running and saving their state
+        recover_writes(self.qdir, min_age=60)
+
+        jobs = self._indexed_jobs(True)
+        pids = [j['pid'] for j in jobs.values() if j.get('state') == RUNNING and j.get('pid', -1) > 0]
+        cmds = self._running_cmds(pids)
+
+        for did, summary in jobs.items():
+            if summary.get('state') == EXITED and not summary.get('relaunch'):
+                self._retire(did, summary)
                 continue
-            did = f[:-1*len(".json")]
-            statefile = self.qdir/f
+            if summary.get('state') == RUNNING and self._is_running(did, summary, cmds):
+                continue
+
+            # the index may be behind the state file; check it before resubmitting
+            statefile = job_state_file(self.qdir, did)
             try:
                 job = Job.from_state_file(statefile)
                 if job.info.get('state') == EXITED and not job.info.get('relaunch'):
-                    statefile.unlink()
-                    self.log.debug("Cleaned up exited job: %s", did)
+                    self.index.record(did, job.info)
+                    self._retire(did, job.info)
                     continue
-                if self.is_running(job):
+                if self.is_running(job, cmds):
                     continue
 
                 self.pq.put_nowait(job)
                 self.log.info("Resubmitting job for %s", job.info['dataid'])
 
+            except FileNotFoundError:
+                self.index.remove(did)
             except (ValueError, KeyError):
                 self.log.warning("Trouble reading job state file: %s", statefile.name)
                 statefile.unlink()
+                self.index.remove(did)
 
         if trigger and not self.pq.empty():
             self.run_queued()
 
+    def _indexed_jobs(self, reconcile: bool=False) -> Mapping[str,Mapping]:
+        # return the job summaries from the index, (re)building it from the state files if necessary.
+        # If reconcile is True, the index is checked against the list of state files, and any files
+        # not yet indexed (e.g. written outside of this queue) are read in.
+        jobs = self.index.jobs()
+        if jobs is not None and not reconcile:
+            return jobs
+        if jobs is None:
+            self.log.info("Indexing the job state files in %s", str(self.qdir))
+
+        found = {}
+        for f in os.listdir(self.qdir):
+            if not f.endswith(".json") or f.startswith(".") or f.startswith('_'):
+                continue
+            did = f[:-1*len(".json")]
+            if jobs and did in jobs:
+                found[did] = None
+                continue
+            try:
+                found[did] = read_json(self.qdir/f)
+            except (ValueError, KeyError):
+                self.log.warning("Trouble reading job state file: %s", f)
+                (self.qdir/f).unlink()
+
+        if jobs is None:
+            self.index.rebuild(found)
+        else:
+            for did in found:
+                if found[did] is not None:
+                    self.index.record(did, found[did])
+            for did in jobs:
+                if did not in found:
+                    self.index.remove(did)
+        return self.index.jobs() or {}
+
+    def _retire(self, dataid: str, info: Mapping):
+        # remove the state file of a completed job according to the retention policy
+        statefile = job_state_file(self.qdir, dataid)
+        retcfg = self.cfg.get('retention', {})
+        try:
+            if retcfg.get('archive', True):
+                archdir = Path(retcfg.get('archive_dir', self.qdir/"_archive"))
+                if not archdir.is_dir():
+                    archdir.mkdir(parents=True)
+                os.replace(statefile, archdir/("%s.%d.json" % (dataid, info.get('comptime') or 0)))
+                self.log.debug("Archived exited job: %s", dataid)
+            else:
+                statefile.unlink()
+                self.log.debug("Cleaned up exited job: %s", dataid)
+        except FileNotFoundError:
+            pass
+        self.index.remove(dataid)
+
     def _restorer_is_running(self, restrdata):
         if not restrdata.get('pid'):
             return False
@@ -379,40 +508,76 @@ class JobQueue:
         """
         return self.pq.qsize()
 
+    def owner_stats(self) -> Mapping[str,Mapping]:
+        """
+        return metrics of the time that each owner's jobs have spent waiting and running since this 
+        queue was instantiated (see :py:meth:`~nistoar.jobmgt.sched.FairShareQueue.owner_stats`).
+        """
+        return self.pq.owner_stats()
+
+    def jobs_in_state(self, *states: int) -> List[str]:
+        """
+        return the data identifiers of the jobs in the queue directory that are in any of the given 
+        states (according to the queue's index).  If no states are given, all jobs are returned.
+        """
+        jobs = self._indexed_jobs()
+        if not states:
+            return list(jobs.keys())
+        return [did for did, j in jobs.items() if j.get('state', PENDING) in states]
         
     def submit(self, dataid: str, args: List[str]=None, config: Mapping=None,
-               priority: int=0, trigger=True) -> Job:
+               priority: int=0, trigger=True, owner: str=None, limits: Mapping=None,
+               covered: Callable[[List[List[str]]], bool]=None) -> Job:
         """
         create and submit a job to process the data with a given ID
 
         :param str  dataid:  the identifier for the data to operate on
         :param [str]  args:  the arguments to pass to the job process when launched
         :param dict config:  the configuration data to pass into the job when launched
+        :param str   owner:  the name of the user or agent that the job is being run on behalf of
+        :param dict limits:  the resource limits to apply to the job process, overriding the runner's
+                             defaults (see :py:mod:`nistoar.jobmgt`)
+        :param func covered: a function that decides whether this request is already covered by the
+                             runs of a job for the data that have not yet started.  It is passed the
+                             argument lists of those runs, in order (excluding any run already in
+                             progress), and should return True if nothing more needs to be queued.
+                             If not provided, a request is dropped only if its arguments are the
+                             same as those of the job's current run.
+        :return:  the job for the data, or None if the request was merged into an active job
         """
         if args is None:
             args = []
         statefile = job_state_file(self.qdir, dataid)
-        if statefile.is_file():
-            dosave = False
-            with LockedFile(statefile) as fd:
-                job = Job.from_state(json.load(fd))
+
+        # examining the current job and updating it must be atomic across all of the processes
+        # sharing this queue
+        with LockedFile(self.qdir/"_submit.lock", 'w'):
+            if statefile.is_file():
+                with LockedFile(statefile) as fd:
+                    job = Job.from_state(json.load(fd))
                 if job.state in [RUNNING, PENDING]:
-                    # already operating on this data don't requeue
-                    if self.relaunchable and job.info.get('args',[]) != args:
+                    # already operating on this data; don't requeue
+                    if covered:
+                        waiting = self._waiting_runs(job)
+                        relaunch = self.relaunchable and not covered([r.get('args', []) for r in waiting])
+                    else:
+                        relaunch = self.relaunchable and job.info.get('args',[]) != args
+                    if relaunch:
                         job.mark_relaunch(args, config, priority)
-                        dosave = True
-            if dosave:
-                job.save_to(statefile)
-            if job.state in [RUNNING, PENDING]:
-                return
+                        job.save_to(statefile, self.index)
+                    return None
 
-        jcfg = OrderedDict(self.cfg.get('default_job_config', {}))
-        if config:
-            jcfg = cfgmod.merge_config(config, jcfg)
+            jcfg = OrderedDict(self.cfg.get('default_job_config', {}))
+            if config:
+                jcfg = cfgmod.merge_config(config, jcfg)
 
-        job = Job(self.mod, dataid, jcfg, args)
-        job.priority = priority
-        job.save_to(statefile)
+            job = Job(self.mod, dataid, jcfg, args)
+            job.priority = priority
+            if owner:
+                job.info['owner'] = owner
+            if limits:
+                job.info['limits'] = dict(limits)
+            job.save_to(statefile, self.index)
 
         # add to in-memory job queue
         self.pq.put_nowait(job)
@@ -421,6 +586,16 @@ class JobQueue:
 
         return job
 
+    @staticmethod
+    def _waiting_runs(job: Job) -> List[Mapping]:
+        # return the state data for the runs of an active job that have not yet started
+        out = []
+        info = job.info if job.state == PENDING else job.info.get('relaunch')
+        while isinstance(info, Mapping):
+            out.append(info)
+            info = info.get('relaunch')
+        return out
+
     def get_job(self, dataid: str) -> Job:
         """
         return the job created to process the data with a given ID
@@ -436,47 +611,62 @@ class JobQueue:
         """
         self.runner.trigger()
 
-    def clean(self, age=300):
+    def clean(self, age=None):
         """
-        remove records of jobs that have completed more than ``age`` seconds ago.  The default is 5 minutes.
+        remove records of jobs that have completed more than ``age`` seconds ago, archiving them 
+        according to the queue's retention policy.  The default is set by the ``retention.age``
+        configuration parameter (5 minutes if not set).
         """
+        if age is None:
+            age = self.cfg.get('retention', {}).get('age', 300)
         deadline = time.time() - age
 
-        for f in os.listdir(self.qdir):
-            if not f.endswith(".json") or f.startswith(".") or f.startswith('_'):
+        for did, summary in self._indexed_jobs().items():
+            if summary.get('state') != EXITED or summary.get('relaunch') or \
+               summary.get('comptime', deadline) >= deadline:
                 continue
-            did = f[:-1*len(".json")]
-            statefile = self.qdir/f
+
+            # confirm against the state file in case the job was resubmitted since
+            statefile = job_state_file(self.qdir, did)
             try:
                 job = Job.from_state_file(statefile)
                 if job.info.get('state') == EXITED and not job.info.get('relaunch') and \
                    job.info.get('comptime', deadline) < deadline:
-                    statefile.unlink()
-                    self.log.debug("Cleaned up exited job: %s", did)
+                    self._retire(did, job.info)
+            except FileNotFoundError:
+                self.index.remove(did)
             except (ValueError, KeyError):
                 self.log.warning("Trouble reading job state file for cleaning: %s", statefile.name)
 
 
-    def is_running(self, job: Job) -> bool:
+    def is_running(self, job: Job, cmds: Mapping[int,List[str]]=None) -> bool:
         """
         return True if the given :py:class:`Job` is in a running state _and_ a matching, running 
         process is found.
+        :param dict cmds:  the command lines of processes already looked up (via 
+                           :py:meth:`_running_cmds`), keyed by process ID; if the job's process is 
+                           not included, it will be looked up individually.
         """
         if 'pid' not in job.info or job.state != RUNNING:
             return False
-        try:
+        return self._is_running(job.info['dataid'], job.info, cmds)
 
-            cl = self._running_cmd(job.info['pid'])
+    def _is_running(self, dataid: str, info: Mapping, cmds: Mapping[int,List[str]]=None) -> bool:
+        try:
+            if cmds is not None and info['pid'] in cmds:
+                cl = cmds[info['pid']]
+            else:
+                cl = self._running_cmd(info['pid'])
             if not cl or not any(__name__ in a for a in cl):
                 return False
 
             idx = cl.index("-I")
-            if idx+1 >= len(cl) or cl[idx+1] != job.info['dataid']:
+            if idx+1 >= len(cl) or cl[idx+1] != dataid:
                 # the data id does not match
                 return False
-            if "-Q" in cl and 'queue' in job.info:
+            if "-Q" in cl and 'queue' in info:
                 idx = cl.index("-Q")
-                if idx+1 < len(cl) and cl[idx+1] != job.info['queue']:
+                if idx+1 < len(cl) and cl[idx+1] != info['queue']:
                     # queue name does not match
                     return False
 
@@ -485,6 +675,13 @@ class JobQueue:
         except ValueError:
             return False
 
+    def _running_cmds(self, pids: List[int]) -> Mapping[int,Union[List[str],None]]:
+        # look up the command lines of many processes at once, skipping those that no longer exist
+        if not pids:
+            return {}
+        live = set(psutil.pids())
+        return dict((pid, self._running_cmd(pid) if pid in live else None) for pid in pids)
+
     def _running_cmd(self, pid: int) -> Union[List[str],None]:
         try:
             proc = psutil.Process(pid)
@@ -518,6 +715,16 @@ class JobRunner:
          (int) _optional_.  The maximum number of jobs to process simultaneously (default: 5).  Note 
          that a feature of this system is not to run jobs running on the same data (as specified 
          by its data ID) simultaneously.
+    ``limits``
+         (dict) _optional_.  The default resource limits to apply to each job process (see 
+         :py:mod:`nistoar.jobmgt`); limits set on a job override these.  The ``cpu`` and ``memory``
+         limits are applied by the job process itself, while ``walltime`` is enforced by this runner.
+    ``kill_grace``
+         (float) _optional_.  The number of seconds to wait after asking a job process that has 
+         exceeded its wall-clock limit to terminate before killing it (default: 10).
+
+    If the job queue provides a ``job_done()`` method (as :py:class:`~nistoar.jobmgt.sched.FairShareQueue`
+    does), the runner calls it with each job taken from the queue and its run time once it completes.
     """
 
     def __init__(self, qname: str, jobdir: Path, jobq: queue.Queue, log: Logger=None, config: Mapping=None):
@@ -535,12 +742,23 @@ class JobRunner:
         self.processed = 0
         self.cleanup = None
         self.setup = None
+        self.index = None
+
+    def _limits_for(self, job: Job) -> Mapping:
+        limits = dict(self.cfg.get('limits', {}))
+        limits.update(job.info.get('limits') or {})
+        return dict((k, v) for k, v in limits.items() if v)
 
     async def _launch_job(self, job: Job):
+        limits = self._limits_for(job)
+        if limits:
+            # the job process will apply these itself
+            job.info['limits'] = limits
+
         # mark its state as running
         if job.source:
             job.mark_running(-1)  # pid will be replaced after the process actually starts
-            job.save_to(job.source)
+            job.save_to(job.source, self.index)
 
         pyexe = self.cfg.get("python_exe", "python")
         if not os.path.isabs(pyexe):
@@ -563,6 +781,7 @@ class JobRunner:
         # cmd = " ".join(cmd)
 
         proc = await asyncio.create_subprocess_exec(*cmd, stdin=sp.DEVNULL, stderr=sp.STDOUT, stdout=out)
+        start = time.time()
 
         if out is sp.PIPE:
             async def capture():
@@ -621,12 +840,35 @@ class JobRunner:
                     # spit out any remaining non-JSON output
                     self.log.warning("\n".join(buffer))
 
-            await capture()
+            waiter = capture()
         else:
-            await proc.communicate()
+            waiter = proc.communicate()
+
+        try:
+            # the process may run on after closing its output
+            await asyncio.wait_for(asyncio.gather(waiter, proc.wait()), limits.get('walltime'))
+        except asyncio.TimeoutError:
+            self.log.warning("%s job exceeded its wall-clock limit (%ss); stopping it",
+                             job.data_id, limits['walltime'])
+            await self._stop(proc)
+            if job.source and job.source.is_file():
+                job = Job.from_state_file(job.source)
+                end = time.time()
+                job.mark_killed(end, end - start,
+                                errors=job.info.get('errors', []) +
+                                       ["Exceeded wall-clock limit of %ss" % limits['walltime']])
+                job.save_to(job.source, self.index)
 
         return proc
 
+    async def _stop(self, proc):
+        proc.terminate()
+        try:
+            await asyncio.wait_for(proc.wait(), self.cfg.get('kill_grace', 10))
+        except asyncio.TimeoutError:
+            proc.kill()
+            await proc.wait()
+
     async def _drain_queue(self):
         class worker:
             def __init__(self, jq, runner):
@@ -638,6 +880,8 @@ class JobRunner:
             async def __call__(self):
                 while not self.jq.empty():
                     job = self.jq.get()
+                    taken = job
+                    started = time.time()
                     proc = None
                     try:
                         if job.source and job.source.is_file():
@@ -648,10 +892,17 @@ class JobRunner:
                         self.processed += 1
                         if job.source and job.source.is_file():
                             job = Job.from_state_file(job.source)
+                            if job.state == RUNNING:
+                                # the process was killed before it could record its completion
+                                end = time.time()
+                                job.mark_killed(end, end - started, 
+                                                errors=[f"Job process exited with status={ec} "
+                                                        "without recording its completion"])
+                                job.save_to(job.source, self.runner.index)
                         if job.info.get('relaunch'):
                             relaunch = job.pop_relaunch_job()
                             if job.source:
-                                relaunch.save_to(job.source)
+                                relaunch.save_to(job.source, self.runner.index)
                             self.jq.put_nowait(relaunch)
                     except asyncio.CancelledError:
                         self.runner.log.warning("Monitor %s task cancelled; shutting down job",
@@ -669,6 +920,9 @@ class JobRunner:
                             self.runner.log.warning("\n".join(jd.get('errors', ['??'])))
                         else:
                             self.runner.log.debug("%s job exited successfully", job.data_id)
+                    finally:
+                        if hasattr(self.jq, 'job_done'):
+                            self.jq.job_done(taken, time.time() - started)
                 return self.processed
 
         self._thdata.workers = []
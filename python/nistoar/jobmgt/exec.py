@@ -6,11 +6,16 @@ from argparse import ArgumentParser
 from typing import Callable
 from pathlib import Path
 import traceback as tb
+try:
+    import resource
+except ImportError:
+    resource = None
 
 from pythonjsonlogger.json import JsonFormatter
 _JF_RESERVED = "msecs relativeCreated thread threadName processName".split()  # do not include these
 
 from nistoar.jobmgt import Job, FatalError, job_state_file
+from nistoar.jobmgt.index import QueueIndex
 from nistoar.base import config
 
 def define_options(progname):
@@ -43,6 +48,37 @@ def define_options(progname):
 
     return parser
 
+CPU_LIMIT_GRACE = 10
+
+def apply_limits(limits):
+    """
+    apply the given resource limits to the current process.  The recognized limits are ``cpu``, the 
+    maximum CPU time in seconds, and ``memory``, the maximum size of virtual memory in bytes; others 
+    are ignored.  Exceeding the CPU limit raises a :py:class:`~nistoar.jobmgt.FatalError`; the 
+    process is killed if it continues for another 10 seconds.  Exceeding the memory limit causes 
+    allocations to fail with a ``MemoryError``.
+    """
+    if not limits or not resource:
+        return
+
+    def setlimit(which, value, hardvalue):
+        soft, hard = resource.getrlimit(which)
+        if hard != resource.RLIM_INFINITY:
+            # an unprivileged process cannot raise its hard limit
+            value, hardvalue = min(value, hard), min(hardvalue, hard)
+        resource.setrlimit(which, (value, hardvalue))
+
+    if limits.get('cpu'):
+        cpu = int(limits['cpu'])
+        setlimit(resource.RLIMIT_CPU, cpu, cpu + CPU_LIMIT_GRACE)
+        def cpuhandle(sig, stack):
+            raise FatalError(f"CPU time limit ({cpu} s) exceeded", 28)
+        signal.signal(signal.SIGXCPU, cpuhandle)
+
+    if limits.get('memory'):
+        mem = int(limits['memory'])
+        setlimit(resource.RLIMIT_AS, mem, mem)
+
 def main(args):
     """
     execute the requested processing.  
@@ -63,13 +99,14 @@ def main(args):
         raise FatalError(f"{opts.queue}/{opts.id}: Job data dir does not exist: {str(statedir)}", 25)
 
     statefile = job_state_file(statedir, opts.id)
+    index = QueueIndex(statedir)
     try:
         job = Job.from_state_file(statefile)
     except Exception as ex:
         raise FatalError(f"Failed to read job file, {statefile}: {str(ex)}", 24)
     try:
         job.mark_running(os.getpid())
-        job.save_to(statefile)
+        job.save_to(statefile, index)
     except Exception as ex:
         raise FatalError(f"Failed to update job status into {statefile}: {str(ex)}", 13)
         
@@ -122,11 +159,13 @@ def main(args):
         if not callable(mod.process):
             raise FatalError(f"{modname}: process symbol is not callable", 2)
 
+        apply_limits(job.info.get('limits'))
+
         start = time.time()
         def sighandle(sig, stack):
             end = time.time()
             job.mark_killed(end, end-start, errors=[f"Caught signal={sig} requesting interruption"])
-            job.save_to(statefile)
+            job.save_to(statefile, index)
             
         signal.signal(signal.SIGHUP, sighandle)
         signal.signal(signal.SIGTERM, sighandle)
@@ -143,6 +182,12 @@ def main(args):
         killed = True
     except SystemExit as ex:
         exitcode = ex.code
+    except MemoryError as ex:
+        exitcode = 29
+        errors.append("Memory limit exceeded")
+        if log:
+            log.critical("Memory limit exceeded")
+        raise FatalError("Memory limit exceeded", 29) from ex
     except FatalError as ex:
         errors.append(str(ex))
         exitcode = ex.exitcode
@@ -162,7 +207,7 @@ def main(args):
             job.mark_killed(ended, runt, errors)
         else:
             job.mark_complete(exitcode, ended, runt, errors)
-        job.save_to(statefile)
+        job.save_to(statefile, index)
 
         
 if __name__ == '__main__':
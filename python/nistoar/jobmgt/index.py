@@ -0,0 +1,255 @@
+"""
+an index of the states of the jobs managed by a :py:class:`~nistoar.jobmgt.JobQueue`.  The index
+allows a queue to find the jobs it must act on--e.g. to resubmit after a restart or to clean up after
+completion--without reading every job state file in its directory.
+
+The index is kept in the queue directory as two files:  an append-only journal (``_index.jsonl``)
+with one JSON object per line recording a change in the state of a job, and a snapshot
+(``_index.json``) of the states of all the jobs at the time the journal was last compacted.  Each
+process that changes the state of a job--the queue and the job processes it launches--appends to
+the journal; a reader loads the snapshot once and afterward only reads the entries appended since
+its last read.  When the journal grows long, the reader folds it into a new snapshot and starts a
+new journal.
+
+The job state files remain the authoritative record of a job's state.  The index is updated before
+a job's state file when the job becomes active and after it when the job finishes, so that a job
+may be listed as active in the index that has, in fact, finished, but not vice versa; consequently,
+a queue should check the state file of an active job before acting on it.
+"""
+import os, json, time, threading, uuid
+from pathlib import Path
+from typing import Mapping, Union
+try:
+    import fcntl
+except ImportError:
+    fcntl = None
+
+from nistoar.pdr.utils import read_json, write_json
+
+JOURNAL_FILE = "_index.jsonl"
+SNAPSHOT_FILE = "_index.json"
+DEF_MAX_ENTRIES = 5000
+SUMMARY_PROPS = "state priority reqtime pid comptime relaunch".split()
+
+_LOCK_SH = fcntl.LOCK_SH if fcntl else 0
+_LOCK_EX = fcntl.LOCK_EX if fcntl else 0
+
+class QueueIndex:
+    """
+    an index of the states of the jobs in a queue directory.  Each job is summarized in the index
+    as a dictionary with the following subset of its state data properties (see
+    :py:mod:`nistoar.jobmgt`):  ``state``, ``priority``, ``reqtime``, ``pid``, ``comptime``,
+    and ``relaunch`` (as a boolean).
+    """
+
+    def __init__(self, jobdir: Union[str,Path], max_entries: int=DEF_MAX_ENTRIES):
+        """
+        open the index for a queue
+        :param str|Path jobdir:  the queue directory where the job state files are kept
+        :param int max_entries:  the number of entries the journal may grow to before it is folded
+                                 into the snapshot
+        """
+        self.dir = Path(jobdir)
+        self.journal = self.dir / JOURNAL_FILE
+        self.snapshot = self.dir / SNAPSHOT_FILE
+        self.max_entries = max_entries
+        self._lock = threading.RLock()
+        self._jobs = None
+        self._gen = None
+        self._offset = 0
+        self._count = 0
+
+    def _open_journal(self, flags, lock):
+        # open the current journal with the given lock, retrying if it gets replaced (via compaction)
+        # while we wait for the lock
+        while True:
+            fd = os.open(self.journal, flags)
+            try:
+                if fcntl:
+                    fcntl.flock(fd, lock)
+                if os.fstat(fd).st_ino == os.stat(self.journal).st_ino:
+                    return fd
+            except FileNotFoundError:
+                pass
+            except Exception:
+                os.close(fd)
+                raise
+            os.close(fd)
+
+    def exists(self) -> bool:
+        """
+        return True if the index has been created
+        """
+        return self.journal.is_file()
+
+    def record(self, dataid: str, info: Mapping) -> bool:
+        """
+        record the current state of a job into the index.
+        :param str dataid:  the identifier of the data the job operates on
+        :param dict  info:  the job's state data
+        :return:  False if the state could not be recorded because the index does not exist yet
+                  or cannot be written to
+        """
+        entry = { "id": dataid }
+        for prop in SUMMARY_PROPS:
+            if info.get(prop) is not None:
+                entry[prop] = info[prop]
+        if 'relaunch' in entry:
+            entry['relaunch'] = bool(entry['relaunch'])
+        return self._append(entry)
+
+    def remove(self, dataid: str) -> bool:
+        """
+        record the removal of a job from the queue directory
+        :return:  False if the removal could not be recorded
+        """
+        return self._append({ "id": dataid, "removed": True })
+
+    def _append(self, entry):
+        entry['time'] = time.time()
+        try:
+            fd = self._open_journal(os.O_WRONLY | os.O_APPEND, _LOCK_SH)
+        except OSError:
+            return False
+        try:
+            # a single small append keeps readers from seeing interleaved entries
+            os.write(fd, (json.dumps(entry) + "\n").encode('utf-8'))
+        except OSError:
+            return False
+        finally:
+            os.close(fd)
+        return True
+
+    def jobs(self) -> Union[Mapping[str,Mapping],None]:
+        """
+        return summaries of the states of the jobs currently in the queue directory, keyed by
+        data identifier.  The summaries should be treated as read-only.  None is returned if the
+        index does not exist or cannot be read, in which case it should be rebuilt from the job
+        state files (see :py:meth:`rebuild`).
+        """
+        with self._lock:
+            try:
+                fd = self._open_journal(os.O_RDONLY, _LOCK_SH)
+            except FileNotFoundError:
+                self._jobs = None
+                return None
+            try:
+                if not self._load(fd):
+                    return None
+            finally:
+                os.close(fd)
+
+            if self.max_entries and self._count > self.max_entries:
+                self.compact()
+            return dict(self._jobs)
+
+    def _load(self, fd):
+        # bring the in-memory summaries up to date with the journal open on fd; return False if the
+        # journal is inconsistent with the snapshot
+        with os.fdopen(os.dup(fd), 'rb') as fo:
+            header = fo.readline()
+            try:
+                gen = json.loads(header)['generation']
+            except (ValueError, KeyError):
+                self._jobs = None
+                return False
+
+            if gen != self._gen or self._jobs is None:
+                snap = None
+                if self.snapshot.is_file():
+                    snap = read_json(str(self.snapshot))
+                if not snap:
+                    self._jobs, self._offset = {}, len(header)
+                elif snap.get('generation') == gen:
+                    self._jobs, self._offset = snap.get('jobs', {}), len(header)
+                elif snap.get('replaces') == gen:
+                    # compaction was interrupted before this journal could be replaced
+                    self._jobs, self._offset = snap.get('jobs', {}), snap.get('offset', len(header))
+                else:
+                    self._jobs = None
+                    return False
+                self._gen = gen
+                self._count = 0
+
+            fo.seek(self._offset)
+            for line in fo.readlines():
+                if not line.endswith(b"\n"):
+                    # a write still in progress
+                    break
+                self._offset += len(line)
+                self._count += 1
+                try:
+                    entry = json.loads(line)
+                    did = entry.pop('id')
+                except (ValueError, KeyError):
+                    continue
+                if entry.get('removed'):
+                    self._jobs.pop(did, None)
+                else:
+                    entry.pop('time', None)
+                    self._jobs[did] = entry
+        return True
+
+    def compact(self):
+        """
+        fold the journal into a new snapshot and start a new, empty journal
+        """
+        with self._lock:
+            try:
+                fd = self._open_journal(os.O_RDONLY, _LOCK_EX)
+            except FileNotFoundError:
+                return
+            try:
+                if self._load(fd):
+                    self._write_generation(self._jobs, self._gen, self._offset)
+            finally:
+                os.close(fd)
+
+    def rebuild(self, jobs: Mapping[str,Mapping]):
+        """
+        replace the contents of the index with the given job states.  This is used to create the
+        index from the job state files when it does not exist or cannot be read.
+        :param dict jobs:  the state data of all the jobs in the queue directory, keyed by data
+                           identifier
+        """
+        summaries = {}
+        for did, info in jobs.items():
+            summaries[did] = dict((p, info[p]) for p in SUMMARY_PROPS if info.get(p) is not None)
+            if 'relaunch' in summaries[did]:
+                summaries[did]['relaunch'] = bool(summaries[did]['relaunch'])
+
+        with self._lock:
+            try:
+                fd = self._open_journal(os.O_RDONLY, _LOCK_EX)
+            except FileNotFoundError:
+                fd = None
+            try:
+                self._write_generation(summaries)
+            finally:
+                if fd is not None:
+                    os.close(fd)
+
+    def _write_generation(self, jobs, oldgen=None, offset=0):
+        # the caller must hold an exclusive lock on the current journal (if it exists)
+        gen = uuid.uuid4().hex
+        header = (json.dumps({ "generation": gen }) + "\n").encode('utf-8')
+        tmpf = self.dir / (".%s.%s" % (JOURNAL_FILE, gen))
+        with open(tmpf, 'wb') as fo:
+            fo.write(header)
+        try:
+            snap = { "generation": gen, "jobs": jobs }
+            if oldgen:
+                snap['replaces'] = oldgen
+                snap['offset'] = offset
+            write_json(snap, str(self.snapshot))
+            os.chmod(tmpf, 0o664)
+            os.replace(tmpf, self.journal)
+        except Exception:
+            if tmpf.exists():
+                tmpf.unlink()
+            raise
+
+        self._jobs = dict(jobs)
+        self._gen = gen
+        self._offset = len(header)
+        self._count = 0
@@ -0,0 +1,211 @@
+"""
+a fair-share scheduler for the jobs of a :py:class:`~nistoar.jobmgt.JobQueue`.
+
+A plain priority queue runs jobs strictly in order of priority and request time, so a single owner
+that submits many jobs at once will keep all other owners waiting until its jobs are done.  The
+:py:class:`FairShareQueue` instead keeps a separate queue for each owner of jobs (as given by the
+``owner`` job state property) and, when a job slot frees up, chooses the next job to run as
+follows:
+
+ 1. the job with the highest *effective* priority:  a job's effective priority is its assigned
+    priority raised by one level for every ``aging_interval`` seconds it has waited, up to the
+    highest assigned priority of any waiting job, so that low-priority jobs are eventually run;
+ 2. among jobs of equal effective priority, the job whose owner has the fewest jobs currently
+    running, relative to the owner's weight;
+ 3. then, the job whose owner has consumed the least run time recently (with past usage decaying
+    with a half-life of ``usage_half_life`` seconds), relative to the owner's weight;
+ 4. finally, the job that was requested first.
+
+The queue also keeps metrics of the time that each owner's jobs have spent waiting and running (see
+:py:meth:`FairShareQueue.owner_stats`).
+"""
+import threading, time, heapq, queue
+from collections import OrderedDict
+from typing import Mapping, Callable
+
+DEF_AGING_INTERVAL = 600
+DEF_USAGE_HALF_LIFE = 3600
+DEF_OWNER = ""
+
+class _OwnerState:
+    def __init__(self, weight):
+        self.weight = weight
+        self.levels = {}      # priority -> heap of (reqtime, seq, job)
+        self.running = 0
+        self.usage = 0.0
+        self.usage_time = 0.0
+        self.submitted = 0
+        self.started = 0
+        self.completed = 0
+        self.total_wait = 0.0
+        self.max_wait = 0.0
+        self.total_runtime = 0.0
+        self.max_runtime = 0.0
+
+    def pending(self):
+        return sum(len(h) for h in self.levels.values())
+
+class FairShareQueue:
+    """
+    a queue of :py:class:`~nistoar.jobmgt.Job` instances that hands them out in a fair-share order
+    (see :py:mod:`nistoar.jobmgt.sched`).  It can be used in place of a ``queue.PriorityQueue`` by a
+    :py:class:`~nistoar.jobmgt.JobRunner`, which reports back the completion of each job via
+    :py:meth:`job_done`.
+
+    This class looks for the following configuration parameters:
+
+    ``weights``
+         (dict) _optional_.  the relative share of the job slots to give to each owner, keyed by
+         owner name.  Owners not listed have a weight of ``default_weight``.
+    ``default_weight``
+         (float) _optional_.  the weight to give owners not listed in ``weights`` (default: 1).
+    ``aging_interval``
+         (float) _optional_.  the number of seconds a job must wait to be promoted by one priority
+         level (default: 600).  A value of 0 or less turns off aging.
+    ``usage_half_life``
+         (float) _optional_.  the time in seconds over which an owner's recorded run time is
+         discounted by half (default: 3600).
+    """
+
+    def __init__(self, config: Mapping=None, clock: Callable=None):
+        """
+        :param dict   config:  the scheduling configuration (see class documentation)
+        :param func    clock:  the function to call to get the current time (default: ``time.time``);
+                               this is provided for simulations.
+        """
+        if config is None:
+            config = {}
+        self.cfg = config
+        self._clock = clock or time.time
+        self._weights = config.get('weights', {})
+        self._defwt = config.get('default_weight', 1)
+        self._aging = config.get('aging_interval', DEF_AGING_INTERVAL)
+        self._halflife = config.get('usage_half_life', DEF_USAGE_HALF_LIFE)
+        self._owners = OrderedDict()
+        self._lock = threading.Lock()
+        self._count = 0
+        self._seq = 0
+
+    def _owner(self, name):
+        if name not in self._owners:
+            self._owners[name] = _OwnerState(self._weights.get(name, self._defwt) or self._defwt)
+        return self._owners[name]
+
+    @staticmethod
+    def owner_of(job) -> str:
+        """
+        return the name of the owner of the given job
+        """
+        return job.info.get('owner') or DEF_OWNER
+
+    def qsize(self) -> int:
+        """
+        return the number of jobs waiting in the queue
+        """
+        return self._count
+
+    def empty(self) -> bool:
+        return self._count == 0
+
+    def put(self, job, block=True, timeout=None):
+        self.put_nowait(job)
+
+    def put_nowait(self, job):
+        """
+        add a job to the queue
+        """
+        with self._lock:
+            owner = self._owner(self.owner_of(job))
+            heap = owner.levels.setdefault(job.priority, [])
+            heapq.heappush(heap, (job.request_time, self._seq, job))
+            self._seq += 1
+            self._count += 1
+            owner.submitted += 1
+
+    def get(self, block=True, timeout=None):
+        # jobs are only taken by the runner after checking that the queue is not empty; thus,
+        # this never blocks
+        return self.get_nowait()
+
+    def get_nowait(self):
+        """
+        remove and return the next job that should be run
+        :raises queue.Empty:  if there are no jobs waiting
+        """
+        with self._lock:
+            now = self._clock()
+            maxprio = max((p for o in self._owners.values() for p in o.levels), default=0)
+            best = None
+            for owner in self._owners.values():
+                if not owner.levels:
+                    continue
+                usage = self._decayed_usage(owner, now)
+                for prio, heap in owner.levels.items():
+                    reqtime = heap[0][0]
+                    eff = prio
+                    if self._aging > 0:
+                        # aging lifts a job up to, but not beyond, the highest waiting priority so
+                        # that it does not override the fair share among jobs of equal priority
+                        eff = min(maxprio, eff + int(max(0, now - reqtime) // self._aging))
+                    key = (-eff, owner.running / owner.weight, usage / owner.weight, reqtime, heap[0][1])
+                    if best is None or key < best[0]:
+                        best = (key, owner, prio)
+            if best is None:
+                raise queue.Empty()
+
+            key, owner, prio = best
+            job = heapq.heappop(owner.levels[prio])[2]
+            if not owner.levels[prio]:
+                del owner.levels[prio]
+            self._count -= 1
+
+            wait = max(0, now - job.request_time)
+            owner.running += 1
+            owner.started += 1
+            owner.total_wait += wait
+            owner.max_wait = max(owner.max_wait, wait)
+            return job
+
+    def job_done(self, job, runtime: float):
+        """
+        record the completion of a job that was previously taken from this queue
+        :param Job      job:  the job that completed
+        :param float runtime:  the number of seconds the job ran for
+        """
+        with self._lock:
+            owner = self._owner(self.owner_of(job))
+            owner.running = max(0, owner.running - 1)
+            owner.usage = self._decayed_usage(owner, self._clock()) + runtime
+            owner.usage_time = self._clock()
+            owner.completed += 1
+            owner.total_runtime += runtime
+            owner.max_runtime = max(owner.max_runtime, runtime)
+
+    def _decayed_usage(self, owner, now):
+        if not owner.usage or self._halflife <= 0:
+            return owner.usage
+        return owner.usage * 0.5 ** (max(0, now - owner.usage_time) / self._halflife)
+
+    def owner_stats(self) -> Mapping[str,Mapping]:
+        """
+        return a summary of the jobs processed for each owner, keyed by owner name.  Each summary
+        includes the numbers of jobs ``waiting``, ``running``, and ``completed``, the mean and maximum
+        times in seconds that started jobs waited in the queue (``mean_wait`` and ``max_wait``), and
+        the mean, maximum, and total run times of completed jobs (``mean_runtime``, ``max_runtime``,
+        and ``total_runtime``).
+        """
+        with self._lock:
+            out = OrderedDict()
+            for name, owner in self._owners.items():
+                out[name] = OrderedDict([
+                    ("weight",        owner.weight),
+                    ("waiting",       owner.pending()),
+                    ("running",       owner.running),
+                    ("completed",     owner.completed),
+                    ("mean_wait",     owner.total_wait / owner.started if owner.started else 0.0),
+                    ("max_wait",      owner.max_wait),
+                    ("mean_runtime",  owner.total_runtime / owner.completed if owner.completed else 0.0),
+                    ("max_runtime",   owner.max_runtime),
+                    ("total_runtime", owner.total_runtime)
+                ])
+            return out
@@ -1,13 +1,20 @@
 """
 A module availabls in the nistoar package that can serve as a test module executable in the 
-:py:mod:`nistoar.jobmgt` framework.  
+:py:mod:`nistoar.jobmgt` framework.  If the configuration includes ``sleep`` or ``spin``, the 
+process will, respectively, sleep or consume CPU for that many seconds.
 """
-import logging
+import logging, time
 
 def def_process(id, config, args, log=None):
     if not log:
         log = logging.getLogger("goober")
     log.info("fake processing started")
 
-process = def_process
+    if config and config.get('sleep'):
+        time.sleep(config['sleep'])
+    if config and config.get('spin'):
+        end = time.time() + config['spin']
+        while time.time() < end:
+            pass
 
+process = def_process
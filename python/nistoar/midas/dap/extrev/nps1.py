@@ -9,6 +9,7 @@ from urllib.parse import urlparse
 import requests
 
 from nistoar.base.config import ConfigurationException
+from nistoar.web import transport
 from nistoar.nsd.service import PeopleService
 from nistoar.nsd.sync.syncer import get_nsd_auth_token
 from nistoar.midas.dap.extrev import ExternalReviewClient, ExternalReviewException
@@ -267,7 +268,7 @@ class NPSExternalReviewClient(ExternalReviewClient):
         }
 
         try:
-            resp = requests.post(url, headers=headers, data=json.dumps(payload), timeout=30)
+            resp = transport.post(url, headers=headers, data=json.dumps(payload), timeout=30)
         except Exception as ex:
             raise ExternalReviewException(f"Failed to POST to NPS: {ex}", self.system_name) from ex
 
@@ -348,7 +349,7 @@ class NPSExternalReviewClient(ExternalReviewClient):
             url += f"&taskID={revid}"
 
         try:
-            resp = requests.get(url, headers=headers)
+            resp = transport.get(url, headers=headers)
         except Exception as ex:
             raise ExternalReviewException(f"Failed to POST to NPS: {ex}", self.system_name) from ex
 
@@ -412,7 +413,7 @@ class NPSExternalReviewClient(ExternalReviewClient):
         
         url = self.nps_endpoint.rstrip('/') + "/DataSet/RevisionCompleted"
         try:
-            resp = requests.post(url, headers=headers, json=data)
+            resp = transport.post(url, headers=headers, json=data)
         except Exception as ex:
             raise ExternalReviewException(f"Failed to POST to NPS: {ex}", self.system_name) from ex
 
@@ -628,7 +629,7 @@ class ExternalReviewFeedbackClient:
         emsg = "Failed to send review feedback: "
 
         try:
-            resp = requests.request(method, url, json=message, headers=self.hdrs)
+            resp = transport.request(method, url, json=message, headers=self.hdrs)
         except Exception as ex:
             raise ExternalReviewException(emsg + "comm failure: " + str(ex))
 
@@ -667,7 +668,7 @@ class ExternalReviewFeedbackClient:
         url = self.ep + id
         
         try:
-            resp = requests.get(url, headers=self.hdrs)
+            resp = transport.get(url, headers=self.hdrs)
         except Exception as ex:
             raise ExternalReviewException("Unable to retrieve review summary due to comm failure: " +
                                           str(ex))
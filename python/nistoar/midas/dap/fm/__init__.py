@@ -11,6 +11,9 @@ This module includes the following components:
     The OAR web service wrapper for the Application Layer (alt to flask)
 :py:mod:`scan`
     Implememtations of the scanning capabilities of the Application Layer
+:py:mod:`watch`
+    A watcher that journals changes to the files in the spaces so that scans can examine just 
+    the files that changed
 :py:mod:`clients`
     Client interfaces to the different file manager APIs, including the Generic Layer, the 
     WebDAV interface, and the Application Layer.  
@@ -5,7 +5,7 @@ behalf of DBIO/DAP users.
 import json
 from collections.abc import Mapping
 from typing import List
-from urllib.parse import urlsplit, unquote, urljoin, urlparse
+from urllib.parse import urlsplit, unquote, urljoin, urlparse, urlencode
 
 from nistoar.base.config import ConfigurationException
 from ..exceptions import *
@@ -229,11 +229,27 @@ class FileManager:
         summ = self.summarize_space(spaceid)
         return summ.get('last_scan_id')
 
-    def get_scan(self, spaceid: str, scanid: str):
+    def get_scan(self, spaceid: str, scanid: str, offset: int=None, limit: int=None, prefix: str=None):
         """
-        return the scan report for a particular identied scan.
+        return the scan report for a particular identied scan.  If any of ``offset``, ``limit``, or 
+        ``prefix`` are given, the report's ``contents`` will include only the requested page of 
+        file entries, and a ``page`` property will give the total number of matching entries.
+        :param int offset:  the index of the first matching file entry to return
+        :param int  limit:  the maximum number of file entries to return
+        :param str prefix:  return only the file entries whose paths start with this string
         """
-        return self._handle_request("GET", spaceid+"/scans/"+scanid)
+        params = [(k, v) for k, v in (("offset", offset), ("limit", limit), ("prefix", prefix))
+                         if v is not None]
+        resource = spaceid+"/scans/"+scanid
+        if params:
+            resource += "?" + urlencode(params)
+        return self._handle_request("GET", resource)
+
+    def get_scan_progress(self, spaceid: str, scanid: str):
+        """
+        return the small record describing the progress of a particular identified scan
+        """
+        return self._handle_request("GET", spaceid+"/scans/"+scanid+"/progress")
 
     def delete_scan(self, spaceid: str, scanid: str):
         """
@@ -241,7 +257,7 @@ class FileManager:
         """
         return self._handle_request("DELETE", spaceid+"/scans/"+scanid)
 
-    def start_scan(self, spaceid: str):
+    def start_scan(self, spaceid: str, type: str=None):
         """
         request a new scan to commence asynchronously.  This function will return an initial scan 
         report which includes a list of the files found in the space and some initial metadata for them.  
@@ -249,10 +265,16 @@ class FileManager:
         the report later.  The ``is_complete`` field, if False, indicates that the scan is still in 
         progress, meaning updates to the report are still expected.
         :param str spaceid:  the identifier for the space to scan.
+        :param str    type:  the type of scan to request; "delta" requests that only the files that 
+                             have changed since the last scan be examined.  If not provided, the 
+                             service's default type is requested.
         :return:  the initial version of the scan report.
                   :rtype: dict
         """
-        return self._handle_request("POST", spaceid+"/scans", input={})
+        input = {}
+        if type:
+            input['type'] = type
+        return self._handle_request("POST", spaceid+"/scans", input=input)
 
 
 
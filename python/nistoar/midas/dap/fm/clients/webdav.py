@@ -8,8 +8,12 @@ Clients can authenticate to Nextcloud's WebDAV interface either with a long-term
 password; in the MIDAS system, long-term passwords are not made available to external clients.  The 
 Nextcloud's (NIST-enhanced) generic layer provides a special endpoint for retrieving a temporary password
 with requires X.509 client certificate authentication.  The 
+temporary passwords retrieved this way are cached (see :py:class:`TempPasswordCache`) and shared by all
+clients in the process that authenticate with the same credentials, and each :py:class:`FMWebDAVClient`
+keeps a single pooled HTTP session open across operations, re-authenticating only when the server 
+rejects its password.
 """
-import logging, os, re
+import logging, os, re, time, threading
 from datetime import datetime
 from urllib.parse import urlparse, urlunparse, urljoin, unquote, urlsplit
 from collections import OrderedDict
@@ -102,7 +106,132 @@ def extract_cert_cn(cert_path: str):
     cert = OpenSSL.crypto.load_certificate(OpenSSL.crypto.FILETYPE_PEM, cert_data)
     subject = cert.get_subject()
     return subject.CN
-    
+
+DEF_PASSWORD_LIFETIME = 1800   # seconds
+
+class TempPasswordCache:
+    """
+    a thread-safe holder of the temporary WebDAV password retrieved for a client identity via
+    :py:func:`get_webdav_password`.  The password is reused until its assumed lifetime expires or
+    until the WebDAV server rejects it.  Retrievals are serialized so that when several threads find
+    the password stale at the same time, only one of them goes to the authentication endpoint; the
+    others receive the password it retrieved.
+    """
+
+    def __init__(self, auth_url: str, certpath: str, keypath: str, capath=None,
+                 lifetime: float=DEF_PASSWORD_LIFETIME, log: logging.Logger=None):
+        """
+        :param str  auth_url:  the URL for the password-generating endpoint
+        :param str  certpath:  the file path to the X.509 client certificate
+        :param str   keypath:  the file path to the certificate's private key
+        :param       capath:   the CA bundle path for validating the endpoint's certificate, or
+                               False to skip validation
+        :param float lifetime: the number of seconds a retrieved password should be trusted before
+                               a new one is retrieved
+        """
+        self.auth_url = auth_url
+        self.certpath = certpath
+        self.keypath = keypath
+        self.capath = capath
+        self.lifetime = lifetime
+        self.log = log
+        self.auth_calls = 0
+        self._pw = None
+        self._expires = 0
+        self._lock = threading.Lock()
+
+    @property
+    def password(self) -> str:
+        """
+        the currently cached password or None if no unexpired password is cached
+        """
+        if self._pw and time.time() < self._expires:
+            return self._pw
+        return None
+
+    def get(self, stale: str=None) -> str:
+        """
+        return a valid temporary password, retrieving a new one if necessary
+        :param str stale:  a password that the WebDAV server has rejected; if it is still the cached
+                           one, a new password will be retrieved.  If another thread has already
+                           replaced it, the replacement is returned without a new retrieval.
+        :raises FileManagerServiceException:  if the retrieval fails
+        """
+        with self._lock:
+            pw = self.password
+            if pw and pw != stale:
+                return pw
+
+            try:
+                self._pw = get_webdav_password(self.auth_url, self.certpath, self.keypath,
+                                               self.capath, self.log)
+            except OSError as ex:
+                raise FileManagerClientError("Unable to get temp password: "+str(ex)) from ex
+            finally:
+                self.auth_calls += 1
+            self._expires = time.time() + self.lifetime
+            return self._pw
+
+    def clear(self):
+        """
+        forget the cached password, forcing the next call to :py:meth:`get` to retrieve a new one
+        """
+        with self._lock:
+            self._pw = None
+            self._expires = 0
+
+_pwcaches = {}
+_pwcaches_lock = threading.Lock()
+def _pwcache_for(auth_url, certpath, keypath, capath, lifetime, log=None):
+    # clients authenticating as the same identity against the same endpoint share a password
+    key = (auth_url, str(certpath), str(keypath))
+    with _pwcaches_lock:
+        if key not in _pwcaches:
+            _pwcaches[key] = TempPasswordCache(auth_url, certpath, keypath, capath, lifetime, log)
+        return _pwcaches[key]
+
+class _PooledClient(wd3c.Client):
+    """
+    a webdav3 client that keeps its password in sync with a :py:class:`TempPasswordCache` and that
+    retries a request once with a fresh password when the server responds with 401 (Unauthorized).
+    All requests are sent through the client's single ``requests.Session`` so that connections are
+    kept alive and reused.
+    """
+    def __init__(self, options, pwcache: TempPasswordCache=None):
+        super().__init__(options)
+        self.pwcache = pwcache
+        self.reauth_count = 0
+
+    def execute_request(self, action, path, data=None, headers_ext=None):
+        if self.pwcache:
+            self.webdav.password = self.pwcache.get()
+
+        pos = None
+        if hasattr(data, 'seek') and hasattr(data, 'tell'):
+            pos = data.tell()
+        try:
+            return self._send(action, path, data, headers_ext)
+        except wd3c.ResponseErrorCode as ex:
+            if ex.code != 401 or not self.pwcache:
+                raise
+            if data is not None and pos is None and not isinstance(data, (bytes, str)):
+                # can't resend a consumed stream
+                raise
+
+        self.webdav.password = self.pwcache.get(self.webdav.password)
+        self.reauth_count += 1
+        if pos is not None:
+            data.seek(pos)
+        return self._send(action, path, data, headers_ext)
+
+    def _send(self, action, path, data, headers_ext):
+        resp = super().execute_request(action, path, data, headers_ext)
+        if action != "download":
+            # webdav3 always requests a streamed response; reading the (small) body now releases
+            # the connection back to the pool rather than leaving it to the garbage collector
+            resp.content
+        return resp
+
 
 class FMWebDAVClient:
     """
@@ -148,6 +277,14 @@ class FMWebDAVClient:
     ``pass``
         _str_ (optional).  the password to authenticate with.  If provided, ``client_cert_path`` is 
         ignored.  Note that this is usually a Nextcloud application password.
+    ``password_lifetime``
+        _float_ (optional).  the number of seconds that a temporary password retrieved with the 
+        client certificate should be reused before a new one is retrieved (default: 1800).  A new 
+        password is also retrieved whenever the WebDAV service rejects the current one.
+
+    Temporary passwords are shared with other clients in the same process that use the same 
+    certificate and authentication URL.  The :py:attr:`stats` property reports how often this 
+    client has had to authenticate and how well it is reusing its HTTP connections.
 
     :param dict config:  the configuration dictionary
     :param Logger  log:  the Logger to use for log messages
@@ -185,13 +322,37 @@ class FMWebDAVClient:
 
         self._add_auth_opts(config.get('authentication', {}), self._wdcopts) # may raise ConfigurationException
 
+        self._pwcache = None
+        if not self._wdcopts['webdav_password']:
+            authcfg = config.get('authentication', {})
+            if not authcfg.get('site_cert_verify', True):
+                # do not attempt to verify site certificate
+                capath = False
+            else:
+                capath = self.cfg.get('ca_bundle')
+            self._pwcache = _pwcache_for(self._auth_url(), authcfg['client_cert_path'],
+                                         authcfg['client_key_path'], capath,
+                                         authcfg.get('password_lifetime', DEF_PASSWORD_LIFETIME),
+                                         self.log)
+
         self.wdcli = None
         if self._wdcopts['webdav_password']:
-            self.wdcli = wd3c.Client(self._wdcopts)
-            if not self.cfg.get('site_cert_verify', True):
-                self.wdcli.verify = False
-            else:
-                self.wdcli.verify = self.cfg.get('ca_bundle', True)
+            self.wdcli = self._create_client()
+
+    def _auth_url(self):
+        auth_url = self.cfg.get('authentication', {}).get('client_auth_url')
+        if not auth_url:
+            auth_url = self.cfg.get('service_endpoint').split("remote.php/dav/file")[0] + \
+                       "api/genapi.php/auth"
+        return auth_url
+
+    def _create_client(self):
+        out = _PooledClient(self._wdcopts, self._pwcache)
+        if not self.cfg.get('site_cert_verify', True):
+            out.verify = False
+        else:
+            out.verify = self.cfg.get('ca_bundle', True)
+        return out
 
     def _add_auth_opts(self, authcfg, wd3opts):
         if not authcfg:
@@ -229,73 +390,90 @@ class FMWebDAVClient:
             if not os.path.isfile(authcfg["client_key_path"]):
                 raise ConfigurationException(f"{authcfg['client_key_path']}: client key file not found")
 
-    def authenticate(self):
+    def authenticate(self, force: bool=False):
         """
-        Create a new authenticated client session with the service. 
+        ensure that this client holds valid credentials for accessing the WebDAV service, creating 
+        the underlying WebDAV client (available via the ``wdcli`` property) if necessary.
 
         If this client is so configured, it will present X.509 credentials to the remote file manager 
-        service to get back temporary credentials for using the WebDAV API.  If this client is 
-        configured with an application password, it will be (re-)used to create a new session.
+        service to get back temporary credentials for using the WebDAV API; however, this is only 
+        done if an unexpired temporary password has not already been retrieved.  If this client is 
+        configured with an application password, it will be (re-)used.  An existing WebDAV client 
+        and its pooled connections are retained.
+
+        :param bool force:  if True, retrieve a new temporary password even if the current one 
+                            has not yet expired.
         """
         authcfg = self.cfg.get('authentication', {})
         if authcfg.get('pass'):
             self._wdcopts['webdav_password'] = authcfg['pass']
 
         else:
-            # retrieve a temporary password from the authentication endpoint
-            auth_url = authcfg.get('client_auth_url')
-            if not auth_url:
-                auth_url = self.cfg.get('service_endpoint').split("remote.php/dav/file")[0] + \
-                           "api/genapi.php/auth"
-
-            certpath = authcfg.get('client_cert_path')
-            keypath = authcfg.get('client_key_path')
-            if not authcfg.get('site_cert_verify', True):
-                # do not attempt to verify site certificate
-                capath = False
-            else:
-                capath = self.cfg.get('ca_bundle')
-            if not certpath or not keypath:
-                raise ConfigurationException("FMWebDAVClient.authenticate() requires config params: "+
-                                             "client_cert_path, client_key_path")
-
-            try:
-                self._wdcopts['webdav_password'] = get_webdav_password(auth_url, certpath, keypath,
-                                                                       capath, self.log)
-            except OSError as ex:
-                raise FileManagerClientError("Unable to get temp password: "+str(ex)) from ex
+            stale = self._pwcache.password if force else None
+            self._wdcopts['webdav_password'] = self._pwcache.get(stale)
 
-        # create a new client
-        self.wdcli = wd3c.Client(self._wdcopts)
-        if self.cfg.get('ca_bundle'):
-            self.wdcli.verify = self.cfg['ca_bundle']
+        if self.wdcli:
+            self.wdcli.webdav.password = self._wdcopts['webdav_password']
+        else:
+            self.wdcli = self._create_client()
 
     def disconnect(self):
         """
-        remove the underlying WebDAV client, essentially unauthenticating.  This will force 
-        future uses of this client to authenticate again (via :py:meth:`authenticate`).  
+        remove the underlying WebDAV client, closing its open connections.  This will force 
+        future uses of this client to authenticate again (via :py:meth:`authenticate`), although 
+        a cached temporary password will be reused if it has not expired.
         """
+        if self.wdcli:
+            self.wdcli.session.close()
         self.wdcli = None
 
+    @property
+    def stats(self) -> Mapping:
+        """
+        counters describing this client's use of authentication and connections.  These include 
+        ``auth_calls``, the number of temporary passwords retrieved with this client's credentials
+        (by any client in this process); ``reauthentications``, the number of requests this client 
+        has had to resend with a new password; ``requests``, the number of HTTP requests sent over 
+        this client's pooled connections; ``connections``, the number of connections opened to 
+        send them; and ``reused``, the number of requests sent over an already open connection.
+        """
+        out = OrderedDict([
+            ("auth_calls", self._pwcache.auth_calls if self._pwcache else 0),
+            ("reauthentications", self.wdcli.reauth_count if self.wdcli else 0),
+            ("requests", 0),
+            ("connections", 0)
+        ])
+        if self.wdcli:
+            for adapter in self.wdcli.session.adapters.values():
+                pools = getattr(adapter, 'poolmanager', None)
+                if pools is None:
+                    continue
+                for key in pools.pools.keys():
+                    pool = pools.pools.get(key)
+                    if pool:
+                        out['requests'] += pool.num_requests
+                        out['connections'] += pool.num_connections
+        out['reused'] = out['requests'] - out['connections']
+        return out
+
     def open_session(self):
         return self.AuthenticatedSession(self)
 
     class AuthenticatedSession:
         """
-        a context manager that opens and closes an authenticated session with the WebDAV service.
-        By reauthenticating whenever the session is started, this helps ensures that the temporary 
-        password remains fresh. 
+        a context manager that ensures that the client is authenticated with the WebDAV service for
+        a set of operations.  The client's HTTP session and cached temporary password are kept open
+        after the context is exited so that they can be reused by subsequent sessions; an expired or
+        rejected password is renewed as needed.
         """
         def __init__(self, client):
             self._cli = client
 
         def __enter__(self):
-            self._cli.disconnect()
             self._cli.authenticate()
             return self._cli
 
         def __exit__(self, exctype, excval, exctb):
-            self._cli.disconnect()
             return False
             
     def is_directory(self, path):
@@ -393,13 +393,18 @@ class SpaceScansResource(Resource):
     def post(self, id):
         """
         request the creation of a new scan of the uploads directory.  An initial version of the scan
-        report is returned, but the scanning will continue asynchronously.
+        report is returned, but the scanning will continue asynchronously.  The input may be a JSON 
+        object with a ``type`` property requesting the type of scan (e.g. "delta") and, for a "delta"
+        scan, a ``since`` property giving the change journal sequence number to scan changes after.
         """
         svc = current_app.service
+        rec = request.get_json(silent=True) or {}
+        if not isinstance(rec, Mapping):
+            return bad_input("Input record is not a JSON object: "+str(rec), "requesting space scanning")
 
         try: 
             sp = svc.get_space(id)
-            return sp.launch_scan()
+            return sp.launch_scan(rec.get('type', 'def'), rec.get('since'))
             
         except FileManagerResourceNotFound as ex:
             return not_found("Requested space not found", "requesting space scanning")
@@ -419,15 +424,22 @@ class SpaceScanReportResource(Resource):
     def get(self, spaceid, scanid):
         """
         return the report for the scan having the given identifier.  If the scan is still in progress,
-        the returned report will be a preliminary version.
+        the returned report will be a preliminary version.  The ``offset``, ``limit``, and ``prefix``
+        query parameters can be used to request a page of the report's file entries (see 
+        :py:meth:`~nistoar.midas.dap.fm.service.FMSpace.get_scan`).
         :param str spaceid:  the identifier for the space that was (or is being) scanned
         :param str  scanid:  the identifier for the scan that was launched on the specified space
         """
         svc = current_app.service
+        offset = request.args.get('offset', type=int)
+        limit = request.args.get('limit', type=int)
+        if (offset is not None and offset < 0) or (limit is not None and limit < 0):
+            return bad_input("offset and limit must not be negative", "requesting scan report")
+        prefix = request.args.get('prefix')
 
         try: 
             sp = svc.get_space(spaceid)
-            return sp.get_scan(scanid)
+            return sp.get_scan(scanid, offset, limit, prefix)
 
         except FileManagerResourceNotFound as ex:
             return not_found("Requested space not found", "requesting scan report")
@@ -456,6 +468,37 @@ class SpaceScanReportResource(Resource):
             current_app.logger.exception(ex)
             return "", 500
 
+class SpaceScanProgressResource(Resource):
+    """
+    Access to the progress of a specific scan of a space (/spaces/[id]/scans/[scanid]/progress)
+    """
+
+    @auth.authorization_required
+    def get(self, spaceid, scanid):
+        """
+        return the (small) progress record for the scan having the given identifier (see 
+        :py:meth:`~nistoar.midas.dap.fm.service.FMSpace.get_scan_progress`).
+        :param str spaceid:  the identifier for the space that was (or is being) scanned
+        :param str  scanid:  the identifier for the scan that was launched on the specified space
+        """
+        svc = current_app.service
+
+        try: 
+            sp = svc.get_space(spaceid)
+            out = sp.get_scan_progress(scanid)
+            if out is None:
+                return not_found("Scan progress not found", "requesting scan progress")
+            return out
+
+        except FileManagerResourceNotFound as ex:
+            return not_found("Requested space not found", "requesting scan progress")
+        except FileManagerScanException as ex:
+            current_app.logger.error(str(ex))
+            return server_error()
+        except Exception as ex:
+            current_app.logger.exception(ex)
+            return server_error()
+
 class SpacePermsResource(Resource):
     """
     Access to the permissions of a particular space (/spaces/[id]/perms)
@@ -529,6 +572,8 @@ def SpacesBlueprint():
     api.add_resource(SpaceResource, '/spaces/<string:id>')
     api.add_resource(SpaceScansResource, '/spaces/<string:id>/scans')
     api.add_resource(SpaceScanReportResource, '/spaces/<string:spaceid>/scans/<string:scanid>')
+    api.add_resource(SpaceScanProgressResource, 
+                     '/spaces/<string:spaceid>/scans/<string:scanid>/progress')
     api.add_resource(SpacePermsResource, '/spaces/<string:id>/perms')
     return bp
 
@@ -13,7 +13,7 @@ import time
 import re
 from abc import ABC, abstractmethod
 from collections import OrderedDict
-from typing import List, Callable, Union, Mapping
+from typing import List, Callable, Union, Mapping, Tuple
 from logging import Logger
 from random import randint
 from pathlib import Path
@@ -24,6 +24,7 @@ from nistoar.pdr.utils import read_json
 from ..clients import helpers, NextcloudApi, FMWebDAVClient
 from nistoar.midas.dbio import ObjectNotFound
 from ..service import FMSpace
+from .. import watch
 from ..exceptions import (FileManagerException, UnexpectedFileManagerResponse, FileManagerResourceNotFound,
                           FileManagerClientError, FileManagerServerError, FileManagerScanException)
 
@@ -78,6 +79,14 @@ class UserSpaceScanner(ABC):
         within the space.  If False, it is expected that the scannning functions will be called
         additional times with different sets of contents until the entire contents have been
         examined.
+    ``journal_seq``
+        int -- the sequence number of the last change recorded in the space's change journal (see
+        :py:mod:`~nistoar.midas.dap.fm.watch`) at the time the scan was started.
+    ``changed_paths``
+        list[str] -- if present, the scan is a "delta" scan, and this lists the paths of the files
+        and folders in ``contents`` that are new or have changed since the previous scan; the
+        scanning functions need only examine these.  The other entries in ``contents`` carry over
+        the metadata from the previous scan.
 
     The metadata may include additional top-level properties.  For example, it may include
     nextcloud properties describing the top level folder that represents the user space.
@@ -148,6 +157,21 @@ class UserSpaceScanner(ABC):
         """
         raise NotImplementedError()
 
+    def init_changed_content(self, since: int=None) -> Union[Tuple[List[Mapping], List[str]], None]:
+        """
+        generate (quickly) a listing of the scannable files under the user's upload directory, 
+        identifying those that have changed since the given change journal sequence number.  This 
+        allows the scanning functions to examine just the files that have changed.  This default 
+        implementation returns None, indicating that the changes are not known.
+
+        :param int since:  the change journal sequence number to identify the changes after.  If 
+                           None, the ``journal_seq`` recorded in the last successful scan is assumed.
+        :return:  a 2-tuple containing the listing (as returned by :py:meth:`init_scannable_content`) 
+                  and the list of paths within it that are new or have changed, or None if the 
+                  changes are not known.
+        """
+        return None
+
     @abstractmethod
     def fast_scan(self, content_md: Mapping) -> Mapping:
         """
@@ -201,6 +225,123 @@ class UserSpaceScanner(ABC):
         """
         raise NotImplementedError()
 
+FAST_PHASE = "fast"
+SLOW_PHASE = "slow"
+COMPLETE_PHASE = "complete"
+
+class ScanProgress:
+    """
+    a tally of the progress of a scan.  Its record (see :py:meth:`to_dict`) is saved separately 
+    from the scan report (via :py:meth:`~nistoar.midas.dap.fm.service.FMSpace.save_scan_progress`)
+    so that clients polling the status of a space during a long scan need not read the full report.
+    The counts of files, folders, and bytes are taken from the scan report contents when the 
+    tally is created (or :py:meth:`recount` is called); the counts of examined files are kept 
+    up to date by the scanner as it works via :py:meth:`examined`.
+    """
+
+    def __init__(self, scan_md: Mapping, phase: str=FAST_PHASE):
+        """
+        start a tally for a scan
+        :param dict scan_md:  the scan report to take the initial counts from
+        :param str    phase:  the scan's current phase
+        """
+        self.scan_id = scan_md.get('scan_id')
+        self.phase = phase
+        self.files_to_examine = 0
+        self.bytes_to_examine = 0
+        self.files_examined = 0
+        self.bytes_examined = 0
+        self.files_checksummed = 0
+        self._examine_start = None
+        self.recount(scan_md)
+
+    def recount(self, scan_md: Mapping):
+        """
+        (re-)tally the files, folders, and bytes listed in the given scan report
+        """
+        self.file_count = 0
+        self.folder_count = 0
+        self.usage = 0
+        for fmd in scan_md.get('contents', []):
+            rtype = fmd.get('resource_type', 'file')
+            if rtype == 'file':
+                self.file_count += 1
+                self.usage += int(fmd.get('size', 0))
+            elif rtype == 'collection':
+                self.folder_count += 1
+
+    def start_examining(self, nfiles: int, nbytes: int):
+        """
+        note that the slow phase of the scan has started
+        :param int nfiles:  the number of files that will be examined
+        :param int nbytes:  the total number of bytes in those files
+        """
+        self.phase = SLOW_PHASE
+        self.files_to_examine = nfiles
+        self.bytes_to_examine = nbytes
+        self.files_examined = 0
+        self.bytes_examined = 0
+        self._examine_start = time.time()
+
+    def examined(self, fmd: Mapping, checksummed: bool=False):
+        """
+        note that the file described by the given metadata has been examined
+        """
+        self.files_examined += 1
+        if fmd.get('resource_type', 'file') == 'file':
+            self.bytes_examined += int(fmd.get('size', 0))
+        if checksummed:
+            self.files_checksummed += 1
+
+    def finish(self, scan_md: Mapping):
+        """
+        note that the scan is complete, recounting the contents of the final report
+        """
+        self.phase = COMPLETE_PHASE
+        self.recount(scan_md)
+
+    @property
+    def eta(self) -> float:
+        """
+        the estimated number of seconds remaining in the scan, or None if an estimate cannot yet 
+        be made.  The estimate assumes that the remaining bytes will be examined at the same rate 
+        as the bytes examined so far.
+        """
+        if self.phase == COMPLETE_PHASE:
+            return 0
+        if self.phase != SLOW_PHASE or not self._examine_start:
+            return None
+        if self.files_examined >= self.files_to_examine:
+            return 0
+        elapsed = time.time() - self._examine_start
+        if self.bytes_examined > 0 and self.bytes_to_examine > 0:
+            return elapsed * (self.bytes_to_examine - self.bytes_examined) / self.bytes_examined
+        if self.files_examined > 0:
+            return elapsed * (self.files_to_examine - self.files_examined) / self.files_examined
+        return None
+
+    def to_dict(self) -> Mapping:
+        """
+        return the progress record (as described by 
+        :py:meth:`~nistoar.midas.dap.fm.service.FMSpace.get_scan_progress`)
+        """
+        eta = self.eta
+        return OrderedDict([
+            ("scan_id",           self.scan_id),
+            ("phase",             self.phase),
+            ("is_complete",       self.phase == COMPLETE_PHASE),
+            ("file_count",        self.file_count),
+            ("folder_count",      self.folder_count),
+            ("usage",             self.usage),
+            ("files_to_examine",  self.files_to_examine),
+            ("bytes_to_examine",  self.bytes_to_examine),
+            ("files_examined",    self.files_examined),
+            ("bytes_examined",    self.bytes_examined),
+            ("files_checksummed", self.files_checksummed),
+            ("updated",           time.time()),
+            ("eta",               round(eta, 1) if eta is not None else None)
+        ])
+
 class UserSpaceScannerBase(UserSpaceScanner, ABC):
     """
     a partial implementation of the :py:meth:`UserSpaceScanner` that can be used as a
@@ -232,6 +373,7 @@ class UserSpaceScannerBase(UserSpaceScanner, ABC):
         if not log:
             log = logging.getLogger(__name__)
         self.log = log
+        self.progress = None
 
     @property
     def space_id(self):
@@ -257,12 +399,15 @@ class UserSpaceScannerBase(UserSpaceScanner, ABC):
         """
         return self.sp.root_dir / self.sp.system_folder
 
-    def _load_last_scan(self):
+    def _read_last_scan(self):
         lastscan = self.system_dir / GOOD_SCAN_FILE
         if not lastscan.is_file():
             return {}
+        return read_json(lastscan)
 
-        scan = read_json(lastscan)
+    def _load_last_scan(self, scan=None):
+        if scan is None:
+            scan = self._read_last_scan()
 
         out = OrderedDict()
         for fmd in scan.get('contents', []):
@@ -274,8 +419,9 @@ class UserSpaceScannerBase(UserSpaceScanner, ABC):
     def init_scannable_content(self, folder=None):
 
         # load up data from last successful scan which has file ids cached
-        lastfileprops = self._load_last_scan()
+        return self._list_content(folder, self._load_last_scan())
 
+    def _list_content(self, folder, lastfileprops):
         scanroot = self.user_dir
         if folder:
             scanroot /= folder
@@ -314,6 +460,62 @@ class UserSpaceScannerBase(UserSpaceScanner, ABC):
 
         return out
 
+    def init_changed_content(self, since: int=None):
+        """
+        generate a listing of the scannable files under the user's upload directory by applying the 
+        changes recorded in the space's change journal to the listing from the last successful scan.
+        None is returned if there is no successful scan to start from or if the journal cannot account
+        for all of the changes since the given sequence number.
+        """
+        lastscan = self._read_last_scan()
+        if since is None:
+            since = lastscan.get('journal_seq')
+        if since is None:
+            return None
+        lastfileprops = self._load_last_scan(lastscan)
+        if not lastfileprops:
+            return None
+
+        changes = self.sp.changes_since(since)
+        if changes is None:
+            return None
+        changed, removed = watch.net_changes(changes)
+
+        # changed folders get re-listed in full
+        relist = set(p for p, t in changed.items() if t == watch.COLLECTION)
+        def within(path, folders, inclusive=True):
+            parts = path.split('/')
+            for i in range(len(parts) if inclusive else len(parts)-1, 0, -1):
+                if '/'.join(parts[:i]) in folders:
+                    return True
+            return False
+
+        out = [fmd for p, fmd in lastfileprops.items()
+                   if p not in changed and not within(p, removed) and not within(p, relist)]
+        delta = []
+        for path, tp in changed.items():
+            if within(path, relist, False) or \
+               any(p.search(n) for n in path.split('/') for p in self.skipre):
+                continue
+            fpath = self.user_dir / path
+            last = lastfileprops.get(path, {})
+            if tp == watch.COLLECTION and fpath.is_dir():
+                out.append(last if last.get('resource_type') == "collection" else
+                           {'path': path, 'resource_type': "collection"})
+                out.extend(self._list_content(path, lastfileprops))
+            elif tp == watch.FILE and fpath.is_file():
+                out.append(last if last.get('resource_type') == "file" else
+                           {'path': path, 'resource_type': "file"})
+            else:
+                # no longer exists
+                continue
+            delta.append(path)
+
+        # include the contents of re-listed folders
+        delta.extend(fmd['path'] for fmd in out if within(fmd['path'], relist, False))
+
+        return out, delta
+
     def _save_report(self, scanid, md):
         try:
             self.sp.save_scan_metadata(self.scanid, md)
@@ -321,6 +523,13 @@ class UserSpaceScannerBase(UserSpaceScanner, ABC):
             self.log.error(str(ex))
         except Exception as ex:
             self.log.exception(ex)
+        self._save_progress()
+
+    def _save_progress(self):
+        # the progress record should be written after the report so that it does not claim
+        # completion before the final report is available
+        if self.progress:
+            self.sp.save_scan_progress(self.scanid, self.progress.to_dict())
 
     def ensure_registered(self, folder=None):
         """
@@ -459,12 +668,19 @@ class UserSpaceScanDriver:
     def _create_scan_id(self):
         return "%04x" % randint(0, 65536)
 
-    def launch_scan(self, folder=None) -> str:
+    def launch_scan(self, folder=None, delta: bool=False, since: int=None) -> str:
         """
         start the file scanning process of the user's upload space.  This executes the fast scan,
         saves the results, and then launches the asynchronous slow scan.  
         :param str folder:  the folder in the file manager space to scan.  If None, the user's 
                             uploads folder will be scanned
+        :param bool delta:  if True, request that only the files that have changed since the 
+                            last successful scan be examined, according to the space's change 
+                            journal.  If the changes are not known (or ``folder`` is given), all 
+                            files will be examined.
+        :param int  since:  the change journal sequence number to examine changes after when 
+                            ``delta`` is True; if None, the sequence number recorded in the last 
+                            successful scan is used.
         :raises FileManagerException: if an error occurs while prepping scan or during the fast
                             scan phase.  
         :return: the identifier for the launched scan
@@ -482,7 +698,19 @@ class UserSpaceScanDriver:
 
         # get list of files to scan
         try:
-            scan_md['contents'] = scanner.init_scannable_content(folder)
+            # note the journal position first so that changes made during the scan are seen next time
+            scan_md['journal_seq'] = self.space.change_journal.last_seq
+
+            changes = None
+            if delta and not folder:
+                changes = scanner.init_changed_content(since)
+                if changes is None:
+                    self.log.info("%s: changes since last scan unknown; examining all files", 
+                                  self.space.id)
+            if changes is not None:
+                scan_md['contents'], scan_md['changed_paths'] = changes
+            else:
+                scan_md['contents'] = scanner.init_scannable_content(folder)
             
         except FileManagerException:
             raise
@@ -504,7 +732,7 @@ class UserSpaceScanDriver:
                 'factory': scanfactname,
                 'scandir': str(self.scanq.qdir)
             }
-            self.scanq.submit(self.space.id, [scan_id], cfg)
+            self.scanq.submit(self.space.id, [scan_id], cfg, owner=self.space.creator)
 
             # # Run the slowScan asynchronously using a thread
             # def run_slow_scan():
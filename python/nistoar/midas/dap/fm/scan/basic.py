@@ -10,7 +10,7 @@ from collections.abc import Mapping
 from operator import itemgetter
 from datetime import datetime
 
-from .base import UserSpaceScannerBase, FileManagerScanException
+from .base import UserSpaceScannerBase, ScanProgress, FAST_PHASE, FileManagerScanException
 from ..exceptions import *
 from ..service import FMSpace
 from nistoar.pdr.utils import checksum_of
@@ -26,7 +26,8 @@ class BasicScanner(UserSpaceScannerBase):
         synchronously examine a set of files specified by the given file metadata.
 
         This implementation makes sure that each file currently exists and captures basic filesystem
-        metadata for it (size, last modified time, etc.).
+        metadata for it (size, last modified time, etc.).  If the metadata includes ``changed_paths``,
+        only those files are examined.
         """
         spaceroot = content_md.get('fm_space_path', self.sp.uploads_davpath)
         scanroot = spaceroot
@@ -41,6 +42,10 @@ class BasicScanner(UserSpaceScannerBase):
         # the DAP service can't register them).
         fileprops = self.sp.svc.wdcli.list_folder_info(scanroot)
 
+        changed = content_md.get('changed_paths')
+        if changed is not None:
+            changed = set(changed)
+
         totals = {'': 0}
         if content_md.get('contents'):
             # sort alphabetically; this puts top files first and folders ahead of their members
@@ -51,17 +56,19 @@ class BasicScanner(UserSpaceScannerBase):
                 fmd = content_md['contents'].pop(0)
                 if 'scan_errors' not in fmd or not isinstance(fmd['scan_errors'], list):
                     fmd['scan_errors'] = []
-                try:
-                    stat = (self.user_dir / fmd['path']).stat()
-                    fmd['size'] = stat.st_size if fmd['resource_type'] == "file" else 0
-                    fmd['ctime'] = stat.st_ctime
-                    fmd['mtime'] = stat.st_mtime
-                    fmd['last_modified'] = datetime.fromtimestamp(fmd['mtime']).isoformat()
-                except FileNotFoundError as ex:
-                    # No longer exists: remove it from the list
-                    fmd = None
-                except Exception as ex:
-                    fmd['scan_errors'].append("Failed to stat file: "+str(ex))
+                if changed is None or fmd['path'] in changed:
+                    # (otherwise, unchanged since the last scan)
+                    try:
+                        stat = (self.user_dir / fmd['path']).stat()
+                        fmd['size'] = stat.st_size if fmd['resource_type'] == "file" else 0
+                        fmd['ctime'] = stat.st_ctime
+                        fmd['mtime'] = stat.st_mtime
+                        fmd['last_modified'] = datetime.fromtimestamp(fmd['mtime']).isoformat()
+                    except FileNotFoundError as ex:
+                        # No longer exists: remove it from the list
+                        fmd = None
+                    except Exception as ex:
+                        fmd['scan_errors'].append("Failed to stat file: "+str(ex))
 
                 davpath = '/'.join([spaceroot, fmd['path']])
                 if davpath in fileprops:
@@ -88,6 +95,7 @@ class BasicScanner(UserSpaceScannerBase):
                 fmd['accumulated_size'] = totals[fmd['path']]
 
         # write out the report
+        self.progress = ScanProgress(content_md, FAST_PHASE)
         self._save_report(self.scanid, content_md)
         
         return content_md
@@ -96,7 +104,9 @@ class BasicScanner(UserSpaceScannerBase):
         """
         extract metadata from a deep examination a set of files specified by scan metadata.
 
-        This implementation will fetch nextcloud metadata and calculate checksums
+        This implementation will fetch nextcloud metadata and calculate checksums.  If the metadata 
+        includes ``changed_paths``, only those files (and any still missing a file ID or checksum)
+        are examined.
         """
         # make sure all files are registered with nextcloud
         if not self.sp.svc.cfg.get('external_uploads_allowed'):
@@ -107,8 +117,22 @@ class BasicScanner(UserSpaceScannerBase):
         update_size_lim = 10000000 # 10 MB
         size_left = update_size_lim
         files_left = update_files_lim
-        for fmd in content_md.get('contents', []):
+        changed = content_md.get('changed_paths')
+        if changed is not None:
+            changed = set(changed)
+
+        toscan = [fmd for fmd in content_md.get('contents', [])
+                    if changed is None or fmd['path'] in changed or not fmd.get('fileid') or
+                       (fmd.get('resource_type') == "file" and not fmd.get('checksum'))]
+        self.progress = ScanProgress(content_md)
+        self.progress.start_examining(len(toscan), sum(int(fmd.get('size', 0)) for fmd in toscan
+                                                       if fmd.get('resource_type') == "file"))
+        self._save_progress()
+
+        for fmd in toscan:
+            lastcs = fmd.get('last_checksum_date')
             self.slow_scan_file(fmd)
+            self.progress.examined(fmd, fmd.get('last_checksum_date') != lastcs)
 
             # update the report (only after processing a certain number of files/bytes)
             size_left -= fmd.get('size', 0)
@@ -120,6 +144,7 @@ class BasicScanner(UserSpaceScannerBase):
 
         # write out the final report
         content_md['is_complete'] = True
+        self.progress.finish(content_md)
         self._save_report(self.scanid, content_md)
 
         return content_md
@@ -11,7 +11,7 @@ This implementation assumes that it has direct access to storage (for scanning p
 space manipulation is done through the Nextcloud's generic and WebDAV APIs using an administrative,
 functional identity.  
 """
-import os, logging, json, re
+import os, logging, json, re, threading
 from logging import Logger
 from copy import deepcopy
 from pathlib import Path
@@ -25,6 +25,7 @@ from webdav3.exceptions import WebDavException
 
 from .clients import NextcloudApi, FMWebDAVClient
 from .exceptions import *
+from .watch import ChangeJournal, is_watching
 from nistoar.base.config import merge_config, ConfigurationException
 from nistoar.pdr.utils import read_json, write_json
 from nistoar.pdr import def_etc_dir
@@ -448,6 +449,28 @@ _NO_FM_SUMMARY = OrderedDict([
     ("last_scan_id", None)
 ])
 
+_REPORT_CACHE_SIZE = 4
+_report_cache = OrderedDict()
+_report_cache_lock = threading.Lock()
+def _read_report(report: Path):
+    # paging through a large report should not mean re-parsing it for each page; keep the most 
+    # recently read reports, reloading any that have since been rewritten
+    st = report.stat()
+    key = str(report)
+    with _report_cache_lock:
+        hit = _report_cache.get(key)
+        if hit and hit[0] == (st.st_mtime_ns, st.st_size):
+            _report_cache.move_to_end(key)
+            return hit[1]
+
+    data = read_json(report)
+    with _report_cache_lock:
+        _report_cache[key] = ((st.st_mtime_ns, st.st_size), data)
+        _report_cache.move_to_end(key)
+        while len(_report_cache) > _REPORT_CACHE_SIZE:
+            _report_cache.popitem(last=False)
+    return data
+
 class FMSpace:
     """
     an encapsulation of a file space in the file manager.  
@@ -623,13 +646,20 @@ class FMSpace:
             the URL for the browser-based (Nextcloud) interface to the uploads directory
         ``uploads_dav_url``
             the URL for WebDAV interface to the uploads directory
+        ``scan_progress``
+            while a scan is in progress, the scan's progress record (see :py:meth:`get_scan_progress`)
         """
         out = self._load_summary()
         try:
             if out.get('last_scan_id') and out.get('syncing') == "syncing":
                 # determine if syncing has finished
-                scanmd = self.get_scan(out['last_scan_id'])
-                self._update_summary_from_scan(scanmd, out)
+                progress = self.get_scan_progress(out['last_scan_id'])
+                if progress is not None:
+                    self._update_summary_from_progress(progress, out)
+                else:
+                    # scanner did not leave a progress record
+                    scanmd = self.get_scan(out['last_scan_id'])
+                    self._update_summary_from_scan(scanmd, out)
         except Exception as ex:
             self.log.error("trouble reading last scan data: "+str(ex))
 
@@ -750,6 +780,65 @@ class FMSpace:
         """
         return self._scan_report_tmpl % scanid
 
+    _scan_progress_tmpl = "scan-progress-%s.json"
+    def scan_progress_filename_for(self, scanid):
+        """
+        return the name of the file in the space's system folder that records the progress of 
+        the scan with the given identifier.
+        """
+        return self._scan_progress_tmpl % scanid
+
+    def save_scan_progress(self, scan_id, progress):
+        """
+        write a scan's progress record to disk where it can be retrieved via 
+        :py:meth:`get_scan_progress`.  Unlike the scan report (see :py:meth:`save_scan_metadata`),
+        this record is small, so it can be cheaply read each time the space is summarized.
+        :param str  scan_id:  the ID for the scan request
+        :param dict progress: the progress record (see :py:meth:`get_scan_progress`)
+        """
+        try:
+            write_json(progress, self.root_dir/self.system_folder/self.scan_progress_filename_for(scan_id))
+        except Exception as ex:
+            self.log.error("trouble saving scan progress: "+str(ex))
+
+    def get_scan_progress(self, scanid: str):
+        """
+        return the record of the progress of the specified scan.  The properties can include:
+
+        ``scan_id``
+            the identifier for the scan
+        ``phase``
+            the scan's current phase: "fast" (listing files), "slow" (examining them), or "complete"
+        ``is_complete``
+            True if the scan has finished
+        ``file_count``, ``folder_count``, ``usage``
+            the numbers of files and folders found in the uploads folder and the total bytes in 
+            those files
+        ``files_to_examine``, ``bytes_to_examine``
+            the number of files (and their total bytes) that the slow phase of the scan needs to 
+            examine
+        ``files_examined``, ``bytes_examined``
+            the number of those files (and bytes) that have been examined so far
+        ``files_checksummed``
+            the number of files whose checksums were calculated
+        ``updated``
+            the epoch time that the record was last updated
+        ``eta``
+            an estimate of the number of seconds remaining in the scan, or None if it cannot be 
+            estimated yet
+
+        :param str scanid:  the unique ID assigned to the scan
+        :return:  the progress record or None if the scanner has not saved one
+                  :rtype: dict
+        """
+        progfile = self.root_dir/self.system_folder/self.scan_progress_filename_for(scanid)
+        try:
+            return read_json(progfile)
+        except FileNotFoundError as ex:
+            return None
+        except Exception as ex:
+            raise FileManagerScanException("failure while reading scan progress: "+str(ex)) from ex
+
     def save_scan_metadata(self, scan_id, md):
         """
         write updated scan metadata to disk where it can be retrieved.  This method can be 
@@ -791,12 +880,40 @@ class FMSpace:
 #                  (filename, self.system_davpath, str(e))
 #            raise UnexpectedFileManagerResponse(msg) from e
 
-    def launch_scan(self, type: str = "def"):
+    @property
+    def change_journal(self) -> ChangeJournal:
+        """
+        the journal of changes made to the files in the uploads folder.  (Changes are only recorded 
+        while a :py:class:`~nistoar.midas.dap.fm.watch.SpaceWatcher` is running.)
+        """
+        return ChangeJournal(self.root_dir / self.system_folder)
+
+    def changes_since(self, seq: int):
+        """
+        return the changes made to the files in the uploads folder since the change with the given 
+        sequence number was recorded in the space's :py:attr:`change_journal`.
+        :param int seq:  the sequence number of the last change already known to the caller
+        :return:  the list of changes (see :py:class:`~nistoar.midas.dap.fm.watch.ChangeJournal`) or 
+                  None if the journal cannot account for all changes since then, including when 
+                  a watcher is not currently recording changes as they happen.
+        """
+        if not is_watching(self.svc._root_dir):
+            return None
+        return self.change_journal.changes_since(seq)
+
+    def launch_scan(self, type: str = "def", since: int = None):
         """
         start a scan of the contents of the space
 
         :param str type:  a label identifying the type of scan to launch.  The default 
-                          is "def", indicating the default type.
+                          is "def", indicating the default type.  "delta" will request a 
+                          scan that only examines the files that have changed since the last 
+                          successful scan (or since ``since``), according to the space's 
+                          change journal; if the journal cannot provide the changes, all 
+                          files are examined as with the default type.
+        :param int since: the change journal sequence number to examine changes after when 
+                          ``type`` is "delta"; if None, the sequence number recorded in the 
+                          last successful scan is used.
         :return:  preliminary data resulting from the initial "fast scan" of the space.
                   This will include "scanid" which can be used to retrieve the scan 
                   results later.
@@ -811,13 +928,13 @@ class FMSpace:
 
         scanq = self._get_scan_queue()
 
-        if type == 'basic':
+        if type in ('basic', 'delta'):
             driver = scan.UserSpaceScanDriver(self, scan.DefaultScannerFactory,
                                               scanq, self.log.getChild("basicscan"))
         else:
             raise scan.FileManagerScanException("unrecognized scan type requested: "+type)
 
-        scanid = driver.launch_scan()
+        scanid = driver.launch_scan(delta=(type == 'delta'), since=since)
 
         report = self.root_dir/self.system_folder/self.scan_report_filename_for(scanid)
         try: 
@@ -841,11 +958,31 @@ class FMSpace:
             summary["last_scan_id"] = scanmd['scan_id']
             summary['last_scan_started'] = scanmd.get('scan_datetime', 'unknown')
         summary['syncing'] = "synced" if scanmd.get('is_complete') else "syncing"
-        files = [f for f in scanmd.get('contents',[]) if f.get('resource_type', 'file') == 'file']
-        summary['file_count'] = len(files)
-        summary['folder_count'] = len([f for f in scanmd.get('contents',[])
-                                         if f.get('resource_type', 'file') == 'collection'])
-        summary['usage'] = sum(f.get('size', 0) for f in files)
+        nfiles, nfolders, usage = (0, 0, 0)
+        for f in scanmd.get('contents', []):
+            rtype = f.get('resource_type', 'file')
+            if rtype == 'file':
+                nfiles += 1
+                usage += f.get('size', 0)
+            elif rtype == 'collection':
+                nfolders += 1
+        summary['file_count'] = nfiles
+        summary['folder_count'] = nfolders
+        summary['usage'] = usage
+        if scanmd.get('is_complete'):
+            summary.pop('scan_progress', None)
+
+        self._cache_fm_summary(summary)
+
+    def _update_summary_from_progress(self, progress, summary):
+        summary['syncing'] = "synced" if progress.get('is_complete') else "syncing"
+        for prop in "file_count folder_count usage".split():
+            if prop in progress:
+                summary[prop] = progress[prop]
+        if progress.get('is_complete'):
+            summary.pop('scan_progress', None)
+        else:
+            summary['scan_progress'] = progress
 
         self._cache_fm_summary(summary)
 
@@ -871,11 +1008,17 @@ class FMSpace:
 
         return scan.slow_scan_queue
 
-    def get_scan(self, scanid: str):
+    def get_scan(self, scanid: str, offset: int=None, limit: int=None, prefix: str=None):
         """
-        return the current results from the specified scan
+        return the current results from the specified scan.  If any of ``offset``, ``limit``, or 
+        ``prefix`` is given, the report's ``contents`` will contain only the selected page of 
+        file entries, and the report will include a ``page`` object giving the ``offset``, 
+        ``limit``, and ``total`` number of entries matching ``prefix``.
 
         :param str scanid:  the unique ID assigned to the scan
+        :param int offset:  the index of the first matching file entry to include
+        :param int  limit:  the maximum number of file entries to include
+        :param str prefix:  include only file entries whose paths start with this string
         :return:  the data that has been collected thus far from the scan operation
                   This will include "is_complete" which will be False if the scan is 
                   still in progress.
@@ -884,13 +1027,26 @@ class FMSpace:
         :raises FileManagerScanException:  if a failure occurs while reading or parsing the report
         """
         report = self.root_dir/self.system_folder/self.scan_report_filename_for(scanid)
+        paged = offset is not None or limit is not None or prefix is not None
         try: 
-            out = read_json(report)
+            if not paged:
+                return read_json(report)
+            out = _read_report(report)
         except FileNotFoundError as ex:
             raise 
         except Exception as ex:
             raise FileManagerScanException("failure while reading initial report: "+str(ex)) from ex
 
+        if offset is None or offset < 0:
+            offset = 0
+        contents = out.get('contents', [])
+        if prefix:
+            contents = [f for f in contents if f.get('path', '').startswith(prefix)]
+        end = offset + limit if limit is not None and limit >= 0 else None
+
+        out = OrderedDict((k, v) for k, v in out.items() if k != 'contents')
+        out['page'] = OrderedDict([("offset", offset), ("limit", limit), ("total", len(contents))])
+        out['contents'] = contents[offset:end]
         return out
 
     def delete_scan(self, scanid: str):
@@ -899,6 +1055,10 @@ class FMSpace:
         system folder.
         :param str scanid:  the unique ID assigned to the scan
         """
+        progfile = self.root_dir/self.system_folder/self.scan_progress_filename_for(scanid)
+        if progfile.is_file():
+            progfile.unlink()
+
         report = self.root_dir/self.system_folder/self.scan_report_filename_for(scanid)
         if not report.is_file():
             # don't care
@@ -0,0 +1,877 @@
+"""
+a module for tracking, as they happen, the changes made to the files in the file manager's user spaces.
+
+Learning what has changed in a space via a scan (see :py:mod:`~nistoar.midas.dap.fm.scan`) requires
+walking the space's entire uploads tree and examining every file in it, even when only a single file
+was added.  This module provides a long-running :py:class:`SpaceWatcher` that subscribes to (Linux)
+inotify events under the root directory containing all of the spaces--falling back to periodically
+rescanning the spaces when inotify is not available or events may have been lost--and records the
+changes it sees into a :py:class:`ChangeJournal` kept in each space's system folder.  A scan can then
+ask a space's journal for the changes since a given sequence number (via
+:py:meth:`ChangeJournal.changes_since`) and examine only the files that changed.
+
+The watcher assumes the layout of the file manager's local storage root directory used by
+:py:class:`~nistoar.midas.dap.fm.service.MIDASFileManagerService`:  each space is a directory named
+after the space's identifier containing an uploads folder of the same name and a system folder with
+the name appended with "-sys".
+"""
+import os, re, sys, json, time, select, struct, logging, tempfile, threading
+import ctypes, ctypes.util
+from logging import Logger
+from pathlib import Path
+from collections import OrderedDict
+from collections.abc import Mapping
+from typing import List, Tuple, Iterable, Union
+
+from nistoar.pdr.utils import read_json, write_json
+
+CHANGE_JOURNAL_FILE = "change_journal.jsonl"
+SNAPSHOT_FILE = "change_snapshot.json"
+HEARTBEAT_FILE = ".space_watcher.json"
+
+CREATED  = "created"
+MODIFIED = "modified"
+MOVED    = "moved"
+DELETED  = "deleted"
+RESCAN   = "rescan"     # marks the point before which changes are unknown
+
+FILE = "file"
+COLLECTION = "collection"
+
+DEF_MAX_ENTRIES = 20000
+DEF_RESCAN_INTERVAL = 600
+DEF_POLL_INTERVAL = 30
+DEF_HEARTBEAT_INTERVAL = 15
+DEF_SKIP_PATTERNS = [ r"^\." ]
+
+class ChangeJournal:
+    """
+    a record of the changes made to the files in a space's uploads folder.  The journal is kept as
+    a file in the space's system folder with one JSON object per line, each describing a change with
+    the following properties:
+
+    ``seq``
+        int -- a sequence number that increases by one with each change recorded
+    ``op``
+        str -- the type of change; one of "created", "modified", "moved", "deleted", or "rescan"
+    ``path``
+        str -- the path of the changed file or folder relative to the uploads folder
+    ``dest``
+        str -- the new path of a moved file or folder (included only when ``op`` is "moved")
+    ``type``
+        str -- the type of resource changed:  "file" or "collection".  A change to a collection
+        applies to everything it contains as well.
+    ``time``
+        float -- the epoch time that the change was recorded
+
+    A "rescan" entry indicates that changes made prior to it may not have been recorded.  The journal
+    is written by a single :py:class:`SpaceWatcher`, but it may be read by any number of processes.
+    """
+
+    def __init__(self, sysdir: Union[str,Path], max_entries: int=DEF_MAX_ENTRIES):
+        """
+        open the journal for a space
+        :param str|Path sysdir:  the space's system directory, where the journal is kept
+        :param int max_entries:  the number of entries the journal may grow to before the oldest
+                                 half are discarded.
+        """
+        self.path = Path(sysdir) / CHANGE_JOURNAL_FILE
+        self.max_entries = max_entries
+        self._lock = threading.Lock()
+        self._next = None
+        self._count = 0
+
+    def _read(self) -> List[Mapping]:
+        try:
+            with open(self.path) as fd:
+                lines = fd.readlines()
+        except FileNotFoundError:
+            return []
+
+        out = []
+        for line in lines:
+            if not line.endswith("\n"):
+                # a write still in progress
+                break
+            out.append(json.loads(line))
+        return out
+
+    @property
+    def last_seq(self) -> int:
+        """
+        the sequence number of the last change recorded into the journal, or 0 if none have been.
+        """
+        try:
+            with open(self.path, 'rb') as fd:
+                size = fd.seek(0, os.SEEK_END)
+                fd.seek(max(0, size - 4096))
+                lines = fd.read().split(b"\n")
+        except FileNotFoundError:
+            return 0
+
+        # the last element is either empty or a partially written entry
+        for line in reversed(lines[:-1]):
+            try:
+                return json.loads(line)['seq']
+            except (ValueError, KeyError):
+                # the first line may be truncated; look at the rest of the file
+                break
+        entries = self._read()
+        return entries[-1]['seq'] if entries else 0
+
+    def changes_since(self, seq: int) -> Union[List[Mapping],None]:
+        """
+        return the changes recorded after the given sequence number.  None is returned if the journal
+        cannot account for all of the changes since then--namely, if it does not reach back that far
+        or if changes since then may have gone unrecorded--in which case the caller must examine the
+        whole space to learn what has changed.
+        :param int seq:  the sequence number of the last change already known to the caller
+        :rtype: list of dict
+        """
+        entries = self._read()
+        if not entries or seq < entries[0]['seq'] - 1 or seq > entries[-1]['seq']:
+            return None
+        out = [e for e in entries if e['seq'] > seq]
+        if any(e['op'] == RESCAN for e in out):
+            return None
+        return out
+
+    def record(self, op: str, path: str, type: str=None, dest: str=None) -> int:
+        """
+        record a change into the journal
+        :return:  the sequence number assigned to the change
+        """
+        return self.record_all([(op, path, type, dest)])
+
+    def record_all(self, changes: Iterable[Tuple[str,str,str,str]]) -> int:
+        """
+        record a sequence of changes into the journal with a single write.
+        :param changes:  the changes as a sequence of (op, path, type, dest) tuples
+        :return:  the sequence number assigned to the last change
+        """
+        with self._lock:
+            if self._next is None:
+                entries = self._read()
+                self._next = entries[-1]['seq'] + 1 if entries else 1
+                self._count = len(entries)
+
+            now = time.time()
+            lines = []
+            for op, path, tp, dest in changes:
+                entry = OrderedDict([("seq", self._next), ("op", op), ("path", path)])
+                if dest is not None:
+                    entry['dest'] = dest
+                if tp:
+                    entry['type'] = tp
+                entry['time'] = now
+                lines.append(json.dumps(entry) + "\n")
+                self._next += 1
+            if not lines:
+                return self._next - 1
+
+            # a single append keeps readers from seeing interleaved entries
+            fd = os.open(self.path, os.O_WRONLY | os.O_APPEND | os.O_CREAT, 0o666)
+            try:
+                os.write(fd, "".join(lines).encode('utf-8'))
+            finally:
+                os.close(fd)
+
+            self._count += len(lines)
+            if self.max_entries and self._count > self.max_entries:
+                self._compact(self.max_entries // 2)
+            return self._next - 1
+
+    def _compact(self, keep):
+        entries = self._read()[-keep:]
+        fd, tmpf = tempfile.mkstemp(prefix="."+CHANGE_JOURNAL_FILE+".", dir=self.path.parent)
+        try:
+            with os.fdopen(fd, 'w') as fd:
+                for entry in entries:
+                    fd.write(json.dumps(entry) + "\n")
+            os.chmod(tmpf, 0o644)
+            os.replace(tmpf, self.path)
+        except Exception:
+            if os.path.exists(tmpf):
+                os.remove(tmpf)
+            raise
+        self._count = len(entries)
+
+def net_changes(changes: Iterable[Mapping]) -> Tuple[Mapping,set]:
+    """
+    reduce a sequence of journal entries (as returned by :py:meth:`ChangeJournal.changes_since`) to
+    the net set of paths that were changed and removed.
+    :return:  a 2-tuple containing a dictionary that maps each path that was created, modified, or
+              moved into place to its type ("file" or "collection") and a set of the paths that
+              were deleted or moved away.  A collection path in either means that the change applies
+              to everything below it as well.
+    """
+    changed = OrderedDict()
+    removed = set()
+
+    def remove(path, tp):
+        changed.pop(path, None)
+        if tp != FILE:
+            pfx = path + '/'
+            for p in [p for p in changed if p.startswith(pfx)]:
+                del changed[p]
+        removed.add(path)
+
+    def add(path, tp):
+        changed.pop(path, None)    # keep the order of the last change
+        changed[path] = tp or FILE
+        removed.discard(path)
+
+    for entry in changes:
+        if entry['op'] in (CREATED, MODIFIED):
+            add(entry['path'], entry.get('type'))
+        elif entry['op'] == DELETED:
+            remove(entry['path'], entry.get('type'))
+        elif entry['op'] == MOVED:
+            remove(entry['path'], entry.get('type'))
+            add(entry['dest'], entry.get('type'))
+
+    return changed, removed
+
+def watcher_status(rootdir: Union[str,Path]) -> Union[Mapping,None]:
+    """
+    return the status last reported by the :py:class:`SpaceWatcher` watching the given root directory,
+    or None if a watcher has never run there.  The status includes ``time``, the epoch time of the
+    report, ``inotify``, whether it is using inotify, and ``interval``, the maximum number of seconds
+    until the next report.
+    """
+    try:
+        return read_json(str(Path(rootdir) / HEARTBEAT_FILE))
+    except (FileNotFoundError, ValueError):
+        return None
+
+def is_watching(rootdir: Union[str,Path]) -> bool:
+    """
+    return True if a :py:class:`SpaceWatcher` is currently recording changes as they happen (i.e. via
+    inotify) to the spaces under the given root directory.  When this is not the case, the change
+    journals may not include the latest changes.
+    """
+    status = watcher_status(rootdir)
+    if not status or not status.get('inotify'):
+        return False
+    return time.time() - status.get('time', 0) < 2 * status.get('interval', DEF_HEARTBEAT_INTERVAL)
+
+# inotify event masks (see inotify(7))
+IN_MODIFY      = 0x00000002
+IN_CLOSE_WRITE = 0x00000008
+IN_MOVED_FROM  = 0x00000040
+IN_MOVED_TO    = 0x00000080
+IN_CREATE      = 0x00000100
+IN_DELETE      = 0x00000200
+IN_DELETE_SELF = 0x00000400
+IN_Q_OVERFLOW  = 0x00004000
+IN_IGNORED     = 0x00008000
+IN_ONLYDIR     = 0x01000000
+IN_DONT_FOLLOW = 0x02000000
+IN_ISDIR       = 0x40000000
+
+_UPLOADS_MASK = IN_CLOSE_WRITE | IN_CREATE | IN_DELETE | IN_MOVED_FROM | IN_MOVED_TO | \
+                IN_ONLYDIR | IN_DONT_FOLLOW
+_SPACES_MASK = IN_CREATE | IN_DELETE | IN_MOVED_FROM | IN_MOVED_TO | IN_ONLYDIR | IN_DONT_FOLLOW
+_evhdr = struct.Struct("iIII")
+
+_libc = None
+def _get_libc():
+    global _libc
+    if _libc is None:
+        libc = ctypes.CDLL(ctypes.util.find_library("c") or "libc.so.6", use_errno=True)
+        libc.inotify_init1.argtypes = [ctypes.c_int]
+        libc.inotify_add_watch.argtypes = [ctypes.c_int, ctypes.c_char_p, ctypes.c_uint32]
+        libc.inotify_rm_watch.argtypes = [ctypes.c_int, ctypes.c_int]
+        _libc = libc
+    return _libc
+
+def inotify_available() -> bool:
+    """
+    return True if the inotify API can be used on this platform
+    """
+    if not sys.platform.startswith("linux"):
+        return False
+    try:
+        return hasattr(_get_libc(), "inotify_init1")
+    except OSError:
+        return False
+
+class Inotify:
+    """
+    a minimal wrapper around the Linux inotify API
+    """
+
+    def __init__(self):
+        self._libc = _get_libc()
+        self.fd = self._libc.inotify_init1(os.O_NONBLOCK | os.O_CLOEXEC)
+        if self.fd < 0:
+            err = ctypes.get_errno()
+            raise OSError(err, "inotify_init1: " + os.strerror(err))
+
+    def add_watch(self, path: Union[str,Path], mask: int) -> int:
+        """
+        start watching a directory for the events selected by ``mask``
+        :return:  the watch descriptor
+        :raises OSError:  if the watch could not be added
+        """
+        wd = self._libc.inotify_add_watch(self.fd, os.fsencode(path), mask)
+        if wd < 0:
+            err = ctypes.get_errno()
+            raise OSError(err, "inotify_add_watch: " + os.strerror(err), str(path))
+        return wd
+
+    def rm_watch(self, wd: int):
+        """
+        stop watching the directory with the given watch descriptor
+        """
+        self._libc.inotify_rm_watch(self.fd, wd)
+
+    def read(self, timeout: float=None) -> List[Tuple[int,int,int,str]]:
+        """
+        return the events that are waiting to be read, waiting up to ``timeout`` seconds for some
+        to arrive.
+        :return:  a list of (wd, mask, cookie, name) tuples
+        """
+        if not select.select([self.fd], [], [], timeout)[0]:
+            return []
+        try:
+            data = os.read(self.fd, 256 * 1024)
+        except BlockingIOError:
+            return []
+
+        out = []
+        pos = 0
+        while pos < len(data):
+            wd, mask, cookie, length = _evhdr.unpack_from(data, pos)
+            pos += _evhdr.size
+            name = os.fsdecode(data[pos:pos+length].rstrip(b'\0'))
+            pos += length
+            out.append((wd, mask, cookie, name))
+        return out
+
+    def close(self):
+        if self.fd >= 0:
+            os.close(self.fd)
+            self.fd = -1
+
+class SpaceWatcher:
+    """
+    a long-running watcher that records the changes made to the files in the uploads folders of all
+    the spaces under the file manager's local storage root directory into each space's
+    :py:class:`ChangeJournal`.
+
+    Changes are learned from inotify events, when available.  In addition, the spaces are periodically
+    rescanned:  the files found are compared to a snapshot of the uploads folder (kept in the space's
+    system folder) to catch changes missed while the watcher was not running or when events were lost.
+    When inotify is not available, the periodic rescans alone are used to detect changes.
+
+    This class supports the following configuration parameters:
+
+    ``use_inotify``
+        (bool) _optional_.  if False, inotify will not be used, and changes will only be detected by
+        periodic rescans (default: True)
+    ``rescan_interval``
+        (float) _optional_.  the number of seconds between rescans of the spaces when inotify is in
+        use (default: 600)
+    ``poll_interval``
+        (float) _optional_.  the number of seconds between rescans of the spaces when inotify is not
+        in use (default: 30)
+    ``skip_patterns``
+        (list of str) _optional_.  regular expressions matching the names of files and folders whose
+        changes should not be recorded (default: names starting with ".")
+    ``journal_max_entries``
+        (int) _optional_.  the number of entries a journal may grow to before its oldest half is
+        discarded (default: 20000)
+    ``heartbeat_interval``
+        (float) _optional_.  the number of seconds between updates to the status file in the root
+        directory that indicates that the watcher is running (see :py:func:`is_watching`; default: 15)
+    """
+
+    def __init__(self, rootdir: Union[str,Path], config: Mapping=None, log: Logger=None):
+        """
+        create the watcher
+        :param str|Path rootdir:  the local storage root directory containing the spaces
+        :param dict      config:  the watcher configuration (see class documentation)
+        :param Logger       log:  the Logger to send messages to
+        """
+        if config is None:
+            config = {}
+        if not log:
+            log = logging.getLogger("file-manager").getChild("watcher")
+        self.root = Path(rootdir)
+        self.cfg = config
+        self.log = log
+        self.skipre = [re.compile(p) for p in self.cfg.get('skip_patterns', DEF_SKIP_PATTERNS)]
+        self.max_entries = self.cfg.get('journal_max_entries', DEF_MAX_ENTRIES)
+
+        self._inotify = None
+        if self.cfg.get('use_inotify', True):
+            if inotify_available():
+                try:
+                    self._inotify = Inotify()
+                except OSError as ex:
+                    self.log.warning("Unable to use inotify (%s); will poll for changes", str(ex))
+            else:
+                self.log.warning("inotify not available on this platform; will poll for changes")
+
+        self.rescan_interval = self.cfg.get('rescan_interval', DEF_RESCAN_INTERVAL)
+        if not self._inotify:
+            self.rescan_interval = self.cfg.get('poll_interval', DEF_POLL_INTERVAL)
+
+        self._lock = threading.RLock()
+        self._journals = {}
+        self._snapshots = {}
+        self._wds = {}        # watch descriptor -> (space id, path relative to uploads dir)
+        self._watched = {}    # (space id, path) -> watch descriptor
+        self.heartbeat_interval = self.cfg.get('heartbeat_interval', DEF_HEARTBEAT_INTERVAL)
+        self._overflowed = False
+        self._stopping = threading.Event()
+        self._thread = None
+
+    @property
+    def using_inotify(self) -> bool:
+        """
+        True if this watcher is learning of changes via inotify events
+        """
+        return self._inotify is not None
+
+    def uploads_dir(self, spaceid: str) -> Path:
+        return self.root / spaceid / spaceid
+
+    def system_dir(self, spaceid: str) -> Path:
+        return self.root / spaceid / (spaceid + "-sys")
+
+    def journal_for(self, spaceid: str) -> ChangeJournal:
+        """
+        return the change journal for the space with the given identifier
+        """
+        with self._lock:
+            if spaceid not in self._journals:
+                self._journals[spaceid] = ChangeJournal(self.system_dir(spaceid), self.max_entries)
+            return self._journals[spaceid]
+
+    def _skip(self, name):
+        return any(p.search(name) for p in self.skipre)
+
+    def _watch(self, spaceid, path, dirpath, mask=_UPLOADS_MASK):
+        if not self._inotify:
+            return
+        try:
+            wd = self._inotify.add_watch(dirpath, mask)
+        except FileNotFoundError:
+            return
+        except OSError as ex:
+            # probably the limit on the number of watches was reached; fall back to more frequent
+            # rescans
+            self.log.warning("Failed to watch %s (%s); relying on rescans", dirpath, str(ex))
+            self.rescan_interval = min(self.rescan_interval,
+                                       self.cfg.get('poll_interval', DEF_POLL_INTERVAL))
+            return
+        self._wds[wd] = (spaceid, path)
+        self._watched[(spaceid, path)] = wd
+
+    def _unwatch(self, spaceid, path):
+        # stop watching the folder at path and everything below it
+        pfx = (path + '/') if path else ''
+        for key in [k for k in self._watched if k[0] == spaceid and k[1] is not None and
+                                                (k[1] == path or k[1].startswith(pfx))]:
+            wd = self._watched.pop(key)
+            self._wds.pop(wd, None)
+            if self._inotify:
+                self._inotify.rm_watch(wd)
+
+    def _walk(self, spaceid, path='', watch=False):
+        # snapshot the contents of the given folder (relative to the uploads dir); each entry maps
+        # a path to [type, size, mtime_ns].  The folder itself is included (unless it is the uploads dir)
+        out = {}
+        top = self.uploads_dir(spaceid)
+        if path:
+            try:
+                st = os.stat(top / path, follow_symlinks=False)
+            except FileNotFoundError:
+                return out
+            out[path] = [COLLECTION, 0, st.st_mtime_ns]
+
+        dirs = [path]
+        while dirs:
+            dpath = dirs.pop()
+            if watch:
+                # watch before listing so that nothing added in between is missed
+                self._watch(spaceid, dpath, top / dpath)
+            try:
+                with os.scandir(top / dpath) as it:
+                    for ent in it:
+                        if self._skip(ent.name):
+                            continue
+                        epath = (dpath + '/' + ent.name) if dpath else ent.name
+                        try:
+                            if ent.is_dir(follow_symlinks=False):
+                                out[epath] = [COLLECTION, 0, ent.stat(follow_symlinks=False).st_mtime_ns]
+                                dirs.append(epath)
+                            else:
+                                st = ent.stat(follow_symlinks=False)
+                                out[epath] = [FILE, st.st_size, st.st_mtime_ns]
+                        except FileNotFoundError:
+                            pass
+            except (FileNotFoundError, NotADirectoryError):
+                pass
+        return out
+
+    @staticmethod
+    def _diff(old, new):
+        # return the changes that turn snapshot old into snapshot new.  Changes below a created or
+        # deleted folder are implied by the change to the folder and so are left out.
+        changes = []
+        created = set()
+        deleted = set()
+        def implied(path, folders):
+            parent = os.path.dirname(path)
+            return parent in folders
+
+        for path in sorted(set(old) | set(new)):
+            was = old.get(path)
+            now = new.get(path)
+            if was and now and was[0] != now[0]:
+                if not implied(path, deleted):
+                    changes.append((DELETED, path, was[0], None))
+                deleted.add(path)
+                was = None
+            if not was:
+                if not implied(path, created):
+                    changes.append((CREATED, path, now[0], None))
+                created.add(path)
+            elif not now:
+                if not implied(path, deleted):
+                    changes.append((DELETED, path, was[0], None))
+                deleted.add(path)
+            elif now[0] == FILE and now[1:] != was[1:]:
+                changes.append((MODIFIED, path, FILE, None))
+        return changes
+
+    def _load_snapshot(self, spaceid):
+        try:
+            return read_json(str(self.system_dir(spaceid) / SNAPSHOT_FILE))
+        except FileNotFoundError:
+            return None
+        except Exception as ex:
+            self.log.warning("%s: unable to read change snapshot: %s", spaceid, str(ex))
+            return None
+
+    def _save_snapshot(self, spaceid):
+        if not self.system_dir(spaceid).is_dir():
+            return
+        try:
+            write_json(self._snapshots[spaceid], str(self.system_dir(spaceid) / SNAPSHOT_FILE), indent=None)
+        except Exception as ex:
+            self.log.warning("%s: unable to save change snapshot: %s", spaceid, str(ex))
+
+    def _record(self, spaceid, changes):
+        if not changes:
+            return 0
+        try:
+            self.journal_for(spaceid).record_all(changes)
+        except OSError as ex:
+            self.log.error("%s: failed to record %d changes: %s", spaceid, len(changes), str(ex))
+            return 0
+        return len(changes)
+
+    def _init_space(self, spaceid):
+        # start tracking a space:  compare its contents to its last snapshot (if it exists), recording
+        # the differences, and start watching it.
+        if not self.uploads_dir(spaceid).is_dir():
+            return 0
+        snap = self._load_snapshot(spaceid)
+        self._watch(spaceid, None, self.root / spaceid, _SPACES_MASK)
+        current = self._walk(spaceid, watch=True)
+        self._snapshots[spaceid] = current
+        self._save_snapshot(spaceid)
+
+        if snap is None:
+            # changes made before now are unknown
+            self.log.debug("%s: starting change journal", spaceid)
+            return self._record(spaceid, [(RESCAN, '', COLLECTION, None)])
+        return self._record(spaceid, self._diff(snap, current))
+
+    def _drop_space(self, spaceid):
+        self._unwatch(spaceid, '')
+        wd = self._watched.pop((spaceid, None), None)
+        if wd is not None:
+            self._wds.pop(wd, None)
+            if self._inotify:
+                self._inotify.rm_watch(wd)
+        self._snapshots.pop(spaceid, None)
+        self._journals.pop(spaceid, None)
+
+    def _space_ids(self):
+        try:
+            return [d for d in os.listdir(self.root) if (self.root / d / d).is_dir()]
+        except FileNotFoundError:
+            return []
+
+    def rescan(self, spaceid: str=None) -> int:
+        """
+        compare the contents of a space's uploads folder to its snapshot and record any differences
+        into its journal.
+        :param str spaceid:  the identifier of the space to rescan; if None, all spaces found under
+                             the root directory are rescanned (and any new ones start to be tracked).
+        :return:  the number of changes recorded
+        """
+        with self._lock:
+            if spaceid:
+                spaces = [spaceid]
+            else:
+                if self._inotify and (None, None) not in self._watched:
+                    self._watch(None, None, self.root, _SPACES_MASK)
+                spaces = self._space_ids()
+                for gone in set(self._snapshots) - set(spaces):
+                    self._drop_space(gone)
+
+            count = 0
+            for spid in spaces:
+                if spid not in self._snapshots:
+                    count += self._init_space(spid)
+                    continue
+                current = self._walk(spid, watch=bool(self._inotify))
+                count += self._record(spid, self._diff(self._snapshots[spid], current))
+                self._snapshots[spid] = current
+                self._save_snapshot(spid)
+            return count
+
+    def process_events(self, timeout: float=0) -> int:
+        """
+        record the changes indicated by the inotify events that have arrived, waiting up to
+        ``timeout`` seconds for some to arrive.  This does nothing if inotify is not in use.
+        :return:  the number of changes recorded
+        """
+        if not self._inotify:
+            if timeout:
+                self._stopping.wait(timeout)
+            return 0
+
+        events = self._inotify.read(timeout)
+        if not events:
+            return 0
+
+        with self._lock:
+            changes = OrderedDict()
+            pending = OrderedDict()
+            self._handle_events(events, changes, pending)
+            if pending:
+                # the other half of a move may not have been read yet
+                self._handle_events(self._inotify.read(0.01), changes, pending)
+            for spid, path, tp in pending.values():
+                # moved out of the space
+                self._note_removed(spid, path, tp, changes)
+
+            if self._overflowed:
+                self._overflowed = False
+                self.log.warning("inotify event queue overflowed; rescanning all spaces")
+                return sum(self._record(s, self._coalesce(c)) for s, c in changes.items()) + self.rescan()
+
+            return sum(self._record(s, self._coalesce(c)) for s, c in changes.items())
+
+    def _handle_events(self, events, changes, pending):
+        for wd, mask, cookie, name in events:
+            if mask & IN_Q_OVERFLOW:
+                self._overflowed = True
+                continue
+            where = self._wds.get(wd)
+            if where is None:
+                continue
+            if mask & IN_IGNORED:
+                self._wds.pop(wd, None)
+                if self._watched.get(where) == wd:
+                    del self._watched[where]
+                continue
+
+            spid, dirpath = where
+            isdir = bool(mask & IN_ISDIR)
+            if spid is None:
+                # an event in the root directory:  a space may have been added or removed
+                if isdir and mask & (IN_CREATE | IN_MOVED_TO):
+                    self._watch(name, None, self.root / name, _SPACES_MASK)
+                    if name not in self._snapshots:
+                        self._init_space(name)
+                elif isdir and mask & (IN_DELETE | IN_MOVED_FROM) and name in self._snapshots:
+                    self._drop_space(name)
+                continue
+            if dirpath is None:
+                # an event in the space's directory:  look for the creation of the uploads folder
+                if name == spid and isdir and mask & (IN_CREATE | IN_MOVED_TO) and \
+                   spid not in self._snapshots:
+                    self._init_space(spid)
+                continue
+            if spid not in self._snapshots or self._skip(name):
+                continue
+
+            path = (dirpath + '/' + name) if dirpath else name
+            tp = COLLECTION if isdir else FILE
+            if mask & IN_MOVED_FROM:
+                pending[cookie] = (spid, path, tp)
+            elif mask & IN_MOVED_TO:
+                src = pending.pop(cookie, None)
+                if src and src[0] == spid:
+                    self._note_moved(spid, src[1], path, tp, changes)
+                else:
+                    if src:
+                        self._note_removed(*src, changes)
+                    self._note_created(spid, path, tp, changes)
+            elif mask & IN_CREATE:
+                self._note_created(spid, path, tp, changes)
+            elif mask & IN_CLOSE_WRITE:
+                self._note_modified(spid, path, changes)
+            elif mask & IN_DELETE:
+                self._note_removed(spid, path, tp, changes)
+
+    def _note_created(self, spid, path, tp, changes):
+        snap = self._snapshots[spid]
+        if tp == COLLECTION:
+            sub = self._walk(spid, path, watch=True)
+            if not sub:
+                return
+            snap.update(sub)
+        else:
+            try:
+                st = os.stat(self.uploads_dir(spid) / path, follow_symlinks=False)
+            except FileNotFoundError:
+                return
+            snap[path] = [FILE, st.st_size, st.st_mtime_ns]
+        changes.setdefault(spid, []).append((CREATED, path, tp, None))
+
+    def _note_modified(self, spid, path, changes):
+        snap = self._snapshots[spid]
+        try:
+            st = os.stat(self.uploads_dir(spid) / path, follow_symlinks=False)
+        except FileNotFoundError:
+            return
+        now = [FILE, st.st_size, st.st_mtime_ns]
+        if snap.get(path) == now:
+            return
+        snap[path] = now
+        changes.setdefault(spid, []).append((MODIFIED, path, FILE, None))
+
+    def _note_removed(self, spid, path, tp, changes):
+        snap = self._snapshots.get(spid)
+        if snap is None:
+            return
+        snap.pop(path, None)
+        if tp == COLLECTION:
+            pfx = path + '/'
+            for p in [p for p in snap if p.startswith(pfx)]:
+                del snap[p]
+            self._unwatch(spid, path)
+        changes.setdefault(spid, []).append((DELETED, path, tp, None))
+
+    def _note_moved(self, spid, src, dest, tp, changes):
+        snap = self._snapshots[spid]
+        if src in snap:
+            snap[dest] = snap.pop(src)
+        if tp == FILE:
+            # it may have changed before it was moved
+            try:
+                st = os.stat(self.uploads_dir(spid) / dest, follow_symlinks=False)
+                snap[dest] = [FILE, st.st_size, st.st_mtime_ns]
+            except FileNotFoundError:
+                pass
+        else:
+            # watches stay with the moved folders; update the paths they map to
+            spfx = src + '/'
+            for p in [p for p in snap if p.startswith(spfx)]:
+                snap[dest + p[len(src):]] = snap.pop(p)
+            for key in [k for k in self._watched if k[0] == spid and k[1] is not None and
+                                                    (k[1] == src or k[1].startswith(spfx))]:
+                wd = self._watched.pop(key)
+                newkey = (spid, dest + key[1][len(src):])
+                self._watched[newkey] = wd
+                self._wds[wd] = newkey
+        changes.setdefault(spid, []).append((MOVED, src, tp, dest))
+
+    @staticmethod
+    def _coalesce(changes):
+        # drop modifications to files already noted as created or modified in the same batch
+        out = []
+        fresh = set()
+        for change in changes:
+            op, path, tp, dest = change
+            if op == MODIFIED and path in fresh:
+                continue
+            if op in (CREATED, MODIFIED):
+                fresh.add(path)
+            elif op == MOVED:
+                fresh.discard(path)
+                fresh.add(dest)
+            else:
+                fresh.discard(path)
+            out.append(change)
+        return out
+
+    def heartbeat(self, running: bool=True):
+        """
+        update the status file that indicates whether this watcher is running
+        """
+        status = OrderedDict([
+            ("pid", os.getpid()),
+            ("inotify", self.using_inotify and running),
+            ("interval", self.heartbeat_interval),
+            ("time", time.time() if running else 0)
+        ])
+        try:
+            write_json(status, str(self.root / HEARTBEAT_FILE), indent=None)
+        except Exception as ex:
+            self.log.warning("Unable to update watcher status file: %s", str(ex))
+
+    def run(self):
+        """
+        watch the spaces until :py:meth:`stop` is called.  All spaces are rescanned at startup and
+        then every ``rescan_interval`` seconds.
+        """
+        self.rescan()
+        next_rescan = time.time() + self.rescan_interval
+        next_beat = 0
+        while not self._stopping.is_set():
+            try:
+                if time.time() >= next_beat:
+                    self.heartbeat()
+                    next_beat = time.time() + self.heartbeat_interval
+                self.process_events(max(0, min(1.0, next_rescan - time.time())))
+                if time.time() >= next_rescan:
+                    self.rescan()
+                    next_rescan = time.time() + self.rescan_interval
+            except Exception as ex:
+                self.log.exception("Unexpected error while watching spaces: %s", str(ex))
+                self._stopping.wait(1.0)
+
+        self.heartbeat(False)
+        with self._lock:
+            for spid in list(self._snapshots):
+                self._save_snapshot(spid)
+
+    def start(self):
+        """
+        start watching the spaces in a separate (daemon) thread
+        """
+        if self._thread and self._thread.is_alive():
+            return
+        self._stopping.clear()
+        self._thread = threading.Thread(target=self.run, name="space-watcher", daemon=True)
+        self._thread.start()
+
+    def stop(self, timeout: float=None):
+        """
+        stop watching the spaces, waiting for the watching thread (if running) to finish
+        """
+        self._stopping.set()
+        if self._thread:
+            self._thread.join(timeout)
+            self._thread = None
+
+    def close(self):
+        """
+        stop watching and release the inotify resources
+        """
+        self.stop()
+        if self._inotify:
+            self._inotify.close()
+            self._inotify = None
+        self._wds.clear()
+        self._watched.clear()
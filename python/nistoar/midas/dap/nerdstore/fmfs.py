@@ -4,7 +4,7 @@ file manager for the files that should be part of the resource.
 """
 import os
 from copy import deepcopy
-from collections import OrderedDict
+from collections import OrderedDict, deque
 from collections.abc import Mapping
 from json import JSONDecodeError
 
@@ -210,7 +210,7 @@ class FMFSFileComps(FSBasedFileComps):
                 self.last_scan_id = None
 
         try:
-            resp = self._fmcli.start_scan(self._res.id)
+            resp = self._fmcli.start_scan(self._res.id, "delta")
             if not isinstance(resp, Mapping):
                 self._res.log.error("Unexpected response from scan request: "+
                                     "not a JSON object (is URL correct?)")
@@ -271,9 +271,42 @@ class FMFSFileComps(FSBasedFileComps):
 
         return resp
 
+    def _index_components(self) -> Mapping:
+        # load the metadata for all components currently in the hierarchy, reading each one once
+        out = OrderedDict()
+        todo = deque(self._children.values())
+        while todo:
+            id = todo.popleft()
+            mdf = self._find_fmd_file(id)
+            if not mdf or id in out:
+                continue
+            fmd = self._read_file_md(mdf)
+            out[id] = fmd
+            if self._is_coll_mdfile(mdf):
+                todo.extend(fmd.get('__children', {}).values())
+        return out
+
+    def _update_file_from_scan(self, fmd: Mapping, entry: Mapping) -> bool:
+        # update file metadata with the scanned properties, returning True if anything changed
+        changed = False
+        if entry.get('size') is not None and fmd.get('size') != entry['size']:
+            fmd['size'] = entry['size']
+            changed = True
+        if entry.get('checksum') and fmd.get('checksum', {}).get('hash') != entry['checksum']:
+            fmd['checksum'] = OrderedDict([
+                ('hash', entry['checksum']),
+                ('algorithm', { '@type': "Thing", 'tag': SCAN_CHECKSUM_ALGORITHM })
+            ])
+            changed = True
+        if entry.get('etag') and fmd.get('__etag') != entry['etag']:
+            fmd['__etag'] = entry['etag']
+            changed = True
+        return changed
+
     def _update_files_from_scan(self, scanmd):
-        # consume the result of a file scanning to cache the organization of files locally
-        topchildren = []
+        # consume the result of a file scanning to cache the organization of files locally.
+        # Rather than updating each component in turn, this compares the scan with the current 
+        # components and then writes out only those that were added, moved, or changed.
 
         def new_folder_md(id, fpath):
             return OrderedDict([
@@ -348,15 +381,17 @@ class FMFSFileComps(FSBasedFileComps):
             raise RemoteStorageException(self._res.id + ": Retrieved scan data is too flawed " +
                                          "to process; file metadata not updated")
 
+        # index what we currently have
+        current = self._index_components()
+        bypath = dict((fmd.get('filepath'), id) for id, fmd in current.items())
+
         # Fold in implied folders, just in case
-        reqfolders = set([p for p in reqfolders
-                            if p not in [f['path'] for f in scfolders.values()]])
+        reqfolders -= set(f['path'] for f in scfolders.values())
         if reqfolders:
             # should not happen if the scan is complete
             for fpath in reqfolders:
-                try:
-                    id = self._find_fmd_id_by_path(fpath)
-                except ObjectNotFound:
+                id = bypath.get(fpath)
+                if not id or id in scfiles or id in scfolders:
                     id = self._new_id()
                 scfolders[id] = {
                     "fileid": id,
@@ -364,70 +399,102 @@ class FMFSFileComps(FSBasedFileComps):
                     "resource_type": "collection"
                 }
 
-        # Remove existing file metadata for files/folders not refered to in the scan
-        deleted = []
-        for id in self.iter_ids():
-            fmd = self._get_file_by_id(id)
-            if self.is_collection(fmd):
-                if id not in scfolders:
-                    deleted.append(id)
-            elif id not in scfiles:
-                deleted.append(id)
-        len(deleted)
-        for id in deleted:
-            self.delete_file(id)
-
-        missing = []
-        
-        # Create or update the folders in order of top to bottom
+        # Determine the existing components that are not in the scan (or that changed type)
+        removed = [id for id, fmd in current.items()
+                      if id not in (scfolders if self.is_collection(fmd) else scfiles)]
+        gone = set(removed)
+
+        # Determine what's new, moved, or changed
+        final = OrderedDict()   # the metadata for all components after the update
+        dirty = set()           # the ids of the components that must be written out
+        added = moved = changed = 0
         for entry in sorted(scfolders.values(), key=lambda e: e['path']):
-            if not self.exists(entry['fileid']):
-                fmd = new_folder_md(entry['fileid'], entry['path'])
-            else:
-                fmd = self._get_file_by_id(entry['fileid'])
+            id = entry['fileid']
+            fmd = current.get(id)
+            if not fmd or id in gone:
+                fmd = new_folder_md(id, entry['path'])
+                dirty.add(id)
+                added += 1
+            elif fmd.get('filepath') != entry['path']:
                 fmd['filepath'] = entry['path']
+                dirty.add(id)
+                moved += 1
+            final[id] = fmd
 
-            # save to disk
-            try:
-                self.set_file_at(fmd)
-            except ObjectNotFound as ex:
-                missing.append(ex.key)
-
-        # Create or update any the files (in alphabetical order)
         for entry in sorted(scfiles.values(), key=lambda e: e['path']):
-            if 'size' in entry and isinstance(entry['size'], str):
+            if isinstance(entry.get('size'), str):
                 try:
                     entry['size'] = int(entry['size'])
-                    total_size += entry['size']
                 except ValueError:
                     self._res.log.warning("%s: scanned size is not an integer: %s",
-                                          fmd['filepath'], entry['size'])
-
-            if not self.exists(entry['fileid']):
-                fmd = new_file_md(entry['fileid'], entry['path'], entry.get('size'), entry.get('checksum'))
+                                          entry['path'], entry['size'])
+                    entry['size'] = None
+            if isinstance(entry.get('size'), int):
+                total_size += entry['size']
+
+            id = entry['fileid']
+            fmd = current.get(id)
+            if not fmd or id in gone:
+                fmd = new_file_md(id, entry['path'], entry.get('size'), entry.get('checksum'))
+                if entry.get('etag'):
+                    fmd['__etag'] = entry['etag']
+                dirty.add(id)
+                added += 1
             else:
-                fmd = self._get_file_by_id(entry['fileid'])
-                fmd['filepath'] = entry['path']
-                if 'size' in entry and entry['size'] is not None:
-                    fmd['size'] = int(entry['size'])
-                if entry.get('checksum'):
-                    fmd['checksum'] = OrderedDict([
-                        ('hash', entry['checksum']),
-                        ('algorithm', { '@type': "Thing", 'tag': SCAN_CHECKSUM_ALGORITHM })
-                    ])
-
-            # save to disk
-            try:
-                self.set_file_at(fmd)
-            except ObjectNotFound as ex:
-                missing.append(ex.key)
-
-        if missing:
-            # should not happen
-            self._res.log.error("update scan: apparently missing %d folder%s (incl. %s)",
-                                len(missing), "s" if len(missing) > 1 else "", missing[0])
-            self._res.log.warning("File hierarchy may be incomplete")
-            raise RuntimeError("Failed add/update files due to missing folders")
+                if fmd.get('filepath') != entry['path']:
+                    fmd['filepath'] = entry['path']
+                    dirty.add(id)
+                    moved += 1
+                if self._update_file_from_scan(fmd, entry):
+                    dirty.add(id)
+                    changed += 1
+            final[id] = fmd
+
+        # Work out the new contents of each folder, preserving the existing order of members
+        folderids = dict((fmd['filepath'], id) for id, fmd in final.items() if id in scfolders)
+        members = OrderedDict([('', OrderedDict())] + [(id, OrderedDict()) for id in folderids.values()])
+        for pid in members:
+            oldmembers = self._children if not pid else current.get(pid, {}).get('__children', {})
+            pfx = (final[pid]['filepath'] + '/') if pid else ''
+            for name, id in oldmembers.items():
+                if id in final and final[id]['filepath'] == pfx + name:
+                    members[pid][name] = id
+        displaced = []
+        for id, fmd in final.items():
+            pid = folderids[self._dirname(fmd['filepath'])] if '/' in fmd['filepath'] else ''
+            name = self._basename(fmd['filepath'])
+            if members[pid].get(name) != id:
+                if name in members[pid]:
+                    # two components scanned with the same path; the last one wins
+                    displaced.append(members[pid][name])
+                members[pid][name] = id
+        for pid, children in members.items():
+            if not pid:
+                continue
+            if list(children.items()) != list(final[pid].get('__children', {}).items()):
+                final[pid]['__children'] = children
+                dirty.add(pid)
+
+        # Now apply the changes:  new and updated components first, then the top of the hierarchy,
+        # and finally, delete the components that are no longer referenced.
+        for id in final:
+            if id in dirty and id not in displaced:
+                self._reserve_id(id)
+                self._cache_file_md(final[id])
+        if list(members[''].items()) != list(self._children.items()):
+            self._children = members['']
+            self._cache_children()
+        for id in removed:
+            mdf = self._fmd_file(id, self.is_collection(current[id]))
+            if mdf.exists():
+                mdf.unlink()
+        for id in displaced:
+            mdf = self._fmd_file(id, id in scfolders)
+            if mdf.exists():
+                mdf.unlink()
+
+        self._res.log.debug("scan update: %d added, %d moved, %d changed, %d removed",
+                            added, moved, changed, len(removed))
 
         if scanmd.get("is_complete"):
             try:
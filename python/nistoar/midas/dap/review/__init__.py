@@ -10,7 +10,13 @@ are implemented in :py:class:`~nistoar.pdr.utils.validate.ValidationIssue` insta
     widget for making the needed change.
   * the first value in the ``comments`` array is a user-oriented suggestion about what the user should
     do. (In contrast, the ``specification`` value is expected to be a more pendantic statement.)
+
+As the DAPTool polls for review results after each edit, the :py:class:`DAPNERDmReviewValidator` 
+remembers the results of its tests for each record and only re-runs those whose inputs have changed; 
+:py:func:`get_nerdm_review_validator` provides a process-wide instance so that these results are 
+shared across requests.
 """
+import json, threading
 from typing import List
 from collections.abc import Mapping
 
@@ -59,15 +65,39 @@ class DAPReviewer(Validator):
         return out
 
     @classmethod
-    def create_reviewer(cls, nrdstore: NERDResourceStorage=None, config: Mapping={}):
+    def create_reviewer(cls, nrdstore: NERDResourceStorage=None, config: Mapping={},
+                        shared: bool=False):
         """
         create a reviewer with the standard DAP validators built in.
+        :param NERDResourceStorage nrdstore:  the storage to retrieve NERDm records from
+        :param Mapping config:  the review configuration
+        :param bool    shared:  if True, the process-wide NERDm review validator for the given 
+                                configuration is used (see :py:func:`get_nerdm_review_validator`)
         """
         nrdvals = []
         if nrdstore:
-            nrdvals = [ DAPNERDmReviewValidator(config) ]
+            nrdvals = [ get_nerdm_review_validator(config) if shared
+                        else DAPNERDmReviewValidator(config) ]
 
         dapvals = []
 
         return cls(dapvals, nrdstore, nrdvals)
-        
+
+_shared_nerdmvals = {}
+_shared_lock = threading.Lock()
+
+def get_nerdm_review_validator(config: Mapping=None) -> DAPNERDmReviewValidator:
+    """
+    return a process-wide shared :py:class:`DAPNERDmReviewValidator` for the given configuration.
+    The first call for a particular configuration creates the validator; subsequent calls return
+    the same instance, along with the test results it has cached.
+    """
+    if config is None:
+        config = {}
+    key = json.dumps(config, sort_keys=True, default=str)
+    with _shared_lock:
+        out = _shared_nerdmvals.get(key)
+        if not out:
+            out = DAPNERDmReviewValidator(config)
+            _shared_nerdmvals[key] = out
+    return out
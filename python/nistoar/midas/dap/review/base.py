@@ -4,10 +4,11 @@ Base definitions and implementations for review tests and infrastructure
 This module reuses the testing infrastructure from :py:mod:`nistoar.pdr.preserve.bagit.validate`.
 """
 from nistoar.pdr.utils.validate import (
-    Validator, ValidatorBase, ValidationResults, ValidationIssue, AggregatedValidator,
+    Validator, ValidatorBase, ValidationResults, ValidationTest, ValidationIssue, AggregatedValidator,
     REQ, WARN, REC, ALL, PROB
 )
 
-__all__ = [ "Validator", "ValidatorBase", "ValidationResults", "ValidationIssue", "AggregatedValidator",
+__all__ = [ "Validator", "ValidatorBase", "ValidationResults", "ValidationTest", "ValidationIssue",
+            "AggregatedValidator",
             "ERROR", "WARN", "REC", "ALL", "PROB" ]
 
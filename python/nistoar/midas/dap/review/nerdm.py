@@ -1,10 +1,11 @@
 """
 NERDm tests for the minimum required elements
 """
-import re
+import re, hashlib, logging, threading
+from collections import OrderedDict
 from collections.abc import Mapping
 
-from .base import ValidatorBase, ValidationResults, ALL, REC, REQ, WARN
+from .base import ValidatorBase, ValidationResults, ValidationTest, ALL, REC, REQ, WARN
 from nistoar.nerdm import utils as nrdutils
 
 NIST_TAXONOMY_URI="https://data.nist.gov/od/dm/nist-themes/"
@@ -13,6 +14,18 @@ GITHUB_BASE_URL = "https://github.com/"
 NIST_GITLAB_BASE_URL = "https://gitlab.nist.gov/doesnotexist/"
 NIST_DOWNLOAD_BASE_URL = "https://data.nist.gov/od/ds/"
 NIST_LANDING_BASE_URL = "https://data.nist.gov/od/id/"
+DEF_REVIEW_CACHE_SIZE = 200
+
+# the functions that extract each section of a NERDm record that review tests examine.  The
+# components are divided into the "files" and "links" sections by _section_hashes().
+SECTIONS = {
+    "resource":    lambda nerd: (nerd.get("@type"), nerd.get("landingPage")),
+    "title":       lambda nerd: nerd.get("title"),
+    "description": lambda nerd: nerd.get("description"),
+    "keywords":    lambda nerd: nerd.get("keyword"),
+    "topics":      lambda nerd: nerd.get("topic"),
+    "authors":     lambda nerd: nerd.get("authors")
+}
 
 class DAPNERDmReviewValidator(ValidatorBase):
     """
@@ -41,12 +54,117 @@ class DAPNERDmReviewValidator(ValidatorBase):
     """
     profile = ("NERDm-DAP-Review", "0.7")
 
+    # the record sections (see SECTIONS and _section_hashes()) examined by each test.  The results
+    # of a test are reused while its sections and the review metadata are unchanged.  A test not
+    # listed here is always run.
+    sections_examined = {
+        "test_title":        ("title",),
+        "test_description":  ("description", "authors"),
+        "test_keywords":     ("keywords",),
+        "test_topics":       ("topics",),
+        "test_has_software": ("resource", "files", "links"),
+        "test_has_data":     ("resource", "files", "links"),
+        "test_author":       ("authors",),
+        "test_files":        ("files",),
+        "test_links":        ("links",)
+    }
+
     def __init__(self, config=None):
+        """
+        initialize the validator.  In addition to the parameters supported by 
+        :py:class:`~nistoar.pdr.utils.validate.ValidatorBase`, this validator supports 
+        ``review_cache_size``, the maximum number of records whose test results are remembered
+        (default: 200); set it to 0 to disable caching.
+        """
         super(DAPNERDmReviewValidator, self).__init__(config)
+        self._cachesize = self.cfg.get("review_cache_size", DEF_REVIEW_CACHE_SIZE)
+        self._cache = OrderedDict()
+        self._lock = threading.Lock()
 
     def _target_name(self, nerd):
         return nerd.get("@id", "mds:unkn")
 
+    def _section_hashes(self, nerd):
+        out = dict((name, hashlib.sha1(repr(get(nerd)).encode('utf-8')).hexdigest())
+                   for name, get in SECTIONS.items())
+
+        # a record can have thousands of components, so visit each only once
+        files = hashlib.sha1()
+        links = hashlib.sha1()
+        for cmp in nerd.get("components", []):
+            rep = repr(cmp).encode('utf-8')
+            isfile = nrdutils.is_type(cmp, "DataFile")
+            if isfile:
+                files.update(rep)
+            if not isfile or cmp.get("accessURL"):
+                links.update(rep)
+        out["files"] = files.hexdigest()
+        out["links"] = links.hexdigest()
+        return out
+
+    def validate(self, target, want=ALL, results: ValidationResults=None,
+                 targetname: str=None, **kw):
+        """
+        apply the review tests to the given NERDm record.  The results of each test are cached by 
+        record so that a test is only re-run if the sections of the record it examines (or the 
+        review metadata) have changed since the record was last reviewed.
+        """
+        if not targetname:
+            targetname = self._target_name(target)
+
+        out = results
+        if not out:
+            out = ValidationResults(targetname, want)
+
+        if self._cachesize <= 0:
+            return super(DAPNERDmReviewValidator, self).validate(target, want, out, targetname, **kw)
+
+        with self._lock:
+            prev = self._cache.pop(targetname, {})
+        done = {}
+        hashes = self._section_hashes(target)
+        metakey = repr(sorted(kw.items()))
+        for test in self.the_test_methods():
+            key = None
+            if test in self.sections_examined:
+                key = (want, metakey) + tuple(hashes[s] for s in self.sections_examined[test])
+
+            if key is not None and test in prev and prev[test][0] == key:
+                issues = prev[test][1]
+            else:
+                part = ValidationResults(targetname, want)
+                try:
+                    getattr(self, test)(target, want, part, **kw)
+                except Exception as ex:
+                    logging.getLogger("Validator").exception(str(ex))
+                    part._add_applied(ValidationTest(self.profile[0], self.profile[1],
+                                                     f"{test} execution failure", REQ),
+                                      False, f"test method, {test}, raised an exception: {str(ex)}")
+                    key = None
+                issues = part.applied()
+
+            if key is not None:
+                done[test] = (key, issues)
+            for issue in issues:
+                out.results[issue.type].append(issue)
+
+        with self._lock:
+            self._cache[targetname] = done
+            while len(self._cache) > self._cachesize:
+                self._cache.popitem(last=False)
+
+        return out
+
+    def forget(self, targetname: str=None):
+        """
+        discard the cached test results for the given record or, if not given, for all records
+        """
+        with self._lock:
+            if targetname:
+                self._cache.pop(targetname, None)
+            else:
+                self._cache.clear()
+
     def _test_prop_exists(self, prop: str, id: str, md: Mapping, out: ValidationResults,
                           desc: str=None, instruct: str=None, issuetype=REQ):
         """
@@ -252,6 +252,10 @@ class DAPService(ProjectService):
     ``auto_publish``
         (*bool*) __optional__.  If True and an external review is not required, the record will be 
         immediately published upon submission.  
+    ``review``
+        (*dict*) __optional__.  the configuration for the completeness review of a record (see
+        :py:class:`~nistoar.midas.dap.review.nerdm.DAPNERDmReviewValidator`).  Review results are
+        cached across requests by a process-wide validator for each distinct configuration.
 
     Note that the DOI is not yet registered with DataCite; it is only internally reserved and included
     in the record NERDm data.  
@@ -303,7 +307,7 @@ class DAPService(ProjectService):
         if self.cfg.get('validate_nerdm', True):
             if not self._schemadir:
                 raise ConfigurationException("'validate_nerdm' is set but cannot find schema dir")
-            self._valid8r = validate.create_lenient_validator(self._schemadir, "_")
+            self._valid8r = validate.get_lenient_validator(self._schemadir, "_")
 
         self._legitcolls = self.cfg.get("available_collections", {})
         if not isinstance(self._legitcolls, Mapping) or \
@@ -321,6 +325,7 @@ class DAPService(ProjectService):
 
         self._taxondir = self.cfg.get('taxonomy_dir', os.path.join(def_etc_dir, "schemas"))
         self._taxcache = None
+        self._reviewer = None
 #        if 'auto_publish' not in self.cfg:
 #            self.cfg['auto_publish'] = False
 
@@ -1062,11 +1067,14 @@ class DAPService(ProjectService):
             except InvalidUpdate as ex:
                 errors.extend(ex.errors)
 
-        # handle resource-level data: merge the new data into the old and validate the result
+        # handle resource-level data: merge the new data into the old and validate the result.
+        # The authors, references, and components were merged and validated above (item by item), 
+        # and replace_res_data() only stores the resource-level properties, so only those are 
+        # merged here.
         if replace:
             oldresdata = self._new_data_for(prec.id, prec.meta, newdata.get("_schema"))
         else:
-            oldresdata = nerd.get_data(False)
+            oldresdata = nerd.get_res_data()
 
         # merge and validate the resource-level data
         try:
@@ -1797,14 +1805,18 @@ class DAPService(ProjectService):
                 elif cmp.get("filepath") and nerd.files.exists(cmp["filepath"]):
                     oldcmp = nerd.files.get(cmp['filepath'])
 
+            changed = True
             if oldcmp:
+                orig = deepcopy(oldcmp)
                 cmp = self._merge_into(cmp, oldcmp)
+                changed = cmp != orig
             elif cmp.get("@id"):
                 cmp = deepcopy(cmp)
                 del cmp["@id"]
 
             try:
-                files[i] = self._moderate_file(cmp, doval)
+                # an unchanged description was already validated when it was saved
+                files[i] = self._moderate_file(cmp, doval and changed)
             except InvalidUpdate as ex:
                 errors.extend(ex.errors)
             
@@ -1827,13 +1839,17 @@ class DAPService(ProjectService):
                 except (KeyError, nerdstore.ObjectNotFound):
                     pass
 
+            changed = True
             if olditem:
+                orig = deepcopy(olditem)
                 item = self._merge_into(item, olditem)
+                changed = item != orig
             elif item.get("@id"):
                 item = deepcopy(item)
                 del item["@id"]
-                
-            return moderate_func(item, doval)
+
+            # an unchanged item was already validated when it was saved
+            return moderate_func(item, doval and changed)
 
         out = []
         errors = []
@@ -1917,8 +1933,9 @@ class DAPService(ProjectService):
                                  record given by `id`.  
         """
         prec = self.get_record(id)   # may raise exceptions
-        reviewer = DAPReviewer.create_reviewer(self._store, self.cfg.get("review",{}))
-        return reviewer.validate(prec, want)
+        if not self._reviewer:
+            self._reviewer = DAPReviewer.create_reviewer(self._store, self.cfg.get("review",{}), True)
+        return self._reviewer.validate(prec, want)
 
     def validate_json(self, json, schemauri=None):
         """
@@ -1,7 +1,7 @@
 """
 validation utilities specialized for DAP editing
 """
-import re
+import re, os, threading
 
 from nistoar.nerdm.validate import *
 from nistoar.nerdm.constants import core_schema_base as CORE_SCHEMA_BASE
@@ -111,7 +111,45 @@ def create_lenient_validator(schemadir, forprefix="_"):
 
     return ejs.ExtValidator(loader, forprefix)
 
+class SharedValidator(object):
+    """
+    a wrapper around a validator (e.g. an ejsonschema.ExtValidator) that allows it to be safely
+    shared across threads.  The wrapped validator compiles and caches the validator for each schema
+    URI it encounters the first time it is used; sharing it means that this work is done only once 
+    for the life of the process.  
+    """
+    def __init__(self, validator):
+        self._val = validator
+        self._lock = threading.Lock()
+
+    def validate(self, *args, **kwargs):
+        """
+        validate a JSON instance.  All arguments are passed to the wrapped validator's validate()
+        function.
+        """
+        # the underlying jsonschema resolvers track $ref scopes as they validate, so calls 
+        # cannot be interleaved.
+        with self._lock:
+            return self._val.validate(*args, **kwargs)
+
+_shared_validators = {}
+_shared_lock = threading.Lock()
+
+def get_lenient_validator(schemadir, forprefix="_"):
+    """
+    return a process-wide shared, lenient validator for the NERDm schemas in the given 
+    directory (see :py:func:`create_lenient_validator`).  The first call for a particular
+    schema directory and metaproperty prefix creates the validator; subsequent calls return 
+    the same instance, so that schemas already loaded and compiled by it need not be again.
 
-    
-
-
+    :param str schemadir:  the directory where the NERDm schemas are cached
+    :param str forprefix:  the metaproperty prefix, "_" or "$"
+    :rtype: SharedValidator
+    """
+    key = (os.path.realpath(schemadir), forprefix)
+    with _shared_lock:
+        out = _shared_validators.get(key)
+        if not out:
+            out = SharedValidator(create_lenient_validator(schemadir, forprefix))
+            _shared_validators[key] = out
+    return out
@@ -0,0 +1,155 @@
+"""
+utilities for managing the provenance action log kept for each project record.
+
+As a record is edited, the :py:class:`~nistoar.midas.dbio.base.DBClient` appends a provenance
+:py:class:`~nistoar.pdr.utils.prov.Action` to the record's action log for each change; when the record
+is published (or its draft is abandoned), the log is closed out and archived into the record's history.
+Heavily edited records can accumulate thousands of fine-grained ``PATCH`` actions.  This module
+provides the functions used to keep the log manageable:
+
+  * :py:func:`compact_actions` merges runs of consecutive ``PATCH`` actions by the same agent into
+    a single action when the log is archived;
+  * :py:func:`pack_history` and :py:func:`unpack_history` compress an archived log for storage;
+  * :py:func:`log_size` summarizes the size of a list of actions.
+"""
+import json, zlib, base64
+from collections import OrderedDict
+from collections.abc import Mapping
+from copy import deepcopy
+from typing import List
+
+from nistoar.pdr.utils.prov import Action
+
+COMPRESSED_HISTORY_PROP = "compressed_history"
+
+def _kind(obj):
+    if obj is None:
+        return None
+    if isinstance(obj, Mapping):
+        return "object"
+    if isinstance(obj, (list, tuple)):
+        return "array"
+    return "value"
+
+def merge_objects(base, update):
+    """
+    return the combination of two action objects, where ``update`` was applied after ``base``.  Two
+    objects (dictionaries) are merged recursively, with the values from ``update`` taking precedence;
+    two arrays (e.g. JSON Patch operations) are concatenated; otherwise, ``update`` replaces ``base``.
+    """
+    if update is None:
+        return base
+    if base is None:
+        return deepcopy(update)
+    if isinstance(base, Mapping) and isinstance(update, Mapping):
+        out = OrderedDict(base)
+        for key, val in update.items():
+            if isinstance(out.get(key), Mapping) and isinstance(val, Mapping):
+                out[key] = merge_objects(out[key], val)
+            else:
+                out[key] = deepcopy(val)
+        return out
+    if isinstance(base, (list, tuple)) and isinstance(update, (list, tuple)):
+        return list(base) + list(update)
+    return deepcopy(update)
+
+def _mergeable(first: Mapping, act: Mapping, kind):
+    # return True if act can be merged into a run of PATCH actions starting with first
+    return act.get('type') == Action.PATCH and act.get('agent') is not None and \
+           act.get('subject') == first.get('subject') and act.get('agent') == first.get('agent') and \
+           (kind is None or _kind(act.get('object')) in (None, kind))
+
+def _merge_subaction(into: Action, sub: Action) -> Action:
+    obj = merge_objects(into.object, sub.object) if sub.type == Action.PATCH else sub.object
+    return Action(sub.type, sub.subject, sub.agent, sub.message, obj, sub.timestamp,
+                  into.subactions + sub.subactions)
+
+def merge_actions(actions: List[Mapping]) -> Mapping:
+    """
+    merge a list of ``PATCH`` actions (given in their dictionary form) applied to the same subject by
+    the same agent into a single ``PATCH`` action.  The merged action's object is the combination of
+    the objects of the given actions (see :py:func:`merge_objects`), and its subactions are those
+    of the given actions, with consecutive subactions of the same type on the same subject merged in
+    the same way.  Its message combines the distinct messages of the given actions, and its timestamp
+    is that of the last action.  The returned dictionary also includes a ``compacted`` property
+    giving the number of actions merged (``count``) and the timestamp of the first one (``since``).
+    """
+    if len(actions) < 2:
+        return actions[0] if actions else None
+
+    acts = [Action.from_dict(a) for a in actions]
+    obj = None
+    subacts = []
+    lastfor = {}     # subject -> index into subacts of the last subaction on it
+    messages = []
+    for act in acts:
+        obj = merge_objects(obj, act.object)
+        if act.message and act.message not in messages:
+            messages.append(act.message)
+        for sub in act.subactions:
+            i = lastfor.get(sub.subject)
+            if i is not None and subacts[i].type == sub.type:
+                subacts[i] = _merge_subaction(subacts[i], sub)
+            else:
+                lastfor[sub.subject] = len(subacts)
+                subacts.append(sub)
+
+    last = acts[-1]
+    merged = Action(Action.PATCH, last.subject, last.agent, "; ".join(messages) or None, obj,
+                    last.timestamp, subacts)
+    out = merged.to_dict()
+    out['compacted'] = OrderedDict([("count", len(acts)), ("since", acts[0].timestamp)])
+    return out
+
+def compact_actions(actions: List[Mapping]) -> List[Mapping]:
+    """
+    return a copy of a list of actions (in their dictionary form) in which each run of consecutive
+    ``PATCH`` actions applied to the same subject by the same agent is replaced by a single merged
+    action (see :py:func:`merge_actions`).  All other actions are returned unchanged and in order.
+    """
+    out = []
+    run = []
+    kind = None
+    for act in actions:
+        if run and not _mergeable(run[0], act, kind):
+            out.append(merge_actions(run))
+            run = []
+            kind = None
+        if act.get('type') == Action.PATCH and act.get('agent') is not None:
+            run.append(act)
+            kind = kind or _kind(act.get('object'))
+        else:
+            out.append(act)
+    if run:
+        out.append(merge_actions(run))
+    return out
+
+def pack_history(actions: List[Mapping]) -> str:
+    """
+    compress a list of actions into a string that can be stored in place of the list
+    """
+    return base64.b64encode(zlib.compress(json.dumps(actions).encode('utf-8'))).decode('ascii')
+
+def unpack_history(packed: str) -> List[Mapping]:
+    """
+    restore a list of actions compressed with :py:func:`pack_history`
+    """
+    return json.loads(zlib.decompress(base64.b64decode(packed)).decode('utf-8'),
+                      object_pairs_hook=OrderedDict)
+
+def expand_archive(archive: Mapping) -> Mapping:
+    """
+    return an archived action log (as saved to the history collection) with its ``history``
+    uncompressed, if necessary.  The given archive is returned as is if it is not compressed.
+    """
+    if COMPRESSED_HISTORY_PROP not in archive:
+        return archive
+    out = OrderedDict((k, v) for k, v in archive.items() if k != COMPRESSED_HISTORY_PROP)
+    out['history'] = unpack_history(archive[COMPRESSED_HISTORY_PROP])
+    return out
+
+def log_size(actions: List[Mapping]) -> int:
+    """
+    return the size in bytes of a list of actions when serialized as JSON
+    """
+    return sum(len(json.dumps(a)) for a in actions)
@@ -26,6 +26,7 @@ from nistoar.pdr.utils.prov import Action, Agent
 from .. import MIDASException
 from .status import RecordStatus
 from .notifier import DBIOClientNotifier
+from . import actlog, search
 from nistoar.pdr.utils.prov import ANONYMOUS_USER
 from nistoar.pdr.utils.validate import ValidationResults, ALL
 from nistoar.nsd.service import PeopleService, create_people_service
@@ -986,6 +987,18 @@ class DBClient(ABC):
          (List[str]) _optional_.  a list of strings representing the identifier prefixes--i.e.
          the _shoulders_--that can be used to create new group identifiers.  If not provided,
          the only allowed shoulder will be the default, ``grp0``.
+    ``action_log``
+         (dict) _optional_.  parameters controlling the provenance action log (see
+         :py:mod:`~nistoar.midas.dbio.actlog`):  ``batch_writes`` (bool), if True, causes actions
+         passed to :py:meth:`record_action` to be held until :py:meth:`flush_actions` (or
+         :py:meth:`free`) is called and then written together (default: False); ``compact``
+         (bool), if True, causes runs of consecutive ``PATCH`` actions by the same agent to be merged
+         into one when the log is archived (default: True); ``compress`` (bool), if True, causes
+         archived logs to be stored compressed (default: False).
+    ``search``
+         (dict) _optional_.  parameters controlling full-text searches via :py:meth:`search_records`,
+         including the parts of records that are searched and the facets that are counted (see
+         :py:mod:`~nistoar.midas.dbio.search`).
     """
 
     def __init__(self, config: Mapping, projcoll: str, nativeclient=None,
@@ -1017,6 +1030,9 @@ class DBClient(ABC):
         self._peopsvc = peopsvc
         self.notifier = notifier
 
+        self._actcfg = self._cfg.get('action_log', {})
+        self._actbuf = [] if self._actcfg.get('batch_writes') else None
+
     @property
     def project(self) -> str:
         """
@@ -1363,6 +1379,138 @@ class DBClient(ABC):
         """
         raise NotImplementedError()
 
+    def search_records(self, query: str = None, perm: Permissions = ACLs.OWN, page: int = 1,
+                       size: int = None, facets: List[str] = None, **constraints) -> search.SearchResults:
+        """
+        return a page of the project records that contain the words in a query string and for which
+        the user has at least one of the given permissions, ranked by relevance, along with facet
+        counts over all of the matched records.
+
+        The query is a space-delimited list of words, all of which must appear in the searched parts
+        of a record (see :py:mod:`~nistoar.midas.dbio.search`) for it to match; a word ending in ``*``
+        matches any word that starts with it.  If no query is given, all accessible records match,
+        ordered with the most recently modified first.
+
+        :param str    query:    the words to search for
+        :param str|[str] perm:  the permissions the user requires for the selected record.  For
+                                each record returned the user will have at least one of these
+                                permissions.
+        :param int     page:    the (1-based) number of the page of results to return
+        :param int     size:    the maximum number of records per page; if not given, the configured
+                                default is used
+        :param [str] facets:    the names of the facets to count; if not given, all configured facets
+                                are counted.
+        :param list _constraint_:  a constraint on a facet that will only match records having one
+                                of the given values for it.  The constraint name is the facet
+                                name with dots replaced by underscores (e.g. ``status_state``,
+                                ``owner``, or ``theme``); unrecognized constraints are ignored.
+        :return:  the page of results
+                  :rtype: SearchResults
+        :raises ValueError:  if ``page`` or ``size`` is not a positive integer
+        """
+        page, size = self._search_page(page, size)
+        words, prefixes = search.parse_query(query)
+        facets = self._search_facets_to_count(facets)
+        cnsts = self._search_constraints(constraints)
+        authorized = self._search_authorizer(perm)
+
+        idx = self._search_index()
+        matched = []
+        for id, score in idx.search(words, prefixes).items():
+            entry = idx.get(id)
+            if entry['deactivated'] or not authorized(entry):
+                continue
+            if any(not vals.intersection(entry['facets'].get(f, [])) for f, vals in cnsts.items()):
+                continue
+            matched.append((score, entry))
+        matched.sort(key=lambda m: (-m[0], -m[1]['modified'], m[1]['id']))
+
+        recs = []
+        scores = []
+        for score, entry in matched[(page-1)*size : page*size]:
+            rec = self._get_from_coll(self._projcoll, entry['id'])
+            if rec:
+                recs.append(ProjectRecord(self._projcoll, rec, self))
+                scores.append(score)
+
+        return search.SearchResults(recs, len(matched), page, size,
+                                    search.count_facets((m[1] for m in matched), facets), scores)
+
+    def reindex_search(self) -> int:
+        """
+        rebuild the search index for this client's project collection from the records currently
+        stored in it.  Normally, the index is kept current as records are saved; this is provided for
+        recovering from failures and for configuration changes to the searched fields.
+        :return:  the number of records indexed
+        """
+        return len(self._search_index())
+
+    def _search_index(self) -> search.SearchIndex:
+        """
+        return a :py:class:`~nistoar.midas.dbio.search.SearchIndex` over the records in this client's
+        project collection.  This implementation builds a new index from all of the records in the
+        collection; backends should override this to return an index that they keep up to date.
+        """
+        return search.SearchIndex(self._make_search_entry(rec)
+                                  for rec in self._select_from_coll(self._projcoll))
+
+    def _make_search_entry(self, recdata: Mapping) -> Mapping:
+        """
+        return the search index entry for the given project record data
+        """
+        scfg = self._cfg.get("search", {})
+        return search.make_entry(recdata, scfg.get("fields"), scfg.get("facets"))
+
+    def search_constraint_names(self) -> List[str]:
+        """
+        return the names of the facet constraints that :py:meth:`search_records` accepts as keyword
+        arguments for this client's configuration
+        """
+        return [search.constraint_name(f) for f in self._search_facet_paths()]
+
+    def _search_facet_paths(self) -> Mapping:
+        return self._cfg.get("search", {}).get("facets") or search.DEF_FACETS
+
+    def _search_page(self, page, size):
+        if size is None:
+            size = self._cfg.get("search", {}).get("page_size", search.DEF_PAGE_SIZE)
+        try:
+            page = int(page)
+            size = int(size)
+        except (TypeError, ValueError):
+            raise ValueError("search_records(): page and size must be integers")
+        if page < 1 or size < 1:
+            raise ValueError("search_records(): page and size must be positive integers")
+        return page, size
+
+    def _search_facets_to_count(self, facets: List[str] = None) -> List[str]:
+        available = self._search_facet_paths()
+        if facets is None:
+            return list(available.keys())
+        return [f for f in facets if f in available]
+
+    def _search_constraints(self, constraints: Mapping) -> Mapping:
+        # return the given facet constraints as a map of facet names to sets of allowed values
+        out = OrderedDict()
+        for facet in self._search_facet_paths():
+            vals = constraints.get(search.constraint_name(facet))
+            if not vals:
+                continue
+            if isinstance(vals, str):
+                vals = [vals]
+            out[facet] = set(str(v) for v in vals)
+        return out
+
+    def _search_authorizer(self, perm: Permissions):
+        # return a function that returns True if the user has one of the permissions on an indexed record
+        if isinstance(perm, str):
+            perm = [perm]
+        if Agent.ADMIN in self._who.groups or \
+           self.user_id in (self._cfg.get("superusers", []) + [AUTOADMIN]):
+            return lambda entry: True
+        idents = set([self.user_id] + list(self.user_groups))
+        return lambda entry: any(idents.intersection(entry['acls'].get(p, [])) for p in perm)
+
     def is_connected(self) -> bool:
         """
         return True if this client is currently connected to its underlying database
@@ -1500,7 +1648,20 @@ class DBClient(ABC):
         if not rec.authorized(ACLs.WRITE) and not rec.authorized(ACLs.PUBLISH):
             raise NotAuthorized(rec.id, "record action for id="+rec.id)
 
-        self._save_action_data(act.to_dict())
+        if self._actbuf is not None:
+            self._actbuf.append(act.to_dict())
+        else:
+            self._save_action_data(act.to_dict())
+
+    def flush_actions(self):
+        """
+        write out the actions held by :py:meth:`record_action` when the ``batch_writes`` parameter
+        of the ``action_log`` configuration is set.  This is called automatically by :py:meth:`free`
+        and before the action log is read.
+        """
+        if self._actbuf:
+            acts, self._actbuf = self._actbuf, []
+            self._save_actions_data(acts)
 
     @abstractmethod
     def _save_action_data(self, actdata: Mapping):
@@ -1509,6 +1670,15 @@ class DBClient(ABC):
         """
         raise NotImplementedError()
 
+    def _save_actions_data(self, actdata: List[Mapping]):
+        """
+        save the given list of action data, in order, to the action log collection.  This
+        implementation saves them one at a time; subclasses should override this to write them in
+        a single batch.
+        """
+        for act in actdata:
+            self._save_action_data(act)
+
     @abstractmethod
     def _select_actions_for(self, id: str) -> List[Mapping]:
         """
@@ -1543,9 +1713,12 @@ class DBClient(ABC):
             raise NotAuthorized(
                 self.user_id, "close record history for id="+rec.id)
 
+        self.flush_actions()
         history = self._select_actions_for(rec.id)
         if len(history) == 0 and cancel_if_empty:
             return
+        if self._actcfg.get('compact', True):
+            history = actlog.compact_actions(history)
         history.append(close_action.to_dict())
 
         # users with permission to read record can read the history, but only superusers
@@ -1569,11 +1742,35 @@ class DBClient(ABC):
             archive['close_action'] += ":%s" % str(close_action.object)
         archive.update(extra)
         archive['acls'] = acls
-        archive['history'] = history
+        if self._actcfg.get('compress', False):
+            archive[actlog.COMPRESSED_HISTORY_PROP] = actlog.pack_history(history)
+        else:
+            archive['history'] = history
 
         self._save_history(archive)
         self._delete_actions_for(rec.id)
 
+    def action_log_size(self, id: str) -> Mapping:
+        """
+        return a summary of the size of the provenance log kept for the identified record.  The
+        summary includes ``actions``, the number of actions in the record's open action log (i.e.
+        since it was last archived); ``bytes``, the size of those actions serialized as JSON;
+        ``archived``, the number of archived logs for the record; and ``archived_bytes``, the
+        size of those archived logs as stored.
+        :raises ObjectNotFound:  if the record does not exist
+        :raises NotAuthorized:   if the user does not have read permission on the record
+        """
+        self.get_record_for(id, ACLs.READ)     # may raise ObjectNotFound, NotAuthorized
+        self.flush_actions()
+        acts = self._select_actions_for(id)
+        out = OrderedDict([("id", id), ("actions", len(acts)), ("bytes", actlog.log_size(acts)),
+                           ("archived", 0), ("archived_bytes", 0)])
+        for hist in self._iter_history_for(id):
+            out['archived'] += 1
+            out['archived_bytes'] += actlog.log_size([hist.get(actlog.COMPRESSED_HISTORY_PROP,
+                                                               hist.get('history', []))])
+        return out
+
     @abstractmethod
     def _save_history(self, histrec):
         """
@@ -1619,6 +1816,7 @@ class DBClient(ABC):
         out = []
         for hist in self._iter_history_for(id):
             exists += 1
+            hist = actlog.expand_archive(hist)
             if hist.get('close_action', '').startswith('delete'):
                 continue
             if hist.get('acls'):
@@ -1654,9 +1852,10 @@ class DBClient(ABC):
 
         The client of this service can call this method when it is finished using it.  The implementation
         should *not* disable the service, making the instance unusable for further use; it should just free
-        up resources as possible.  This implementation does notthing.
+        up resources as possible.  This implementation writes out any actions held for batched writing
+        (see :py:meth:`flush_actions`).
         """
-        pass
+        self.flush_actions()
 
 
 class DBClientFactory(ABC):
@@ -1,20 +1,39 @@
 """
 An implementation of the dbio interface that persists data to files on disk.
 """
-import os, json
+import os, json, threading
 from pathlib import Path
 from copy import deepcopy
 from collections.abc import Mapping, MutableMapping, Set
+from collections import OrderedDict
 from typing import Iterator, List
-from . import base
+from . import base, search
 from .notifier import DBIOClientNotifier
 
-from nistoar.pdr.utils import read_json, write_json
+from nistoar.pdr.utils import read_json, write_json, recover_writes, LockedFile
 from nistoar.base.config import ConfigurationException, merge_config
 from nistoar.nsd.service import PeopleService, MongoPeopleService, create_people_service
 
 SUPPORTED_CONSTRAINTS = set("name id owner status_state".split())
 
+# the directory (below the database root) holding the search index journals
+SEARCH_DIR = "_search"
+
+# The search index for a collection is persisted as a journal file with one JSON object per line,
+# each giving a record's id and its index entry (or null if the record was deleted).  Saves append
+# to the journal; each process keeps the index in memory and replays only the lines appended since
+# it last looked.  The journal is rewritten (compacted) once it has many more lines than records.
+_search_cache = {}          # journal path -> _JournaledIndex
+_search_lock = threading.Lock()
+_MIN_COMPACT_LINES = 1000
+
+class _JournaledIndex:
+    def __init__(self, inode):
+        self.index = search.SearchIndex()
+        self.inode = inode
+        self.offset = 0
+        self.lines = 0
+
 class FSBasedDBClient(base.DBClient):
     """
     an implementation of DBClient in which the data is persisted to flat files on disk.
@@ -81,6 +100,9 @@ class FSBasedDBClient(base.DBClient):
             return
         for root, dirs, files in os.walk(collpath):
             for fn in files:
+                if fn.startswith('.'):
+                    # skip lock and temporary files
+                    continue
                 try:
                     rec = read_json(os.path.join(root, fn))
                 except ValueError:
@@ -104,6 +126,9 @@ class FSBasedDBClient(base.DBClient):
             return
         for root, dirs, files in os.walk(collpath):
             for fn in files:
+                if fn.startswith('.'):
+                    # skip lock and temporary files
+                    continue
                 try:
                     recf = os.path.join(root, fn)
                     rec = read_json(recf)
@@ -122,6 +147,7 @@ class FSBasedDBClient(base.DBClient):
         recpath = self._root / collname / (id+".json")
         if recpath.is_file():
             recpath.unlink()
+            self._journal_search_entry(collname, id, None)
             shldr, num = self._parse_id(id)
             if shldr:
                 self._try_push_recnum(shldr, num)
@@ -131,9 +157,92 @@ class FSBasedDBClient(base.DBClient):
     def _upsert(self, coll: str, recdata: Mapping) -> bool:
         self._ensure_collection(coll)
         try:
-            return self._write_rec(coll, recdata['id'], recdata)
+            out = self._write_rec(coll, recdata['id'], recdata)
         except KeyError:
             raise base.DBIOException("_upsert(): record is missing 'id' property")
+        self._journal_search_entry(coll, recdata['id'], recdata)
+        return out
+
+    def _search_journal_for(self, collname) -> Path:
+        return self._root / SEARCH_DIR / (collname+".lis")
+
+    def _journal_search_entry(self, collname, id, recdata):
+        # a collection's journal is created when it is first searched; until then, nothing is recorded
+        jpath = self._search_journal_for(collname)
+        if not jpath.exists():
+            return
+        entry = self._make_search_entry(recdata) if recdata is not None else None
+        try:
+            self._append_json_to_listfile({"id": id, "entry": entry}, jpath)
+        except Exception as ex:
+            raise base.DBIOException(id+": Unable to update search index: "+str(ex)) from ex
+
+    def _search_index(self) -> search.SearchIndex:
+        jpath = self._search_journal_for(self._projcoll)
+        with _search_lock:
+            if not jpath.exists():
+                return self._write_search_journal(jpath, super(FSBasedDBClient, self)._search_index())
+
+            st = jpath.stat()
+            cached = _search_cache.get(str(jpath))
+            if not cached or cached.inode != st.st_ino or st.st_size < cached.offset:
+                # new to this process or rewritten by another one
+                cached = _JournaledIndex(st.st_ino)
+                _search_cache[str(jpath)] = cached
+            self._replay_search_journal(jpath, cached)
+
+            if cached.lines > max(2 * len(cached.index), _MIN_COMPACT_LINES):
+                self._write_search_journal(jpath, cached.index)
+            return cached.index
+
+    def _replay_search_journal(self, jpath: Path, cached: _JournaledIndex):
+        with open(jpath, 'rb') as fd:
+            fd.seek(cached.offset)
+            for line in fd:
+                if not line.endswith(b"\n"):
+                    # partially written; pick it up next time
+                    break
+                cached.offset += len(line)
+                cached.lines += 1
+                try:
+                    upd = json.loads(line)
+                except ValueError:
+                    continue
+                if upd.get('entry'):
+                    cached.index.add(upd['entry'])
+                else:
+                    cached.index.remove(upd['id'])
+
+    def _write_search_journal(self, jpath: Path, idx: search.SearchIndex) -> search.SearchIndex:
+        # replace the journal with one line for each indexed record
+        jpath.parent.mkdir(parents=True, exist_ok=True)
+        tmp = jpath.with_name(jpath.name + ".tmp%d" % os.getpid())
+        try:
+            with open(tmp, 'w') as fd:
+                for entry in idx.entries():
+                    fd.write(json.dumps({"id": entry['id'], "entry": entry}))
+                    fd.write("\n")
+            os.replace(tmp, jpath)
+        except Exception as ex:
+            if tmp.exists():
+                tmp.unlink()
+            raise base.DBIOException(str(jpath)+": Unable to write search index: "+str(ex)) from ex
+
+        st = jpath.stat()
+        cached = _JournaledIndex(st.st_ino)
+        cached.index = idx
+        cached.offset = st.st_size
+        cached.lines = len(idx)
+        _search_cache[str(jpath)] = cached
+        return idx
+
+    def reindex_search(self) -> int:
+        jpath = self._search_journal_for(self._projcoll)
+        with _search_lock:
+            if jpath.exists():
+                jpath.unlink()
+            _search_cache.pop(str(jpath), None)
+        return len(self._search_index())
 
     def select_records(self, perm: base.Permissions=base.ACLs.OWN, **cnsts) -> Iterator[base.ProjectRecord]:
         if isinstance(perm, str):
@@ -146,6 +255,9 @@ class FSBasedDBClient(base.DBClient):
             return
         for root, dirs, files in os.walk(collpath):
             for fn in files:
+                if fn.startswith('.'):
+                    # skip lock and temporary files
+                    continue
                 try:
                     recf = os.path.join(root, fn)
                     rec = read_json(recf)
@@ -177,9 +289,26 @@ class FSBasedDBClient(base.DBClient):
                         yield rec
                         break
 
-    def adv_select_records(self, perm: base.Permissions = base.ACLs.OWN,
-                           **cst) -> Iterator[base.ProjectRecord]:
-        raise NotImplementedError()
+    def adv_select_records(self, filter: dict,
+                           perm: base.Permissions = base.ACLs.OWN) -> Iterator[base.ProjectRecord]:
+        if not base.DBClient.check_query_structure(filter):
+            raise SyntaxError('Wrong query format')
+        if isinstance(perm, str):
+            perm = [perm]
+        if isinstance(perm, (list, tuple)):
+            perm = set(perm)
+        try:
+            for rec in self._select_from_coll(self._projcoll):
+                rec = base.ProjectRecord(self._projcoll, rec, self)
+                for p in perm:
+                    if rec.authorized(p):
+                        if rec.searched(filter) == True:
+                            yield rec
+                        break
+        except base.DBIOException:
+            raise
+        except Exception as ex:
+            raise base.DBIOException("Failed while selecting records: " + str(ex), cause=ex)
 
     def _save_action_data(self, actdata: Mapping):
         self._ensure_collection(base.PROV_ACT_LOG)
@@ -191,19 +320,38 @@ class FSBasedDBClient(base.DBClient):
         except Exception as ex:
             raise base.DBIOException(actdata['subject']+": Unable to append action: "+str(ex)) from ex
 
+    def _save_actions_data(self, actdata: List[Mapping]):
+        self._ensure_collection(base.PROV_ACT_LOG)
+        bysubj = OrderedDict()
+        for act in actdata:
+            if not act.get('subject'):
+                raise ValueError("_save_actions_data(): Action is missing subject id")
+            bysubj.setdefault(act['subject'], []).append(act)
+
+        # one append per record's log
+        for subj, acts in bysubj.items():
+            recpath = self._root / base.PROV_ACT_LOG / (subj+".lis")
+            try:
+                self._append_jsons_to_listfile(acts, recpath)
+            except Exception as ex:
+                raise base.DBIOException(subj+": Unable to append actions: "+str(ex)) from ex
+
     # the action log list file contains one JSON object per line
     def _append_json_to_listfile(self, data: Mapping, outpath: Path):
+        return self._append_jsons_to_listfile([data], outpath)
+
+    def _append_jsons_to_listfile(self, data: List[Mapping], outpath: Path):
+        # the file is locked so that concurrent appends do not interleave
         exists = outpath.exists()
-        with open(outpath, 'a') as fd:
-            fd.write(json.dumps(data))
-            fd.write("\n")
+        with LockedFile(str(outpath), 'a') as fd:
+            fd.write("".join(json.dumps(d)+"\n" for d in data))
         return not exists
 
     # the action log list file contains one JSON object per line
     def _load_from_listfile(self, inpath: Path):
         if not inpath.exists():
             return []
-        with open(inpath) as fd:
+        with LockedFile(str(inpath)) as fd:
             return [json.loads(line.strip()) for line in fd]
                 
     def _select_actions_for(self, id: str) -> List[Mapping]:
@@ -283,6 +431,9 @@ class FSBasedDBClientFactory(base.DBClientFactory):
     ``db_root_dir``
          the root directory where the database's record files will be store below.  If not specified,
          this value must be provided to the constructor directly.  
+    ``recover_min_age``
+         the minimum age in seconds of the temporary files left by interrupted record writes that 
+         will be cleaned up when the factory is created (default: 60).  
     """
 
     def __init__(self, config: Mapping, dbroot: str = None):
@@ -306,6 +457,9 @@ class FSBasedDBClientFactory(base.DBClientFactory):
             raise base.DBIOException("FSBasedDBClientFactory: %s: does not exist as a directory" % dbroot)
         self._dbroot = dbroot
 
+        # clean up after any record writes interrupted by a previous crash
+        recover_writes(self._dbroot, True, self._cfg.get("recover_min_age", 60))
+
     def create_client(self, servicetype: str, config: Mapping = {}, foruser: str = base.ANONYMOUS):
         cfg = merge_config(config, deepcopy(self._cfg))
 
@@ -6,7 +6,7 @@ This is provided primarily for testing purposes
 from copy import deepcopy
 from collections.abc import Mapping, MutableMapping, Set
 from typing import Iterator, List,Sequence
-from . import base
+from . import base, search
 from .notifier import DBIOClientNotifier
 
 from nistoar.base.config import merge_config
@@ -14,6 +14,9 @@ from nistoar.nsd.service import PeopleService, MongoPeopleService, create_people
 
 SUPPORTED_CONSTRAINTS = set("name id owner status_state".split())
 
+# the key in the in-memory data store holding the search indexes, by collection name
+SEARCH_INDEXES = "search_indexes"
+
 class InMemoryDBClient(base.DBClient):
     """
     an in-memory DBClient implementation 
@@ -84,6 +87,9 @@ class InMemoryDBClient(base.DBClient):
     def _delete_from(self, collname, id):
         if collname in self._db and id in self._db[collname]:
             del self._db[collname][id]
+            idx = self._db.get(SEARCH_INDEXES, {}).get(collname)
+            if idx is not None:
+                idx.remove(id)
             shldr, num = self._parse_id(id)
             if shldr:
                 self._try_push_recnum(shldr, num)
@@ -95,8 +101,24 @@ class InMemoryDBClient(base.DBClient):
             self._db[coll] = {}
         exists = bool(self._db[coll].get(recdata['id']))
         self._db[coll][recdata['id']] = deepcopy(recdata)
+        idx = self._db.get(SEARCH_INDEXES, {}).get(coll)
+        if idx is not None:
+            idx.add(self._make_search_entry(recdata))
         return not exists
 
+    def _search_index(self) -> search.SearchIndex:
+        # a collection's index is created when it is first searched and is updated with each save
+        idxs = self._db.setdefault(SEARCH_INDEXES, {})
+        if self._projcoll not in idxs:
+            # indexing does not alter the records, so there is no need to copy them
+            idxs[self._projcoll] = search.SearchIndex(self._make_search_entry(rec)
+                                                      for rec in self._db.get(self._projcoll, {}).values())
+        return idxs[self._projcoll]
+
+    def reindex_search(self) -> int:
+        self._db.setdefault(SEARCH_INDEXES, {}).pop(self._projcoll, None)
+        return len(self._search_index())
+
     def select_records(self, perm: base.Permissions=base.ACLs.OWN, **cnsts) -> Iterator[base.ProjectRecord]:
         """
         return an iterator of project records for which the given user has at least one of the given 
@@ -144,11 +166,13 @@ class InMemoryDBClient(base.DBClient):
                 if not matched:
                     continue
                 
-            rec = base.ProjectRecord(self._projcoll, rec, self)
+            prec = base.ProjectRecord(self._projcoll, rec, self)
 
             for p in perm:
-                if rec.authorized(p):
-                    yield deepcopy(rec)
+                if prec.authorized(p):
+                    # copy only the record data; copying the ProjectRecord would also copy this client
+                    # (and with it, the entire database)
+                    yield base.ProjectRecord(self._projcoll, deepcopy(rec), self)
                     break
     
     def adv_select_records(self, filter:dict,
@@ -160,11 +184,11 @@ class InMemoryDBClient(base.DBClient):
                 if isinstance(perm, (list, tuple)):
                     perm = set(perm)
                 for rec in self._db[self._projcoll].values():
-                    rec = base.ProjectRecord(self._projcoll, rec, self)
+                    prec = base.ProjectRecord(self._projcoll, rec, self)
                     for p in perm:
-                        if(rec.authorized(p)):
-                            if (rec.searched(filter) == True):
-                                yield deepcopy(rec)
+                        if(prec.authorized(p)):
+                            if (prec.searched(filter) == True):
+                                yield base.ProjectRecord(self._projcoll, deepcopy(rec), self)
                                 break
             except Exception as ex:
                 raise base.DBIOException(
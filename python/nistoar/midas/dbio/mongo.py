@@ -4,25 +4,31 @@ An implementation of the dbio interface that uses a MongoDB database as it backe
 import re, time
 from copy import deepcopy
 from collections.abc import Mapping, MutableMapping, Set
+from collections import OrderedDict
 from typing import Iterator, List
-from . import base
+from . import base, search
 from .notifier import DBIOClientNotifier
 
-from pymongo import MongoClient, ASCENDING
+from pymongo import MongoClient, ASCENDING, DESCENDING, TEXT
 from pymongo.errors import OperationFailure
 
 from nistoar.base.config import ConfigurationException, merge_config
+from nistoar.pdr.utils.prov import Agent
 from nistoar.nsd.service import PeopleService, MongoPeopleService, create_people_service
 
 _dburl_re = re.compile(r"^mongodb://(\w+(:\S+)?@)?\w+(\.\w+)*(:\d+)?/\w+(\?\w.*)?$")
 SUPPORTED_CONSTRAINTS = set("name id owner status_state".split())
 
+# whether a text index could be set up on a collection, by (database URL, collection name)
+_text_indexed = {}
+
 class MongoDBClient(base.DBClient):
     """
     an implementation of DBClient using a MongoDB database as the backend store.
     """
     ACTION_LOG_COLL = base.PROV_ACT_LOG
     HISTORY_COLL = 'history'
+    SEARCH_INDEX_NAME = 'dbio_search'
 
     def __init__(self, dburl: str, config: Mapping, projcoll: str, foruser: str = base.ANONYMOUS,
                  peopsvc: PeopleService = None, notifier: DBIOClientNotifier = None):
@@ -73,9 +79,13 @@ class MongoDBClient(base.DBClient):
         """
         free up resources used by this client.  
 
-        This implementation calls :py:meth:`disconnect`.
+        This implementation writes out any actions held for batched writing and then calls
+        :py:meth:`disconnect`.
         """
-        self.disconnect()
+        try:
+            self.flush_actions()
+        finally:
+            self.disconnect()
 
     @property
     def native(self):
@@ -284,6 +294,138 @@ class MongoDBClient(base.DBClient):
         else:
             raise SyntaxError('Wrong query format')
 
+    def search_records(self, query: str = None, perm: base.Permissions = base.ACLs.OWN, page: int = 1,
+                       size: int = None, facets: List[str] = None, **constraints) -> search.SearchResults:
+        """
+        return a page of the project records that contain the words in a query string and for which
+        the user has at least one of the given permissions, ranked by relevance, along with facet
+        counts over all of the matched records.  (See :py:meth:`DBClient.search_records()
+        <nistoar.midas.dbio.base.DBClient.search_records>` for a description of the parameters.)
+
+        This implementation uses a MongoDB text index on the collection, creating it if necessary,
+        to match and rank the whole words in the query.  MongoDB text searches cannot match
+        prefixes, so each prefix (``*``) word is instead matched with a case-insensitive regular
+        expression anchored at a word boundary, applied to each searched property.  A regular
+        expression cannot use an index, so such a query makes the server scan the records that
+        pass the other conditions; records matched only by prefixes are given a score of zero.
+        If the text index cannot be created (e.g. because the collection already has a different
+        text index), whole words are matched with regular expressions in the same way, and the
+        matches are ordered by modification time rather than relevance.
+        """
+        words, prefixes = search.parse_query(query)
+        page, size = self._search_page(page, size)
+        facets = self._search_facets_to_count(facets)
+        paths = self._search_facet_paths()
+
+        cnsts = []
+        acls = self._search_acl_constraints(perm)
+        if acls:
+            cnsts.append(acls)
+        filter = {"deactivated": None}
+        for facet, vals in self._search_constraints(constraints).items():
+            filter[paths[facet]] = {"$in": list(vals)}
+
+        textsearch = bool(words) and self._ensure_text_index()
+        if not textsearch:
+            cnsts.extend(self._search_regex_constraint(w) for w in words)
+        cnsts.extend(self._search_regex_constraint(p, True) for p in prefixes)
+        if cnsts:
+            filter["$and"] = cnsts
+
+        proj = {'_id': False}
+        sort = [("status.modified", DESCENDING), ("id", ASCENDING)]
+        if textsearch:
+            # quoting each word requires all of them to match
+            filter["$text"] = {"$search": " ".join('"%s"' % w for w in words)}
+            proj["_score"] = {"$meta": "textScore"}
+            sort.insert(0, ("_score", {"$meta": "textScore"}))
+
+        try:
+            coll = self.native[self._projcoll]
+            total = coll.count_documents(filter)
+            recs = []
+            scores = []
+            for rec in coll.find(filter, proj).sort(sort).skip((page-1)*size).limit(size):
+                scores.append(rec.pop("_score", 0.0))
+                recs.append(base.ProjectRecord(self._projcoll, rec, self))
+
+            counts = OrderedDict((f, OrderedDict()) for f in facets)
+            if facets and total > 0:
+                pipeline = [{"$match": filter}, {"$facet": OrderedDict(
+                    ("f%d" % i, [{"$unwind": "$"+paths[f]},
+                                 {"$group": {"_id": "$"+paths[f], "count": {"$sum": 1}}},
+                                 {"$sort": {"count": -1, "_id": 1}}])
+                    for i, f in enumerate(facets)
+                )}]
+                for res in coll.aggregate(pipeline):
+                    for i, f in enumerate(facets):
+                        for c in res.get("f%d" % i, []):
+                            if c['_id'] is not None:
+                                counts[f][str(c['_id'])] = c['count']
+
+        except Exception as ex:
+            raise base.DBIOException("Failed while searching records: " + str(ex), cause=ex)
+
+        return search.SearchResults(recs, total, page, size, counts, scores)
+
+    def reindex_search(self) -> int:
+        """
+        rebuild the text index used for searching this client's project collection
+        """
+        _text_indexed.pop((self._dburl, self._projcoll), None)
+        try:
+            self.native[self._projcoll].drop_index(self.SEARCH_INDEX_NAME)
+        except OperationFailure:
+            # did not exist
+            pass
+        self._ensure_text_index()
+        try:
+            return self.native[self._projcoll].count_documents({"deactivated": None})
+        except Exception as ex:
+            raise base.DBIOException("Failed to count records: " + str(ex), cause=ex)
+
+    def _ensure_text_index(self) -> bool:
+        # make sure the collection has the text index used for searching; return False if that is
+        # not possible
+        key = (self._dburl, self._projcoll)
+        if key not in _text_indexed:
+            fields = self._cfg.get("search", {}).get("fields") or search.DEF_SEARCH_FIELDS
+            weights = OrderedDict()
+            for field in fields.values():
+                for path in field.get("paths", []):
+                    # MongoDB indexes array elements implicitly
+                    weights.setdefault(path.replace("[]", ""), max(1, int(field.get("weight", 1))))
+            try:
+                self.native[self._projcoll].create_index([(p, TEXT) for p in weights],
+                                                         weights=weights, default_language="none",
+                                                         name=self.SEARCH_INDEX_NAME)
+                _text_indexed[key] = True
+            except OperationFailure as ex:
+                _text_indexed[key] = False
+        return _text_indexed[key]
+
+    def _search_regex_constraint(self, word: str, prefix: bool = False) -> Mapping:
+        # return a condition matching records where any searched property contains the given word
+        # (or, if prefix is True, a word starting with it)
+        fields = self._cfg.get("search", {}).get("fields") or search.DEF_SEARCH_FIELDS
+        paths = []
+        for field in fields.values():
+            for path in field.get("paths", []):
+                path = path.replace("[]", "")
+                if path not in paths:
+                    paths.append(path)
+        regex = r"\b" + re.escape(word) + ("" if prefix else r"\b")
+        return {"$or": [{p: {"$regex": regex, "$options": "i"}} for p in paths]}
+
+    def _search_acl_constraints(self, perm: base.Permissions) -> Mapping:
+        if isinstance(perm, str):
+            perm = [perm]
+        if Agent.ADMIN in self._who.groups or \
+           self.user_id in (self._cfg.get("superusers", []) + [base.AUTOADMIN]):
+            return None
+        idents = [self.user_id] + list(self.user_groups)
+        return {"$or": [{"acls."+p: {"$in": idents}} for p in perm]}
+
     def _save_action_data(self, actdata: Mapping):
         try:
             coll = self.native[self.ACTION_LOG_COLL]
@@ -296,6 +438,15 @@ class MongoDBClient(base.DBClient):
             raise base.DBIOException(actdata.get('subject',"id=?")+
                                      ": Failed to save action: "+str(ex)) from ex
 
+    def _save_actions_data(self, actdata: List[Mapping]):
+        if not actdata:
+            return
+        try:
+            coll = self.native[self.ACTION_LOG_COLL]
+            coll.insert_many(actdata, ordered=True)
+        except Exception as ex:
+            raise base.DBIOException("Failed to save %d actions: %s" % (len(actdata), str(ex))) from ex
+
     def _select_actions_for(self, id: str) -> List[Mapping]:
         try:
             coll = self.native[self.ACTION_LOG_COLL]
@@ -1476,6 +1476,11 @@ class ProjectService(MIDASSystem):
         up resources as possible.  This implementation calls the ``free()`` function on the underlying 
         :py:class:`~nistoar.midas.dbio.base.DBClient` instance.
         """
+        # like _record_action(), this is tolerant of recording errors
+        try:
+            self.dbcli.flush_actions()
+        except Exception as ex:
+            self.log.error("Failed to record batched provenance actions: %s", str(ex))
         self.dbcli.free()
 
     def _publish(self, prec: ProjectRecord, version: str = None, revsummary: str = None):
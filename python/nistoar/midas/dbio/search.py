@@ -0,0 +1,328 @@
+"""
+support for full-text searching and faceting of the records in a DBIO project collection.
+
+A search matches words given in a query string against the words found in selected parts of the
+project records--by default, their titles, descriptions, keywords, author names, contact
+information, topics, and file names--and returns the matching records that the user is authorized
+to see, ranked by relevance and a page at a time (see
+:py:meth:`~nistoar.midas.dbio.base.DBClient.search_records`).  Along with the page of records, a
+search returns _facet_ counts:  for each of a set of properties (by default, ``status.state``,
+``owner``, and ``theme``), the number of matching records having each value of the property.
+
+This module provides the local implementation of search used by the in-memory and file-based
+backends:  a :py:class:`SearchIndex` is an inverted index over the words in a collection's records,
+which the backends keep up to date as records are saved and deleted.  The MongoDB backend uses a
+MongoDB text index instead when one is available.
+
+The parts of records that are searched and the facets that are counted can be configured via the
+``search`` configuration parameter of the :py:class:`~nistoar.midas.dbio.base.DBClient`:
+
+``fields``
+     (dict) _optional_.  the parts of the records to search, where each key is a name for the
+     part and its value is a dictionary with ``paths`` (a list of dot-delimited paths to record
+     properties, where ``[]`` after a property name means each element of its array value) and
+     ``weight`` (a number that scales the relevance of matches found in that part).  The default
+     is given by :py:data:`DEF_SEARCH_FIELDS`.
+``facets``
+     (dict) _optional_.  the facets to count, where each key is the facet name and its value is
+     the dot-delimited path to the record property to count values of.  The default is given by
+     :py:data:`DEF_FACETS`.
+``page_size``
+     (int) _optional_.  the number of records to return per page if not specified by the caller
+     (default: 25).
+"""
+import re, math
+from collections import OrderedDict
+from functools import lru_cache
+from collections.abc import Mapping
+from typing import Iterable, Iterator, List, Tuple, Union
+
+DEF_SEARCH_FIELDS = OrderedDict([
+    ("title",       {"paths": ["name", "data.title"], "weight": 5}),
+    ("keywords",    {"paths": ["data.keywords", "data.keyword"], "weight": 3}),
+    ("authors",     {"paths": ["data.authors[].fn", "data.authors[].givenName", "data.authors[].familyName",
+                               "data.contributors[].firstName", "data.contributors[].lastName"],
+                     "weight": 3}),
+    ("contact",     {"paths": ["data.contactPoint.fn", "data.contactPoint.hasEmail",
+                               "data.primary_NIST_contact.firstName", "data.primary_NIST_contact.lastName"],
+                     "weight": 2}),
+    ("topics",      {"paths": ["data.theme"], "weight": 2}),
+    ("files",       {"paths": ["data.components[].filepath", "data.components[].title"], "weight": 1}),
+    ("description", {"paths": ["data.description", "data.projectDescription", "data.dataDescription"],
+                     "weight": 1})
+])
+
+DEF_FACETS = OrderedDict([
+    ("status.state", "status.state"),
+    ("owner",        "owner"),
+    ("theme",        "data.theme")
+])
+
+DEF_PAGE_SIZE = 25
+
+# BM25 ranking parameters
+_K1 = 1.2
+_B = 0.75
+
+_word_re = re.compile(r"\w+")
+STOP_WORDS = frozenset(("a an and are as at be by for from in is it of on or that the this to with " +
+                        "mailto").split())
+
+def tokenize(text: str) -> List[str]:
+    """
+    split the given text into the lower-cased words that get indexed, dropping single characters
+    and common words that are not worth searching for.
+    """
+    return [w for w in _word_re.findall(text.lower()) if len(w) > 1 and w not in STOP_WORDS]
+
+def parse_query(query: str) -> Tuple[List[str], List[str]]:
+    """
+    parse a query string into the words that must match exactly and the words that must match
+    the start of a word (which are those given in the query with a trailing ``*``).
+    :return: a pair of lists, the exact words and the prefixes
+    """
+    words = []
+    prefixes = []
+    for tok in (query or "").split():
+        isprefix = tok.endswith("*")
+        toks = tokenize(tok)
+        if isprefix and toks:
+            prefixes.append(toks.pop())
+        words.extend(toks)
+    return words, prefixes
+
+@lru_cache(maxsize=256)
+def _parse_path(path: str) -> Tuple[Tuple[str, bool], ...]:
+    # split a path into (property name, step into each element) pairs
+    return tuple((p[:-2], True) if p.endswith("[]") else (p, False) for p in path.split('.'))
+
+def values_at(rec: Mapping, path: str) -> List:
+    """
+    return the values found at a dot-delimited path into a record.  A property name followed by
+    ``[]`` steps into each element of the array value of that property.  A value that is itself
+    an array contributes each of its elements.
+    """
+    # records are JSON data, so checking for dicts and lists suffices
+    vals = [rec]
+    for prop, each in _parse_path(path):
+        nxt = []
+        for val in vals:
+            if not isinstance(val, dict):
+                continue
+            val = val.get(prop)
+            if val is None:
+                continue
+            if each and isinstance(val, (list, tuple)):
+                nxt.extend(val)
+            else:
+                nxt.append(val)
+        vals = nxt
+        if not vals:
+            return vals
+    out = []
+    for val in vals:
+        if isinstance(val, (list, tuple)):
+            out.extend(v for v in val if v is not None and not isinstance(v, (dict, list, tuple)))
+        elif not isinstance(val, dict):
+            out.append(val)
+    return out
+
+def make_entry(rec: Mapping, fields: Mapping = None, facets: Mapping = None) -> Mapping:
+    """
+    extract the data needed to index a project record:  its weighted word counts, its facet values,
+    and the data needed to determine who is authorized to see it.
+    :param Mapping rec:     the project record data (as stored in the database)
+    :param Mapping fields:  the parts of the record to index (see :py:data:`DEF_SEARCH_FIELDS`)
+    :param Mapping facets:  the facets to extract (see :py:data:`DEF_FACETS`)
+    """
+    if fields is None:
+        fields = DEF_SEARCH_FIELDS
+    if facets is None:
+        facets = DEF_FACETS
+
+    terms = {}
+    for field in fields.values():
+        weight = field.get("weight", 1)
+        for path in field.get("paths", []):
+            for val in values_at(rec, path):
+                for word in tokenize(str(val)):
+                    terms[word] = terms.get(word, 0) + weight
+
+    return {
+        "id": rec['id'],
+        "owner": rec.get('owner', ""),
+        "acls": dict((p, list(ids)) for p, ids in rec.get('acls', {}).items()),
+        "deactivated": bool(rec.get('deactivated')),
+        "modified": (rec.get('status') or {}).get('modified', 0) or 0,
+        "facets": dict((name, [str(v) for v in values_at(rec, path)]) for name, path in facets.items()),
+        "terms": terms
+    }
+
+def constraint_name(facet: str) -> str:
+    """
+    return the name of the keyword argument to
+    :py:meth:`~nistoar.midas.dbio.base.DBClient.search_records` that constrains the given facet
+    (e.g. ``status_state`` for ``status.state``)
+    """
+    return facet.replace('.', '_')
+
+
+class SearchIndex:
+    """
+    an inverted index over the words appearing in a collection of project records.
+
+    The index holds an entry (see :py:func:`make_entry`) for each record in the collection;
+    :py:meth:`add` and :py:meth:`remove` keep it current as records change.  :py:meth:`search`
+    returns the identifiers of the records that contain all of a set of words, with relevance
+    scores computed with the BM25 ranking function.
+    """
+
+    def __init__(self, entries: Iterable[Mapping] = None):
+        self._entries = {}
+        self._lengths = {}
+        self._postings = {}
+        self._totlen = 0
+        if entries:
+            for entry in entries:
+                self.add(entry)
+
+    def __len__(self):
+        return len(self._entries)
+
+    def __contains__(self, id):
+        return id in self._entries
+
+    def add(self, entry: Mapping):
+        """
+        add or replace the entry for a record
+        """
+        self.remove(entry['id'])
+        self._entries[entry['id']] = entry
+        for word, tf in entry['terms'].items():
+            self._postings.setdefault(word, {})[entry['id']] = tf
+        self._lengths[entry['id']] = sum(entry['terms'].values())
+        self._totlen += self._lengths[entry['id']]
+
+    def remove(self, id: str):
+        """
+        remove the entry for a record; nothing happens if the record is not indexed
+        """
+        entry = self._entries.pop(id, None)
+        if not entry:
+            return
+        for word in entry['terms']:
+            posting = self._postings.get(word)
+            if posting is not None:
+                posting.pop(id, None)
+                if not posting:
+                    del self._postings[word]
+        self._totlen -= self._lengths.pop(id, 0)
+
+    def get(self, id: str) -> Mapping:
+        """
+        return the entry for the record with the given identifier or None if it is not indexed
+        """
+        return self._entries.get(id)
+
+    def entries(self) -> Iterator[Mapping]:
+        """
+        iterate through the entries for all of the indexed records
+        """
+        return iter(self._entries.values())
+
+    def _docs_with_prefix(self, prefix: str) -> Mapping:
+        out = {}
+        for word, posting in self._postings.items():
+            if word.startswith(prefix):
+                for id, tf in posting.items():
+                    out[id] = out.get(id, 0) + tf
+        return out
+
+    def search(self, words: List[str], prefixes: List[str] = []) -> Mapping:
+        """
+        return the records that contain all of the given words and words starting with each of the
+        given prefixes, as a dictionary mapping record identifiers to relevance scores.  If no words
+        or prefixes are given, all records are returned with a score of zero.
+        """
+        if not words and not prefixes:
+            return dict((id, 0.0) for id in self._entries)
+
+        postings = [self._postings.get(w, {}) for w in words] + \
+                   [self._docs_with_prefix(p) for p in prefixes]
+        postings.sort(key=len)
+        if not postings[0]:
+            return {}
+
+        N = len(self._entries)
+        avglen = self._totlen / N if N else 1.0
+        scores = dict((id, 0.0) for id in postings[0])
+        for posting in postings:
+            idf = math.log(1.0 + (N - len(posting) + 0.5) / (len(posting) + 0.5))
+            for id in list(scores):
+                tf = posting.get(id)
+                if tf is None:
+                    del scores[id]
+                    continue
+                norm = 1 - _B + _B * self._lengths[id] / avglen
+                scores[id] += idf * tf * (_K1 + 1) / (tf + _K1 * norm)
+        return scores
+
+
+class SearchResults:
+    """
+    a page of the records matched by a search, along with the facet counts for all of the matched
+    records
+    """
+
+    def __init__(self, records: List, total: int, page: int, size: int,
+                 facets: Mapping = None, scores: List[float] = None):
+        """
+        :param list records:  the matched ProjectRecords on the requested page, in ranked order
+        :param int    total:  the total number of matched records across all pages
+        :param int     page:  the (1-based) number of the page returned
+        :param int     size:  the maximum number of records per page
+        :param dict  facets:  the facet counts, mapping each facet name to a dictionary of counts
+                              by facet value
+        :param list  scores:  the relevance scores for the records in ``records``
+        """
+        self.records = records
+        self.total = total
+        self.page = page
+        self.size = size
+        self.facets = facets or OrderedDict()
+        self.scores = scores if scores is not None else [0.0] * len(records)
+
+    @property
+    def pages(self) -> int:
+        """
+        the total number of pages of matched records
+        """
+        return (self.total + self.size - 1) // self.size if self.size > 0 else 0
+
+    def to_dict(self) -> Mapping:
+        """
+        return the results as a JSON-serializable dictionary
+        """
+        return OrderedDict([
+            ("total", self.total),
+            ("page", self.page),
+            ("size", self.size),
+            ("pages", self.pages),
+            ("facets", self.facets),
+            ("records", [dict(r.to_dict(), score=s) for r, s in zip(self.records, self.scores)])
+        ])
+
+def count_facets(entries: Iterable[Mapping], facets: Iterable[str]) -> Mapping:
+    """
+    count the values of each of the named facets across the given index entries
+    :return: a dictionary mapping each facet name to a dictionary of counts by value, in order
+             of decreasing count
+    """
+    counts = OrderedDict((f, {}) for f in facets)
+    for entry in entries:
+        for facet, byval in counts.items():
+            for val in set(entry['facets'].get(facet, [])):
+                byval[val] = byval.get(val, 0) + 1
+    for facet, byval in counts.items():
+        counts[facet] = OrderedDict(sorted(byval.items(), key=lambda c: (-c[1], c[0])))
+    return counts
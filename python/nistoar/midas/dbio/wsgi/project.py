@@ -17,6 +17,15 @@ are handled accordingly:
      responds to to project search queries to find project records matching search criteria (GET)
      as well as accepts requests to create new records (POST).
 
+``/:export`` -- :py:class:`ProjectSelectionHandler`
+     exports the records matching search criteria (GET, with query parameters) or identified in the
+     request body (POST).  The NDJSON, CSV, and zip formats are streamed to the client as the records
+     are read from the database (see :py:mod:`nistoar.midas.export.stream`).
+
+``/:search`` -- :py:class:`ProjectSelectionHandler`
+     returns a page of the records matching a full-text search, ranked by relevance, along with
+     facet counts over all of the matched records (GET; see :py:mod:`nistoar.midas.dbio.search`).
+
 ``/{projid}`` -- :py:class:`ProjectHandler`
      returns the full project record (GET) or deletes it (DELETE).
 
@@ -38,18 +47,42 @@ are handled accordingly:
 
 ``/{projid}/*`` -- :py:class`ProjectInfoHandler`
      returns other non-editable parts of the record via GET (including the ``meta`` property).
+
+Exports to PDF, CSV, and Markdown are rendered via :py:func:`nistoar.midas.export.export.run`, configured
+by the handler's ``export`` configuration object:
+
+``max_workers``
+     (int) _optional_.  the number of processes to render records with (default: 1, render within the
+     request's process).  Under uWSGI, values greater than 1 are ignored unless ``fork_under_uwsgi``
+     is also set (see below).
+``fork_under_uwsgi``
+     (bool) _optional_.  if True, allow a pool of rendering processes to be forked from a uWSGI worker
+     (default: False).  Forking from a uWSGI worker copies its sockets, locks, and open connections
+     (e.g. to MongoDB) into the children; this is only safe when uWSGI is run with ``lazy-apps``
+     enabled and the pool size is accounted for in the server's process limits.
+``spool_dir``
+     (str) _optional_.  a directory for intermediate PDFs rendered by parallel exports
+``template_cache_dir``
+     (str) _optional_.  a directory where compiled export templates are kept
 """
 from collections import OrderedDict
 from collections.abc import Mapping, Sequence, Callable
 from logging import Logger
 from typing import Iterator, List
 from urllib.parse import parse_qs
-import json, re
+import json, re, itertools
+
+try:
+    import uwsgi    # only importable when running inside a uWSGI server
+    _under_uwsgi = True
+except ImportError:
+    _under_uwsgi = False
 
 from nistoar.web.rest import ServiceApp, Handler, Agent
 from nistoar.web.formats import Format, FormatSupport, JSONSupport, TextSupport, UnsupportedFormat, Unacceptable
 from nistoar.pdr.utils.validate import ValidationResults
 from nistoar.midas.export.export import run as export_run
+from nistoar.midas.export.stream import stream_records, STREAM_FORMATS, DEF_CHUNK_SIZE
 from .base import DBIOHandler
 from .search_sorter import SortByPerm
 from ..fsbased import FSBasedDBClient
@@ -59,6 +92,35 @@ from ...dbio import ProjectRecord, ProjectService, ProjectServiceFactory
 __all__ = ["MIDASProjectHandler", "ProjectDataHandler"]
 SUPPORTED_FILTERS = set("perm name id owner status_state".split())
 
+class _StreamedBody:
+    """
+    a WSGI response body that delivers content from a generator and calls a given function to free
+    the resources it depends on once the response is complete.  The WSGI server calls :py:meth:`close`
+    whether or not the body was fully delivered.
+    """
+    def __init__(self, chunks: Iterator[bytes], free: Callable, log: Logger=None):
+        self._chunks = chunks
+        self._free = free
+        self._log = log
+
+    def __iter__(self):
+        try:
+            for chunk in self._chunks:
+                yield chunk
+        except Exception as ex:
+            if self._log:
+                self._log.exception("Export stream interrupted: %s", str(ex))
+            raise
+
+    def close(self):
+        try:
+            if hasattr(self._chunks, 'close'):
+                self._chunks.close()
+        finally:
+            if self._free:
+                self._free()
+                self._free = None
+
 class ProjectRecordHandler(DBIOHandler):
     """
     base handler class for all requests on project records.
@@ -127,12 +189,23 @@ class ProjectRecordHandler(DBIOHandler):
             # Detect record type for template selection
             template_name = self._determine_template_name(valid_records, format_type)
 
+            exportcfg = self.cfg.get('export', {})
+            max_workers = exportcfg.get('max_workers', 1)
+            if max_workers > 1 and _under_uwsgi and not exportcfg.get('fork_under_uwsgi', False):
+                # don't fork rendering processes from a uWSGI worker unless explicitly allowed
+                self.log.debug("Rendering export in-process under uWSGI (fork_under_uwsgi not set)")
+                max_workers = 1
             result = export_run(
                 input_data=valid_records,
                 output_format=format_type,
                 output_directory=None,
-                template_name=template_name
+                template_name=template_name,
+                max_workers=max_workers,
+                spool_dir=exportcfg.get('spool_dir'),
+                template_cache_dir=exportcfg.get('template_cache_dir')
             )
+            self.log.debug("Exported %d records as %s: %s", len(valid_records), format_type,
+                           ", ".join("%s=%.2fs" % t for t in result.get('timings', {}).items()))
 
             content = result.get('bytes', result.get('text'))
             if not content and result.get('path'):
@@ -650,10 +723,17 @@ class ProjectSelectionHandler(ProjectRecordHandler):
         super(ProjectSelectionHandler, self).__init__(service, svcapp, wsgienv, start_resp, who, iftype,
                                                       config, log)
         self._set_format_qp("format")
+        self._streaming = False
 
     def do_OPTIONS(self, path):
         return self.send_options(["GET", "POST"])
 
+    def free(self):
+        # a streamed response still needs the service after the handler returns; it is freed
+        # when the response is closed.
+        if not self._streaming:
+            super(ProjectSelectionHandler, self).free()
+
     def _select_records(self, perms, **constraints) -> Iterator[ProjectRecord]:
         """
         submit a search query in a project specific way.  This method is provided as a
@@ -683,26 +763,14 @@ class ProjectSelectionHandler(ProjectRecordHandler):
             sortd.add_record(rec)
         return [rec.to_dict() for rec in sortd.sorted()]
 
-    def do_GET(self, path, ashead=False, format=None):
+    def _query_filters(self):
         """
-        respond to a GET request, interpreted as a search for records accessible by the user
-        :param str path:  a path to the portion of the data to get.  This is the same as the `datapath`
-                          given to the handler constructor.  This will always be an empty string.
-        :param bool ashead:  if True, the request is actually a HEAD request for the data
+        extract the search constraints from the request's query parameters
+        :return:  a tuple giving the dictionary of all query parameters, the requested permissions,
+                  and the dictionary of the supported filter constraints
         """
-        # Set supported output formats
-        supp_fmts = FormatSupport()
-        JSONSupport.add_support(supp_fmts, ["text/json", "application/json"], asdefault=True)
-        supp_fmts.support(Format("pdf", "application/pdf"))
-        supp_fmts.support(Format("markdown", "text/markdown"), ["text/markdown", "text/plain"])
-        supp_fmts.support(Format("csv", "text/csv"))
-        self._set_default_format_support(supp_fmts)
-        
-        perms = []
         params = {}
         filters = {}
-        fmt = self.select_format(format)   # may raise UnsupportedFormat, Unacceptable
-        
         qstr = self._env.get('QUERY_STRING')
         if qstr:
             params = parse_qs(qstr)
@@ -719,6 +787,33 @@ class ProjectSelectionHandler(ProjectRecordHandler):
         if not perms:
             perms = dbio.ACLs.OWN
 
+        return params, perms, filters
+
+    def do_GET(self, path, ashead=False, format=None):
+        """
+        respond to a GET request, interpreted as a search for records accessible by the user
+        :param str path:  a path to the portion of the data to get.  This is the same as the `datapath`
+                          given to the handler constructor.  This is either an empty string,
+                          ":export" for a streamed export of the matched records, or ":search" for
+                          a full-text search.
+        :param bool ashead:  if True, the request is actually a HEAD request for the data
+        """
+        if path.strip('/') == ":export":
+            return self.export_queried_records(ashead)
+        if path.strip('/') == ":search":
+            return self.search_queried_records(ashead)
+
+        # Set supported output formats
+        supp_fmts = FormatSupport()
+        JSONSupport.add_support(supp_fmts, ["text/json", "application/json"], asdefault=True)
+        supp_fmts.support(Format("pdf", "application/pdf"))
+        supp_fmts.support(Format("markdown", "text/markdown"), ["text/markdown", "text/plain"])
+        supp_fmts.support(Format("csv", "text/csv"))
+        self._set_default_format_support(supp_fmts)
+        
+        fmt = self.select_format(format)   # may raise UnsupportedFormat, Unacceptable
+        params, perms, filters = self._query_filters()
+
         recs = self._sort_and_format_records(self._select_records(perms, **filters))
 
         # Handle empty results based on format
@@ -820,16 +915,36 @@ class ProjectSelectionHandler(ProjectRecordHandler):
     def export_selected_records(self, input: Mapping):
         """
         export records identified by IDs provided in the request body.
-        Expects: {"ids": ["id1", "id2", ...], "format": "json"|"pdf"|"csv"|"markdown"}
+        Expects: {"ids": ["id1", "id2", ...], "format": "json"|"pdf"|"csv"|"markdown"|"ndjson"|"zip"}
         When format is omitted or "json", returns the records as a JSON array.
+
+        The "ndjson" and "zip" formats--as well as "csv" when the input includes "columns" (a list of
+        dot-delimited paths to the record values to export) or "stream": true--are streamed to the
+        client (see :py:meth:`send_stream`).  For these, the records may alternatively be selected
+        with an advanced search "filter" (as for ``:selected``) in place of "ids".
         """
         ids = input.get("ids", [])
-        if not ids:
-            return self.send_error_resp(400, "Bad POST input", "No record IDs provided")
-
         fmt_name = (input.get("format") or "json").strip().lower()
         perms = input.get("permissions") or dbio.ACLs.OWN   # OWN=any of all perms
 
+        columns = input.get("columns")
+        if fmt_name in STREAM_FORMATS and (fmt_name != "csv" or columns or input.get("stream")):
+            if columns is not None and (not isinstance(columns, list) or
+                                        not all(isinstance(c, str) for c in columns)):
+                return self.send_error_resp(400, "Bad POST input", "columns must be a list of strings")
+            if ids:
+                recs = self._select_records(perms, id=ids)
+            elif input.get("filter"):
+                if not isinstance(perms, (list, tuple)):
+                    perms = [ perms ]
+                recs = self._adv_select_records(input["filter"], perms)
+            else:
+                return self.send_error_resp(400, "Bad POST input", "No record IDs or filter provided")
+            return self.send_stream(recs, fmt_name, columns)
+
+        if not ids:
+            return self.send_error_resp(400, "Bad POST input", "No record IDs provided")
+
         recs = self._sort_and_format_records(self._select_records(perms, id=ids))
         if not recs:
             return self.send_error_resp(400, "Cannot export empty result set",
@@ -845,10 +960,110 @@ class ProjectSelectionHandler(ProjectRecordHandler):
         fmt = supp_fmts.match(fmt_name)
         if not fmt:
             return self.send_error_resp(400, "Bad POST input",
-                                        "format must be one of: json, pdf, csv, markdown")
+                                        "format must be one of: json, pdf, csv, markdown, ndjson, zip")
 
         return self._format_records_as(recs, fmt)
 
+    def search_queried_records(self, ashead=False):
+        """
+        respond with a page of the records matching a full-text search given by query parameters:
+        ``q`` gives the words to search for, ``page`` and ``size`` select the page of results,
+        ``facets`` is a comma-separated list of the facets to count, and ``perm`` gives the
+        permissions required.  Parameters named for a facet (e.g. ``status_state``, ``owner``, or
+        ``theme``) constrain the values of that facet; any other parameters are ignored.
+        """
+        params = parse_qs(self._env.get('QUERY_STRING', ''))
+
+        def _list(name):
+            out = []
+            for v in params.get(name, []):
+                out.extend(p.strip() for p in v.split(',') if p.strip())
+            return out
+
+        perms = _list('perm') or dbio.ACLs.OWN
+        facets = _list('facets') if 'facets' in params else None
+        # other parameters are ignored unless they constrain a facet
+        cnsts = dict((k, _list(k)) for k in self._dbcli.search_constraint_names() if k in params)
+        try:
+            results = self._search_records(" ".join(params.get('q', [])), perms,
+                                           params.get('page', [1])[0], params.get('size', [None])[0],
+                                           facets, **cnsts)
+        except ValueError as ex:
+            return self.send_error_resp(400, "Bad search parameters", str(ex), ashead=ashead)
+
+        return self.send_json(results.to_dict(), ashead=ashead)
+
+    def _search_records(self, query, perms, page, size, facets, **constraints):
+        """
+        submit a full-text search in a project-specific way.  This method is provided as a hook to
+        subclasses that may need to specialize the search.  This implementation passes the query
+        directly to the generic DBClient instance.
+        :return:  the page of search results
+                  :rtype: nistoar.midas.dbio.search.SearchResults
+        """
+        return self._dbcli.search_records(query, perms, page, size, facets, **constraints)
+
+    def export_queried_records(self, ashead=False):
+        """
+        stream an export of the records matching the constraints given as query parameters (as for a
+        search via GET).  The ``format`` query parameter selects one of the streamed formats
+        (default: ndjson), and, for csv, ``columns`` gives a comma-separated list of the dot-delimited
+        paths to the record values to export.
+        """
+        params, perms, filters = self._query_filters()
+        fmt_name = (params.get('format') or ["ndjson"])[0].strip().lower()
+        if fmt_name not in STREAM_FORMATS:
+            return self.send_error_resp(400, "Unsupported export format",
+                                        "format must be one of: " + ", ".join(STREAM_FORMATS.keys()),
+                                        ashead=ashead)
+        columns = []
+        for v in params.get('columns', []):
+            columns.extend(c.strip() for c in v.split(',') if c.strip())
+
+        return self.send_stream(self._select_records(perms, **filters), fmt_name, columns or None,
+                                ashead=ashead)
+
+    def send_stream(self, records: Iterator[ProjectRecord], fmt_name: str, columns: List[str]=None,
+                    ashead=False):
+        """
+        send the given records to the client in one of the streamed export formats.  The records are
+        serialized as the server consumes the response, so the records need not fit into memory; the
+        database connection is kept open until the response is closed.
+
+        This handler's ``export`` configuration may include ``chunk_size``, the approximate number of
+        bytes to send at a time (default: 64 kB), and ``columns``, the default list of columns to export
+        to CSV.
+        :param Iterator records:  the records to export (typically, a database cursor)
+        :param str     fmt_name:  the export format, one of the keys of
+                                  :py:data:`~nistoar.midas.export.stream.STREAM_FORMATS`
+        :param list     columns:  for CSV, the dot-delimited paths to the record values to export
+        :param bool      ashead:  if True, send only the response header
+        """
+        exportcfg = self.cfg.get('export', {})
+        if not columns:
+            columns = exportcfg.get('columns')
+
+        # read the first record before committing to a response, so that a failed query can still
+        # be reported with an error status
+        records = iter(records)
+        try:
+            first = next(records, None)
+        except SyntaxError as ex:
+            return self.send_error_resp(400, "Wrong query structure for filter", str(ex), ashead=ashead)
+        if first is not None:
+            records = itertools.chain([first], records)
+
+        self.set_response(200, "OK")
+        self.add_header("Content-Type", STREAM_FORMATS[fmt_name])
+        self.add_header("Content-Disposition", 'attachment; filename="export.%s"' % fmt_name)
+        self.end_headers()
+        if ashead:
+            return []
+
+        chunks = stream_records(records, fmt_name, columns, exportcfg.get('chunk_size', DEF_CHUNK_SIZE))
+        self._streaming = True
+        return _StreamedBody(chunks, self.svc.free, self.log)
+
     def create_record(self, newdata: Mapping):
         """
         create a new record
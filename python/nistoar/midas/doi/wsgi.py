@@ -1,17 +1,21 @@
 """
 A RESTful web service that resolves a DOI to a NERDm reference
+
+Resolved DOIs are cached (see :py:class:`~nistoar.pdr.describe.doicache.CachingDOIResolver`), and 
+several DOIs can be resolved at once by POSTing a JSON array of DOIs to the "ref/" or "authors/"
+endpoint.
 """
-import logging, re
+import logging, re, json
 from logging import Logger
 from collections import OrderedDict
 from typing import List, Mapping, Callable
 
-from nistoar.nerdm.convert.doi import DOIResolver
 from nistoar.doi import DOIDoesNotExist, DOIClientException, DOIResolutionException
-from nistoar.web.rest import ServiceApp, Handler, HandlerWithJSON, Ready
+from nistoar.web.rest import ServiceApp, Handler, HandlerWithJSON, Ready, FatalError
 from nistoar.base.config import ConfigurationException
 from nistoar.nerdm.constants import BIB_SCHEMA_URI
 from nistoar.pdr.utils.prov import Agent
+from nistoar.pdr.describe.doicache import CachingDOIResolver
 from ..dbio.wsgi import DBIOHandler
 from .. import system
 
@@ -19,6 +23,7 @@ deflog = logging.getLogger(system.system_abbrev)   \
                 .getChild('doi').getChild('wsgi')
 
 DEF_BASE_PATH = '/'
+DEF_MAX_BATCH_SIZE = 200
 
 _doi_pat = re.compile("(doi:)?(10\.\d+/[^#\s]+)")
 _doi_baseurl_pat = re.compile("^https?://(dx\.)?doi\.org/")
@@ -27,7 +32,8 @@ class DOI2NERDmHandler(HandlerWithJSON):
     """
     the main handler for converting DOIs to NERDm metadata.  
 
-    It expects a path that starts with "ref/" or "authors/" (followed by a DOI).
+    It expects a path that starts with "ref/" or "authors/" (followed by a DOI).  A POST to
+    either of these (without a DOI) resolves the JSON array of DOIs given as input.
     """
     def __init__(self, doiresolver, path: str, wsgienv: dict, start_resp: Callable, who=None, 
                  log: Logger=None, config: Mapping={}, app=None):
@@ -51,16 +57,18 @@ class DOI2NERDmHandler(HandlerWithJSON):
             ref = self._doires.to_reference(doi)
             
         except DOIDoesNotExist as ex:
-            
-            ref = OrderedDict([
-                ("@id", "doi:"+doi),
-                ("_extensionSchemas",
-                 [ BIB_SCHEMA_URI+"#/definitions/DCiteReference" ]),
-                ("pdr:comment", "DOI does not exist yet")
-            ])
+            ref = self._missing_reference(doi)
 
         return self.send_json(ref, ashead=ashead)
 
+    def _missing_reference(self, doi):
+        return OrderedDict([
+            ("@id", "doi:"+doi),
+            ("_extensionSchemas",
+             [ BIB_SCHEMA_URI+"#/definitions/DCiteReference" ]),
+            ("pdr:comment", "DOI does not exist yet")
+        ])
+
     def send_authors(self, doi, ashead=False):
         """
         convert the given DOI to a list of NERDm authors (People objects) and send it to the client
@@ -135,16 +143,98 @@ class DOI2NERDmHandler(HandlerWithJSON):
                                        "Trouble accessing remote DOI resolver service",
                                        ashead=ashead)
 
+    def get_json_body(self):
+        try:
+            bodyin = self._env.get('wsgi.input')
+            if bodyin is None:
+                raise FatalError(400, "Missing input", "Missing expected input JSON data")
+            return json.load(bodyin, object_pairs_hook=OrderedDict)
+
+        except (ValueError, TypeError) as ex:
+            raise FatalError(400, "Input not parseable as JSON",
+                             "Input document is not parse-able as JSON: "+str(ex))
+
+    def _resolve_batch(self, dois, outtype):
+        if hasattr(self._doires, 'resolve_batch'):
+            return self._doires.resolve_batch(dois, outtype)
+
+        out = OrderedDict()
+        for doi in dois:
+            try:
+                out[doi] = self._doires.to_authors(doi) if outtype == "authors" \
+                           else self._doires.to_reference(doi)
+            except Exception as ex:
+                out[doi] = ex
+        return out
+
+    def do_POST(self, path):
+        """
+        Convert a list of DOIs to the requested NERDm objects.  The output is a JSON object that 
+        maps each of the input DOIs to its NERDm description.  As with GET, a DOI that does not 
+        exist is described with a placeholder reference (for ``ref``); for ``authors``, it, like any
+        DOI that could not be resolved due to an error, is mapped to null.  
+        """
+        if self.cfg.get('require_authenticated') and not self.authenticated():
+            return self.send_unauthorized()
+
+        outtype = path.strip('/')
+        if outtype not in ["ref", "authors"]:
+            return self.send_error_obj(405, "Method Not Allowed",
+                                       "POST request must be to a NERDm type, authors or ref")
+
+        try:
+            dois = self.get_json_body()
+        except FatalError as ex:
+            return self.send_fatal_error(ex)
+        if not isinstance(dois, list) or not all(isinstance(d, str) for d in dois):
+            return self.send_error_obj(400, "Bad Input", "Input must be a JSON array of DOIs")
+        if len(dois) > self.cfg.get('max_batch_size', DEF_MAX_BATCH_SIZE):
+            return self.send_error_obj(413, "Too Many DOIs",
+                                       "Number of DOIs exceeds the maximum allowed (%d)" %
+                                       self.cfg.get('max_batch_size', DEF_MAX_BATCH_SIZE))
+
+        norm = OrderedDict()
+        for doi in dois:
+            m = _doi_pat.search(_doi_baseurl_pat.sub('', doi))
+            if not m:
+                return self.send_error_obj(400, "Not a DOI",
+                                           "Identifier not recognized as a DOI: "+doi)
+            norm[doi] = m.group(2)
+
+        results = self._resolve_batch(list(norm.values()), outtype)
+        out = OrderedDict()
+        failed = 0
+        for doi, ndoi in norm.items():
+            res = results[ndoi]
+            if isinstance(res, DOIDoesNotExist):
+                res = self._missing_reference(ndoi) if outtype == "ref" else None
+            elif isinstance(res, Exception):
+                self.log.error("Problem resolving DOI, %s: %s", ndoi, str(res))
+                res = None
+                failed += 1
+            out[doi] = res
+
+        if failed and failed == len(norm):
+            return self.send_error_obj(503, "DOI Resolver Failure",
+                                       "Trouble accessing remote DOI resolver service")
+        return self.send_json(out)
+
 class DOI2NERDmApp(ServiceApp):
     """
-    a web app for converting a DOI to NERDm metadata
+    a web app for converting a DOI to NERDm metadata.  
+
+    The required ``doi_resolver`` configuration parameter configures the DOI resolver, including
+    (via its ``cache`` parameter) how resolved DOIs are cached (see 
+    :py:class:`~nistoar.pdr.describe.doicache.CachingDOIResolver`).  The optional 
+    ``max_batch_size`` parameter sets the maximum number of DOIs that can be resolved in one
+    request (default: 200).
     """
 
     def __init__(self, log: Logger, config: dict={}):
         super(DOI2NERDmApp, self).__init__("doi2nerdm", log, config)
         if not self.cfg.get("doi_resolver"):
             raise ConfigurationException("DOI2NERDmApp: missing required parameter: doi_resolver")
-        self._doires = DOIResolver.from_config(self.cfg["doi_resolver"])
+        self._doires = CachingDOIResolver.from_config(self.cfg["doi_resolver"], self.log)
 
     def create_handler(self, env: dict, start_resp: Callable, path: str, who: Agent=None) -> Handler:
         """
@@ -1,8 +1,11 @@
 from __future__ import annotations
 
-from typing import Any, Dict, Iterable, List, Optional, Union
+from typing import Any, Callable, Dict, Iterable, List, Optional, Union
+from concurrent.futures import ProcessPoolExecutor, as_completed
 from pathlib import Path
 import logging
+import tempfile
+import time
 
 from .utils.loader import normalize_input
 from .utils.writer import write_file
@@ -17,12 +20,24 @@ LOG = logging.getLogger(__name__)
 
 
 def run(input_data: Iterable[Any], output_format: str, output_directory: Optional[Union[str, Path]] = None,
-        template_dir: str = None, template_name: str = None, output_filename: str = None):
+        template_dir: str = None, template_name: str = None, output_filename: str = None,
+        max_workers: int = 1, spool_dir: Optional[Union[str, Path]] = None,
+        progress: Optional[Callable[[str, int, int], None]] = None,
+        template_cache_dir: Optional[Union[str, Path]] = None):
     """ Wrapper that handles 1 to N inputs. The initial format of the inputs, the template (if any) used for rendering,
      the output format and the output directory must be the same for all inputs. Only one output is produced.
      Default behavior doesn't generate output file, it simply returns the rendered result. output file is generated
      only if output_directory is not None.
 
+     When max_workers is greater than 1, the inputs are split into one batch per worker process and the
+     batches are rendered in parallel.
+     When rendering PDFs in parallel (or whenever spool_dir is given), each rendered record is spooled to a
+     file rather than held in memory, and the spooled files are merged and written to the output file
+     without an intermediate in-memory copy; the merge itself still holds the combined document in memory
+     (see utils.concat.concat_pdf()).
+     Within each process, the template is loaded and the rendering set up once for all of the inputs
+     rendered there (see Exporter.render_many()).
+
     Args:
         input_data:
         output_format:
@@ -30,24 +45,61 @@ def run(input_data: Iterable[Any], output_format: str, output_directory: Optiona
         template_dir:
         template_name:
         output_filename:
+        max_workers: the number of processes to render records with (default: 1, render in this process)
+        spool_dir: a directory for intermediate PDFs; a temporary one is used if needed and not given
+        progress: a function called as progress(stage, done, total) as each stage ("render",
+                  "concat", "write") advances
+        template_cache_dir: a directory where compiled templates are kept so that they are not recompiled
+                  by each process (see utils.templates.load_template)
 
-    Returns:
+    Returns: the combined result; it includes a "timings" dict giving the seconds spent in each stage.
 
     """
+    if not input_data:
+        raise ValueError("No inputs provided. Pass at least one input item.")
+    timings: Dict[str, float] = {}
+    if progress is None:
+        progress = _no_progress
+
+    mark = time.time()
+    infos = [normalize_input(item, index=i) for i, item in enumerate(input_data)]
+    timings["load"] = time.time() - mark
+
+    tmpspool = None
+    if spool_dir is None and max_workers > 1 and output_format == "pdf":
+        tmpspool = tempfile.TemporaryDirectory(prefix="export_spool_")
+        spool_dir = tmpspool.name
+    try:
+        return _run(infos, output_format, output_directory, template_dir, template_name, output_filename,
+                    max_workers, spool_dir, progress, timings, template_cache_dir)
+    finally:
+        if tmpspool:
+            tmpspool.cleanup()
+
+
+def _no_progress(stage: str, done: int, total: int):
+    pass
+
+
+def _run(infos, output_format, output_directory, template_dir, template_name, output_filename,
+         max_workers, spool_dir, progress, timings, template_cache_dir=None):
+    streaming = spool_dir is not None and output_format == "pdf"
+    if streaming:
+        Path(spool_dir).mkdir(parents=True, exist_ok=True)
+
+    mark = time.time()
     results = []
     exported_records = []
     failed_records = []
-    if not input_data:
-        raise ValueError("No inputs provided. Pass at least one input item.")
-    for i, item in enumerate(input_data):
-        info = normalize_input(item, index=i)
-        try:
-            result = _render_from_info(info, output_format, template_dir, template_name)
+    for i, result in _render_all(infos, output_format, template_dir, template_name,
+                                 max_workers, spool_dir if streaming else None, progress, template_cache_dir):
+        if isinstance(result, Exception):
+            LOG.error("Export rendering failed for record index %s", i, exc_info=result)
+            failed_records.append(failed_record_summary(infos[i], result, i))
+        else:
             results.append(result)
-            exported_records.append(exported_record_summary(info, i))
-        except Exception as ex:
-            LOG.exception("Export rendering failed for record index %s", i)
-            failed_records.append(failed_record_summary(info, ex, i))
+            exported_records.append(exported_record_summary(infos[i], i))
+    timings["render"] = time.time() - mark
 
     if not results and output_format not in REPORT_TEMPLATES:
         raise ValueError("No rendered results produced from the input data.")
@@ -64,8 +116,8 @@ def run(input_data: Iterable[Any], output_format: str, output_directory: Optiona
     concat_fn = CONCAT_REGISTRY.get(output_format)
     if concat_fn is None:
         raise ValueError(f"Concatenation not supported for format '{output_format}'.")
-    combined = concat_fn(results, output_filename) if results else None
 
+    mark = time.time()
     if output_format in REPORT_TEMPLATES:
         report_payload = build_report_payload(
             output_format,
@@ -75,15 +127,31 @@ def run(input_data: Iterable[Any], output_format: str, output_directory: Optiona
             template_name=template_name,
         )
         report_result = render_report(report_payload, output_format, template_dir)
-        combined = concat_fn([report_result] + results, output_filename) if results else concat_fn([report_result],
-                                                                                                   output_filename)
+        results = [report_result] + results
+        timings["report"] = time.time() - mark
+        mark = time.time()
+
+    progress("concat", 0, len(results))
+    if streaming and output_directory is not None:
+        combined = concat_fn(results, output_filename, output_dir=output_directory)
+    else:
+        combined = concat_fn(results, output_filename)
+    progress("concat", len(results), len(results))
+    timings["concat"] = time.time() - mark
 
     # Default result
     if output_directory is None:
+        combined["timings"] = timings
         return combined
 
     # Single write
-    path = write_file(output_directory, combined)
+    mark = time.time()
+    if combined.get("path") and combined.get("bytes") is None and combined.get("text") is None:
+        path = combined["path"]
+    else:
+        path = write_file(output_directory, combined)
+    progress("write", 1, 1)
+    timings["write"] = time.time() - mark
 
     return {
         "format": combined["format"],
@@ -91,9 +159,89 @@ def run(input_data: Iterable[Any], output_format: str, output_directory: Optiona
         "mimetype": combined["mimetype"],
         "file_extension": combined["file_extension"],
         "path": path,
+        "timings": timings,
     }
 
 
+def _render_all(infos: List[Dict[str, Any]], output_format: str, template_dir: str, template_name: str,
+                max_workers: int, spool_dir: Optional[Union[str, Path]], progress: Callable,
+                template_cache_dir: Optional[Union[str, Path]] = None):
+    """
+    render each of the normalized inputs, yielding (index, result) pairs in input order; result is the
+    exception raised if the rendering failed.
+    """
+    total = len(infos)
+    progress("render", 0, total)
+    if max_workers <= 1 or total < 2:
+        try:
+            exporter = _exporter_for(output_format, template_dir, template_cache_dir)
+            results = exporter.render_many(((info['input_type'], info['payload'], info['filename'])
+                                            for info in infos), template_name)
+        except Exception as ex:
+            results = [ex] * total
+        for i, result in enumerate(results):
+            if not isinstance(result, Exception):
+                try:
+                    result = _spool(result, spool_dir, i)
+                except Exception as ex:
+                    result = ex
+            progress("render", i+1, total)
+            yield i, result
+        return
+
+    # split the inputs into one contiguous batch per worker so that each worker sets up the
+    # rendering once for its whole batch
+    nworkers = min(max_workers, total)
+    bounds = [(total * w) // nworkers for w in range(nworkers + 1)]
+    out = [None] * total
+    with ProcessPoolExecutor(max_workers=nworkers) as pool:
+        futs = {pool.submit(_render_batch, infos[start:end], output_format, template_dir, template_name,
+                            spool_dir, start, template_cache_dir): (start, end)
+                for start, end in zip(bounds[:-1], bounds[1:])}
+        done = 0
+        for fut in as_completed(futs):
+            start, end = futs[fut]
+            try:
+                out[start:end] = fut.result()
+            except Exception as ex:
+                out[start:end] = [ex] * (end - start)
+            done += end - start
+            progress("render", done, total)
+    for i, result in enumerate(out):
+        yield i, result
+
+
+def _render_batch(infos: List[Dict[str, Any]], output_format: str, template_dir: str, template_name: str,
+                  spool_dir: Optional[Union[str, Path]], start: int,
+                  template_cache_dir: Optional[Union[str, Path]] = None):
+    """
+    render a batch of normalized inputs with a single exporter, returning the results in order (with
+    the exception raised in place of the result of any input that failed); start is the index of the
+    first input in the batch.  If spool_dir is given, the rendered bytes are written to files there and
+    the results refer to them via "path".  (This is run in a worker process for parallel exports.)
+    """
+    exporter = _exporter_for(output_format, template_dir, template_cache_dir)
+    results = exporter.render_many(((info['input_type'], info['payload'], info['filename'])
+                                    for info in infos), template_name)
+    out = []
+    for i, result in enumerate(results, start):
+        if not isinstance(result, Exception):
+            try:
+                result = _spool(result, spool_dir, i)
+            except Exception as ex:
+                result = ex
+        out.append(result)
+    return out
+
+
+def _spool(result: Dict[str, Any], spool_dir: Optional[Union[str, Path]], index: int):
+    if spool_dir is not None and result.get("bytes") is not None:
+        path = Path(spool_dir) / f"{index:06d}{result.get('file_extension', '')}"
+        path.write_bytes(result.pop("bytes"))
+        result["path"] = str(path)
+    return result
+
+
 def export(input_item: Any, output_format: str, template_dir: str = None, template_name: str = None, _index: int = 0):
     """
     Manage the export for a single input by leveraging the right exporter and the right configurations.
@@ -113,31 +261,37 @@ def export(input_item: Any, output_format: str, template_dir: str = None, templa
     return _render_from_info(info, output_format, template_dir, template_name)
 
 
-def _render_from_info(info: Dict[str, Any], output_format: str, template_dir: str = None, template_name: str = None):
+def _render_from_info(info: Dict[str, Any], output_format: str, template_dir: str = None, template_name: str = None,
+                      template_cache_dir: Optional[Union[str, Path]] = None):
     input_type = info['input_type']
     payload = info['payload']
     filename = info['filename']
 
+    exporter = _exporter_for(output_format, template_dir, template_cache_dir)
+
+    render_result = exporter.render(
+        input_type=input_type,
+        payload=payload,
+        filename=filename,
+        template_name=template_name,
+    )
+
+    return render_result
+
+
+def _exporter_for(output_format: str, template_dir: str = None,
+                  template_cache_dir: Optional[Union[str, Path]] = None):
     # Select the right exporter
     output_format_key = (output_format or "").strip().lower()
     roots = [template_dir] if template_dir else None
     exporters: Dict[str, Any] = {
-        "pdf": PDFExporter(template_roots=roots),
-        "markdown": MarkdownExporter(template_roots=roots),
-        "csv": CSVExporter(template_roots=roots),
+        "pdf": PDFExporter,
+        "markdown": MarkdownExporter,
+        "csv": CSVExporter,
 
     }
     if output_format_key not in exporters:
         supported = ", ".join(sorted(exporters.keys()))
         raise ValueError(f"Unknown output_format '{output_format}'. Supported: {supported}")
 
-    exporter = exporters[output_format_key]
-
-    render_result = exporter.render(
-        input_type=input_type,
-        payload=payload,
-        filename=filename,
-        template_name=template_name,
-    )
-
-    return render_result
+    return exporters[output_format_key](template_roots=roots, template_cache_dir=template_cache_dir)
@@ -1,9 +1,9 @@
 from __future__ import annotations
 from abc import ABC, abstractmethod
 from pathlib import Path
-from typing import Any, Optional, Iterable, Union
+from typing import Any, Optional, Iterable, Iterator, Tuple, Union
 
-from ..utils.templates import TemplateResolver
+from ..utils.templates import TemplateResolver, load_template
 
 
 class Exporter(ABC):
@@ -13,13 +13,17 @@ class Exporter(ABC):
     format_name: str = ""
     file_extension: str = ""
 
-    def __init__(self, *, template_roots: Optional[Iterable[Union[str, Path]]] = None):
+    def __init__(self, *, template_roots: Optional[Iterable[Union[str, Path]]] = None,
+                 template_cache_dir: Optional[Union[str, Path]] = None):
         """
         - Provide one or more roots where templates may live.
         - Layout is <root>/<format>/<template_filename>.
         - If not provided, defaults to package templates dir.
+        - template_cache_dir, if provided, is a directory where compiled templates are kept
+          across processes (see utils.templates.load_template).
         """
         self._resolver = TemplateResolver(template_roots)
+        self.template_cache_dir = template_cache_dir
 
     def resolve_template_path(self, format_subdir: str, template_filename: str) -> Path:
         """
@@ -27,6 +31,12 @@ class Exporter(ABC):
         """
         return self._resolver.resolve(format_subdir, template_filename)
 
+    def load_template(self, template_path: Union[str, Path]):
+        """
+        Return the compiled template at the given path, using this exporter's template cache directory.
+        """
+        return load_template(template_path, self.template_cache_dir)
+
     @abstractmethod
     def render(self, input_type: str, payload: Any, filename: str, template_name: str = None):
         """
@@ -41,3 +51,23 @@ class Exporter(ABC):
 
         """
         raise NotImplementedError
+
+    def render_many(self, items: Iterable[Tuple[str, Any, str]], template_name: str = None) -> Iterator[Any]:
+        """
+        Render a sequence of input payloads, each into its own output, with the same template.  Subclasses
+        override this to set up the rendering once for the whole sequence rather than once per payload.
+
+        Args:
+            items: (input_type, payload, filename) tuples, with the meanings given for render().
+            template_name: Optional template filename the exporter uses.
+
+        Returns: an iterator yielding, in order, the render() result for each item; if an item cannot be
+                 rendered, the exception raised is yielded in place of its result so that one bad
+                 payload does not end the sequence.
+
+        """
+        for input_type, payload, filename in items:
+            try:
+                yield self.render(input_type, payload, filename, template_name)
+            except Exception as ex:
+                yield ex
@@ -207,7 +207,7 @@ class CSVExporter(Exporter):
 
     def _render_report_template(self, json_payload: Any, filename: str, template_name: str):
         template_path = self.resolve_template_path("csv", template_name)
-        preppy_template = preppy.getModule(str(template_path))
+        preppy_template = self.load_template(template_path)
         if isinstance(json_payload, MappingABC):
             data_for_template = json_payload.get("data", json_payload)
         else:
@@ -70,7 +70,7 @@ class MarkdownExporter(Exporter):
         # Preppy can take the full .prep path or just the module base
         # We pass the .prep path for clarity
         template_path = self.resolve_template_path("markdown", template_filename)
-        preppy_template = preppy.getModule(str(template_path))
+        preppy_template = self.load_template(template_path)
 
         # Load template and parse
         data_for_template = json_payload.get("data", json_payload)
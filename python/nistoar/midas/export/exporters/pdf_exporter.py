@@ -1,9 +1,9 @@
 from __future__ import annotations
-from typing import Any, Optional
+from typing import Any, Iterable, Iterator, Optional, Tuple
 from collections.abc import Mapping as MappingABC
 from .base import Exporter
+from ..utils.rml import render_rml
 import preppy
-import trml2pdf
 import xml.sax.saxutils as saxutils
 import re
 
@@ -52,18 +52,45 @@ class PDFExporter(Exporter):
         if not isinstance(json_payload, MappingABC):
             raise TypeError("PDFExporter expects a mapping-like payload (e.g., dict)")
 
+        return self._render_with(self._load_pdf_template(template_name), json_payload, filename)
+
+    def render_many(self, items: Iterable[Tuple[str, Any, str]], template_name: str = None) -> Iterator[Any]:
+        """
+        Render a sequence of JSON inputs, each into its own PDF.  The template is resolved and loaded
+        once for the whole sequence, and the fonts and styles its RML sets up are reused across the
+        documents (see utils.rml.render_rml).
+        """
+        try:
+            preppy_template = self._load_pdf_template(template_name)
+        except Exception as ex:
+            for item in items:
+                yield ex
+            return
+
+        for input_type, payload, filename in items:
+            try:
+                if input_type != "json":
+                    raise TypeError("PDFExporter.render: unsupported payload type.")
+                if not isinstance(payload, MappingABC):
+                    raise TypeError("PDFExporter expects a mapping-like payload (e.g., dict)")
+                yield self._render_with(preppy_template, payload, filename)
+            except Exception as ex:
+                yield ex
+
+    def _load_pdf_template(self, template_name: Optional[str]):
         template_filename = template_name or DEFAULT_PDF_TEMPLATE
 
         # Preppy can take the full .prep path or just the module base
         # We pass the .prep path for clarity
         template_path = self.resolve_template_path("pdf", template_filename)
-        preppy_template = preppy.getModule(str(template_path))
+        return self.load_template(template_path)
 
+    def _render_with(self, preppy_template, json_payload: MappingABC, filename: str):
         # Load template and parse
         data_for_template = json_payload.get("data", json_payload)
         data_for_template = _escape_xml(data_for_template)
         rml_xml_text = preppy_template.get(data_for_template)
-        pdf_bytes = trml2pdf.parseString(rml_xml_text)
+        pdf_bytes = render_rml(rml_xml_text)
 
         return {
             "format": self.format_name,
@@ -0,0 +1,215 @@
+"""
+stream: serialize a collection of project records incrementally.
+
+Unlike :py:func:`~nistoar.midas.export.export.run`, which renders its complete output in memory, the
+functions in this module consume an iterator of records (e.g. straight from a DBIO
+``select_records()`` cursor) and return a generator of byte chunks suitable for returning as the
+body of a WSGI response.  Output is buffered into chunks of about ``chunk_size`` bytes:  a chunk is
+only produced when the consumer (i.e. the web server writing to the client) asks for the next one,
+so at most one chunk and one record are held in memory at a time, regardless of the number of
+records exported.
+
+Supported formats (see :py:data:`STREAM_FORMATS`):
+
+``ndjson``
+    one JSON record per line
+``csv``
+    one row per record with columns given as dot-delimited paths into the record (e.g.
+    ``data.title`` or ``meta.resourceType``); non-scalar values are written as JSON.
+``zip``
+    a zip archive containing one JSON file per record, named after the record identifier
+"""
+from __future__ import annotations
+
+from typing import Any, Iterable, Iterator, List, Mapping, Optional
+import csv
+import io
+import json
+import re
+import zipfile
+
+DEF_CHUNK_SIZE = 64 * 1024
+DEF_CSV_COLUMNS = ["id", "name", "owner", "status.state", "status.modified"]
+
+STREAM_FORMATS = {
+    "ndjson": "application/x-ndjson",
+    "csv": "text/csv",
+    "zip": "application/zip",
+}
+
+_unsafe_name_re = re.compile(r"[^\w\-\.]")
+
+
+class _ChunkBuffer:
+    """
+    a write-only file-like sink that collects output until it can be handed out as a chunk
+    """
+
+    def __init__(self, chunk_size: int = DEF_CHUNK_SIZE):
+        self.chunk_size = chunk_size
+        self._parts: List[bytes] = []
+        self._size = 0
+
+    def write(self, data) -> int:
+        if isinstance(data, str):
+            data = data.encode("utf-8")
+        if data:
+            self._parts.append(bytes(data))
+            self._size += len(data)
+        return len(data)
+
+    def flush(self):
+        pass
+
+    def ready(self) -> bool:
+        return self._size >= self.chunk_size
+
+    def take(self) -> bytes:
+        out = b"".join(self._parts)
+        self._parts = []
+        self._size = 0
+        return out
+
+
+def _as_dict(rec: Any) -> Mapping:
+    if hasattr(rec, "to_dict"):
+        return rec.to_dict()
+    if isinstance(rec, Mapping):
+        return rec
+    raise TypeError("stream: records must be mappings or have a to_dict() method")
+
+
+def lookup(rec: Mapping, path: str) -> Any:
+    """
+    return the value within a record at a dot-delimited path (e.g. ``data.contactPoint.fn``) or
+    None if the path does not exist.  Path elements that are integers select from arrays.
+    """
+    val = rec
+    for prop in path.split("."):
+        if isinstance(val, Mapping):
+            val = val.get(prop)
+        elif isinstance(val, (list, tuple)) and prop.lstrip("-").isdigit():
+            try:
+                val = val[int(prop)]
+            except IndexError:
+                return None
+        else:
+            return None
+        if val is None:
+            return None
+    return val
+
+
+def _cell(val: Any) -> str:
+    if val is None:
+        return ""
+    if isinstance(val, bool):
+        return "true" if val else "false"
+    if isinstance(val, (Mapping, list, tuple)):
+        return json.dumps(val, separators=(",", ":"))
+    return str(val)
+
+
+def stream_ndjson(records: Iterable[Any], chunk_size: int = DEF_CHUNK_SIZE) -> Iterator[bytes]:
+    """
+    Serialize records as newline-delimited JSON.
+    """
+    buf = _ChunkBuffer(chunk_size)
+    for rec in records:
+        buf.write(json.dumps(_as_dict(rec)))
+        buf.write(b"\n")
+        if buf.ready():
+            yield buf.take()
+    out = buf.take()
+    if out:
+        yield out
+
+
+def stream_csv(records: Iterable[Any], columns: Optional[List[str]] = None,
+               chunk_size: int = DEF_CHUNK_SIZE) -> Iterator[bytes]:
+    """
+    Serialize records as CSV, one row per record, preceded by a header row of the column paths.
+
+    Args:
+        records: the records to serialize
+        columns: the dot-delimited paths to the record values to include as columns
+                 (default: DEF_CSV_COLUMNS)
+        chunk_size: the approximate number of bytes to collect before yielding a chunk
+    """
+    if not columns:
+        columns = DEF_CSV_COLUMNS
+    buf = _ChunkBuffer(chunk_size)
+    text = io.StringIO()
+    writer = csv.writer(text, lineterminator="\r\n")
+
+    def _flush_text():
+        buf.write(text.getvalue())
+        text.seek(0)
+        text.truncate()
+
+    writer.writerow(columns)
+    _flush_text()
+    for rec in records:
+        rec = _as_dict(rec)
+        writer.writerow([_cell(lookup(rec, c)) for c in columns])
+        _flush_text()
+        if buf.ready():
+            yield buf.take()
+    out = buf.take()
+    if out:
+        yield out
+
+
+def record_filename(rec: Mapping, index: int) -> str:
+    """
+    return the name of the file to give to a record within a zip archive
+    """
+    name = _unsafe_name_re.sub("_", str(rec.get("id") or "")) or "record%d" % index
+    return name + ".json"
+
+
+def stream_zip(records: Iterable[Any], chunk_size: int = DEF_CHUNK_SIZE,
+               compression: int = zipfile.ZIP_DEFLATED) -> Iterator[bytes]:
+    """
+    Serialize records as a zip archive of per-record JSON files.  The archive is written sequentially
+    (with data descriptors after each member), so it never needs to be seeked or held in memory.
+    """
+    buf = _ChunkBuffer(chunk_size)
+    seen = set()
+    with zipfile.ZipFile(buf, "w", compression=compression) as zf:
+        for i, rec in enumerate(records):
+            rec = _as_dict(rec)
+            name = record_filename(rec, i)
+            if name in seen:
+                name = "%s.%d.json" % (name[:-len(".json")], i)
+            seen.add(name)
+            zf.writestr(name, json.dumps(rec, indent=2))
+            if buf.ready():
+                yield buf.take()
+    # closing the archive writes its central directory
+    out = buf.take()
+    if out:
+        yield out
+
+
+def stream_records(records: Iterable[Any], output_format: str, columns: Optional[List[str]] = None,
+                   chunk_size: int = DEF_CHUNK_SIZE) -> Iterator[bytes]:
+    """
+    Serialize records into one of the STREAM_FORMATS, returning a generator of byte chunks.
+
+    Args:
+        records: an iterable of record dictionaries or objects with a to_dict() method (like
+                 ProjectRecord); it is only consumed as the output is consumed.
+        output_format: one of "ndjson", "csv", or "zip"
+        columns: for "csv", the dot-delimited paths of the values to include as columns
+        chunk_size: the approximate number of bytes to collect before yielding a chunk
+
+    Raises: ValueError if output_format is not supported
+    """
+    if output_format == "ndjson":
+        return stream_ndjson(records, chunk_size)
+    if output_format == "csv":
+        return stream_csv(records, columns, chunk_size)
+    if output_format == "zip":
+        return stream_zip(records, chunk_size)
+    raise ValueError("Unsupported streaming format: %s" % output_format)
@@ -1,6 +1,7 @@
 from __future__ import annotations
-from typing import Dict, List
+from typing import Dict, List, Optional, Union
 from io import BytesIO
+from pathlib import Path
 
 
 def concat_markdown(rendered_results: List[Dict], output_filename: str) -> Dict:
@@ -26,37 +27,59 @@ def concat_markdown(rendered_results: List[Dict], output_filename: str) -> Dict:
     }
 
 
-def concat_pdf(rendered_results: List[Dict], output_filename: str) -> Dict:
+def concat_pdf(rendered_results: List[Dict], output_filename: str,
+               output_dir: Optional[Union[str, Path]] = None) -> Dict:
     """
-    Merge multiple PDF byte streams.
-    Rendered_results is a list of dicts that must contain the key 'bytes'
+    Merge multiple PDF documents.
+    Rendered_results is a list of dicts that must contain either the key 'bytes' or the key 'path'
+    (the location of a PDF file, e.g. one spooled by a parallel export).
+    If output_dir is given, the merged document is written directly to a file in that directory
+    (and returned via the key 'path') rather than being returned in memory as 'bytes'.
+
+    Note that this merge is not streamed: pypdf assembles all of the pages of the merged document
+    in a single in-memory PdfWriter before any of it is written, so peak memory grows with the size
+    of the combined output regardless of whether the inputs are given as bytes or spooled paths.
+    Spooling only keeps the individual renderings out of memory while they are being produced and
+    avoids an extra in-memory copy of the merged output when output_dir is given.
     """
     try:
         from pypdf import PdfReader, PdfWriter
     except Exception as ex:
         raise RuntimeError("PDF concatenation requires 'pypdf' to be installed") from ex
 
+    filename = f"{output_filename}.pdf" if not output_filename.endswith(".pdf") else output_filename
     writer = PdfWriter()
     for result in rendered_results:
         data = result.get("bytes")
-        if not isinstance(data, (bytes, bytearray)):
-            raise TypeError("concat_pdf expects all inputs to have a 'bytes' key.")
-        reader = PdfReader(BytesIO(data))
+        if isinstance(data, (bytes, bytearray)):
+            reader = PdfReader(BytesIO(data))
+        elif result.get("path"):
+            reader = PdfReader(result["path"])
+        else:
+            raise TypeError("concat_pdf expects all inputs to have a 'bytes' or 'path' key.")
         for page in reader.pages:
             writer.add_page(page)
 
-    buffer = BytesIO()
-    writer.write(buffer)
-    buffer.seek(0)
-    pdf_bytes = buffer.read()
-
-    return {
+    out = {
         "format": "pdf",
-        "filename": f"{output_filename}.pdf" if not output_filename.endswith(".pdf") else output_filename,
+        "filename": filename,
         "mimetype": "application/pdf",
-        "bytes": pdf_bytes,
         "file_extension": ".pdf",
     }
+    if output_dir is not None:
+        output_dir = Path(output_dir)
+        output_dir.mkdir(parents=True, exist_ok=True)
+        output_path = output_dir / filename
+        with open(output_path, "wb") as fd:
+            writer.write(fd)
+        out["path"] = str(output_path)
+    else:
+        buffer = BytesIO()
+        writer.write(buffer)
+        out["bytes"] = buffer.getvalue()
+    writer.close()
+
+    return out
 
 
 def _extract_csv_text(result: Dict) -> str:
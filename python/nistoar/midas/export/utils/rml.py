@@ -0,0 +1,121 @@
+"""
+Render RML documents (as produced by the PDF templates) into PDF via trml2pdf, keeping the parts of
+the setup that every document rendered from the same template shares resident in the process.
+
+:py:func:`trml2pdf.parseString` repeats all of the document setup for each document it renders: it
+registers the fonts declared in the document's ``<docinit>`` and builds the paragraph and table styles
+from its ``<stylesheet>`` (which, for each style, rebuilds the ReportLab sample stylesheet).  When
+many records are rendered with one template, this setup is identical for each of them.
+:py:func:`render_rml` instead registers a given set of fonts only once per process and reuses the
+styles parsed from a given stylesheet (identified by a hash of its markup) for every document that
+includes it.
+"""
+from __future__ import annotations
+import copy
+import hashlib
+import io
+import threading
+from collections import OrderedDict
+from typing import Dict, Set
+
+from reportlab.pdfgen import canvas
+from trml2pdf import doc as rmldoc, styles as rmlstyles, canv as rmlcanv
+
+# the maximum number of distinct stylesheets to keep parsed
+MAX_CACHED_STYLESHEETS = 32
+
+_STYLES: "OrderedDict[str, rmlstyles.RmlStyles]" = OrderedDict()
+_FONTS: Set[str] = set()
+_STATS: Dict[str, int] = {"hits": 0, "misses": 0}
+_LOCK = threading.Lock()
+
+
+def _markup_key(nodes) -> str:
+    h = hashlib.sha256()
+    for node in nodes:
+        h.update(node.toxml().encode("utf-8"))
+    return h.hexdigest()
+
+
+def _register_fonts(nodes):
+    key = _markup_key(nodes)
+    with _LOCK:
+        if key in _FONTS:
+            return
+        rmldoc.docinit(nodes)
+        _FONTS.add(key)
+
+
+def _get_styles(nodes) -> rmlstyles.RmlStyles:
+    key = _markup_key(nodes)
+    with _LOCK:
+        styles = _STYLES.get(key)
+        if styles is not None:
+            _STYLES.move_to_end(key)
+            _STATS["hits"] += 1
+        else:
+            _STATS["misses"] += 1
+    if styles is None:
+        styles = rmlstyles.RmlStyles(nodes)
+        with _LOCK:
+            _STYLES[key] = styles
+            while len(_STYLES) > MAX_CACHED_STYLESHEETS:
+                _STYLES.popitem(last=False)
+
+    # rendering a document can add to its styles' names, so each document gets its own copy of them
+    out = copy.copy(styles)
+    out.names = dict(styles.names)
+    return out
+
+
+class _RmlDoc(rmldoc.RmlDoc):
+    """
+    an RmlDoc that takes its fonts and styles from the process-wide caches
+    """
+
+    def render(self, out):
+        root = self.dom.documentElement
+        el = root.getElementsByTagName('docinit')
+        if el:
+            _register_fonts(el)
+        self.styles = _get_styles(root.getElementsByTagName('stylesheet'))
+        el = root.getElementsByTagName('template')
+        if len(el):
+            rmldoc.RmlTemplate(out, el[0], self).render(root.getElementsByTagName('story')[0])
+        else:
+            self.canvas = canvas.Canvas(out)
+            pd = root.getElementsByTagName('pageDrawing')[0]
+            rmlcanv.RmlCanvas(self.canvas, None, self).render(pd)
+            self.canvas.showPage()
+            self.canvas.save()
+
+
+def render_rml(rml: str) -> bytes:
+    """
+    Render an RML document into PDF, returning the PDF bytes.  The result is the same as that of
+    :py:func:`trml2pdf.parseString`.
+    """
+    out = io.BytesIO()
+    _RmlDoc(rml.strip()).render(out)
+    return out.getvalue()
+
+
+def rml_cache_info() -> Dict[str, int]:
+    """
+    Return statistics about the reuse of parsed stylesheets in this process:  ``hits`` and
+    ``misses`` count lookups of a document's stylesheet, and ``stylesheets`` gives the number of
+    stylesheets currently kept.
+    """
+    with _LOCK:
+        return dict(_STATS, stylesheets=len(_STYLES))
+
+
+def clear_rml_cache():
+    """
+    Forget the stylesheets parsed and the fonts registered by this process, so that they are set up
+    again for the next document that uses them.
+    """
+    with _LOCK:
+        _STYLES.clear()
+        _FONTS.clear()
+        _STATS.update(hits=0, misses=0)
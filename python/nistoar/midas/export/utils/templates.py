@@ -1,6 +1,21 @@
 from __future__ import annotations
+import hashlib
+import logging
+import marshal
+import os
+import sys
+import tempfile
+import threading
 from pathlib import Path
-from typing import Iterable, Union, Optional
+from types import ModuleType
+from typing import Dict, Iterable, Tuple, Union, Optional
+
+import preppy
+
+LOG = logging.getLogger(__name__)
+
+# the extension given to compiled templates saved in a template cache directory
+CACHED_TEMPLATE_EXT = ".prepc"
 
 
 class TemplateResolver:
@@ -22,3 +37,113 @@ class TemplateResolver:
                 return p
         # fall back to first candidate (even if missing) so callers see a clear error
         return cand[0]
+
+
+# Compiled preppy templates, keyed by template path.  Each process (including each worker in a
+# parallel export) keeps its own cache so that a template is compiled at most once per process
+# (or again whenever its source file changes).
+_COMPILED: Dict[str, Tuple[Tuple[int, int], ModuleType]] = {}
+_COMPILED_LOCK = threading.Lock()
+
+
+def load_template(template_path: Union[str, Path], cache_dir: Optional[Union[str, Path]] = None):
+    """
+    Return the compiled preppy module for the template at the given path, compiling it only if it
+    has not already been loaded by this process or if its source has changed since.
+
+    Args:
+        template_path: the path to the template's source (.prep) file
+        cache_dir: a directory where compiled templates are saved so that they can be shared across
+                   processes and restarts; if given, a template is only compiled if this directory
+                   does not already hold a compilation of the same source (see
+                   :py:func:`compiled_template_key`).  If None, preppy compiles the template.
+    """
+    path = str(template_path)
+    try:
+        st = os.stat(path)
+    except OSError:
+        # let preppy report the missing template
+        return preppy.getModule(path)
+    stamp = (st.st_mtime_ns, st.st_size)
+
+    with _COMPILED_LOCK:
+        hit = _COMPILED.get(path)
+    if hit and hit[0] == stamp:
+        return hit[1]
+
+    module = None
+    if cache_dir:
+        try:
+            module = _load_cached_template(Path(path), Path(cache_dir))
+        except Exception as ex:
+            LOG.warning("Unable to use template cache for %s (%s); compiling directly", path, str(ex))
+    if module is None:
+        module = preppy.getModule(path)
+    if isinstance(module, ModuleType):
+        with _COMPILED_LOCK:
+            _COMPILED[path] = (stamp, module)
+    return module
+
+
+def compiled_template_key(source: str) -> str:
+    """
+    Return the key identifying the compilation of the given template source in a template cache
+    directory.  The key is a hash of the source together with the versions of preppy and Python that
+    compile it, so a cached compilation is never used with a different template, preppy, or Python.
+    """
+    h = hashlib.sha256(source.encode("utf-8"))
+    h.update(("\0%s\0%s" % (preppy.VERSION, sys.implementation.cache_tag)).encode("utf-8"))
+    return h.hexdigest()[:32]
+
+
+def _load_cached_template(src: Path, cache_dir: Path) -> ModuleType:
+    # return the template module, compiled from the cache directory's copy if there is one,
+    # otherwise compiled from source and saved to the cache directory
+    source = src.read_text(encoding="utf-8")
+    cached = cache_dir / ("%s-%s%s" % (src.stem, compiled_template_key(source), CACHED_TEMPLATE_EXT))
+
+    code = None
+    try:
+        with open(cached, "rb") as fd:
+            code = marshal.load(fd)
+    except FileNotFoundError:
+        pass
+    except (EOFError, ValueError, TypeError) as ex:
+        LOG.warning("Ignoring corrupted compiled template, %s: %s", str(cached), str(ex))
+
+    if code is None:
+        parser = preppy.PreppyParser(source, str(src), preppy.getMd5(source))
+        parser.nosourcefile = 0
+        parser.compile(0)
+        code = parser.codeobject
+        _save_compiled(code, cached)
+
+    # set up the module as preppy.getModule() would
+    module = ModuleType(src.stem)
+    module.__file__ = str(src)
+    exec(code, module.__dict__)
+    module.__dict__["__getModule_kwds__"] = dict(source_extension=src.suffix or ".prep", verbose=0,
+                                                 savePyc=False, cache="global", _globals=None)
+    return module
+
+
+def _save_compiled(code, cached: Path):
+    # write atomically so that concurrent processes never read a partial file
+    cached.parent.mkdir(parents=True, exist_ok=True)
+    fd, tmp = tempfile.mkstemp(prefix=cached.stem, suffix=".tmp", dir=str(cached.parent))
+    try:
+        with os.fdopen(fd, "wb") as fp:
+            marshal.dump(code, fp)
+        os.replace(tmp, cached)
+    except OSError as ex:
+        LOG.warning("Unable to save compiled template to %s: %s", str(cached), str(ex))
+        if os.path.exists(tmp):
+            os.remove(tmp)
+
+
+def clear_template_cache():
+    """
+    Forget all compiled templates loaded by this process.
+    """
+    with _COMPILED_LOCK:
+        _COMPILED.clear()
@@ -72,6 +72,11 @@ The supported subproperties for ``jwt_auth`` are as follows:
     (bool) _optional_.  If True (default), any JWT token that does not include an expiration time will be 
     rejected, and the client user will be set to anonymous.
 
+``cache``
+    (object) _optional_.  The configuration for caching verified tokens (see 
+    :py:class:`~nistoar.web.auth.methods.JWTAuthCache`), supporting ``capacity`` (the maximum number of 
+    tokens to cache; 0 disables caching) and ``ttl`` (the maximum seconds to cache a token).
+
 Most of the properties in a service configuration object will be treated as default configuration 
 parameters for configuring a particular version, or _convention_, of the service.  Convention-level 
 configuration will be merged with these properties (overriding the defaults) to produce the configuration 
@@ -148,7 +153,7 @@ from . import system
 from .dbio.base import DBClientFactory, AUTOADMIN
 from .dbio.wsgi import project as prj, DBIOHandler
 from nistoar.web.rest import (ServiceApp, Handler, Agent, AuthenticatedWSGIApp,
-                              authenticate_via_jwt)
+                              authenticate_via_jwt, JWTAuthCache, NISTOARClaimMapper)
 from .dap.service import mdsx, mds3
 from .dbio.inmem import InMemoryDBClientFactory
 from .dbio.fsbased import FSBasedDBClientFactory
@@ -612,6 +617,8 @@ class MIDASApp(AuthenticatedWSGIApp):
                                              str(self.cfg['authentication']))
             if not self.cfg['authentication'].get('require_expiration', True):
                 log.warning("JWT Authentication: token expiration is not required")
+        self.jwt_cache = JWTAuthCache((self.cfg.get('authentication') or {}).get('cache'))
+        self.claim_mapper = NISTOARClaimMapper()
 
         # Add the groups endpoint
         grp_svc_cfg = self.cfg.get("services", {}).get("group", {})
@@ -644,7 +651,8 @@ class MIDASApp(AuthenticatedWSGIApp):
         """
         authcfg = self.cfg.get('authentication')
         if authcfg:
-            return authenticate_via_jwt("midas", env, authcfg, self.log, agents, client_id)
+            return authenticate_via_jwt("midas", env, authcfg, self.log, agents, client_id,
+                                        claim_to_agent_func=self.claim_mapper, cache=self.jwt_cache)
 
         vehicle = client_id.split(':')[0] if client_id else "(unknown)"
         return Agent(vehicle, Agent.UNKN, Agent.ANONYMOUS, Agent.PUBLIC, agents)
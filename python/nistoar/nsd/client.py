@@ -11,6 +11,7 @@ import requests
 
 from . import NSDException, NSDServerError, NSDClientError, NSDResourceNotFound
 from nistoar.base.config import ConfigurationException
+from nistoar.web import transport
 
 NISTOrg = namedtuple('NISTOrg', "id title abbrev number")
 _org_prop_nm = {
@@ -106,7 +107,7 @@ class NSDClient:
         hdrs = self._authhdr
         
         try:
-            resp = requests.get(self.baseurl+relurl, headers=hdrs, **self._authkw)
+            resp = transport.get(self.baseurl+relurl, headers=hdrs, **self._authkw)
 
             if resp.status_code >= 500:
                 raise NSDServerError(relurl, resp.status_code, resp.reason)
@@ -145,7 +146,7 @@ class NSDClient:
         hdrs.update(self._authhdr)
         
         try:
-            resp = requests.post(self.baseurl+relurl, headers=hdrs, json=filter, **self._authkw)
+            resp = transport.post(self.baseurl+relurl, headers=hdrs, json=filter, **self._authkw)
 
             if resp.status_code >= 500:
                 raise NSDServerError(relurl, resp.status_code, resp.reason)
@@ -9,9 +9,10 @@ from typing import List, Iterator
 
 from .base import PeopleService
 from .. import NSDException, NSDServerError, NSDClientError, NSDResourceNotFound
+from ..sync.syncer import people_version
 from nistoar.base.config import ConfigurationException
 
-from pymongo import MongoClient
+from pymongo import MongoClient, ReplaceOne, DeleteMany
 from pymongo.errors import PyMongoError, OperationFailure
 
 class MongoPeopleService(PeopleService):
@@ -33,6 +34,7 @@ class MongoPeopleService(PeopleService):
 
     ORGS_COLL = "Orgs"
     PEOPLE_COLL = "People"
+    VERSIONS_COLL = "Versions"
 
     def __init__(self, mongourl, exactmatch=False):
         """
@@ -194,6 +196,26 @@ class MongoPeopleService(PeopleService):
         load the given data into the People collection.  This can be called multiple times
         """
         self._db['People'].insert_many(data)
+        self._set_people_version(None)
+
+    def _people_version(self, session=None) -> str:
+        # return the fingerprint of the people data last loaded (see nistoar.nsd.sync.people_version)
+        versions = self._db[self.VERSIONS_COLL]
+        if session:
+            versions = session.client[self._db.name][self.VERSIONS_COLL]
+        rec = versions.find_one({"_id": self.PEOPLE_COLL}, session=session)
+        return rec.get('version') if rec else None
+
+    def _set_people_version(self, version: str, session=None):
+        # record the fingerprint of the people data just loaded; None means it is unknown
+        versions = self._db[self.VERSIONS_COLL]
+        if session:
+            versions = session.client[self._db.name][self.VERSIONS_COLL]
+        if version:
+            versions.replace_one({"_id": self.PEOPLE_COLL}, {"_id": self.PEOPLE_COLL, "version": version},
+                                 upsert=True, session=session)
+        else:
+            versions.delete_one({"_id": self.PEOPLE_COLL}, session=session)
 
     def load_orgs(self, data: List[Mapping]):
         """
@@ -201,6 +223,30 @@ class MongoPeopleService(PeopleService):
         """
         self._db['Orgs'].insert_many(data)
 
+    def apply_people_diff(self, diff: Mapping, session=None) -> bool:
+        """
+        update the People collection with the differences between two syncs of the NSD data (as
+        produced by :py:func:`nistoar.nsd.sync.syncer.diff_people`).  The differences are only 
+        applied if the fingerprint of the people data currently loaded matches the diff's 
+        ``base_version``--i.e. the collection holds exactly the data from the previous sync that 
+        the differences are relative to.  
+        :param dict diff:  the differences to apply
+        :return:  True if the differences were applied, False if they were not applicable
+        """
+        people = self._db.People
+        if session:
+            people = session.client[self._db.name].People
+        if not diff.get('base_version') or self._people_version(session) != diff['base_version']:
+            return False
+
+        ops = [ReplaceOne({self.PERSON_ID_PROP: p[self.PERSON_ID_PROP]}, p, upsert=True)
+               for p in diff.get('added', []) + diff.get('changed', [])]
+        if diff.get('removed'):
+            ops.append(DeleteMany({self.PERSON_ID_PROP: {"$in": diff['removed']}}))
+        if ops:
+            people.bulk_write(ops, ordered=False, session=session)
+        self._set_people_version(diff.get('version'), session)
+        return True
 
     def load(self, config, log=None, clear=True, withtrans=False):
         """
@@ -217,6 +263,13 @@ class MongoPeopleService(PeopleService):
         ``org_file``
             the name of the file containing records describing that organizations the people are 
             assigned to.
+        ``people_diff_file``
+            the name of the file containing the differences in the people data since the previous
+            sync (default: "people-diff.json").  If this file exists, these differences will be 
+            applied to the People collection instead of reloading the entire person file, provided
+            the collection was loaded from the previous sync.  
+        ``use_people_diff``
+            if False, a full reload of the person file will always be done (default: True)
 
         :param dict config:  the configuration to use during loading (see above)
         :param Logger  log:  the Logger to send messages to
@@ -232,17 +285,42 @@ class MongoPeopleService(PeopleService):
             raise ConfigurationException(f"{datadir}: NSD data directory does not exist as a directory")
         personfile = config.get('person_file', "person.json")
         orgfile = config.get('org_file', "orgs.json")
+        difffile = None
+        if config.get('use_people_diff', True):
+            difffile = config.get('people_diff_file', "people-diff.json")
 #        if not os.path.isfile(os.path.join(datadir, personfile)):
 #           raise ConfigurationException(f"{personfile}: NSD data does not exist as a file in {datadir}")
 #        if not os.path.isfile(os.path.join(datadir, orgfile)):
 #           raise ConfigurationException(f"{orgfile}: NSD data does not exist as a file in {datadir}")
 
         if not withtrans:
-            self._load_notrans(datadir, personfile, orgfile, log, clear)
+            self._load_notrans(datadir, personfile, orgfile, log, clear, difffile)
         else:
-            self._load_notrans(datadir, personfile, orgfile, log, clear)
+            self._load_notrans(datadir, personfile, orgfile, log, clear, difffile)
+
+    def _apply_diff_file(self, datadir, difffile, log, session=None):
+        # apply the people diff file if it exists and is applicable; return True if it was applied
+        if not difffile or not os.path.isfile(os.path.join(datadir, difffile)):
+            return False
+        try:
+            with open(os.path.join(datadir, difffile)) as fd:
+                diff = json.load(fd)
+        except ValueError as ex:
+            if log:
+                log.warning("People diff file not parseable as JSON: %s: %s", difffile, str(ex))
+            return False
+
+        if not self.apply_people_diff(diff, session):
+            if log:
+                log.info("People diff not applicable to current data; doing full reload")
+            return False
+        if log:
+            log.info("Applied people changes: %d added, %d changed, %d removed",
+                     len(diff.get('added', [])), len(diff.get('changed', [])),
+                     len(diff.get('removed', [])))
+        return True
 
-    def _load_notrans(self, datadir, personfile, orgfile, log, clear):
+    def _load_notrans(self, datadir, personfile, orgfile, log, clear, difffile=None):
         people = self._db.People
         orgs = self._db.Orgs
 
@@ -256,10 +334,11 @@ class MongoPeopleService(PeopleService):
         if log:
             log.info("Updating the People database")
         
-        if os.path.exists(pfile):
+        if os.path.exists(pfile) and not self._apply_diff_file(datadir, difffile, log):
             if clear:
                 people.delete_many({})
-            self._load_file(people, personfile, datadir, log)
+            version = self._load_file(people, personfile, datadir, log, versioned=True)
+            self._set_people_version(version if clear else None)
         if os.path.exists(ofile):
             if clear:
                 orgs.delete_many({})
@@ -285,20 +364,25 @@ class MongoPeopleService(PeopleService):
                 if os.path.exists(ofile):
                     orgs.delete_many({}, session=session)
 
-            self._load_file(people, personfile, datadir, log, session)
+            version = self._load_file(people, personfile, datadir, log, session, versioned=True)
+            self._set_people_version(version if clear else None, session)
             self._load_file(orgs, orgfile, datadir, log, session)
 
         with self._cli.start_session() as session:
             session.with_transaction(_loadit)
 
-    def _load_file(self, mongocoll, file, dir='.', log=None, session=None):
+    def _load_file(self, mongocoll, file, dir='.', log=None, session=None, versioned=False):
+        # load the records in the given file; if versioned, return the fingerprint of the people data
+        # loaded (or None if nothing was loaded)
         try:
             datafile = os.path.join(dir, file)
             if log:
                 log.debug("Loading data from %s", datafile)
             with open(datafile) as fd:
                 data = json.load(fd)
+            version = people_version(data) if versioned else None
             mongocoll.insert_many(data, session=session)
+            return version
         except FileNotFoundError as ex:
             if log:
                 log.warning("Source data file not found: %s", datafile)
@@ -1,10 +1,12 @@
 """
 Implementation of the sync capabilities
 """
-import json
+import json, os, math, shutil, hashlib, logging
+from collections import OrderedDict
 from collections.abc import Mapping
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
 from pathlib import Path
-from typing import Union
+from typing import Union, List
 from io import TextIOBase
 
 from nistoar.base.config import ConfigurationException
@@ -12,12 +14,15 @@ from .. import NSDException, NSDServiceException
 
 import requests
 
+from nistoar.web import transport
+
 ORGANIZATIONS = "NISTOUDivisionGroup"
 PEOPLE = "People/list"
 PEOP_OUORGID_SEL="oU_ORG_ID"
 PEOP_PAGE_SZ=100
 TOOMANY=6000
 OU_LEV=1
+PERSON_ID_PROP="peopleID"
 
 class NSDSyncer:
     """
@@ -33,6 +38,19 @@ class NSDSyncer:
         ``org_file``
             _str_ (optional) the name of the file to contain records describing that organizations 
             the people are assigned to; default: ``orgs.json``
+        ``people_diff_file``
+            _str_ (optional) the name of the file to write the differences between the newly 
+            retrieved people records and those retrieved by the previous sync; default: 
+            ``people-diff.json``.  (See :py:func:`diff_people` for the format.)
+        ``max_workers``
+            _int_ (optional) the maximum number of requests to make to the NSD service 
+            concurrently; default: 4
+        ``page_size``
+            _int_ (optional) the number of people records to request at a time; default: 100
+        ``work_dir``
+            _str_ (optional) the name of the subdirectory (of ``dir``) where intermediate data is 
+            saved while syncing.  If a sync fails, this directory is left in place so that a 
+            subsequent sync can resume where it left off; default: ``_syncwork``
         ``source``
             _dict_ (required) a dictionary of parameters that describe the service from which to 
             pull the staff data
@@ -103,19 +121,294 @@ class NSDSyncer:
             with open(filepath, 'w') as fd:
                 json.dump(orgs, fd, indent=2)
 
-            if forous is None:
-                forous = [ou['orG_ID'] for ou in orgs if ou['orG_LVL_ID'] == OU_LEV]
+            forous = _resolve_ou_ids(forous, orgs)
             filepath = dir / self.cfg.get("person_file", "people.json")
-            with open(filepath, 'w') as fd:
-                out = _JSONListWriter(fd)
-                _write_nsd_people(out, baseep, forous, token)
-                out.done()
+            self.sync_people(dir, forous, token)
 
         except NSDException:
             raise
         except Exception as ex:
             raise NSDException(f"Failed to cache data to {filepath.name}: {str(ex)}")
 
+    def sync_people(self, dir: Path, ouids: List[int], token: str=None) -> Mapping:
+        """
+        retrieve the people records for the given OUs and write them into the configured person
+        file.  Requests for the OUs' pages of records are made concurrently (up to the configured
+        ``max_workers`` at a time), and the records are streamed to disk as they arrive.  As each 
+        OU is completed, it is recorded in a checkpoint file so that, should the sync fail, a 
+        subsequent call can resume by fetching only the incomplete OUs.  When all OUs are 
+        complete, the differences from the previously synced people data are written to the 
+        configured diff file (if previous data exists).
+
+        :param Path     dir:  the directory to write the people data into
+        :param [int]  ouids:  the (database) IDs of the OUs to retrieve people for
+        :param str    token:  the authentication token to use to access the service
+        :return:  a summary of the differences from the previous sync (with counts of the number
+                  of people added, changed, and removed) or None if there was no previous sync.
+        """
+        baseurl = self.cfg["source"]["service_endpoint"]
+        if not baseurl.endswith('/'):
+            baseurl += '/'
+        fullurl = baseurl + PEOPLE
+        pagesz = self.cfg.get("page_size", PEOP_PAGE_SZ)
+        log = logging.getLogger("nsdsync")
+
+        workdir = dir / self.cfg.get("work_dir", "_syncwork")
+        ckpt = _SyncCheckpoint(workdir, ouids)
+        pending = [ou for ou in ckpt.ous if ou not in ckpt.done]
+        if len(pending) < len(ckpt.ous):
+            log.info("Resuming people sync: %d of %d OUs already retrieved",
+                     len(ckpt.ous) - len(pending), len(ckpt.ous))
+
+        pool = ThreadPoolExecutor(max_workers=self.cfg.get("max_workers", 4))
+        try:
+            futs = {}
+            for ou in pending:
+                futs[pool.submit(_get_nsd_people_page, fullurl, ou, 1, token, pagesz)] = (ou, 1)
+
+            # if retrieving an OU fails, let the others finish (so that they are checkpointed)
+            # before raising the first failure
+            outstanding = {}
+            failure = None
+            failed = set()
+            while futs:
+                finished, notyet = wait(futs, return_when=FIRST_COMPLETED)
+                for fut in finished:
+                    ou, page = futs.pop(fut)
+                    if ou in failed:
+                        continue
+                    try:
+                        data = fut.result()
+                        if 'userInfo' not in data:
+                            raise NSDException(f"Unexpected {PEOPLE} output: missing 'userInfo' "
+                                               f"property: {data.keys()}")
+                    except Exception as ex:
+                        log.warning("Failed to retrieve people for OU %s: %s", ou, str(ex))
+                        failed.add(ou)
+                        if not failure:
+                            failure = ex
+                        continue
+                    ckpt.write_records(ou, data['userInfo'])
+
+                    if page == 1:
+                        total = data.get('totalCount', len(data['userInfo']))
+                        if total > TOOMANY:
+                            raise NSDException(f"Unexpectedly large number of people in OU {ou}: "
+                                               f"{total}")
+                        npages = max(math.ceil(total / pagesz), 1)
+                        for p in range(2, npages+1):
+                            futs[pool.submit(_get_nsd_people_page, fullurl, ou, p, token, pagesz)] = \
+                                (ou, p)
+                        outstanding[ou] = npages
+                    outstanding[ou] -= 1
+
+                    if outstanding[ou] <= 0:
+                        ckpt.complete(ou)
+                        log.debug("Retrieved people for OU %s", ou)
+
+            if failure:
+                raise failure
+
+        finally:
+            pool.shutdown(wait=True, cancel_futures=True)
+            ckpt.close()
+
+        # all OUs retrieved; assemble the final output
+        peoplefile = dir / self.cfg.get("person_file", "people.json")
+        indexfile = dir / (peoplefile.stem + "-index.json")
+        difffile = dir / self.cfg.get("people_diff_file", "people-diff.json")
+
+        previdx = None
+        if indexfile.is_file():
+            with open(indexfile) as fd:
+                previdx = json.load(fd)
+        elif peoplefile.is_file():
+            with open(peoplefile) as fd:
+                previdx = _index_people(json.load(fd))
+
+        tmpfile = dir / (peoplefile.name + ".tmp")
+        index = OrderedDict()
+        with open(tmpfile, 'w') as fd:
+            out = _JSONListWriter(fd)
+            for person in ckpt.iter_records():
+                pid = str(person.get(PERSON_ID_PROP))
+                if pid in index:
+                    continue
+                index[pid] = _digest(person)
+                out.append(person)
+            out.done()
+
+        diff = None
+        if previdx is not None:
+            diff = diff_people(previdx, index, ckpt.iter_records())
+            with open(difffile, 'w') as fd:
+                json.dump(diff, fd, indent=2)
+            log.info("People sync: %d added, %d changed, %d removed",
+                     len(diff['added']), len(diff['changed']), len(diff['removed']))
+        elif difffile.exists():
+            # a stale diff would not apply to the new data
+            difffile.unlink()
+
+        os.replace(tmpfile, peoplefile)
+        with open(indexfile, 'w') as fd:
+            json.dump(index, fd)
+        ckpt.clear()
+
+        if diff is None:
+            return None
+        return OrderedDict((k, len(diff[k])) for k in "added changed removed".split())
+
+
+def _resolve_ou_ids(forous, orgs: List[Mapping]) -> List[int]:
+    # convert a list of OU IDs and/or OU codes into a unique list of OU (database) IDs
+    ous = [ou for ou in orgs if ou['orG_LVL_ID'] == OU_LEV]
+    if not forous:
+        return [ou['orG_ID'] for ou in ous]
+
+    out = []
+    for ou in forous:
+        if isinstance(ou, str):
+            match = [o['orG_ID'] for o in ous if o['orG_CD'] == ou]
+            ou = match[0] if len(match) > 0 else -1
+        if ou >= 0 and ou not in out:
+            out.append(ou)
+    return out
+
+def _digest(person: Mapping) -> str:
+    return hashlib.sha1(json.dumps(person, sort_keys=True).encode('utf-8')).hexdigest()
+
+def _index_people(people: List[Mapping]) -> Mapping:
+    return OrderedDict((str(p.get(PERSON_ID_PROP)), _digest(p)) for p in people)
+
+def index_version(index: Mapping) -> str:
+    """
+    return a fingerprint of the version of the people data described by the given index.  Two 
+    versions of the data have the same fingerprint only if they contain the same person records.
+    :param Mapping index:  a mapping of person IDs to record digests
+    """
+    return hashlib.sha1(json.dumps(sorted(index.items())).encode('utf-8')).hexdigest()
+
+def people_version(people: List[Mapping]) -> str:
+    """
+    return a fingerprint of the version of the given people data (see :py:func:`index_version`)
+    """
+    return index_version(_index_people(people))
+
+def diff_people(previdx: Mapping, newidx: Mapping, newpeople) -> Mapping:
+    """
+    compute the differences between two versions of the people data.  The output is a dictionary
+    with the following properties:
+
+    ``base_count``
+        the number of people in the previous version of the data
+    ``count``
+        the number of people in the new version of the data
+    ``base_version``
+        the fingerprint of the previous version of the data (see :py:func:`index_version`); the 
+        differences only apply to data with this fingerprint
+    ``version``
+        the fingerprint of the new version of the data, which the differences produce
+    ``added``
+        the list of person records that appear in the new data but not the previous data
+    ``changed``
+        the list of (new) person records that have changed since the previous data
+    ``removed``
+        the list of the IDs of people that appear in the previous data but not the new data
+
+    :param Mapping previdx:  a mapping of person IDs to record digests for the previous data
+    :param Mapping  newidx:  a mapping of person IDs to record digests for the new data
+    :param Iterable newpeople:  an iterable over the new person records
+    """
+    out = OrderedDict([("base_count", len(previdx)), ("count", len(newidx)),
+                       ("base_version", index_version(previdx)), ("version", index_version(newidx)),
+                       ("added", []), ("changed", []), ("removed", [])])
+    seen = set()
+    for person in newpeople:
+        pid = str(person.get(PERSON_ID_PROP))
+        if pid in seen:
+            continue
+        seen.add(pid)
+        if pid not in previdx:
+            out['added'].append(person)
+        elif previdx[pid] != newidx.get(pid):
+            out['changed'].append(person)
+    out['removed'] = [(int(pid) if pid.isdigit() else pid) for pid in previdx if pid not in newidx]
+    return out
+
+class _SyncCheckpoint:
+    """
+    the intermediate state of a people sync.  As the people records for an OU are retrieved, they
+    are appended (as JSON lines) to a "part" file in the work directory; when all of the OU's 
+    records are retrieved, the file is renamed and the OU is recorded as done in a checkpoint file.
+    """
+    CKPT_FILE = "checkpoint.json"
+
+    def __init__(self, workdir: Path, ouids: List[int]):
+        self.dir = workdir
+        self.ous = sorted(ouids)
+        self.done = set()
+        self._parts = {}
+
+        ckptf = self.dir / self.CKPT_FILE
+        if ckptf.is_file():
+            try:
+                with open(ckptf) as fd:
+                    data = json.load(fd)
+                if data.get('ous') == self.ous:
+                    self.done = set([ou for ou in data.get('done', [])
+                                        if (self.dir / self._ou_file(ou)).is_file()])
+            except ValueError:
+                pass
+        if not self.done and self.dir.exists():
+            shutil.rmtree(self.dir)
+        if not self.dir.exists():
+            self.dir.mkdir()
+        self._save()
+
+    def _ou_file(self, ou):
+        return f"ou-{ou}.jsonl"
+
+    def _save(self):
+        tmpf = self.dir / (self.CKPT_FILE + ".tmp")
+        with open(tmpf, 'w') as fd:
+            json.dump({"ous": self.ous, "done": sorted(self.done)}, fd)
+        os.replace(tmpf, self.dir / self.CKPT_FILE)
+
+    def write_records(self, ou: int, recs: List[Mapping]):
+        if ou not in self._parts:
+            self._parts[ou] = open(self.dir / (self._ou_file(ou)+".part"), 'w')
+        fd = self._parts[ou]
+        for rec in recs:
+            fd.write(json.dumps(rec))
+            fd.write("\n")
+
+    def complete(self, ou: int):
+        partf = self.dir / (self._ou_file(ou)+".part")
+        if ou in self._parts:
+            self._parts.pop(ou).close()
+        else:
+            partf.touch()
+        os.replace(partf, self.dir / self._ou_file(ou))
+        self.done.add(ou)
+        self._save()
+
+    def close(self):
+        for fd in self._parts.values():
+            fd.close()
+        self._parts = {}
+
+    def iter_records(self):
+        for ou in self.ous:
+            with open(self.dir / self._ou_file(ou)) as fd:
+                for line in fd:
+                    if line.strip():
+                        yield json.loads(line)
+
+    def clear(self):
+        self.close()
+        if self.dir.exists():
+            shutil.rmtree(self.dir)
+
 
 def get_nsd_people(baseurl: str, forous=None, token: str=None) -> list[Mapping]:
     """
@@ -159,6 +452,8 @@ class _JSONListWriter:
             self.append(item)
 
     def done(self):
+        if self.count == 0:
+            self.ostrm.write("[")
         self.ostrm.write("\n]\n")
     
 
@@ -203,19 +498,20 @@ def _write_nsd_ou_people(out: Union[list,_JSONListWriter], fullurl: str, ouid: i
 
     return out
 
-def _get_nsd_people_page(fullurl: str, ouid: int, page=1, token: str=None) -> Mapping:
+def _get_nsd_people_page(fullurl: str, ouid: int, page=1, token: str=None,
+                         pagesize: int=PEOP_PAGE_SZ) -> Mapping:
     hdrs = { "Accept": "application/json", "Content-type": "application/json" }
     if token:
         hdrs["Authorization"] = f"Bearer {token}"
 
     payload = {
-        "pageSize": PEOP_PAGE_SZ,
+        "pageSize": pagesize,
         "pageIndex": page,
         PEOP_OUORGID_SEL: [ ouid ]
     }
 
     try:
-        resp = requests.post(fullurl, data=json.dumps(payload).encode('utf-8'), headers=hdrs)
+        resp = transport.post(fullurl, data=json.dumps(payload).encode('utf-8'), headers=hdrs)
         if resp.status_code >= 300:
             raise NSDServiceException(fullurl, resp.status_code, resp.reason,
                   f"Failed to obtain people from {PEOPLE}: {resp.reason} ({resp.status_code})")
@@ -245,7 +541,7 @@ def get_nsd_orgs(baseurl: str, token: str=None) -> list[Mapping]:
         hdrs["Authorization"] = f"Bearer {token}"
 
     try:
-        resp = requests.get(fullurl, headers=hdrs)
+        resp = transport.get(fullurl, headers=hdrs)
         if resp.status_code >= 300:
             raise NSDServiceException(fullurl, resp.status_code, resp.reason,
                   f"Failed to obtain orgs from {ORGANIZATIONS}: {resp.reason} ({resp.status_code})")
@@ -296,7 +592,7 @@ def get_nsd_auth_token(tscfg: Mapping):
 
     try: 
         url = tscfg['service_endpoint']
-        resp = requests.post(url, data=payload, headers=hdrs)
+        resp = transport.post(url, data=payload, headers=hdrs)
         if resp.status_code >= 300:
             raise NSDServiceException(url, resp.status_code, resp.reason,
                     f"Failed to obtain NSD auth token from {url}: {resp.reason} ({resp.status_code})")
@@ -8,7 +8,8 @@ from collections.abc import Mapping, Callable
 from typing import List
 
 from ..service import MongoPeopleService, PeopleService, NSDClientError
-from nistoar.web.rest import ServiceApp, Handler, WSGIServiceApp, authenticate_via_jwt
+from nistoar.web.rest import (ServiceApp, Handler, WSGIServiceApp, authenticate_via_jwt, JWTAuthCache,
+                              NISTOARClaimMapper)
 from nistoar.pdr.utils.prov import Agent
 from nistoar.base.config import ConfigurationException
 from .. import system
@@ -195,13 +196,16 @@ class NSDApp(WSGIServiceApp):
                                              str(self.cfg['authentication']))
             if not self.cfg['authentication'].get('require_expiration', True):
                 log.warning("JWT Authentication: token expiration is not required")
+        self.jwt_cache = JWTAuthCache((self.cfg.get('authentication') or {}).get('cache'))
+        self.claim_mapper = NISTOARClaimMapper()
 
     def authenticate_user(self, env: Mapping, agents: List[str]=None, client_id: str=None) -> Agent:
         """
         determine the authenticated user
         """
         authcfg = self.cfg.get('authentication', {})
-        return authenticate_via_jwt("midas", env, authcfg, self.log, agents, client_id)
+        return authenticate_via_jwt("midas", env, authcfg, self.log, agents, client_id,
+                                    claim_to_agent_func=self.claim_mapper, cache=self.jwt_cache)
 
 
 app = NSDApp
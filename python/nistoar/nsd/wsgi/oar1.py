@@ -14,7 +14,8 @@ from urllib.parse import parse_qs
 from .nsd1 import NSDHandler
 from ..service import MongoPeopleService, PeopleService, NSDClientError
 from nistoar.web.formats import (FormatSupport, Format, UnsupportedFormat, Unacceptable)
-from nistoar.web.rest import ServiceApp, Handler, WSGIServiceApp, authenticate_via_jwt, NotFoundHandler
+from nistoar.web.rest import ServiceApp, Handler, WSGIServiceApp, authenticate_via_jwt, NotFoundHandler, \
+                              JWTAuthCache, NISTOARClaimMapper
 from nistoar.web.rest.jsonerr import ErrorHandling
 from nistoar.pdr.utils.prov import Agent
 from nistoar.midas.dbio import index
@@ -466,13 +467,16 @@ class PeopleApp(WSGIServiceApp):
                                              str(self.cfg['authentication']))
             if not self.cfg['authentication'].get('require_expiration', True):
                 log.warning("JWT Authentication: token expiration is not required")
+        self.jwt_cache = JWTAuthCache((self.cfg.get('authentication') or {}).get('cache'))
+        self.claim_mapper = NISTOARClaimMapper()
 
     def authenticate_user(self, env: Mapping, agents: List[str]=None, client_id: str=None) -> Agent:
         """
         determine the authenticated user
         """
         authcfg = self.cfg.get('authentication', {})
-        return authenticate_via_jwt("nsd", env, authcfg, self.log, agents, client_id)
+        return authenticate_via_jwt("nsd", env, authcfg, self.log, agents, client_id,
+                                    claim_to_agent_func=self.claim_mapper, cache=self.jwt_cache)
 
     def load(self):
         """
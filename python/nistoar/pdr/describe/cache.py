@@ -0,0 +1,232 @@
+"""
+a module providing a caching version of the RMM :py:class:`~nistoar.pdr.describe.rmm.MetadataClient`.
+
+Responses from the RMM are cached in two tiers:  a small, in-memory least-recently-used (LRU)
+cache and (optionally) a persistent store on disk.  Cached responses are revalidated with the
+RMM using the ``ETag`` and ``Last-Modified`` headers returned with the original response (when
+the RMM provides them), so unchanged records need not be re-transferred or re-parsed.  When the
+RMM is unreachable, the client can serve previously cached responses ("offline" mode).
+"""
+import os, json, time, hashlib, logging, threading, tempfile
+from collections import OrderedDict
+from collections.abc import Mapping
+from copy import deepcopy
+
+import requests
+
+from .rmm import MetadataClient, RMMServerError
+from ..exceptions import IDNotFound, StateException
+
+log = logging.getLogger(__name__)
+
+DEF_MEM_CAPACITY = 100
+
+class MetadataCache(object):
+    """
+    a two-tier cache of JSON responses from the RMM keyed by request URL.  Each entry is a
+    dictionary with the following properties:
+
+    ``url``
+         the URL whose response is cached
+    ``body``
+         the parsed JSON response body
+    ``etag``
+         the value of the ``ETag`` header returned with the response (or None)
+    ``lastmod``
+         the value of the ``Last-Modified`` header returned with the response (or None)
+    ``checked``
+         the epoch time when the response was last retrieved or revalidated with the service
+
+    The in-memory tier holds a limited number of the most recently used entries; the disk tier
+    (if a cache directory is provided) holds all entries ever saved, one JSON file per URL.
+    """
+
+    def __init__(self, cachedir: str=None, capacity: int=DEF_MEM_CAPACITY):
+        """
+        create the cache
+        :param str cachedir:  the directory where entries should be persisted; if None, entries
+                              will only be held in memory.
+        :param int capacity:  the maximum number of entries to hold in memory
+        :raises StateException:  if `cachedir` is provided but is not an existing directory
+        """
+        if cachedir and not os.path.isdir(cachedir):
+            raise StateException("%s: metadata cache directory not found" % cachedir)
+        self._dir = cachedir
+        self.capacity = capacity
+        self._mem = OrderedDict()
+        self._lock = threading.RLock()
+
+    @property
+    def cachedir(self) -> str:
+        """
+        the directory where cache entries are persisted (or None if the cache is memory-only)
+        """
+        return self._dir
+
+    def _entry_file(self, url):
+        return os.path.join(self._dir, hashlib.sha256(url.encode('utf-8')).hexdigest()+".json")
+
+    def get(self, url: str) -> Mapping:
+        """
+        return the cache entry for the given URL or None if the URL is not cached.  The returned
+        entry should be treated as read-only.
+        """
+        with self._lock:
+            if url in self._mem:
+                self._mem.move_to_end(url)
+                return self._mem[url]
+
+        if not self._dir:
+            return None
+        entf = self._entry_file(url)
+        if not os.path.isfile(entf):
+            return None
+        try:
+            with open(entf) as fd:
+                entry = json.load(fd, object_pairs_hook=OrderedDict)
+        except (IOError, ValueError) as ex:
+            log.warning("Unable to read cached RMM response from %s: %s", entf, str(ex))
+            return None
+        if entry.get('url') != url:
+            return None
+
+        self._remember(url, entry)
+        return entry
+
+    def put(self, url: str, body, etag: str=None, lastmod: str=None) -> Mapping:
+        """
+        save a response to the cache
+        :param str url:      the URL the response came from
+        :param body:         the parsed JSON body of the response
+        :param str etag:     the value of the ETag header that came with the response
+        :param str lastmod:  the value of the Last-Modified header that came with the response
+        :return:  the saved cache entry
+        """
+        entry = OrderedDict([("url", url), ("etag", etag), ("lastmod", lastmod),
+                             ("checked", time.time()), ("body", body)])
+        self._remember(url, entry)
+        self._persist(entry)
+        return entry
+
+    def touch(self, url: str):
+        """
+        record that the cached response for the given URL was just revalidated with the service
+        """
+        entry = self.get(url)
+        if entry:
+            entry['checked'] = time.time()
+            self._persist(entry)
+
+    def _remember(self, url, entry):
+        with self._lock:
+            self._mem[url] = entry
+            self._mem.move_to_end(url)
+            while len(self._mem) > self.capacity:
+                self._mem.popitem(last=False)
+
+    def _persist(self, entry):
+        if not self._dir:
+            return
+        entf = self._entry_file(entry['url'])
+        try:
+            # write to a temp file and rename so that readers never see a partial entry
+            fd, tmpf = tempfile.mkstemp(dir=self._dir, suffix=".tmp")
+            with os.fdopen(fd, 'w') as fd:
+                json.dump(entry, fd)
+            os.replace(tmpf, entf)
+        except (IOError, OSError, TypeError) as ex:
+            log.warning("Unable to persist RMM response to %s: %s", entf, str(ex))
+
+    def forget(self, url: str):
+        """
+        remove the entry for the given URL from the cache (in both tiers)
+        """
+        with self._lock:
+            self._mem.pop(url, None)
+        if self._dir:
+            entf = self._entry_file(url)
+            if os.path.exists(entf):
+                os.remove(entf)
+
+    def clear_memory(self):
+        """
+        empty the in-memory tier of the cache.  Entries persisted on disk are retained.
+        """
+        with self._lock:
+            self._mem.clear()
+
+class CachingMetadataClient(MetadataClient):
+    """
+    an RMM :py:class:`~nistoar.pdr.describe.rmm.MetadataClient` that caches the responses it
+    receives from the RMM.
+
+    This class supports the following configuration parameters:
+
+    ``max_age``
+         the number of seconds after retrieval (or revalidation) that a cached response may be
+         returned without revalidating it with the RMM (default: 0, always revalidate)
+    ``mem_capacity``
+         the maximum number of responses to hold in memory (default: 100)
+    ``offline``
+         if True, the RMM will never be contacted; only cached responses will be returned
+         (default: False)
+    ``serve_stale_on_error``
+         if True (default), a cached response will be returned (regardless of its age) if the
+         RMM cannot be reached or returns a server error.
+    """
+
+    def __init__(self, baseurl: str, cachedir: str=None, config: Mapping=None,
+                 session: requests.Session=None):
+        """
+        set up the client
+        :param str baseurl:   the base URL for the RMM service
+        :param str cachedir:  the directory where responses should be persisted; if not provided,
+                              responses will only be cached in memory.
+        :param Mapping config:  the configuration for this client (see class documentation)
+        :param requests.Session session:  the HTTP session to use for all requests to the RMM
+        """
+        super(CachingMetadataClient, self).__init__(baseurl, session)
+        if not config:
+            config = {}
+        self.cfg = config
+        self.max_age = self.cfg.get('max_age', 0)
+        self.offline = self.cfg.get('offline', False)
+        self.stale_ok = self.cfg.get('serve_stale_on_error', True)
+        self.cache = MetadataCache(cachedir, self.cfg.get('mem_capacity', DEF_MEM_CAPACITY))
+
+    def _retrieve(self, url, id):
+        entry = self.cache.get(url)
+        if entry and (self.offline or time.time() - entry.get('checked', 0) < self.max_age):
+            return deepcopy(entry['body'])
+        if self.offline:
+            raise RMMServerError(id, message="RMM is offline, and response is not cached: "+url)
+
+        hdrs = { "Accept": "application/json" }
+        if entry and entry.get('etag'):
+            hdrs['If-None-Match'] = entry['etag']
+        if entry and entry.get('lastmod'):
+            hdrs['If-Modified-Since'] = entry['lastmod']
+
+        try:
+            resp = self._session.get(url, headers=hdrs)
+        except requests.RequestException as ex:
+            if entry and self.stale_ok:
+                log.warning("RMM unreachable (%s); returning cached response for %s", str(ex), id)
+                return deepcopy(entry['body'])
+            raise RMMServerError(id,
+                                 message="Trouble connecting to metadata"
+                                 +" service: "+ str(ex), cause=ex)
+
+        if resp.status_code == 304 and entry:
+            self.cache.touch(url)
+            return deepcopy(entry['body'])
+        if resp.status_code >= 500 and entry and self.stale_ok:
+            log.warning("RMM server error (%s %s); returning cached response for %s",
+                        resp.status_code, resp.reason, id)
+            return deepcopy(entry['body'])
+        if resp.status_code == 404 and entry:
+            self.cache.forget(url)
+
+        out = self._handle_response(resp, id)
+        self.cache.put(url, out, resp.headers.get('ETag'), resp.headers.get('Last-Modified'))
+        return deepcopy(out)
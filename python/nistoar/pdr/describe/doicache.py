@@ -0,0 +1,184 @@
+"""
+a module providing a caching, batch-capable front end to the DOI resolver used to convert DOIs into
+NERDm metadata (:py:class:`nistoar.nerdm.convert.doi.DOIResolver`).
+
+Resolving a DOI requires one or more requests to remote DOI services (e.g. doi.org and Crossref or
+DataCite), so resolving the many references cited by a typical paper one at a time can be slow.
+The :py:class:`CachingDOIResolver` keeps the NERDm descriptions it produces in a
+:py:class:`~nistoar.pdr.describe.cache.MetadataCache` (optionally persisted to disk so that the
+results can be shared across processes and restarts), remembers for a shorter time the DOIs found
+not to exist, and can resolve a batch of DOIs concurrently.
+"""
+import os, re, time, logging, threading
+from collections import OrderedDict
+from collections.abc import Mapping
+from concurrent.futures import ThreadPoolExecutor
+from copy import deepcopy
+from typing import List
+
+from nistoar.nerdm.convert.doi import DOIResolver
+from nistoar.doi import DOIDoesNotExist, DOIResolutionException
+from .cache import MetadataCache, DEF_MEM_CAPACITY
+
+log = logging.getLogger(__name__)
+
+DEF_TTL = 7 * 24 * 3600
+DEF_NOT_FOUND_TTL = 3600
+DEF_MAX_WORKERS = 8
+
+REFERENCE = "ref"
+AUTHORS = "authors"
+
+_doiprefix_pat = re.compile(r'^((https?://(dx\.)?doi\.org/)|(doi:))', re.I)
+def doi_key(doi: str) -> str:
+    """
+    return a normalized form of a DOI suitable for use as a cache key.  Any resolver URL base or
+    "doi:" prefix is removed, and the result is lower-cased (as DOIs are case-insensitive).
+    """
+    return _doiprefix_pat.sub('', doi.strip()).lower()
+
+_caches = {}
+_caches_lock = threading.Lock()
+def _cache_for(cachedir, capacity):
+    # instances persisting to the same directory share a single cache (and its memory tier)
+    if not cachedir:
+        return MetadataCache(None, capacity)
+    cachedir = os.path.abspath(cachedir)
+    with _caches_lock:
+        if cachedir not in _caches:
+            if not os.path.exists(cachedir):
+                os.makedirs(cachedir)
+            _caches[cachedir] = MetadataCache(cachedir, capacity)
+        return _caches[cachedir]
+
+class CachingDOIResolver(object):
+    """
+    a wrapper around a :py:class:`~nistoar.nerdm.convert.doi.DOIResolver` that caches the NERDm
+    references and author lists it creates.  It can be used wherever a ``DOIResolver`` is used to
+    call :py:meth:`to_reference` and :py:meth:`to_authors`.
+
+    This class supports the following configuration parameters:
+
+    ``dir``
+         the directory where resolved metadata should be persisted; if not set, metadata will only
+         be cached in memory.
+    ``ttl``
+         the number of seconds that resolved metadata may be returned from the cache before it must
+         be resolved again (default: one week)
+    ``not_found_ttl``
+         the number of seconds to remember that a DOI does not exist (default: one hour)
+    ``mem_capacity``
+         the maximum number of results to hold in memory (default: 100)
+    ``max_workers``
+         the maximum number of DOIs to resolve at once when resolving a batch (default: 8)
+    ``serve_stale_on_error``
+         if True (default), expired metadata will be returned if the DOI services cannot be reached
+         or otherwise fail.
+    """
+
+    def __init__(self, resolver: DOIResolver, config: Mapping=None, logger: logging.Logger=None):
+        """
+        wrap a DOIResolver
+        :param DOIResolver resolver:  the resolver to use to resolve DOIs not in the cache
+        :param Mapping       config:  the cache configuration (see class documentation)
+        :param Logger        logger:  the logger to use for messages
+        """
+        if config is None:
+            config = {}
+        self.resolver = resolver
+        self.cfg = config
+        self.log = logger or log
+        self.ttl = self.cfg.get('ttl', DEF_TTL)
+        self.not_found_ttl = self.cfg.get('not_found_ttl', DEF_NOT_FOUND_TTL)
+        self.max_workers = max(1, self.cfg.get('max_workers', DEF_MAX_WORKERS))
+        self.stale_ok = self.cfg.get('serve_stale_on_error', True)
+        self.cache = _cache_for(self.cfg.get('dir'), self.cfg.get('mem_capacity', DEF_MEM_CAPACITY))
+
+    @classmethod
+    def from_config(cls, config: Mapping, logger: logging.Logger=None):
+        """
+        create a caching resolver from the configuration for a DOIResolver.  The cache is
+        configured via its ``cache`` parameter (see the class documentation for its properties).
+        """
+        return cls(DOIResolver.from_config(config), config.get('cache'), logger)
+
+    def _resolve(self, kind, doi):
+        key = "%s:%s" % (kind, doi_key(doi))
+        entry = self.cache.get(key)
+        if entry:
+            found = entry['body'] is not None
+            if time.time() - entry.get('checked', 0) < (self.ttl if found else self.not_found_ttl):
+                if not found:
+                    raise DOIDoesNotExist(doi)
+                return deepcopy(entry['body'])
+
+        try:
+            if kind == AUTHORS:
+                out = self.resolver.to_authors(doi)
+            else:
+                out = self.resolver.to_reference(doi)
+
+        except DOIDoesNotExist:
+            self.cache.put(key, None)
+            raise
+
+        except DOIResolutionException as ex:
+            if entry and entry['body'] is not None and self.stale_ok:
+                self.log.warning("Trouble resolving DOI (%s); returning cached metadata for %s",
+                                 str(ex), doi)
+                return deepcopy(entry['body'])
+            raise
+
+        self.cache.put(key, out)
+        return deepcopy(out)
+
+    def to_reference(self, doi: str) -> Mapping:
+        """
+        return a NERDm reference describing the resource identified by the given DOI
+        :raises DOIDoesNotExist:  if the DOI is not registered
+        :raises DOIResolutionException:  if some other error occurs while resolving the DOI
+        """
+        return self._resolve(REFERENCE, doi)
+
+    def to_authors(self, doi: str) -> List[Mapping]:
+        """
+        return the list of NERDm authors of the resource identified by the given DOI
+        :raises DOIDoesNotExist:  if the DOI is not registered
+        :raises DOIResolutionException:  if some other error occurs while resolving the DOI
+        """
+        return self._resolve(AUTHORS, doi)
+
+    def resolve_batch(self, dois: List[str], kind: str=REFERENCE) -> Mapping:
+        """
+        resolve a list of DOIs concurrently, returning an ordered mapping of each given DOI to its
+        NERDm description.  A DOI that could not be resolved is mapped to the exception that was
+        raised (e.g. :py:class:`~nistoar.doi.DOIDoesNotExist`) rather than causing this method to
+        fail.  Duplicate DOIs (in any of their equivalent forms) are only resolved once.
+        :param list dois:  the DOIs to resolve
+        :param str  kind:  the type of NERDm metadata to return:  "ref" for a reference (the
+                           default) or "authors" for an author list.
+        """
+        if kind not in (REFERENCE, AUTHORS):
+            raise ValueError("resolve_batch(): unsupported kind: " + str(kind))
+
+        def resolve(doi):
+            try:
+                return self._resolve(kind, doi)
+            except Exception as ex:
+                return ex
+
+        uniq = OrderedDict()
+        for doi in dois:
+            uniq.setdefault(doi_key(doi), doi)
+
+        if len(uniq) > 1 and self.max_workers > 1:
+            with ThreadPoolExecutor(min(self.max_workers, len(uniq))) as pool:
+                results = dict(zip(uniq.keys(), pool.map(resolve, uniq.values())))
+        else:
+            results = dict((k, resolve(d)) for k, d in uniq.items())
+
+        out = OrderedDict()
+        for doi in dois:
+            res = results[doi_key(doi)]
+            out[doi] = deepcopy(res) if not isinstance(res, Exception) else res
+        return out
@@ -8,7 +8,7 @@ from collections.abc import Mapping
 
 import requests
 
-from . import altbig, rmm
+from . import altbig, rmm, cache
 from ..exceptions import PDRServiceException, PDRServerError, IDNotFound, StateException
 from .. import constants as const
 
@@ -25,14 +25,22 @@ class MetadataClient(object):
     :py:module:`~nistoar.pdr.describe.altbig` modules to deliver complete record.  
     """
 
-    def __init__(self, baseurl: str, cachedir: str=None):
+    def __init__(self, baseurl: str, cachedir: str=None, config: Mapping=None):
         """
         setup the client
         :param str baseurl:   the base URL for the RMM service
         :param str cachedir:  the root directory for the alternate file cache, if not provided
                               records will only be retrieved from RMM.
+        :param Mapping config:  the configuration for the RMM response cache.  If provided, 
+                              responses from the RMM will be cached via a 
+                              :py:class:`~nistoar.pdr.describe.cache.CachingMetadataClient`; the 
+                              ``cache_dir`` parameter sets the directory where responses are 
+                              persisted, and the other parameters are as supported by that class.
         """
-        self._rmmcli = rmm.MetadataClient(baseurl)
+        if config is not None:
+            self._rmmcli = cache.CachingMetadataClient(baseurl, config.get('cache_dir'), config)
+        else:
+            self._rmmcli = rmm.MetadataClient(baseurl)
         self._altcli = None
         if cachedir:
             self._altcli = altbig.MetadataClient(cachedir)
@@ -78,3 +86,16 @@ class MetadataClient(object):
                             otherwise, all matching versions will be returned.
         """
         return self._rmmcli.search(query, latest)
+
+    def iter_search(self, query=None, latest=True, pagesize: int=None):
+        """
+        iterate through the NERDm records matching a given query, requesting them from the RMM
+        a page at a time.  
+
+        :param dict query:  a dictionary whose properties specify the RMM search query parameters by name
+        :param bool latest: if True (default), only the latest versions of resources will be returned; 
+                            otherwise, all matching versions will be returned.
+        :param int pagesize:  the maximum number of records to request from the RMM at a time; if 
+                            not provided, all matching records will be requested in a single call.
+        """
+        return self._rmmcli.iter_search(query, latest, pagesize)
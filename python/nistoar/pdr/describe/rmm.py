@@ -8,6 +8,8 @@ from collections.abc import Mapping
 
 import requests
 
+from nistoar.web import transport
+
 from ..exceptions import PDRServiceException, PDRServerError, IDNotFound, StateException
 from .. import constants as const
 
@@ -26,10 +28,26 @@ class MetadataClient(object):
     COLL_VERSIONS = "versions"
     COLL_RELEASES = "releasesets"
 
-    def __init__(self, baseurl: str):
+    # the number of the first page of search results (used by iter_search())
+    SEARCH_FIRST_PAGE = 1
+
+    # the maximum number of pages of search results iter_search() will request
+    SEARCH_MAX_PAGES = 10000
+
+    def __init__(self, baseurl: str, session: requests.Session=None):
+        """
+        set up the client
+        :param str baseurl:   the base URL for the RMM service
+        :param requests.Session session:  the HTTP session to use for all requests to the RMM; 
+                              if not provided, the shared, pooled transport from 
+                              :py:mod:`nistoar.web.transport` will be used.
+        """
         self.baseurl = baseurl
         if not self.baseurl.endswith('/'):
             self.baseurl += '/'
+        if not session:
+            session = transport.get_transport()
+        self._session = session
 
     def describe(self, id: str, version: str=None) -> Mapping:
         """
@@ -218,8 +236,16 @@ class MetadataClient(object):
     def _retrieve(self, url, id):
         hdrs = { "Accept": "application/json" }
         try:
-            resp = requests.get(url, headers=hdrs)
+            resp = self._session.get(url, headers=hdrs)
+        except requests.RequestException as ex:
+            raise RMMServerError(id,
+                                 message="Trouble connecting to distribution"
+                                 +" service: "+ str(ex), cause=ex)
+        return self._handle_response(resp, id)
 
+    def _handle_response(self, resp, id):
+        # check the status of a response to a describe request and return its parsed content
+        try:
             if resp.status_code >= 500:
                 raise RMMServerError(id, resp.status_code, resp.reason)
             elif resp.status_code == 404:
@@ -254,10 +280,6 @@ class MetadataClient(object):
                 raise RMMServerError(id,
                                      message="Unable to parse response as "+
                                      "JSON (is service URL correct?)")
-        except requests.RequestException as ex:
-            raise RMMServerError(id,
-                                 message="Trouble connecting to distribution"
-                                 +" service: "+ str(ex), cause=ex)
 
     def search(self, query=None, latest=True):
         """
@@ -270,16 +292,77 @@ class MetadataClient(object):
         :param bool latest: if True (default), only the latest versions of resources will be returned; 
                             otherwise, all matching versions will be returned.
         """
+        return self._search_page(self._search_url(query, latest))['ResultData']
+
+    def iter_search(self, query=None, latest=True, pagesize: int=None):
+        """
+        iterate through the NERDm records matching a given query.  Unlike :py:meth:`search`, this
+        method will request the matching records from the RMM a page at a time, so that the full
+        set of matches need not be held in memory at once.  A record returned on more than one page
+        (as identified by its ``@id``) is only yielded once, and the iteration ends if a page 
+        returns no new records.  
+
+        :param dict query:  a dictionary whose properties specify the RMM search query parameters by name
+        :param bool latest: if True (default), only the latest versions of resources will be returned; 
+                            otherwise, all matching versions will be returned.
+        :param int pagesize:  the maximum number of records to request from the RMM at a time; if 
+                            not provided (or less than 1), all matching records will be requested 
+                            in a single call.
+        :raises RMMServerError:  if the results do not end within ``SEARCH_MAX_PAGES`` pages
+        """
+        if not pagesize or pagesize < 1:
+            for rec in self.search(query, latest):
+                yield rec
+            return
+
+        page = self.SEARCH_FIRST_PAGE
+        count = 0
+        seen = set()
+        lastrecs = None
+        while True:
+            if page - self.SEARCH_FIRST_PAGE >= self.SEARCH_MAX_PAGES:
+                raise RMMServerError("records", message="Search results did not end after %d pages"
+                                                        % self.SEARCH_MAX_PAGES)
+            pquery = OrderedDict(query or {})
+            pquery['page'] = page
+            pquery['size'] = pagesize
+            out = self._search_page(self._search_url(pquery, latest))
+            recs = out.get('ResultData', [])
+            if recs and recs == lastrecs:
+                # the service is ignoring the page request
+                break
+
+            added = 0
+            for rec in recs:
+                recid = rec.get('@id')
+                if recid is not None:
+                    if recid in seen:
+                        continue
+                    seen.add(recid)
+                added += 1
+                yield rec
+            count += len(recs)
+
+            if len(recs) < pagesize or not added:
+                break
+            if isinstance(out.get('ResultCount'), int) and count >= out['ResultCount']:
+                break
+            if out.get('PageSize', pagesize) > pagesize:
+                # the service does not appear to support paging; we got everything
+                break
+            lastrecs = recs
+            page += 1
+
+    def _search_url(self, query, latest):
         qstr = ""
         if query:
             qstr = "&".join(["%s=%s" % i for i in query.items()])
-        url = self.baseurl + \
-              ((latest and "records?") or "versions?") + \
-              qstr
+        return self.baseurl + ((latest and "records?") or "versions?") + qstr
 
+    def _search_page(self, url):
         hdrs = { "Accept": "application/json" }
         try:
-            resp = requests.get(url, headers=hdrs)
+            resp = self._session.get(url, headers=hdrs)
 
             if resp.status_code >= 500:
                 raise RMMServerError("records", resp.status_code, resp.reason)
@@ -295,22 +378,22 @@ class MetadataClient(object):
             if "Message" in out and "ResultData" not in out:
                 if "No record available" in out['Message']:
                     # RMM should have responded with 404!
-                    return []
+                    return { "ResultCount": 0, "ResultData": [] }
                 raise RMMServerError("records", message="Unexpected response: "+
                                      out['Message'])
 
-            return out['ResultData']
+            return out
         except ValueError as ex:
             if resp.text and ("<body" in resp.text or "<BODY" in resp.text):
-                raise RMMServerError(id,
+                raise RMMServerError("records",
                                      message="HTML returned where JSON "+
                                      "expected (is service URL correct?)")
             else:
-                raise RMMServerError(id,
+                raise RMMServerError("records",
                                      message="Unable to parse response as "+
                                      "JSON (is service URL correct?)")
         except requests.RequestException as ex:
-            raise RMMServerError(id,
+            raise RMMServerError("records",
                                  message="Trouble connecting to metadata"
                                  +" service: "+ str(ex), cause=ex)
 
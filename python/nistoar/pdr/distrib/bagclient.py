@@ -2,8 +2,10 @@
 This distrib submodule provides a client interface to the part of the PDR 
 Distribution Service that provides access to preservation bags. 
 """
-import os
-from .client import RESTServiceClient
+import os, io, zipfile
+from .client import RESTServiceClient, DistribResourceNotFound, DistribServerError
+
+MIN_RANGE_READ = 65536
 
 class BagDistribClient(object):
     """
@@ -146,3 +148,123 @@ class BagDistribClient(object):
         rurl = "/".join(["_aip", bagname])
         self.svc.retrieve_file(rurl, os.path.join(outdir, bagname))
 
+    def read_bag_file(self, bagname, filepath, size=None):
+        """
+        return the contents of a single file from within a serialized bag without downloading 
+        the entire bag.  This is done by reading just the needed parts of the serialized bag 
+        via HTTP range requests; thus, it requires that the bag is zip-serialized and that the
+        service supports range requests.  
+
+        :param str bagname:   the name of the (serialized) bag as given by any of the listing
+                              methods in this client.  
+        :param str filepath:  the path to the desired file relative to the bag's root directory
+        :param int size:      the size of the serialized bag, if known; if not provided, it will 
+                              be determined from the service.
+        :rtype: bytes
+        :raises ValueError:   if the bag is not zip-serialized
+        :raises DistribResourceNotFound:  if the bag or the file within it does not exist
+        :raises DistribServerError:  if the service does not support range requests or otherwise
+                              fails to return the requested data
+        """
+        if os.path.splitext(bagname)[1] != ".zip":
+            raise ValueError("read_bag_file(): not a zip-serialized bag: "+bagname)
+        rurl = "/".join(["_aip", bagname])
+        if size is None:
+            size = self.svc.get_size(rurl)
+            if size is None:
+                raise DistribServerError(rurl, message="Unable to determine size of "+bagname)
+
+        member = "/".join([os.path.splitext(bagname)[0], filepath.lstrip('/')])
+        try:
+            with zipfile.ZipFile(_RangedReader(self.svc, rurl, size)) as zf:
+                return zf.read(member)
+        except KeyError as ex:
+            raise DistribResourceNotFound(bagname+":"+filepath, 
+                                          message="File not found in bag: "+member)
+        except zipfile.BadZipFile as ex:
+            raise DistribServerError(rurl, message="Bad zip file: %s: %s" % (bagname, str(ex)),
+                                     cause=ex)
+
+    def member_bags_for(self, headbag, size=None):
+        """
+        return the names of the member bags listed in the given head bag (via its 
+        ``multibag/member-bags.tsv`` file).  Only the member list is retrieved from the service 
+        (see :py:meth:`read_bag_file`).  
+
+        :param str headbag:  the name of the serialized head bag
+        :param int size:     the size of the serialized bag, if known
+        :rtype: list of str
+        """
+        data = self.read_bag_file(headbag, "multibag/member-bags.tsv", size)
+        out = []
+        for line in data.decode('utf-8').splitlines():
+            name = line.split('\t', 1)[0].strip()
+            if name and not name.startswith('#'):
+                out.append(name)
+        return out
+
+
+class _RangedReader(io.RawIOBase):
+    """
+    a seekable, read-only file-like view of a remote file that fetches its data with HTTP range
+    requests as needed.  Data is fetched at least MIN_RANGE_READ bytes at a time, and the last 
+    block fetched is retained so that small, nearby reads (as made by zipfile) do not each 
+    require a request.
+    """
+
+    def __init__(self, svc, relurl, size):
+        self._svc = svc
+        self._url = relurl
+        self._size = size
+        self._pos = 0
+        self._bufstart = 0
+        self._buf = b''
+
+    def readable(self):
+        return True
+
+    def seekable(self):
+        return True
+
+    def tell(self):
+        return self._pos
+
+    def seek(self, offset, whence=io.SEEK_SET):
+        if whence == io.SEEK_SET:
+            self._pos = offset
+        elif whence == io.SEEK_CUR:
+            self._pos += offset
+        elif whence == io.SEEK_END:
+            self._pos = self._size + offset
+        else:
+            raise ValueError("seek(): bad whence value: "+str(whence))
+        self._pos = max(0, self._pos)
+        return self._pos
+
+    def read(self, size=-1):
+        if size is None or size < 0:
+            size = self._size - self._pos
+        size = min(size, self._size - self._pos)
+        if size <= 0:
+            return b''
+
+        end = self._pos + size
+        if self._pos < self._bufstart or end > self._bufstart + len(self._buf):
+            start = self._pos
+            fetch = max(size, MIN_RANGE_READ)
+            if start + fetch > self._size:
+                # read-ahead backwards instead (e.g. when reading the end of a zip file)
+                start = max(0, self._size - fetch)
+                fetch = self._size - start
+            self._buf = self._svc.get_range(self._url, start, fetch)
+            self._bufstart = start
+
+        off = self._pos - self._bufstart
+        out = self._buf[off:off+size]
+        self._pos += len(out)
+        return out
+
+    def readinto(self, b):
+        data = self.read(len(b))
+        b[:len(data)] = data
+        return len(data)
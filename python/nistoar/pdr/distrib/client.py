@@ -7,6 +7,8 @@ import os, sys, shutil, logging, json
 import urllib.request, urllib.parse, urllib.error
 import requests
 
+from nistoar.web import transport
+
 from ..exceptions import PDRException, PDRServiceException, PDRServerError
 
 class RESTServiceClient(object):
@@ -34,7 +36,7 @@ class RESTServiceClient(object):
 
         resp = None
         try:
-            resp = requests.get(self.base+relurl, headers=hdrs)
+            resp = transport.get(self.base+relurl, headers=hdrs)
 
             if resp.status_code >= 500:
                 raise DistribServerError(relurl, resp.status_code, resp.reason)
@@ -111,7 +113,7 @@ class RESTServiceClient(object):
 
         resp = None
         try:
-            resp = requests.get(self.base+relurl, stream=True)
+            resp = transport.get(self.base+relurl, stream=True)
 
             if resp.status_code >= 500:
                 raise DistribServerError(relurl, resp.status_code, resp.reason)
@@ -137,6 +139,80 @@ class RESTServiceClient(object):
             if resp is not None:
                 resp.close()
 
+    def get_range(self, relurl, offset, size):
+        """
+        retrieve a range of bytes of the content at the given URL.  This requires that the service 
+        support HTTP range requests for the resource.
+
+        :param str relurl:  a relative URL for the desired resource
+        :param int offset:  the position of the first byte to return
+        :param int size:    the (maximum) number of bytes to return
+        :rtype: bytes
+        :raises DistribServerError: if the server could not be reached, returns a server error, or 
+                       does not support range requests for the resource
+        """
+        if not relurl.startswith('/'):
+            relurl = '/'+relurl
+        hdrs = { "Range": "bytes={0}-{1}".format(offset, offset+size-1) }
+
+        resp = None
+        try:
+            resp = transport.get(self.base+relurl, headers=hdrs, stream=True)
+
+            if resp.status_code == 206:
+                return resp.content
+            elif resp.status_code == 200:
+                # the range was ignored; don't download the entire resource
+                raise DistribServerError(relurl, resp.status_code, resp.reason,
+                                         message="Range requests not supported for "+relurl)
+            elif resp.status_code >= 500:
+                raise DistribServerError(relurl, resp.status_code, resp.reason)
+            elif resp.status_code == 404:
+                raise DistribResourceNotFound(relurl, resp.reason)
+            elif resp.status_code >= 400:
+                raise DistribClientError(relurl, resp.status_code, resp.reason)
+            else:
+                raise DistribServerError(relurl, resp.status_code, resp.reason,
+                               message="Unexpected response from server: {0} {1}"
+                                        .format(resp.status_code, resp.reason))
+
+        except requests.RequestException as ex:
+            raise DistribServerError(message="Trouble connecting to distribution"
+                                     +" service: "+ str(ex), cause=ex)
+
+        finally:
+            if resp is not None:
+                resp.close()
+
+    def get_size(self, relurl):
+        """
+        return the size in bytes of the content at the given URL as reported by the service via
+        a HEAD request, or None if the service does not report it.
+
+        :raises DistribResourceNotFound: if the resource does not exist
+        :raises DistribServerError: if there is a failure while trying to connect to the server.
+        """
+        if not relurl.startswith('/'):
+            relurl = '/'+relurl
+
+        try:
+            resp = transport.head(self.base+relurl, allow_redirects=True)
+        except requests.RequestException as ex:
+            raise DistribServerError(message="Trouble connecting to distribution"
+                                     +" service: "+ str(ex), cause=ex)
+
+        if resp.status_code == 404:
+            raise DistribResourceNotFound(relurl, resp.reason)
+        elif resp.status_code >= 500:
+            raise DistribServerError(relurl, resp.status_code, resp.reason)
+        elif resp.status_code >= 400:
+            raise DistribClientError(relurl, resp.status_code, resp.reason)
+
+        try:
+            return int(resp.headers['Content-Length'])
+        except (KeyError, ValueError):
+            return None
+
     def head(self, relurl):
         """
         send a HEAD request to the given relative URL to determine if the 
@@ -152,7 +228,7 @@ class RESTServiceClient(object):
 
         resp = None
         try:
-            resp = requests.get(self.base+relurl, allow_redirects=True)
+            resp = transport.get(self.base+relurl, allow_redirects=True)
             return (resp.status_code, resp.reason)
 
         except requests.RequestException as ex:
@@ -7,6 +7,7 @@ from shutil import copy as filecopy, rmtree
 from copy import deepcopy
 from collections import OrderedDict
 from collections.abc import Mapping, Sequence
+from concurrent.futures import ThreadPoolExecutor
 from urllib.parse import quote as urlencode
 
 from .. import PreservationSystem
@@ -20,7 +21,7 @@ from ...constants import FILECMP_EXTENSION
 from ....id import PDRMinter
 from ... import ARK_NAAN, PDR_PUBLIC_SERVER
 from ...utils import (build_mime_type_map, checksum_of, measure_dir_size,
-                      read_nerd, read_pod, write_json)
+                      read_nerd, read_pod, write_json, remove_lock_files)
 
 from ....id import PDRMinter
 from ... import def_jq_libdir, def_etc_dir
@@ -156,6 +157,9 @@ class BagBuilder(PreservationSystem):
                               the bag from the Distribution Service.  
     :prop validator dict:     a set of properties for configuring the bag validation;
                               see nistoar.pdr.preserv.bagit.validate for details.
+    :prop comp_metadata_workers int (1):  the number of threads ensure_comp_metadata()
+                              should use to examine data files; a value greater than 1 
+                              engages its parallel mode.
     """
 
     nistprofile = "0.4"
@@ -1914,6 +1918,11 @@ class BagBuilder(PreservationSystem):
             self.ensure_comp_metadata(updstats=True, extract=False)
         self.ensure_merged_annotations()
 
+        # drop the lock files left behind by the metadata updates so that they
+        # do not become part of the bag
+        remove_lock_files(self.bag.metadata_dir, True)
+        remove_lock_files(self.bagdir)
+
         # Now trim empty metadata folders
         if trim:
             self.trim_metadata_folders()
@@ -1996,7 +2005,7 @@ class BagBuilder(PreservationSystem):
                     self.log.exception("Failed to remove empty metadata dir: " +
                                        mdir + ": " + str(ex))
 
-    def ensure_comp_metadata(self, updstats=False, extract=False):
+    def ensure_comp_metadata(self, updstats=False, extract=False, workers=None):
         """
         iterate through all the data files found under the data directory
         and ensure there is metadata describing them.  
@@ -2008,9 +2017,22 @@ class BagBuilder(PreservationSystem):
         :param bool extract:  if True, examine the file and extract metadata
                               from its contents.  If False, no metadata is 
                               extracted.  
+        :param int workers:   the number of threads to use to examine the data 
+                              files.  If greater than 1, the files' specs, checksums, 
+                              and extracted metadata are computed concurrently, and 
+                              the resulting metadata are then saved in a single pass
+                              in the same order as the serial mode (with the same 
+                              result), recording log messages in batches.  If None,
+                              the value of the 'comp_metadata_workers' configuration
+                              parameter is used (default: 1).
         """
         if not self.bag:
             self.ensure_bagdir()
+        if workers is None:
+            workers = self.cfg.get('comp_metadata_workers', 1)
+        if workers > 1:
+            return self._ensure_comp_metadata_parallel(updstats, extract, workers)
+
         for dfile in self.bag.iter_data_files():
             mdfile = self.bag.nerd_file_for(dfile)
             dfpath = os.path.join(self.bag.data_dir, dfile)
@@ -2045,6 +2067,69 @@ class BagBuilder(PreservationSystem):
                     self.update_metadata_for(dfile, md)
                 self.ensure_ansc_collmd(dfile)
 
+    _comp_md_log_batch = 100
+
+    def _ensure_comp_metadata_parallel(self, updstats, extract, workers):
+        # the parallel mode of ensure_comp_metadata()
+        registered = []
+        updated = []
+        def flush(msg, dfiles, force=False):
+            if dfiles and (force or len(dfiles) >= self._comp_md_log_batch):
+                self.record("%s (%d): %s", msg, len(dfiles), ", ".join(dfiles))
+                del dfiles[:]
+
+        with ThreadPoolExecutor(max_workers=workers) as pool:
+            examined = pool.map(lambda f: self._examine_comp_file(f, updstats, extract),
+                                self.bag.iter_data_files())
+
+            # save the metadata in order
+            for dfile, regmd, md in examined:
+                if regmd is not None:
+                    self.replace_metadata_for(dfile, regmd, "")
+                    registered.append(dfile)
+                    flush("Adding file metadata", registered)
+                    if md:
+                        self.update_metadata_for(dfile, md, message="")
+                else:
+                    if md:
+                        self.update_metadata_for(dfile, md, message="")
+                        updated.append(dfile)
+                        flush("Updating file metadata", updated)
+                    self.ensure_ansc_collmd(dfile)
+
+        flush("Adding file metadata", registered, True)
+        flush("Updating file metadata", updated, True)
+
+    def _examine_comp_file(self, dfile, updstats, extract):
+        # determine, without saving anything, the metadata ensure_comp_metadata() should save 
+        # for a data file.  Returns the file path, the full metadata to register if the file 
+        # has none yet (or None), and the updates to merge into its metadata (or None).
+        mdfile = self.bag.nerd_file_for(dfile)
+        dfpath = os.path.join(self.bag.data_dir, dfile)
+        if not os.path.exists(mdfile):
+            comptype = self._determine_file_comp_type(dfile)
+            regmd = self.describe_data_file(dfpath, dfile, extract, comptype, False)
+            md = None
+            if not extract:
+                md = OrderedDict()
+                self._add_checksum(checksum_of(dfpath), md)
+            return (dfile, regmd, md)
+
+        updcstats = updstats
+        md = self.bag.nerd_metadata_for(dfile)
+        if 'size' not in md or 'mediaType' not in md or 'checksum' not in md:
+            updcstats = True
+        md = None
+        if updcstats:
+            md = self.get_file_specs(dfpath, True)
+
+        if extract:
+            if not md:
+                md = OrderedDict()
+            self._add_extracted_metadata(dfpath, md)
+
+        return (dfile, None, md)
+
     def ensure_merged_annotations(self):
         """
         ensure that the annotations have been merged into the primary 
@@ -6,8 +6,8 @@ import re, logging
 from collections import OrderedDict
 from collections.abc import Mapping
 
-from nistoar.nerdm.convert import DOIResolver
 from nistoar.doi import is_DOI, DOIResolutionException
+from nistoar.pdr.describe.doicache import CachingDOIResolver
 
 class AuthorFetcher(object):
     """
@@ -21,11 +21,13 @@ class AuthorFetcher(object):
     def __init__(self, cfg=None):
         """
         create a fetcher with the given configuration.  The configuration
-        parameters supported are the same as supported by DOIResolver.
+        parameters supported are the same as supported by DOIResolver, plus
+        ``cache``, the configuration for caching resolved DOIs (see 
+        :py:class:`~nistoar.pdr.describe.doicache.CachingDOIResolver`).
         """
         if cfg == None: cfg = {}
         self.cfg = cfg
-        self.doir = DOIResolver.from_config(self.cfg)
+        self.doir = CachingDOIResolver.from_config(self.cfg)
 
     def fetch_authors(self, nerd):
         """
@@ -139,11 +141,13 @@ class ReferenceEnhancer(object):
     def __init__(self, cfg=None, log=None):
         """
         create an enhancer with the given configuration.  The configuration
-        parameters supported are the same as supported by DOIResolver.
+        parameters supported are the same as supported by DOIResolver, plus
+        ``cache``, the configuration for caching resolved DOIs (see 
+        :py:class:`~nistoar.pdr.describe.doicache.CachingDOIResolver`).
         """
         if cfg == None: cfg = {}
         self.cfg = cfg
-        self.doir = DOIResolver.from_config(self.cfg)
+        self.doir = CachingDOIResolver.from_config(self.cfg, log)
         self.log = log
 
     def enhancer_for(self, bagbldr, as_annot=False):
@@ -223,6 +227,7 @@ class ReferenceEnhancer(object):
 
         # Now enhance the ones that are left.  References newly added to
         # the unannotated list will get added to the annotated list.
+        enh.prefetch([loc for loc in unannot if is_DOI(loc)], override)
         for loc in unannot:
             if is_DOI(loc):
                 enh.merge_enhanced_ref(loc, override)
@@ -243,6 +248,8 @@ class ReferenceEnhancer(object):
         by a DOI; if that DOI does not exist, an enhanced reference for it is 
         add to the list.  The enhance_existing() method will simply called 
         merge_enhanced_ref() for each DOI in the baseline list of references.  
+        If the DOI resolver supports batch resolution, the prefetch() method
+        can be used to resolve the DOIs that are about to be merged all at once.
 
         An instance of this class can also be used to remove references via
         its remove_missing_from() method.  
@@ -263,6 +270,7 @@ class ReferenceEnhancer(object):
             self.doir = doi_resolver
             self.refs = self._index_refs(baserefs)
             self.log = logger
+            self._prefetched = {}
 
         def _index_refs(self, reflist):
             # create a mapping of URL locations to reference node for 
@@ -285,6 +293,31 @@ class ReferenceEnhancer(object):
 
             return out
 
+        def _needs_resolving(self, key, override):
+            return override or key not in self.refs or 'citation' not in self.refs[key]
+
+        def prefetch(self, dois, override=False):
+            """
+            concurrently resolve those of the given DOIs that merge_enhanced_ref()
+            would need to resolve so that the subsequent merges need not wait on
+            the DOI services one at a time.  This does nothing if the DOI 
+            resolver does not support batch resolution.
+            """
+            if not hasattr(self.doir, 'resolve_batch'):
+                return
+            need = [d for d in dois if self._needs_resolving(normalize_doi(d), override)]
+            if need:
+                for doi, ref in self.doir.resolve_batch(need).items():
+                    self._prefetched[normalize_doi(doi)] = ref
+
+        def _to_reference(self, doi):
+            ref = self._prefetched.pop(normalize_doi(doi), None)
+            if ref is None:
+                return self.doir.to_reference(doi)
+            if isinstance(ref, Exception):
+                raise ref
+            return ref
+
         def merge_enhanced_ref(self, doi, override=False):
             """
             resolve the doi into a NERDm reference description and merge
@@ -297,11 +330,11 @@ class ReferenceEnhancer(object):
             try:
 
                 if key in self.refs:
-                    if not override and 'citation' in self.refs[key]:
+                    if not self._needs_resolving(key, override):
                         return False
                     id = self.refs[key].get('@id')
                     refType = self.refs[key].get("refType")
-                    self.refs[key].update(self.doir.to_reference(doi))
+                    self.refs[key].update(self._to_reference(doi))
                     if id:
                         self.refs[key]['@id'] = id  # keep previous @id
                     if refType and refType != "References":
@@ -310,7 +343,7 @@ class ReferenceEnhancer(object):
                         self.refs[key]['refType'] = refType
 
                 else:
-                    self.refs[key] = self.doir.to_reference(doi)
+                    self.refs[key] = self._to_reference(doi)
                     if self.refs[key]['@id'].startswith("doi:"):
                         self.refs[key]['@id'] = normalize_doi(self.refs[key]['@id'])
 
@@ -323,6 +356,7 @@ class ReferenceEnhancer(object):
             return True
 
         def enhance_existing(self, override=False):
+            self.prefetch([loc for loc in self.refs.keys() if is_DOI(loc)], override)
             for loc in self.refs.keys():
                 if is_DOI(loc):
                     self.merge_enhanced_ref(loc, override)
@@ -0,0 +1,147 @@
+"""
+a cache of metadata about AIPs (Archive Information Packages) used by the resolver's AIP handler.
+
+The cache holds head bag descriptions, the lists of member bags of head bags, and the lists of
+distributions (bag files) that make up particular versions of an AIP.  Once a version of an AIP has
+been preserved, information about it does not change; thus, entries describing an explicit version
+are never invalidated (though they may be evicted when the cache is full).  Information that can
+change as new versions are preserved--the list of versions and the description of the "latest"
+version--is only cached for a short time.
+
+Member bag lists are extracted from a head bag by reading only its ``multibag/member-bags.tsv``
+file from the distribution service using HTTP range requests.  If the service does not support
+these (or the bag is not zip-serialized), the head bag is downloaded in full as a fall-back.
+"""
+import os, logging, tempfile
+from collections.abc import Mapping
+from copy import deepcopy
+
+from nistoar.pdr import distrib
+from .cache import LRUCache, DEF_CAPACITY, DEF_LATEST_TTL
+
+import multibag
+
+class AIPMetadataCache(LRUCache):
+    """
+    a thread-safe, in-memory cache of AIP metadata retrieved from the distribution service.
+
+    This class supports the following configuration parameters:
+
+    ``capacity``
+         the maximum number of items to hold in the cache; when full, the least recently used
+         items are evicted (default: 1000).
+    ``latest_ttl``
+         the number of seconds to cache information that can change as new AIP versions are
+         preserved, namely, the list of available versions, the list of all the AIP's bags, and the
+         description of the latest version's head bag (default: 60).
+    ``tmp_dir``
+         a directory where head bags can be temporarily downloaded when member bag lists cannot
+         be read via range requests (default: the system temporary directory).
+    """
+
+    def __init__(self, svcclient, config: Mapping=None, log: logging.Logger=None):
+        """
+        create the cache
+        :param svcclient:  the client for the distribution service; if a str, it is the base URL
+                           for the service.
+        :param Mapping config:  the cache configuration (see class documentation)
+        :param Logger log:      the logger to use for messages
+        """
+        super(AIPMetadataCache, self).__init__(config)
+        if isinstance(svcclient, str):
+            svcclient = distrib.RESTServiceClient(svcclient)
+        self.svc = svcclient
+        self.log = log
+
+    def _client(self, aipid):
+        return distrib.BagDistribClient(aipid, self.svc)
+
+    def versions_for(self, aipid):
+        """
+        return the list of versions available for the given AIP
+        :raises DistribServiceException:  if the service fails to provide the information
+        """
+        key = ("versions", aipid)
+        out = self._get(key)
+        if out is None:
+            out = self._put(key, self._client(aipid).list_versions(), self.latest_ttl)
+        return deepcopy(out)
+
+    def describe_all(self, aipid):
+        """
+        return descriptions of all of the bags (distributions) available for the given AIP
+        :raises DistribServiceException:  if the service fails to provide the information
+        """
+        key = ("dists", aipid)
+        out = self._get(key)
+        if out is None:
+            out = self._put(key, self._client(aipid).describe_all(), self.latest_ttl)
+        return deepcopy(out)
+
+    def head_for(self, aipid, version=None):
+        """
+        return a description of the head bag for the given version of an AIP
+        :param str aipid:    the AIP identifier
+        :param str version:  the version of interest; if empty or None, the latest is assumed
+        :raises DistribServiceException:  if the service fails to provide the information
+        """
+        key = ("head", aipid, version or None)
+        out = self._get(key)
+        if out is None:
+            out = self._client(aipid).describe_head_for_version(version)
+            self._put(key, out, (not version and self.latest_ttl) or None)
+        return deepcopy(out)
+
+    def members_of(self, aipid, headbag: Mapping):
+        """
+        return the names of the member bags listed in a head bag
+        :param str     aipid:  the AIP identifier
+        :param Mapping headbag:  the description of the head bag (as returned by :py:meth:`head_for`)
+        :raises DistribServiceException:  if the service fails to provide the information
+        """
+        key = ("members", headbag['name'])
+        out = self._get(key)
+        if out is None:
+            out = self._put(key, self._load_members(aipid, headbag))
+        return list(out)
+
+    def _load_members(self, aipid, headbag):
+        distcli = self._client(aipid)
+        try:
+            return distcli.member_bags_for(headbag['name'], headbag.get('contentLength'))
+        except (ValueError, distrib.DistribServerError) as ex:
+            if self.log:
+                self.log.info("Unable to read member bags for %s via range requests (%s); "
+                              "downloading head bag", headbag['name'], str(ex))
+
+        tmpdir = self.cfg.get('tmp_dir', tempfile.gettempdir())
+        if not os.path.isdir(tmpdir):
+            if self.log:
+                self.log.warning("Configured 'tmp_dir' is not an existing directory; using %s",
+                                 tempfile.gettempdir())
+            tmpdir = tempfile.gettempdir()
+
+        with tempfile.TemporaryDirectory(prefix="resolveaip", dir=tmpdir) as td:
+            distcli.save_bag(headbag['name'], td)
+            bag = multibag.open_headbag(os.path.join(td, headbag['name']))
+            return list(bag.member_bag_names)
+
+    def dists_for_version(self, aipid, version=None):
+        """
+        return the descriptions of the distributions (bag files) that make up a given version of
+        an AIP.
+        :param str aipid:    the AIP identifier
+        :param str version:  the version of interest; if empty or None, the latest is assumed
+        :raises DistribServiceException:  if the service fails to provide the information
+        """
+        head = self.head_for(aipid, version)
+        if head.get('sinceVersion'):
+            # list is immutable once we know the actual version
+            version = head['sinceVersion']
+        key = ("vdists", aipid, version or None)
+        out = self._get(key)
+        if out is None:
+            members = self.members_of(aipid, head)
+            out = [d for d in self.describe_all(aipid) if os.path.splitext(d['name'])[0] in members]
+            self._put(key, out, (not version and self.latest_ttl) or None)
+        return deepcopy(out)
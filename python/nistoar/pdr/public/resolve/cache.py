@@ -0,0 +1,83 @@
+"""
+common support for the in-memory caches used by the resolver service.
+"""
+import time, threading
+from collections import OrderedDict
+from collections.abc import Mapping
+
+DEF_CAPACITY = 1000
+DEF_LATEST_TTL = 60
+
+class LRUCache(object):
+    """
+    a thread-safe, in-memory, least-recently-used cache whose items may optionally expire after a
+    given time.  Subclasses use :py:meth:`_get` and :py:meth:`_put` to access the cache.
+
+    This class supports the following configuration parameters:
+
+    ``capacity``
+         the maximum number of items to hold in the cache; when full, the least recently used
+         items are evicted (default: 1000).
+    ``latest_ttl``
+         the number of seconds to cache information that can change over time, such as
+         descriptions of the latest version of a resource (default: 60).
+    """
+
+    def __init__(self, config: Mapping=None):
+        """
+        create the cache
+        :param Mapping config:  the cache configuration (see class documentation)
+        """
+        if config is None:
+            config = {}
+        self.cfg = config
+        self.capacity = self.cfg.get('capacity', DEF_CAPACITY)
+        self.latest_ttl = self.cfg.get('latest_ttl', DEF_LATEST_TTL)
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def _get(self, key):
+        with self._lock:
+            item = self._data.get(key)
+            if item and (item[0] is None or item[0] > time.time()):
+                self._data.move_to_end(key)
+                self.hits += 1
+                return item[1]
+            self.misses += 1
+            return None
+
+    def _put(self, key, value, ttl=None):
+        expires = (ttl is not None and time.time() + ttl) or None
+        with self._lock:
+            self._data[key] = (expires, value)
+            self._data.move_to_end(key)
+            while len(self._data) > self.capacity:
+                self._data.popitem(last=False)
+        return value
+
+    def clear(self):
+        """
+        empty the cache
+        """
+        with self._lock:
+            self._data.clear()
+
+    @property
+    def size(self) -> int:
+        """
+        the number of items currently in the cache
+        """
+        return len(self._data)
+
+    def stats(self) -> Mapping:
+        """
+        return a summary of the cache's usage as a JSON-encodable dictionary
+        """
+        return OrderedDict([
+            ("size",     self.size),
+            ("capacity", self.capacity),
+            ("hits",     self.hits),
+            ("misses",   self.misses)
+        ])
@@ -1,7 +1,7 @@
 """
 Handlers for resolving PDR resource identifiers
 """
-import sys, os, re, json, tempfile
+import sys, os, re, json
 from collections import OrderedDict
 
 from nistoar.web.rest import Handler, Ready
@@ -12,8 +12,7 @@ from nistoar.pdr.exceptions import ConfigurationException, IDNotFound, StateExce
 from nistoar.pdr import distrib
 from nistoar.pdr.publish.bagger import utils as bagutils
 import nistoar.pdr.distrib as distrib
-
-import multibag
+from ..aipcache import AIPMetadataCache
 
 VER_DELIM  = const.RELHIST_EXTENSION.lstrip('/')
 DIST_DELIM = "pdr:d"
@@ -23,6 +22,11 @@ class AIPHandler(Handler):
     """
     A Handler for resolving PDR AIP (Archive Information Package) identifiers.  This is intended 
     to handle endpoints under "/aip/"; however, the path passed is expected to be relative to this base.
+
+    Information retrieved from the distribution service is cached via the 
+    :py:class:`~nistoar.pdr.public.resolve.aipcache.AIPMetadataCache` provided by the app (as its 
+    ``aip_cache`` attribute); if the app does not provide one, a cache is created that lasts only 
+    for the life of this handler.
     """
 
     def __init__(self, path, wsgienv, start_resp, config={}, log=None, app=None):
@@ -32,6 +36,12 @@ class AIPHandler(Handler):
             raise ConfigurationException("Missing config param: locations.distributionService")
         self._dsep = self._dsep.rstrip('/')
         self._svccli = distrib.RESTServiceClient(self._dsep)
+        self._cache = getattr(app, 'aip_cache', None)
+        if self._cache is None:
+            cachecfg = dict(self.cfg.get('cache', {}))
+            if self.cfg.get('tmp_dir'):
+                cachecfg.setdefault('tmp_dir', self.cfg['tmp_dir'])
+            self._cache = AIPMetadataCache(self._svccli, cachecfg, log)
         self._set_format_qp("format")
 
     def do_GET(self, path, ashead=False, format=None):
@@ -104,11 +114,10 @@ class AIPHandler(Handler):
         except UnsupportedFormat as ex:
             return self.send_error(400, "Unsupported Format", str(ex))
 
-        distcli = distrib.BagDistribClient(aipid, self._svccli)
         try:
 
-            vers = distcli.list_versions()
-            head = distcli.describe_head_for_version(version)
+            vers = self._cache.versions_for(aipid)
+            head = self._cache.head_for(aipid, version)
 
         except distrib.DistribResourceNotFound as ex:
             return self.send_error(404, "AIP Not Found")
@@ -211,9 +220,8 @@ class AIPHandler(Handler):
         raise StateException("No dataset handler implemented for format="+format.name)
 
     def _find_serialized_bag(self, aipid, aipbag):
-        distcli = distrib.BagDistribClient(aipid, self._svccli)
         aipbag += "."
-        matched = [b for b in distcli.list_all() if b.startswith(aipbag)]
+        matched = [b['name'] for b in self._cache.describe_all(aipid) if b['name'].startswith(aipbag)]
         if len(matched) == 0:
             raise distrib.DistribResourceNotFound(aipbag.rstrip('.'))
         return matched[0]
@@ -229,10 +237,9 @@ class AIPHandler(Handler):
                             format will be determined from the client's request.
                             :type format: str or Format
         """
-        distcli = distrib.BagDistribClient(aipid, self._svccli)
         try:
 
-            dists = distcli.describe_all()
+            dists = self._cache.describe_all(aipid)
 
         except distrib.DistribResourceNotFound as ex:
             return self.send_error(404, "AIP Not Found")
@@ -311,10 +318,9 @@ class AIPHandler(Handler):
         if path:
             return self.send_error(403, "Not a supported resource")
 
-        distcli = distrib.BagDistribClient(aipid, self._svccli)
         try:
 
-            head = distcli.describe_head_for_version(version)
+            head = self._cache.head_for(aipid, version)
 
         except distrib.DistribResourceNotFound as ex:
             return self.send_error(404, "AIP Not Found")
@@ -392,11 +398,9 @@ class AIPHandler(Handler):
         """
         return a list of the distributions that are part of a given version of an AIP
         """
-        distcli = distrib.BagDistribClient(aipid, self._svccli)
         try:
 
-            head = distcli.describe_head_for_version(version)
-            dists = distcli.describe_all()
+            out = self._cache.dists_for_version(aipid, version)
 
         except distrib.DistribResourceNotFound as ex:
             return self.send_error(404, "AIP Not Found")
@@ -424,22 +428,6 @@ class AIPHandler(Handler):
         except UnsupportedFormat as ex:
             return self.send_error(400, "Unsupported Format", str(ex))
 
-        tmpdir = self.cfg.get('tmp_dir', tempfile.gettempdir())
-        if not os.path.isdir(tmpdir):
-            if self.log:
-                self.log.warning("Configured 'tmp_dir' is not an existing directory; using %s",
-                                 tempfile.gettempdir())
-            tmpdir = tempfile.gettempdir()
-
-        members = []
-        with tempfile.TemporaryDirectory(prefix="resolveaip", dir=tmpdir) as td:
-            distcli.save_bag(head['name'], td)
-
-            bag = multibag.open_headbag(os.path.join(td, head['name']))
-            members = bag.member_bag_names
-
-        out = [d for d in dists if os.path.splitext(d['name'])[0] in members]
-
         if format.name == "json" or format.name == "text":
             return self.send_ok(content=json.dumps(out, indent=2),
                                 contenttype=format.ctype, ashead=ashead)
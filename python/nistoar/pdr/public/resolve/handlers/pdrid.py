@@ -8,7 +8,7 @@ from nistoar.web.formats import (Format, FormatSupport, XHTMLSupport, TextSuppor
                                  Unacceptable, UnsupportedFormat)
 from nistoar.pdr import constants as const
 from nistoar.pdr.exceptions import ConfigurationException, IDNotFound, StateException
-from nistoar.pdr.describe import MetadataClient
+from ..mdcache import ReleasedMetadataCache
 
 ark_naan = const.ARK_NAAN
 VER_DELIM = const.RELHIST_EXTENSION.lstrip('/')
@@ -21,6 +21,11 @@ class PDRIDHandler(Handler):
     A Handler for resolving a PDR resource identifier.  This is intended to handle endpoints 
     under "/id/"; however, the path passed is expected to be relative to this base and represent
     a PDR identifier (or a short-hand version of one) to be resolved. 
+
+    Released metadata is retrieved via the 
+    :py:class:`~nistoar.pdr.public.resolve.mdcache.ReleasedMetadataCache` provided by the app (as 
+    its ``md_cache`` attribute); if the app does not provide one, a cache is created that lasts 
+    only for the life of this handler.
     """
     ark_id_re = re.compile(const.ARK_ID_PAT)
     old_ver_ext_re = re.compile(r'\.(\d+(_\d+(_\d+)?)?)$')
@@ -31,8 +36,18 @@ class PDRIDHandler(Handler):
         super(PDRIDHandler, self).__init__(path, wsgienv, start_resp, config=config, log=log, app=app)
         self._naan = str(self.cfg.get('naan', ark_naan))
         self._mdcachedir = self.cfg.get("metadata_cache_dir")
+        self._mdcache = getattr(app, 'md_cache', None)
         self._set_format_qp("format")
 
+    def _get_metadata_cache(self):
+        if self._mdcache is None:
+            baseurl = self.cfg.get("APIs", {}).get("mdSearch")
+            if not baseurl:
+                raise ConfigurationException("Missing required configuration: APIs.mdSearch")
+            self._mdcache = ReleasedMetadataCache(baseurl, self._mdcachedir,
+                                                  self.cfg.get('cache', {}), self.log)
+        return self._mdcache
+
     def do_GET(self, path, ashead=False, format=None):
         """
         handle a GET (or HEAD) request of a resource
@@ -145,11 +160,9 @@ class PDRIDHandler(Handler):
             return []
 
         elif format.name == "nerdm" or format.name == "text":
-            baseurl = self.cfg.get("APIs", {}).get("mdSearch")
-            if not baseurl:
-                raise ConfigurationException("Missing required configuration: APIs.mdSearch")
+            mdcache = self._get_metadata_cache()
             try:
-                nerdm = MetadataClient(baseurl, self._mdcachedir).describe(dsid, version)
+                nerdm = mdcache.describe(dsid, version)
             except IDNotFound as ex:
                 return self.send_error(404, "Dataset ID Not Found")
             except Exception as ex:
@@ -212,11 +225,9 @@ class PDRIDHandler(Handler):
             return self.send_error(400, "Unsupported Format", str(ex))
 
         if format.name == "nerdm":   # FUTURE: or format.name == "text":
-            baseurl = self.cfg.get("APIs", {}).get("mdSearch")
-            if not baseurl:
-                raise ConfigurationException("Missing required configuration: APIs.mdSearch")
+            mdcache = self._get_metadata_cache()
             try:
-                nerdm = MetadataClient(baseurl, self._mdcachedir).describe(dsid + const.RELHIST_EXTENSION)
+                nerdm = mdcache.describe_releases(dsid)
             except IDNotFound as ex:
                 return self.send_error(404, "Dataset ID Not Found")
             except Exception as ex:
@@ -241,13 +252,9 @@ class PDRIDHandler(Handler):
         """
         send a view of a dataset component (which could be a file)
         """
-        cmpid = '/'.join([dsid, path])
-        
-        baseurl = self.cfg.get("APIs", {}).get("mdSearch")
-        if not baseurl:
-            raise ConfigurationException("Missing required configuration: APIs.mdSearch")
+        mdcache = self._get_metadata_cache()
         try:
-            cmpmd = MetadataClient(baseurl, self._mdcachedir).describe(cmpid, version)
+            cmpmd = mdcache.describe_component(dsid, path, version)
         except IDNotFound as ex:
             return self.send_error(404, "Component ID Not Found")
         except Exception as ex:
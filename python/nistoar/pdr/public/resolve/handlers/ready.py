@@ -1,6 +1,8 @@
 """
 ResolverReady: A top level proof-of-life handler
 """
+import json
+from collections import OrderedDict
 
 from nistoar.web.rest import Ready
 
@@ -33,4 +35,23 @@ class ResolverReady(Ready):
 </html>
 """      
         return self.send_ok(out, contenttype, "Ready", ashead=ashead)
+
+    def get_ready_json(self, contenttype, ashead=None):
+        servicename = (self.app and self.app.name) or ""
+        out = OrderedDict([
+            ("service", servicename),
+            ("status",  "ready"),
+            ("message", f"{servicename} service is ready.")
+        ])
+
+        # report on the usage of the app's metadata caches
+        caches = OrderedDict()
+        for name, attr in (("metadata", "md_cache"), ("aip", "aip_cache")):
+            cache = getattr(self.app, attr, None)
+            if cache is not None:
+                caches[name] = cache.stats()
+        if caches:
+            out['caches'] = caches
+
+        return self.send_ok(json.dumps(out, indent=2), contenttype, ashead=ashead)
     
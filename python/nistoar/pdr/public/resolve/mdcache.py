@@ -0,0 +1,141 @@
+"""
+a cache of released NERDm records used by the resolver's PDR ID handler.
+
+Released records are retrieved via a single, long-lived
+:py:class:`~nistoar.pdr.describe.MetadataClient` (so that connections to the RMM are reused
+across requests) and kept in memory keyed by dataset identifier and version.  A released version
+of a dataset does not change; thus, records for an explicit version are never invalidated (though
+they may be evicted when the cache is full).  The latest version of a dataset and its release
+history can change when a new version is released, so these are only cached for a short time.
+
+Components are resolved from the cached record of the dataset that contains them via a map from
+component identifier to component that is built once per cached record.
+"""
+import logging
+from collections.abc import Mapping
+from copy import deepcopy
+
+from nistoar.pdr import constants as const
+from nistoar.pdr.exceptions import IDNotFound
+from nistoar.pdr.describe import MetadataClient
+from .cache import LRUCache, DEF_CAPACITY, DEF_LATEST_TTL
+
+VER_DELIM = const.RELHIST_EXTENSION
+FILE_DELIM = const.FILECMP_EXTENSION
+OLD_FILE_DELIM = "/cmps"
+
+class ReleasedMetadataCache(LRUCache):
+    """
+    a thread-safe, in-memory cache of released NERDm records.
+
+    This class supports the following configuration parameters:
+
+    ``capacity``
+         the maximum number of records to hold in the cache; when full, the least recently used
+         records are evicted (default: 1000).
+    ``latest_ttl``
+         the number of seconds to cache the latest version of a dataset and its release history
+         (default: 60).
+    ``rmm_cache``
+         if provided, the configuration for caching RMM responses on disk; see
+         :py:class:`~nistoar.pdr.describe.cache.CachingMetadataClient`.
+    """
+
+    def __init__(self, baseurl: str, cachedir: str=None, config: Mapping=None,
+                 log: logging.Logger=None):
+        """
+        create the cache
+        :param str baseurl:   the base URL for the RMM service
+        :param str cachedir:  the root directory for the alternate file store for records too big
+                              for the RMM (see :py:class:`~nistoar.pdr.describe.MetadataClient`)
+        :param Mapping config:  the cache configuration (see class documentation)
+        :param Logger log:      the logger to use for messages
+        """
+        super(ReleasedMetadataCache, self).__init__(config)
+        self.baseurl = baseurl
+        self.cachedir = cachedir
+        self.log = log
+        self._cli = None
+
+    @property
+    def cli(self) -> MetadataClient:
+        """
+        the client used to retrieve records not in the cache.  It is created on first use so that
+        problems accessing the alternate file store are reported as retrieval failures.
+        """
+        if self._cli is None:
+            self._cli = MetadataClient(self.baseurl, self.cachedir, self.cfg.get('rmm_cache'))
+        return self._cli
+
+    def _load(self, dsid, version):
+        key = (dsid, version or None)
+        entry = self._get(key)
+        if entry is None:
+            nerdm = self.cli.describe(dsid, version)
+            entry = { "nerdm": nerdm, "comps": None }
+            self._put(key, entry, (not version and self.latest_ttl) or None)
+        return entry
+
+    def describe(self, dsid: str, version: str=None) -> Mapping:
+        """
+        return the NERDm record for the given version of a dataset
+        :param str dsid:     the dataset identifier
+        :param str version:  the desired version; if not provided, the latest is returned
+        :raises IDNotFound:  if the dataset or version does not exist
+        """
+        return deepcopy(self._load(dsid, version)['nerdm'])
+
+    def describe_releases(self, dsid: str) -> Mapping:
+        """
+        return the release history for the given dataset
+        :param str dsid:     the dataset identifier
+        :raises IDNotFound:  if the dataset does not exist
+        """
+        return self.describe(dsid + VER_DELIM)
+
+    def describe_component(self, dsid: str, cmppath: str, version: str=None) -> Mapping:
+        """
+        return the NERDm description of a component of a dataset
+        :param str dsid:     the ARK identifier of the dataset containing the component
+        :param str cmppath:  the component's identifier relative to the dataset identifier
+        :param str version:  the version of the dataset to look in; if not provided, the latest
+                             is assumed
+        :raises IDNotFound:  if the dataset, version, or component does not exist
+        """
+        if not dsid.startswith("ark:"):
+            # components of EDI-ID-identified datasets are left to the client
+            return self.cli.describe('/'.join([dsid, cmppath]), version)
+
+        entry = self._load(dsid, version)
+        comps = entry['comps']
+        if comps is None:
+            comps = dict((c['@id'], c) for c in entry['nerdm'].get('components', []) if c.get('@id'))
+            entry['comps'] = comps
+
+        find = cmppath.strip('/')
+        cmp = comps.get(find)
+        if cmp is None:
+            # the old and current file component delimiters are interchangeable: a file requested
+            # with either can be stored under the other
+            for asked, stored in ((FILE_DELIM, OLD_FILE_DELIM), (OLD_FILE_DELIM, FILE_DELIM)):
+                asked = asked.lstrip('/') + '/'
+                if find.startswith(asked):
+                    cmp = comps.get(stored.lstrip('/') + '/' + find[len(asked):])
+                    break
+        if cmp is None:
+            raise IDNotFound('/'.join([dsid, cmppath]))
+
+        # tweak the meta-metadata on its way out the door (as the RMM client does)
+        nerdm = entry['nerdm']
+        cmp = deepcopy(cmp)
+        if version:
+            dsid += VER_DELIM + '/' + version
+        cmp['isPartOf'] = dsid
+        if cmp['@id'][0] != '/' and cmp['@id'][0] != '#':
+            dsid += '/'
+        cmp['@id'] = dsid + cmp['@id']
+        if '@context' in nerdm:
+            cmp['@context'] = nerdm['@context']
+        if 'version' in nerdm and 'version' not in cmp:
+            cmp['version'] = nerdm['version']
+        return cmp
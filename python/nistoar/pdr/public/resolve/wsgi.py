@@ -10,6 +10,8 @@ from copy import deepcopy
 from ... import ARK_NAAN
 from . import system
 from .handlers import ResolverReady, PDRIDHandler, AIPHandler
+from .aipcache import AIPMetadataCache
+from .mdcache import ReleasedMetadataCache
 from nistoar.web.rest import ServiceApp
 
 log = logging.getLogger(system.system_abbrev)   \
@@ -27,6 +29,12 @@ class ResolverApp(ServiceApp):
     /id/
     /aip/
     Only GET methods are supported.
+
+    Released NERDm records and metadata about AIPs are cached across requests; these caches can
+    be configured via the ``id.cache`` and ``aip.cache`` parameters, respectively (see 
+    :py:class:`~nistoar.pdr.public.resolve.mdcache.ReleasedMetadataCache` and
+    :py:class:`~nistoar.pdr.public.resolve.aipcache.AIPMetadataCache`).  Usage statistics for 
+    the caches are included in the JSON response from the ready endpoint.
     """
 
     def __init__(self, config):
@@ -49,6 +57,20 @@ class ResolverApp(ServiceApp):
         if level:
             self.log.setLevel(level)
 
+        self.md_cache = None
+        mdep = self.cfg['id'].get('APIs', {}).get('mdSearch')
+        if mdep:
+            self.md_cache = ReleasedMetadataCache(mdep, self.cfg['id'].get('metadata_cache_dir'),
+                                                  self.cfg['id'].get('cache', {}), self.log)
+
+        self.aip_cache = None
+        dsep = self.cfg['aip'].get('locations', {}).get('distributionService')
+        if dsep:
+            cachecfg = dict(self.cfg['aip'].get('cache', {}))
+            if self.cfg['aip'].get('tmp_dir'):
+                cachecfg.setdefault('tmp_dir', self.cfg['aip']['tmp_dir'])
+            self.aip_cache = AIPMetadataCache(dsep.rstrip('/'), cachecfg, self.log)
+
         self.handlers = {
             "id":  (PDRIDHandler,  self.cfg.get('id', {})),
             "aip": (AIPHandler,    self.cfg.get('aip', {})),
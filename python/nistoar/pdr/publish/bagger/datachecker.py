@@ -7,6 +7,8 @@ from collections.abc import Mapping
 import multibag as mb
 import requests
 
+from nistoar.web import transport
+
 from .utils import parse_bag_name
 from ...exceptions import ConfigurationException, StateException
 from ...distrib import (RESTServiceClient, BagDistribClient, DistribServerError,
@@ -200,7 +202,7 @@ class DataChecker(object):
         """
         resp = None
         try:
-            resp = requests.head(url, allow_redirects=True)
+            resp = transport.head(url, allow_redirects=True)
             return (resp.status_code, resp.reason)
         finally:
             if resp is not None:
@@ -41,6 +41,8 @@ class RMMLoader(IDLoader):
     The following configurmation parameters are supported:
     :param Mapping metadata_service:  (required) the configuration for setting up the RMM client.
     :param str     metadata_service.service_endpoint:  (required) the base URL for the RMM API service.
+    :param int     metadata_service.page_size:  the number of records to request from the RMM at a 
+                                time (default: 1000)
     :param str     id_prefrix:  the identifier prefix used to select identifiers from the RMM; this 
                                 value can be overridden by an argument provided to the constructor.
     """
@@ -71,7 +73,8 @@ class RMMLoader(IDLoader):
         self.cli = MetadataClient(self.cfg['metadata_service']['service_endpoint'])
 
     def iter(self):
-        recs = self.cli.search({'include':'@id','exclude':'_id'})
+        recs = self.cli.iter_search({'include':'@id','exclude':'_id'},
+                                    pagesize=self.cfg['metadata_service'].get('page_size', 1000))
         for r in recs:
             if self.prefix and not r.get('@id', '').startswith(self.prefix):
                 continue
@@ -3,7 +3,7 @@ This module provides publishing service implementations based around assembling
 as the Archive Information Package (AIP).  This includes those supporting Submission Information Package
 (SIP) conventions PDP1 and PDP2.  
 """
-import os, re, importlib, inspect
+import os, re, importlib, inspect, json
 from copy import deepcopy
 from collections.abc import Mapping
 from abc import abstractmethod, abstractproperty
@@ -19,7 +19,8 @@ from ...utils.prov import Agent, Action
 from ..idmint import PDP0Minter
 from ....nerdm import utils as nerdutils
 from ....nerdm.validate import ValidationError
-from . import status
+from . import status, pubjob
+from nistoar import jobmgt
 
 ARK_PFX_RE = re.compile(const.ARK_PFX_PAT)
 ARK_ID_RE = re.compile(const.ARK_ID_PAT)
@@ -41,12 +42,25 @@ class BagBasedPublishingService(SimpleNerdmPublishingService):
     :param str sip_status_dir:   The path to the directory where SIP status state is persisted.  
                                  If the path is relative, it will be taken to be relative to the 
                                  working directory.
+    :param str sip_status_store: the type of store used to persist SIP status state:  either "file" 
+                                 (default), which saves each status as a file in sip_status_dir, 
+                                 or "sqlite", which uses an indexed database within sip_status_dir
+                                 (see :py:func:`~nistoar.pdr.publish.service.status.open_store`).
     :param bool validate_nerdm:  If True (default), input NERDm metadata will be validated before 
                                  being accepted, raising a ValidationError exception if the 
                                  metadata is not valid.  
     :param str nerdm_schema_dir: the path to the directory containing NERDm schema files used to 
                                  validate input metadata; if not set, the default OAR schema 
                                  directory (e.g. the OAR system's etc/schemas directory).
+    :param str async_queue_dir:  if set, requests to finalize or publish an SIP will be carried out 
+                                 asynchronously by a separate process:  the SIP is put into the 
+                                 PROCESSING state and the request is queued in this directory 
+                                 (see :py:mod:`~nistoar.pdr.publish.service.pubjob`).  If the path 
+                                 is relative, it will be taken to be relative to the working directory.
+                                 If not set, these requests are handled synchronously.
+    :param Mapping async_queue:  the configuration for the :py:class:`~nistoar.jobmgt.JobQueue` used 
+                                 to process asynchronous requests (ignored if ``async_queue_dir`` is 
+                                 not set).
     """
 
     def __init__(self, config: Mapping, convention: str, workdir: str=None, bagdir: str=None, 
@@ -75,13 +89,27 @@ class BagBasedPublishingService(SimpleNerdmPublishingService):
 
         self.bagparent = self._resolve_dir('sip_bags_dir', bagdir, self.workdir, 'sipbags')
         self.statusdir = self._resolve_dir('sip_status_dir', statusdir, self.workdir, 'status')
+        self.statuscfg = {"cachedir": self.statusdir, "store": self.cfg.get('sip_status_store', 'file')}
 
         self.ingestsvc = ingestsvc
         if not self.ingestsvc:
             self.ingestsvc = self._create_ingest_service()
 
+        self.jobqueue = None
+        if self.cfg.get('async_queue_dir'):
+            qdir = self._resolve_dir('async_queue_dir', None, self.workdir)
+            self.jobqueue = pubjob.create_publish_queue(qdir, self.cfg.get('async_queue'),
+                                                        self.log.getChild("pubqueue"))
+
         self._baggers = {}
 
+    @property
+    def asynchronous(self) -> bool:
+        """
+        True if this service is configured to carry out finalize and publish requests asynchronously
+        """
+        return self.jobqueue is not None
+
     def _resolve_dir(self, cfgkey, injectedval, defbasedir, defsubdir=None):
         # resolve the path to use for the cfgkey directory
         # The injectedval takes precendence if set; if not, self.cfg is consulted using cfgkey.
@@ -121,7 +149,51 @@ class BagBasedPublishingService(SimpleNerdmPublishingService):
         :return: an object describing the current status of the idenfied SIP
         :rtype: SIPStatus
         """
-        return status.SIPStatus(sipid, {"cachedir": self.statusdir})
+        return status.SIPStatus(sipid, self.statuscfg)
+
+    def _job_config(self) -> Mapping:
+        # the configuration needed to reconstitute this service (synchronously) within a queued job
+        svccfg = deepcopy(self.cfg)
+        svccfg.pop('async_queue_dir', None)
+        svccfg.pop('async_queue', None)
+        svccfg['working_dir'] = self.workdir
+        svccfg['sip_bags_dir'] = self.bagparent
+        svccfg['sip_status_dir'] = self.statusdir
+        return {
+            "service": svccfg,
+            "convention": self.convention,
+            "factory": "%s.%s" % (type(self).__module__, type(self).__name__)
+        }
+
+    def _queue_request(self, sipid: str, action: str, sts: status.SIPStatus, who: Agent=None) -> None:
+        # submit an action request to the job queue.  A request that is covered by a run that has not
+        # yet started (a queued publish also finalizes) is coalesced into that run; a run already in
+        # progress may have read the SIP before this request, so the request is queued behind it.
+        job = self.jobqueue.get_job(sipid)
+        active = job is not None and job.state in (jobmgt.PENDING, jobmgt.RUNNING)
+        if not active and sts.state == status.PROCESSING:
+            raise SIPConflictError(sipid, "Requested SIP is currently being processed: "+sipid)
+
+        coalesced = []
+        def covered(waiting):
+            actions = [(args or [None])[0] for args in waiting]
+            coalesced.append(action in actions or pubjob.PUBLISH in actions)
+            return coalesced[-1]
+
+        args = [action]
+        if who:
+            args.append(json.dumps(who.to_dict()))
+        if sts.state != status.PROCESSING:
+            sts.update(status.PROCESSING)
+            sts.record_progress("Request to %s has been queued" % action, "queued", 0)
+
+        # the check for a covering run and the submission are done atomically by the queue; if a job
+        # is already running, the queue will relaunch it with these arguments when done
+        self.jobqueue.submit(sipid, args, self._job_config(), covered=covered)
+        if coalesced and coalesced[-1]:
+            self.log.info("SIP %s: %s request already queued (coalescing)", sipid, action)
+        else:
+            self.log.info("SIP %s: queued %s request", sipid, action)
 
     @abstractmethod
     def _get_id_shoulder(self, who: Agent, sipid: str, create: bool):
@@ -432,12 +504,17 @@ class BagBasedPublishingService(SimpleNerdmPublishingService):
         """
         process all SIP input to get it ready for publication.  The SIP metadata will be updated 
         accordingly (which will affect what is returned from :py:method:`describe`).  
-        In this convention, finalization is expected to be quick and therefore can be handled 
-        synchronously.  Upon successful completion, the state will be set to FINALIZED.  If an 
+        In this convention, finalization is expected to be quick and therefore is, by default, 
+        handled synchronously.  Upon successful completion, the state will be set to FINALIZED.  If an 
         error caused by the collected SIP input occurs, the state will be set to FAILED to 
         indicate that the client must provide updated input to fix the problem and make the 
         SIP publishable.  
 
+        If this service is configured to be :py:attr:`asynchronous`, the request is instead queued 
+        for processing in a separate process, and this method returns with the SIP in the PROCESSING
+        state.  A request for an SIP that is already queued for finalizing (or publishing) is 
+        merged into the queued request.
+
         :param str sipid:  the identifier for the SIP of interest
         :raises SIPNotFoundError:   if the SIP is in the NOT_FOUND state
         :raises SIPStateException:  if the SIP is not in the PENDING or FINALIZED state
@@ -448,14 +525,22 @@ class BagBasedPublishingService(SimpleNerdmPublishingService):
         if sts.state == status.FINALIZED:
             self.log.info("SIP %s is already finalized (skipping)", sipid)
             return
-        if sts.state != status.PENDING:
-            raise SIPConflictError(sipid, "SIP {0} is not ready for finalizing: {1}"
-                                          .format(sipid, sts.message))
         if sts.siptype != self.convention:
             raise SIPConflictError(sipid, "SIP {0} is being handled by a different convention: {1}"
                                           .format(sipid, sts.message))
+        if sts.state != status.PENDING and \
+           not (self.asynchronous and sts.state == status.PROCESSING):
+            raise SIPConflictError(sipid, "SIP {0} is not ready for finalizing: {1}"
+                                          .format(sipid, sts.message))
 
         shoulder = self._get_id_shoulder(who, sipid, False)  # may raise UnauthorizedPublishingRequest
+        if self.asynchronous:
+            self._queue_request(sipid, pubjob.FINALIZE, sts, who)
+            return
+
+        self._finalize(sipid, shoulder, sts, who)
+
+    def _finalize(self, sipid: str, shoulder: str, sts: status.SIPStatus, who: Agent=None) -> None:
         bagger = self._get_bagger_for(shoulder, sipid)
         try:
             bagger.finalize(who)
@@ -480,6 +565,11 @@ class BagBasedPublishingService(SimpleNerdmPublishingService):
 
         This implementations will call delete() after successful submission of the SIP.
 
+        If this service is configured to be :py:attr:`asynchronous`, the request is instead queued 
+        for processing in a separate process, and this method returns with the SIP in the PROCESSING
+        state.  If the SIP is currently being finalized via an earlier request, publishing will 
+        follow the completion of the finalization.  
+
         :param str sipid:  the identifier for the SIP of interest
         :param who:        an actor identifier object, indicating who is requesting this action.  This 
                            will get recorded in the history data.  If None, an internal administrative 
@@ -491,13 +581,19 @@ class BagBasedPublishingService(SimpleNerdmPublishingService):
         sts = self.status_of(sipid)
         if sts.state == status.NOT_FOUND:
             raise SIPNotFoundError(sipid)
-        if sts.state != status.PENDING and sts.state != status.FINALIZED:
+        if sts.state != status.PENDING and sts.state != status.FINALIZED and \
+           not (self.asynchronous and sts.state == status.PROCESSING):
             raise SIPConflictError(sipid, "SIP {0} is not ready for publishing: {1}"
                                           .format(sipid, sts.message))
         if sts.siptype != self.convention:
             raise SIPConflictError(sipid, "SIP {0} is being handled by a different convention: {1}"
                                           .format(sipid, sts.message))
 
+        if self.asynchronous:
+            self._get_id_shoulder(who, sipid, False)  # may raise UnauthorizedPublishingRequest
+            self._queue_request(sipid, pubjob.PUBLISH, sts, who)
+            return
+
         try:
             self.finalize(sipid, who)
             # sts.update(status.PROCESSING)
@@ -509,6 +605,59 @@ class BagBasedPublishingService(SimpleNerdmPublishingService):
             sts.update(status.FAILED, sysdata={'errors': [str(ex)]})
             raise ex
 
+    def process_request(self, sipid: str, action: str, who: Agent=None):
+        """
+        carry out a finalize or publish request that was queued by an :py:attr:`asynchronous` 
+        instance of this service.  This is called from within the queued job (see 
+        :py:mod:`~nistoar.pdr.publish.service.pubjob`), and progress is recorded to the SIP's 
+        status as the processing proceeds.  
+
+        :param str  sipid:  the identifier for the SIP of interest
+        :param str action:  the requested action, either "finalize" or "publish"
+        :param who:         an actor identifier object, indicating who requested this action.
+        :raises SIPNotFoundError:   if the SIP is in the NOT_FOUND state
+        :raises SIPConflictError:   if the SIP is not in a state that allows the action
+        """
+        if action not in pubjob.actions:
+            raise ValueError("Unrecognized publishing action: "+str(action))
+        sts = self.status_of(sipid)
+        if sts.state == status.NOT_FOUND:
+            raise SIPNotFoundError(sipid)
+        if sts.state not in (status.PROCESSING, status.PENDING, status.FINALIZED):
+            raise SIPConflictError(sipid, "SIP {0} is not ready to {1}: {2}"
+                                          .format(sipid, action, sts.message))
+        if sts.siptype != self.convention:
+            raise SIPConflictError(sipid, "SIP {0} is being handled by a different convention: {1}"
+                                          .format(sipid, sts.message))
+
+        # A relaunched publish request may follow a completed finalization
+        finalized = sts.state == status.FINALIZED
+        if action == pubjob.FINALIZE and finalized:
+            self.log.info("SIP %s is already finalized (skipping)", sipid)
+            return
+
+        try:
+            shoulder = self._get_id_shoulder(who, sipid, False)
+            if sts.state != status.PROCESSING:
+                sts.update(status.PROCESSING)
+
+            if not finalized:
+                sts.record_progress("Finalizing submission", "finalizing",
+                                    10 if action == pubjob.PUBLISH else 20)
+                self._finalize(sipid, shoulder, sts, who)
+
+            if action == pubjob.PUBLISH:
+                sts.update(status.PROCESSING)
+                sts.record_progress("Publishing submission", "publishing", 60)
+                sts.update(status.PUBLISHED)
+                self.delete(sipid, who)
+
+        except Exception as ex:
+            if sts.state != status.FAILED:
+                self.log.error("Failed to %s SIP %s: %s", action, sipid, str(ex))
+                sts.update(status.FAILED, sysdata={'errors': [str(ex)]})
+            raise
+
     def describe(self, id: str, withcomps=True):
         """
         returns a NERDm description of the entity with the given identifier.  If the identifier 
@@ -687,6 +836,8 @@ class PDPublishingService(BagBasedPublishingService):
     :param str sip_status_dir:   The path to the directory where SIP status state is persisted.  
                                  If the path is relative, it will be taken to be relative to the 
                                  working directory.
+    :param str sip_status_store: the type of store used to persist SIP status state:  either "file" 
+                                 (default) or "sqlite".
     :param str id_registry_dir:  The path to the directory where ID minting registries are stored
                                  If the path is relative, it will be taken to be relative to the 
                                  working directory.  This serves as a default path that can be overridden
@@ -711,6 +862,12 @@ class PDPublishingService(BagBasedPublishingService):
                                  a bagger instance for a shoulder that has not specified its own
                                  "bagger.factory_function" parameter. 
     :param Mapping repo_access:  a configuration of the PDR APIs
+    :param str async_queue_dir:  if set, requests to finalize or publish an SIP will be queued in this
+                                 directory and carried out asynchronously by a separate process.  If the 
+                                 path is relative, it will be taken to be relative to the working 
+                                 directory.  If not set, these requests are handled synchronously.
+    :param Mapping async_queue:  the configuration for the job queue used to process asynchronous 
+                                 requests (ignored if ``async_queue_dir`` is not set).
 
     As described above, the 'clients' parameter contains configurations for each of the authorized 
     groups for this service; each key under 'clients' is a group's name, and each value is the 
@@ -818,6 +975,11 @@ class PDPublishingService(BagBasedPublishingService):
         self.idregdir = self._resolve_dir('id_registry_dir', idregdir, self.workdir, 'idregs')
         self._minters = {}
 
+    def _job_config(self) -> Mapping:
+        out = super(PDPublishingService, self)._job_config()
+        out['service']['id_registry_dir'] = self.idregdir
+        return out
+
     def _get_id_shoulder(self, who, sipid: str, create: bool):
         """
         determine the ID shoulder to be associated with a service request.  The ID shoulder (the prefix 
@@ -0,0 +1,118 @@
+"""
+A module for executing a queued finalize or publish request as part of a :py:mod:`nistoar.jobmgt` Job
+via its :py:func:`process` function.  This allows a
+:py:class:`~nistoar.pdr.publish.service.pdp.BagBasedPublishingService` configured for asynchronous
+operation to return to its client immediately while the (potentially slow) bag finalization and
+publishing is carried out in a separate process.
+
+The following parameters will be looked for in the configuration provided to the :py:func:`process`
+function:
+
+``service``
+     the configuration needed to reconstitute the publishing service.  It should not itself be
+     configured for asynchronous operation.
+``convention``
+     the label of the SIP convention that the service implements.
+``factory``
+     the fully qualified (i.e. module name included) name of the publishing service class (or a
+     factory function) to instantiate.  It must accept two arguments:  the service configuration
+     and the convention label.
+"""
+import logging, importlib, json
+from collections.abc import Mapping
+from typing import List, Union
+from pathlib import Path
+from logging import Logger
+
+from nistoar.base import config as cfgmod
+from nistoar.base.config import ConfigurationException
+from nistoar.jobmgt import JobQueue, FatalError
+from ...utils.prov import Agent
+from .. import PublishException
+
+LOGNAME = "pubjob"
+FINALIZE = "finalize"
+PUBLISH  = "publish"
+actions = [ FINALIZE, PUBLISH ]
+
+def make_service(config: Mapping, log: Logger=None):
+    """
+    create an instance of the publishing service that will execute a queued request.
+
+    :param dict config:  the configuration data used to reconstitute the service (see above)
+    :param Logger  log:  the base Logger to use
+    :raises ConfigurationException:  if the configuration is incomplete or otherwise unusable
+    """
+    factoryname = config.get('factory')
+    if not factoryname:
+        raise ConfigurationException("Missing required config param: factory")
+    if not config.get('convention'):
+        raise ConfigurationException("Missing required config param: convention")
+
+    parts = factoryname.rsplit('.', 1)
+    try:
+        mod = importlib.import_module(parts[0])
+    except ImportError as ex:
+        raise ConfigurationException("Unable to import publishing service module: "+str(ex)) from ex
+    factory = getattr(mod, parts[-1], None) if len(parts) > 1 else None
+    if not callable(factory):
+        raise ConfigurationException(f"factory value, {factoryname}, does not resolve to a callable")
+
+    return factory(config.get('service', {}), config['convention'])
+
+def process(sipid: str, config: Mapping, args: List[str], log: Logger=None):
+    """
+    finalize or publish the identified SIP
+
+    :param str   sipid:  the identifier of the SIP to process
+    :param dict config:  the configuration needed to reconstitute the publishing service (see
+                         :py:func:`make_service`)
+    :param list   args:  the list of arguments passed to the Job executable; the first argument
+                         must be the action to apply (``finalize`` or ``publish``); the optional
+                         second argument is the JSON-serialized
+                         :py:class:`~nistoar.pdr.utils.prov.Agent` that requested the action.
+    :param Logger  log:  the base Logger to use
+    """
+    if not log:
+        log = logging.getLogger("jobmgt."+LOGNAME).getChild(sipid)
+
+    if not args or args[0] not in actions:
+        raise FatalError("Missing or unrecognized action in Job arguments: %s" % str(args), 2)
+    action = args[0]
+
+    try:
+        who = None
+        if len(args) > 1 and args[1]:
+            who = Agent.from_dict(json.loads(args[1]))
+        svc = make_service(config, log)
+
+    except Exception as ex:
+        log.exception(ex)
+        raise FatalError("Failure while setting up %s request: %s" % (action, str(ex)), 4) from ex
+
+    try:
+        svc.process_request(sipid, action, who)
+    except PublishException as ex:
+        log.exception(ex)
+        raise FatalError(str(ex), 1) from ex
+    except Exception as ex:
+        log.exception(ex)
+        raise FatalError("Unexpected %s failure: %s" % (action, str(ex)), 1) from ex
+
+def create_publish_queue(queuedir: Union[Path,str], config: Mapping=None,
+                         log: Logger=None, resume: bool=True) -> JobQueue:
+    """
+    create a :py:class:`nistoar.jobmgt.JobQueue` to use for executing finalize and publish requests
+    :param str|Path queuedir:  the directory to use to persist the queue state
+    :param dict       config:  the configuration to use
+    :param Logger        log:  the Logger to use
+    :param bool       resume:  if True, launch any zombied jobs found in the state directory
+    """
+    cfg = {
+        "runner": {
+            "capture_logging": True
+        }
+    }
+    if config:
+        cfg = cfgmod.merge_config(config, cfg)
+    return JobQueue("publish", queuedir, __name__, cfg, log, resume)
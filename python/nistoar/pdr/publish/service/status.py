@@ -1,14 +1,21 @@
 """
 This module provides tools for managing and retrieving the status of a 
 preservation efforts across multiple processes.  
+
+Status data is persisted via a :py:class:`SIPStatusStore`; by default, each SIP's status is 
+saved as a JSON file in a directory (:py:class:`FileStatusStore`), but an indexed SQLite database
+(:py:class:`SQLiteStatusStore`) can be configured for services handling many SIPs (see 
+:py:func:`open_store`).  
 """
-import json, os, time, fcntl, re
+import json, os, time, fcntl, re, sqlite3, threading
 from collections import OrderedDict
 from collections.abc import Mapping
 from typing import Iterable, Union, List
 from copy import deepcopy
+from contextlib import closing
+from abc import ABCMeta, abstractmethod
 
-from ...exceptions import StateException
+from ...exceptions import StateException, ConfigurationException
 from .. import system as pubsys
 
 NOT_FOUND  = "not found"     # SIP has not been created
@@ -149,7 +156,7 @@ def _read_status(filepath):
     except OSError as ex:
         raise StateException("Can't open preservation status file: "
                              +filepath+": "+str(ex), cause=ex,
-                             sys=preservsys)
+                             sys=pubsys)
 
 
 def _write_status(filepath, data):
@@ -163,7 +170,262 @@ def _write_status(filepath, data):
     except OSError as ex:
         raise StateException("Can't open preservation status file: "
                              +filepath+": "+str(ex), cause=ex,
-                             sys=preservsys)
+                             sys=pubsys)
+
+class SIPStatusStore(object, metaclass=ABCMeta):
+    """
+    an abstract interface to the persistent storage of SIP status data.  Each SIP's data is stored 
+    under a key derived from its identifier (see :py:func:`status_key`).  Implementations must be
+    safe to use from multiple processes.
+    """
+    @abstractmethod
+    def load(self, key: str) -> Mapping:
+        """
+        return the status data saved under the given key or None if it does not exist
+        """
+        raise NotImplementedError()
+
+    @abstractmethod
+    def save(self, key: str, data: Mapping) -> None:
+        """
+        save the given status data under the given key, replacing any previously saved data
+        """
+        raise NotImplementedError()
+
+    @abstractmethod
+    def remove(self, key: str) -> None:
+        """
+        delete the status data saved under the given key (if it exists)
+        """
+        raise NotImplementedError()
+
+    @abstractmethod
+    def select(self, agents: Iterable[str]=None, state: str=None, siptype: str=None,
+               offset: int=0, limit: int=None) -> List[str]:
+        """
+        return the keys for the saved status data, sorted, that match the given constraints
+        :param list[str] agents:  if provided, return only those SIPs whose authorized agent groups 
+                                  include at least one of these
+        :param str        state:  if provided, return only those SIPs currently in this state
+        :param str      siptype:  if provided, return only those SIPs handled under this convention
+        :param int       offset:  the number of matching keys to skip over (for paging)
+        :param int        limit:  the maximum number of keys to return; if None, all are returned
+        """
+        raise NotImplementedError()
+
+class FileStatusStore(SIPStatusStore):
+    """
+    a status store that saves each SIP's status as a JSON file in a directory.  Filtering a listing 
+    requires reading each status file.
+    """
+
+    def __init__(self, cachedir: str):
+        self.dir = cachedir
+
+    def file_for(self, key: str) -> str:
+        """
+        return the path to the file that the status data for the given key is saved to
+        """
+        return os.path.join(self.dir, key + ".json")
+
+    def load(self, key: str) -> Mapping:
+        path = self.file_for(key)
+        if not os.path.exists(path):
+            return None
+        return SIPStatusFile.read(path)
+
+    def save(self, key: str, data: Mapping) -> None:
+        if not os.path.exists(self.dir):
+            try:
+                os.mkdir(self.dir)
+            except Exception as ex:
+                raise StateException("Can't create preservation status dir: "
+                                     +self.dir+": "+str(ex), cause=ex, sys=pubsys)
+        SIPStatusFile.write(self.file_for(key), data)
+
+    def remove(self, key: str) -> None:
+        path = self.file_for(key)
+        if os.path.exists(path):
+            os.remove(path)
+
+    def select(self, agents: Iterable[str]=None, state: str=None, siptype: str=None,
+               offset: int=0, limit: int=None) -> List[str]:
+        if not os.path.isdir(self.dir):
+            return []
+        out = sorted(os.path.splitext(f)[0] for f in os.listdir(self.dir)
+                                            if f.endswith(".json") and
+                                               not f.startswith('_') and not f.startswith('.'))
+        if agents is not None or state or siptype:
+            if agents is not None:
+                agents = set(agents)
+            out = [k for k in out if self._matches(self.load(k), agents, state, siptype)]
+        return out[offset:] if limit is None else out[offset:offset+limit]
+
+    def _matches(self, data, agents, state, siptype):
+        if not data:
+            return False
+        user = data.get('user', {})
+        if state and user.get('state') != state:
+            return False
+        if siptype and user.get('siptype') != siptype:
+            return False
+        if agents is not None and not (agents & set(user.get('authorized', []))):
+            return False
+        return True
+
+class SQLiteStatusStore(SIPStatusStore):
+    """
+    a status store that saves status data into an embedded SQLite database.  The state, SIP type, 
+    authorized agents, and update time of each SIP are indexed so that listings can be filtered and
+    paged without reading every record.  
+    """
+    _schema = [
+        "CREATE TABLE IF NOT EXISTS sipstatus (key TEXT PRIMARY KEY, id TEXT, state TEXT, "
+        "siptype TEXT, update_time REAL, data TEXT NOT NULL)",
+        "CREATE INDEX IF NOT EXISTS sipstatus_state ON sipstatus (state)",
+        "CREATE INDEX IF NOT EXISTS sipstatus_siptype ON sipstatus (siptype)",
+        "CREATE INDEX IF NOT EXISTS sipstatus_update_time ON sipstatus (update_time)",
+        "CREATE TABLE IF NOT EXISTS sipagent (key TEXT NOT NULL, agent TEXT NOT NULL, "
+        "PRIMARY KEY (key, agent))",
+        "CREATE INDEX IF NOT EXISTS sipagent_agent ON sipagent (agent)"
+    ]
+
+    def __init__(self, dbfile: str, timeout: float=30.0):
+        """
+        open the store, creating the database if necessary
+        :param str    dbfile:  the path to the SQLite database file
+        :param float timeout:  the number of seconds to wait for another process's lock on the 
+                               database to be released
+        """
+        self.dbfile = dbfile
+        self.timeout = timeout
+        dbdir = os.path.dirname(dbfile)
+        if dbdir and not os.path.isdir(dbdir):
+            raise StateException("SIP status database directory does not exist: "+dbdir, sys=pubsys)
+        with closing(self._connect()) as conn, conn:
+            for stmt in self._schema:
+                conn.execute(stmt)
+
+    def _connect(self):
+        # connections are opened per operation so that the store can be shared across threads
+        return sqlite3.connect(self.dbfile, timeout=self.timeout)
+
+    def load(self, key: str) -> Mapping:
+        with closing(self._connect()) as conn:
+            row = conn.execute("SELECT data FROM sipstatus WHERE key=?", (key,)).fetchone()
+        if not row:
+            return None
+        return json.loads(row[0], object_pairs_hook=OrderedDict)
+
+    def save(self, key: str, data: Mapping) -> None:
+        user = data.get('user', {})
+        with closing(self._connect()) as conn, conn:
+            conn.execute("INSERT OR REPLACE INTO sipstatus "
+                         "(key, id, state, siptype, update_time, data) VALUES (?, ?, ?, ?, ?, ?)",
+                         (key, user.get('id'), user.get('state'), user.get('siptype'),
+                          user.get('update_time'), json.dumps(data)))
+            conn.execute("DELETE FROM sipagent WHERE key=?", (key,))
+            conn.executemany("INSERT OR IGNORE INTO sipagent (key, agent) VALUES (?, ?)",
+                             [(key, a) for a in user.get('authorized', [])])
+
+    def remove(self, key: str) -> None:
+        with closing(self._connect()) as conn, conn:
+            conn.execute("DELETE FROM sipagent WHERE key=?", (key,))
+            conn.execute("DELETE FROM sipstatus WHERE key=?", (key,))
+
+    def select(self, agents: Iterable[str]=None, state: str=None, siptype: str=None,
+               offset: int=0, limit: int=None) -> List[str]:
+        where = []
+        params = []
+        if agents is not None:
+            agents = list(agents)
+            if not agents:
+                return []
+            where.append("key IN (SELECT key FROM sipagent WHERE agent IN (%s))" %
+                         ",".join("?" * len(agents)))
+            params.extend(agents)
+        if state:
+            where.append("state=?")
+            params.append(state)
+        if siptype:
+            where.append("siptype=?")
+            params.append(siptype)
+
+        sql = "SELECT key FROM sipstatus"
+        if where:
+            sql += " WHERE " + " AND ".join(where)
+        sql += " ORDER BY key LIMIT ? OFFSET ?"
+        params.extend([-1 if limit is None else limit, offset])
+
+        with closing(self._connect()) as conn:
+            return [r[0] for r in conn.execute(sql, params)]
+
+    def import_from(self, filestore: FileStatusStore, overwrite: bool=False) -> int:
+        """
+        copy the status data from a file-based store into this store.  
+        :param FileStatusStore filestore:  the store to import from
+        :param bool            overwrite:  if False (default), records already in this store will 
+                                           not be replaced
+        :return:  the number of records imported
+        """
+        n = 0
+        for key in filestore.select():
+            if not overwrite and self.load(key) is not None:
+                continue
+            data = filestore.load(key)
+            if data:
+                self.save(key, data)
+                n += 1
+        return n
+
+def status_key(id: str) -> str:
+    """
+    return the key that status data for the SIP with the given identifier is stored under
+    """
+    return re.sub(r'^ark:/\d+/', '', id)
+
+_stores = {}
+_stores_lock = threading.Lock()
+
+def open_store(config: Mapping) -> SIPStatusStore:
+    """
+    return the status store described by the given status configuration.  Stores are cached so that 
+    repeated calls with the same configuration return the same instance.  
+
+    The following configuration parameters are supported:
+
+    ``cachedir``
+         the directory where status data is stored (default: /tmp/sipstatus)
+    ``store``
+         the type of store to use: either "file" (default), which saves each status as a JSON file 
+         in ``cachedir``, or "sqlite", which uses an indexed SQLite database.
+    ``dbfile``
+         the path to the SQLite database file (default: "_sipstatus.sqlite" within ``cachedir``)
+    """
+    if not config:
+        config = {}
+    cachedir = config.get('cachedir', '/tmp/sipstatus')
+    stype = config.get('store', 'file')
+
+    if stype == 'file':
+        return FileStatusStore(cachedir)
+    if stype != 'sqlite':
+        raise ConfigurationException("Unsupported SIP status store type: "+str(stype))
+
+    dbfile = config.get('dbfile') or os.path.join(cachedir, "_sipstatus.sqlite")
+    with _stores_lock:
+        store = _stores.get(dbfile)
+        if not store:
+            if not os.path.exists(cachedir) and not config.get('dbfile'):
+                try:
+                    os.mkdir(cachedir)
+                except Exception as ex:
+                    raise StateException("Can't create preservation status dir: "
+                                         +cachedir+": "+str(ex), cause=ex, sys=pubsys)
+            store = SQLiteStatusStore(dbfile)
+            _stores[dbfile] = store
+        return store
+
 
 class SIPStatus(object):
     """
@@ -184,7 +446,8 @@ class SIPStatus(object):
         :param str config:   the configuration data to apply.  If not provided
                              defaults will be used; in particular, the status
                              data will be cached to /tmp (intended only for 
-                             testing purposes).
+                             testing purposes).  See :py:func:`open_store` for 
+                             the supported parameters.
         :param dict sysdata: if not None, include this data as system data
         :param dict   _data: initialize the status with this data.  This is 
                              not intended for public use.   
@@ -194,14 +457,15 @@ class SIPStatus(object):
         if not config:
             config = {}
         cachedir = config.get('cachedir', '/tmp/sipstatus')
-        fbase = re.sub(r'^ark:/\d+/', '', id)
-        self._cachefile = os.path.join(cachedir, fbase + ".json")
+        self._key = status_key(id)
+        self._cachefile = os.path.join(cachedir, self._key + ".json")
+        self._store = open_store(config)
 
         if _data:
             self._data = deepcopy(_data)
-        elif os.path.exists(self._cachefile):
-            self._data = SIPStatusFile.read(self._cachefile)
         else:
+            self._data = self._store.load(self._key)
+        if not self._data:
             self._data = OrderedDict([
                 ('sys', {}),
                 ('user', OrderedDict([
@@ -270,21 +534,11 @@ class SIPStatus(object):
 
     def cache(self) -> None:
         """
-        cache the data to a JSON file on disk
+        cache the data to the status store
         """
-        if not os.path.exists(self._cachefile):
-            cachedir = os.path.dirname(self._cachefile)
-            if not os.path.exists(cachedir):
-                try:
-                    os.mkdir(cachedir)
-                except Exception as ex:
-                    raise StateException("Can't create preservation status dir: "
-                                         +cachedir+": "+str(ex), cause=ex,
-                                         sys=preservsys)
-
         self._data['user']['update_time'] = time.time()
         self._data['user']['updated'] = time.asctime()
-        SIPStatusFile.write(self._cachefile, self._data)
+        self._store.save(self._key, self._data)
         
     def update(self, label: str, message: str=None, userdata: dict=None, sysdata: dict=None,
                cache: bool=True) -> None:
@@ -319,6 +573,9 @@ class SIPStatus(object):
                 if key not in handsoff:
                     self._data['user'][key] = userdata[key]
             
+        if label != PROCESSING:
+            # progress is only meaningful while processing
+            self._data['user'].pop('progress', None)
         self._data['user']['state'] = label
         self._data['user']['message'] = message
         if cache:
@@ -400,8 +657,7 @@ class SIPStatus(object):
                 ('message', user_message[NOT_FOUND])
             ])
             self._data['history'] = []
-            if os.path.exists(self._cachefile):
-                os.remove(self._cachefile)
+            self._store.remove(self._key)
             
 
     def start(self, siptype: str, agroup: str=None, message: str=None) -> None:
@@ -430,20 +686,52 @@ class SIPStatus(object):
             self.add_authorized_agent(agroup, False)
         self.update(PROCESSING, message)
 
-    def record_progress(self, message: str) -> None:
+    def record_progress(self, message: str, phase: str=None, percent: float=None,
+                        eta: float=None) -> None:
         """
         Update the status with a user-oriented message.  The state will be 
         unchanged, but the data will be cached to disk.
+
+        If any of ``phase``, ``percent``, or ``eta`` are provided, they are saved into a 
+        ``progress`` property of the user-exportable data, allowing clients to follow 
+        long-running (e.g. asynchronous) processing.  This property is removed when the 
+        state is next changed to something other than PROCESSING.
+
+        :param str   message:  a message for display to the end user describing the current
+                               processing
+        :param str     phase:  a short label for the current stage of processing
+        :param float percent:  the estimated percentage (0-100) of the processing that is complete
+        :param float     eta:  the estimated epoch time when processing will be complete; if not 
+                               provided but ``percent`` is, an estimate will be calculated from the 
+                               time elapsed since progress was first recorded. 
         """
         self._data['user']['message'] = message
+        if phase is not None or percent is not None or eta is not None:
+            now = time.time()
+            prog = self._data['user'].get('progress')
+            if not prog:
+                prog = OrderedDict([('since', now)])
+            if phase is not None:
+                prog['phase'] = phase
+            if percent is not None:
+                prog['percent'] = percent
+                if eta is None and 0 < percent < 100:
+                    eta = now + (now - prog['since']) * (100 - percent) / percent
+            if eta is not None:
+                prog['eta'] = eta
+            elif percent is not None:
+                prog.pop('eta', None)
+            prog['updated'] = now
+            self._data['user']['progress'] = prog
         self.cache()
 
     def refresh(self) -> None:
         """
         Read the cached status data and replace the data in memory.
         """
-        if os.path.exists(self._cachefile):
-            self._data = SIPStatusFile.read(self._cachefile)
+        data = self._store.load(self._key)
+        if data:
+            self._data = data
 
     def user_export(self) -> dict:
         """
@@ -452,30 +740,26 @@ class SIPStatus(object):
         """
         out = deepcopy(self._data['user'])
         out['history'] = self._data['history']
-        if out['history'] or out['state'] == SUCCESSFUL:
+        if out['history'] or out['state'] == PUBLISHED:
             out['published'] = True
         return out
 
     @classmethod
-    def requests(cls, config: Mapping, agents: Union[str,Iterable[str],None]=None) -> List:
+    def requests(cls, config: Mapping, agents: Union[str,Iterable[str],None]=None,
+                 state: str=None, siptype: str=None, offset: int=0, limit: int=None) -> List:
         """
         return a list of SIP IDs for which there exist status information.  
-        :param Mapping config:  the status configurtion (which should include the `cachedir` parameter)
+        :param Mapping config:  the status configurtion (which should include the `cachedir` parameter;
+                                see :py:func:`open_store`)
         :param str|list agents: a name or a list of names of agent groups; if provided, the 
                                 returned list will include only those SIPs whose authorized agent 
                                 groups include at least one of these. 
+        :param str       state: if provided, include only those SIPs currently in this state
+        :param str     siptype: if provided, include only those SIPs handled under this convention
+        :param int      offset: the number of matching SIPs to skip over (for paging through the list)
+        :param int       limit: the maximum number of SIP IDs to return; if None, all are returned
         """
-        cachedir = config.get('cachedir', '/tmp/sipstatus')
-        all = [ os.path.splitext(id)[0] for id in os.listdir(cachedir)
-                                        if not id.startswith('_') and
-                                           not id.startswith('.')      ]
-        if agents is None:
-            return all
-
         if isinstance(agents, str):
             agents = [agents]
-        if not isinstance(agents, set):
-            agents = set(agents)
-        out = [s for s in all if SIPStatus(s, config).any_authorized(agents)]
-        return out
+        return open_store(config).select(agents, state, siptype, offset, limit)
             
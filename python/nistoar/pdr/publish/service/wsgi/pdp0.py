@@ -12,7 +12,7 @@ from ... import (PublishingStateException, SIPNotFoundError, BadSIPInputError, N
 from .base import PDPHandler
 from nistoar.web.rest import ServiceApp
 from nistoar.pdr.utils.prov import Agent, Action
-from nistoar.pdr.utils.webrecord import WebRecorder
+from nistoar.web.webrecord import WebRecorder
 from nistoar.web.utils import order_accepts
 from nistoar.web.rest import Handler
 from nistoar.nerdm.validate import ValidationError
@@ -27,16 +27,20 @@ class PDP0App(ServiceApp):
         super(PDP0App, self).__init__(convention, parentlog.getChild(convention), config)
 
         self.svc = PDP0Service(self.cfg, convention)   # IngestService?
-        self.statuscfg = {"cachedir": self.svc.statusdir}
+        self.statuscfg = self.svc.statuscfg
 
-    def sips_for(self, who: Agent):
+    def sips_for(self, who: Agent, state: str=None, offset: int=0, limit: int=None):
         """
         return the list of SIPs that the given Agent is managing.  This is determined based on the 
         Agent's ``agent_class`` property.
+        :param Agent who:   the agent making the request
+        :param str state:   if provided, include only SIPs currently in this state
+        :param int offset:  the number of matching SIPs to skip over (for paging)
+        :param int limit:   the maximum number of SIPs to return; if None, all are returned
         """
         if who.agent_class is None:
             return []
-        return status.SIPStatus.requests(self.statuscfg, who.agent_class)
+        return status.SIPStatus.requests(self.statuscfg, who.agent_class, state, offset=offset, limit=limit)
         
     def create_handler(self, env: dict, start_resp: Callable, path: str, who: Agent) -> Handler:
         """
@@ -87,7 +91,17 @@ class PDP0App(ServiceApp):
 
             path = path.lstrip('/')
             if not path:
-                return self.send_json(self._app.sips_for(self.who), ashead=ashead)
+                qry = parse_qs(self._env.get('QUERY_STRING', ''))
+                try:
+                    offset = int(qry.get('offset', ['0'])[0])
+                    limit = int(qry['limit'][0]) if 'limit' in qry else None
+                    if offset < 0 or (limit is not None and limit < 0):
+                        raise ValueError("negative value")
+                except ValueError as ex:
+                    return self.send_error_resp(400, "Bad query parameter",
+                                                "offset and limit must be non-negative integers")
+                return self.send_json(self._app.sips_for(self.who, qry.get('state', [None])[0],
+                                                         offset, limit), ashead=ashead)
 
             parts = path.split('/', 1)
             try:
@@ -110,6 +124,20 @@ class PDP0App(ServiceApp):
                 self.log.exception("Failed to describe SIP: %s: %s", parts[0], str(ex))
                 return self.send_error(500, "Server error")
 
+        def _set_status(self, out, stat, action, code=200):
+            # record the SIP's status into the output; return the response code to send, which
+            # indicates whether a finalize or publish request was queued for asynchronous processing
+            out['pdr:status'] = stat.state
+            if out.get('pdr:message') is not None:
+                out['pdr:message'] = status.user_message[stat.state]
+            if stat.state == status.PROCESSING and \
+               (action == self.ACTION_FINALIZE or action == self.ACTION_PUBLISH):
+                progress = stat.user_export().get('progress')
+                if progress:
+                    out['pdr:progress'] = progress
+                return 202
+            return code
+
         def do_POST(self, path):
             if not self.acceptable():
                 return self.send_unacceptable()
@@ -201,10 +229,8 @@ class PDP0App(ServiceApp):
                         out = self._app.svc.describe(sipid)
 
                 stat = self._app.svc.status_of(sipid)
-                out['pdr:status'] = stat.state
-                if out.get('pdr:message') is not None:
-                    out['pdr:message'] = status.user_message[stat.state]
-                return self.send_json(out, code=success)
+                code = self._set_status(out, stat, action, success)
+                return self.send_json(out, "Accepted" if code == 202 else "OK", code)
 
             except NERDError as ex:
                 self.log.error("Bad NERDm data POSTed to %s: %s", path, str(ex))
@@ -314,10 +340,8 @@ class PDP0App(ServiceApp):
                         out = self._app.svc.describe(sipid)
 
                 stat = self._app.svc.status_of(sipid)
-                out['pdr:status'] = stat.state
-                if out.get('pdr:message') is not None:
-                    out['pdr:message'] = status.user_message[stat.state]
-                return self.send_json(out)
+                code = self._set_status(out, stat, action)
+                return self.send_json(out, "Accepted" if code == 202 else "OK", code)
 
             except NERDError as ex:
                 self.log.error("Bad NERDm data PUT to %s: %s", path, str(ex))
@@ -437,10 +461,8 @@ class PDP0App(ServiceApp):
                     out = self._app.svc.describe(sipid)
 
                 stat = self._app.svc.status_of(sipid)
-                out['pdr:status'] = stat.state
-                if out.get('pdr:message') is not None:
-                    out['pdr:message'] = status.user_message[stat.state]
-                return self.send_json(out)
+                code = self._set_status(out, stat, action)
+                return self.send_json(out, "Accepted" if code == 202 else "OK", code)
 
             except SIPNotFoundError as ex:
                 return self.send_error_resp(404, "SIP not found",
@@ -3,7 +3,7 @@ Utility functions and classes for file reading and writing
 """
 from collections import OrderedDict
 from collections.abc import Mapping
-import json, os, threading
+import json, os, re, time, threading, tempfile, weakref
 try:
     import fcntl
 except ImportError:
@@ -14,8 +14,8 @@ from .logging import blab, utilslog
 log = utilslog
 
 __all__ = [
-    'LockedFile', 'read_nerd', 'read_pod', 'read_json', 'write_json',
-    'NERDError', 'PODError', 'StateException'
+    'LockedFile', 'read_nerd', 'read_pod', 'read_json', 'write_json', 'recover_writes',
+    'remove_lock_files', 'NERDError', 'PODError', 'StateException'
 ]
 
 class LockedFile(object):
@@ -49,8 +49,18 @@ class LockedFile(object):
        with lkdfile as fd:
           json.dump(data, fd)
 
+
+    The thread locks used to coordinate access within this process are held in a registry only as
+    long as some ``LockedFile`` instance refers to them, so the registry does not grow with the
+    number of distinct files ever accessed.
+
+    Across processes, the file is locked via a sidecar lock file in the same directory (named 
+    ``.<name>.lock``, where ``<name>`` is the name of the file); this is the same lock taken by 
+    :py:func:`write_json`, which replaces the file (and, thus, its inode) rather than writing it
+    in place.  Writers create the sidecar as needed and also lock the file itself; readers lock
+    the file itself only if no sidecar exists yet.
     """
-    _thread_locks = {}
+    _thread_locks = weakref.WeakValueDictionary()
     _class_lock = threading.RLock()
 
     class _ThreadLock(object):
@@ -79,13 +89,16 @@ class LockedFile(object):
     def _get_thread_lock_for(cls, filepath):
         filepath = os.path.abspath(filepath)
         with cls._class_lock:
-            if filepath not in cls._thread_locks:
-                cls._thread_locks[filepath] = cls._ThreadLock()
-            return cls._thread_locks[filepath]
+            out = cls._thread_locks.get(filepath)
+            if out is None:
+                out = cls._ThreadLock()
+                cls._thread_locks[filepath] = out
+            return out
 
     def __init__(self, filename, mode='r'):
         self.mode = mode
         self._fo = None
+        self._lfo = None
         self._fname = filename
         self._thread_lock = self._get_thread_lock_for(filename)
         self._writing = None
@@ -122,21 +135,24 @@ class LockedFile(object):
         self._writing = 'a' in self.mode or 'w' in self.mode or '+' in self.mode
         self._acquire_thread_lock()
         try:
+            self._lfo = _lock_sidecar(self._fname, self._writing)
             self._fo = open(self._fname, self.mode)
+            if fcntl and (self._writing or not self._lfo):
+                lock_type = (self._writing and fcntl.LOCK_EX) or fcntl.LOCK_SH
+                fcntl.lockf(self.fo, lock_type)
         except:
-            self._release_thread_lock()
-            if self._fo:
-                try:
-                    self._fo.close()
-                except:
-                    pass
+            for fo in (self._fo, self._lfo):
+                if fo:
+                    try:
+                        fo.close()
+                    except:
+                        pass
             self._fo = None
+            self._lfo = None
+            self._release_thread_lock()
             self._writing = None
             raise
 
-        if fcntl:
-            lock_type = (self._writing and fcntl.LOCK_EX) or fcntl.LOCK_SH
-            fcntl.lockf(self.fo, lock_type)
         return self.fo
 
     def close(self):
@@ -146,6 +162,11 @@ class LockedFile(object):
             self._fo.close()
         finally:
             self._fo = None
+            if self._lfo:
+                try:
+                    self._lfo.close()
+                finally:
+                    self._lfo = None
             self._release_thread_lock()
             self._writing = None
 
@@ -160,6 +181,34 @@ class LockedFile(object):
         if self._fo:
             self.close()
 
+_LOCK_EXT = ".lock"
+_lockfile_pat = re.compile(r'^\..+'+re.escape(_LOCK_EXT)+'$')
+
+def _lockfile_for(filepath):
+    destdir, name = os.path.split(os.path.abspath(filepath))
+    return os.path.join(destdir, "." + name + _LOCK_EXT)
+
+def _lock_sidecar(filepath, exclusive):
+    # lock the sidecar lock file for the given file, returning the open lock file (or None if 
+    # there is no sidecar to lock).  An exclusive lock will create the sidecar if necessary; a 
+    # shared lock will only use an existing one.
+    if not fcntl:
+        return None
+    lockfile = _lockfile_for(filepath)
+    try:
+        lfo = open(lockfile, (exclusive and 'a') or 'r')
+    except OSError:
+        if exclusive:
+            raise
+        return None
+
+    try:
+        fcntl.lockf(lfo, (exclusive and fcntl.LOCK_EX) or fcntl.LOCK_SH)
+    except:
+        lfo.close()
+        raise
+    return lfo
+
 def read_nerd(nerdfile):
     """
     read the JSON-formatted NERDm metadata in the given file
@@ -208,9 +257,22 @@ def read_json(jsonfile, nolock=False):
     blab(log, "released SH")
     return out
 
-def write_json(jsdata, destfile, indent=4, nolock=False):
+_TMP_EXT = ".writing"
+_umask_lock = threading.Lock()
+_tmpfile_pat = re.compile(r'^\..+\.[^.]+'+re.escape(_TMP_EXT)+'$')
+
+def write_json(jsdata, destfile, indent=4, nolock=False, fsync=True, dirsync=False):
     """
-    write out the given JSON data into a file with pretty print formatting
+    write out the given JSON data into a file with pretty print formatting.  
+
+    The data is written atomically:  it is first written to a temporary file in the same directory
+    as the destination which then replaces the destination via a rename.  Thus, should the process
+    crash mid-write, the destination will contain either its previous contents or the new contents
+    but never a partial write; the orphaned temporary file can be cleaned up with 
+    :py:func:`recover_writes`.  Because the destination is replaced, the lock against other 
+    processes is held on a sidecar lock file (see :py:class:`LockedFile`) which is left in place;
+    it can be removed, once the files are no longer being updated, with 
+    :py:func:`remove_lock_files`.
 
     :param dict jsdata:    the JSON data to write 
     :param str  destfile:  the path to the file to write the data to
@@ -219,14 +281,143 @@ def write_json(jsdata, destfile, indent=4, nolock=False):
     :param bool  nolock:   if False (default), an exclusive lock will be acquired
                            before writing to the file.  A True value writes the 
                            data without a lock
+    :param bool  fsync:    if True (default), the data will be flushed to disk before it replaces
+                           the destination file.
+    :param bool dirsync:   if True, the directory will also be flushed to disk after the 
+                           destination is replaced so that the replacement survives a system 
+                           crash (default: False).
     """
+    destfile = str(destfile)
     try:
-        with LockedFile(destfile, 'a') as fd:
-            blab(log, "Acquired exclusive lock for writing: "+str(destfile))
-            fd.truncate(0)
-            json.dump(jsdata, fd, indent=indent, separators=(',', ': '))
+        tlock = None
+        if not nolock:
+            tlock = LockedFile._get_thread_lock_for(destfile)
+            tlock.acquire_exclusive()
+        try:
+            fo = None
+            if not nolock:
+                # lock against other processes via the sidecar:  the file itself is about to
+                # be replaced, so a lock on it would not be seen by later writers
+                fo = _lock_sidecar(destfile, True)
+                blab(log, "Acquired exclusive lock for writing: "+str(destfile))
+            try:
+                _write_atomically(jsdata, destfile, indent, fsync, dirsync)
+            finally:
+                if fo:
+                    fo.close()
+        finally:
+            if tlock:
+                tlock.release_exclusive()
         blab(log, "released EX")
     except Exception as ex:
         raise StateException("{0}: Failed to write JSON data to file: {1}"
                              .format(destfile, str(ex)), cause=ex)
 
+def _write_atomically(jsdata, destfile, indent, fsync, dirsync):
+    destdir, name = os.path.split(os.path.abspath(destfile))
+    fd, tmpfile = tempfile.mkstemp(prefix="."+name+".", suffix=_TMP_EXT, dir=destdir)
+    try:
+        with os.fdopen(fd, 'w') as fo:
+            json.dump(jsdata, fo, indent=indent, separators=(',', ': '))
+            if fsync:
+                fo.flush()
+                os.fsync(fo.fileno())
+        if os.path.exists(destfile):
+            # preserve the permissions of the file being replaced
+            os.chmod(tmpfile, os.stat(destfile).st_mode & 0o7777)
+        else:
+            # new files get the permissions open() would give them
+            os.chmod(tmpfile, 0o666 & ~_get_umask())
+        os.replace(tmpfile, destfile)
+    except:
+        try:
+            os.remove(tmpfile)
+        except OSError:
+            pass
+        raise
+
+    if dirsync and hasattr(os, 'O_DIRECTORY'):
+        dfd = os.open(destdir, os.O_RDONLY|os.O_DIRECTORY)
+        try:
+            os.fsync(dfd)
+        finally:
+            os.close(dfd)
+
+def _get_umask():
+    # return the process's current umask.  Where possible (Linux), it is read from /proc so that 
+    # it need not be changed; otherwise, it is read by (briefly) setting it, which is serialized 
+    # with a lock
+    try:
+        with open("/proc/self/status") as fd:
+            for line in fd:
+                if line.startswith("Umask:"):
+                    return int(line.split()[1], 8)
+    except (OSError, ValueError, IndexError):
+        pass
+    with _umask_lock:
+        mask = os.umask(0o22)
+        os.umask(mask)
+    return mask
+
+def recover_writes(dirpath, recursive=False, min_age=0):
+    """
+    clean up after JSON writes (via :py:func:`write_json`) that were interrupted by a crash.  An 
+    interrupted write leaves its destination file intact but also leaves behind the temporary file
+    it was writing to; this function removes such files.  It should be called at startup before 
+    files in the directory are written to.  
+
+    :param str  dirpath:    the directory containing the files that were written to
+    :param bool recursive:  if True, subdirectories will be recovered as well
+    :param float min_age:   the minimum age in seconds of the temporary files to remove; set this
+                            to a positive value if other processes may be writing to the directory
+                            at the same time (default: 0).
+    :return:  the list of the temporary files that were removed
+            :rtype: list of str
+    """
+    out = []
+    if not os.path.isdir(dirpath):
+        return out
+    tooyoung = time.time() - min_age
+    for root, dirs, files in os.walk(str(dirpath)):
+        for f in files:
+            if _tmpfile_pat.match(f):
+                path = os.path.join(root, f)
+                try:
+                    if min_age <= 0 or os.stat(path).st_mtime < tooyoung:
+                        os.remove(path)
+                        out.append(path)
+                except FileNotFoundError:
+                    pass
+        if not recursive:
+            break
+    if out:
+        log.warning("%s: cleaned up %d interrupted JSON write(s)", str(dirpath), len(out))
+    return out
+
+def remove_lock_files(dirpath, recursive=False):
+    """
+    remove the sidecar lock files left behind by :py:func:`write_json` and :py:class:`LockedFile`.
+    This should only be called when no other thread or process is accessing the files in the 
+    directory (e.g. when a bag is being finalized); otherwise, a subsequent write may not be 
+    serialized with one that is already in progress.  
+
+    :param str  dirpath:    the directory containing the files that were written to
+    :param bool recursive:  if True, lock files in subdirectories will be removed as well
+    :return:  the list of the lock files that were removed
+            :rtype: list of str
+    """
+    out = []
+    if not os.path.isdir(dirpath):
+        return out
+    for root, dirs, files in os.walk(str(dirpath)):
+        for f in files:
+            if _lockfile_pat.match(f):
+                path = os.path.join(root, f)
+                try:
+                    os.remove(path)
+                    out.append(path)
+                except FileNotFoundError:
+                    pass
+        if not recursive:
+            break
+    return out
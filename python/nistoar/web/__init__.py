@@ -15,4 +15,7 @@ This package is organized into the following modules:
     access to the request via the WSGI environment.
 ``rest``
     a simple framework for creating strict REST services
+``transport``
+    a pooled, instrumented HTTP transport to be used by clients for outbound requests to other
+    services
 """
@@ -1,8 +1,11 @@
 """
 A module that provides methods of authentication that can be used by web service implementations.
 """
+import time, hashlib, threading
 from typing import Mapping, List, Callable
 from logging import Logger
+from collections import OrderedDict
+from copy import deepcopy
 
 import jwt
 
@@ -161,9 +164,119 @@ def authenticate_via_proxy_x509(svcname: str, env: Mapping, authcfg: Mapping, lo
     # TODO!
     return None
 
+class JWTAuthCache:
+    """
+    a bounded, thread-safe cache of Agents created from successfully verified JWT tokens.  Clients 
+    often present the same token on many requests (e.g. when polling); caching the result of 
+    verification allows :py:func:`authenticate_via_jwt` to skip the decoding and agent construction 
+    for repeat requests.  A cached entry never outlives the token's expiration time.  
+
+    Entries can be purged when a token is revoked via :py:meth:`revoke` or :py:meth:`revoke_subject`.
+
+    An instance is intended to be created once when an application is loaded and used for all of
+    its requests.  It looks for the following parameters in the configuration provided at 
+    construction:
+
+    ``capacity``
+        the maximum number of tokens to cache; when full, the least recently used entries are 
+        evicted (default: 1000).  A value of 0 disables caching.
+    ``ttl``
+        the maximum number of seconds to cache a verified token (default: 300).
+    """
+    DEF_CAPACITY = 1000
+    DEF_TTL = 300
+
+    def __init__(self, config: Mapping=None):
+        if config is None:
+            config = {}
+        self.capacity = config.get('capacity', self.DEF_CAPACITY)
+        self.ttl = config.get('ttl', self.DEF_TTL)
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    @classmethod
+    def _digest(cls, token: str) -> str:
+        return hashlib.sha256(token.encode('utf-8')).hexdigest()
+
+    def _key(self, token, svcname, agents, client_id):
+        return (self._digest(token), svcname, tuple(agents or []), client_id)
+
+    def get(self, token: str, svcname: str, agents: List[str]=None, client_id: str=None) -> Agent:
+        """
+        return a copy of the Agent cached for the given token and request context or None if 
+        there is no unexpired entry
+        """
+        key = self._key(token, svcname, agents, client_id)
+        with self._lock:
+            entry = self._entries.get(key)
+            if not entry:
+                return None
+            if entry[0] <= time.time():
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+        return deepcopy(entry[2])
+
+    def put(self, token: str, svcname: str, agents: List[str], client_id: str, who: Agent,
+            exp: float=None) -> None:
+        """
+        cache the Agent created for the given token and request context
+        :param float exp:  the token's expiration time as an epoch time; if provided, the entry 
+                           will not be cached beyond this time.
+        """
+        if self.capacity <= 0:
+            return
+        expires = time.time() + self.ttl
+        if exp is not None and exp < expires:
+            expires = exp
+        key = self._key(token, svcname, agents, client_id)
+        with self._lock:
+            self._entries[key] = (expires, who.actor, deepcopy(who))
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.capacity:
+                self._entries.popitem(last=False)
+
+    def revoke(self, token: str) -> int:
+        """
+        remove all entries for the given token
+        :return:  the number of entries removed
+        """
+        digest = self._digest(token)
+        with self._lock:
+            keys = [k for k in self._entries if k[0] == digest]
+            for k in keys:
+                del self._entries[k]
+        return len(keys)
+
+    def revoke_subject(self, actor: str) -> int:
+        """
+        remove all entries for tokens issued to the given user (as identified by the Agent's 
+        ``actor`` property)
+        :return:  the number of entries removed
+        """
+        with self._lock:
+            keys = [k for k, e in self._entries.items() if e[1] == actor]
+            for k in keys:
+                del self._entries[k]
+        return len(keys)
+
+    def clear(self) -> None:
+        """
+        empty the cache
+        """
+        with self._lock:
+            self._entries.clear()
+
+    @property
+    def size(self) -> int:
+        """
+        the number of entries currently in the cache
+        """
+        return len(self._entries)
+
 def authenticate_via_jwt(svcname: str, env: Mapping, jwtcfg: Mapping, log: Logger,
                          agents: List[str], client_id: str=None,
-                         claim_to_agent_func: Callable=None) -> Agent:
+                         claim_to_agent_func: Callable=None, cache: JWTAuthCache=None) -> Agent:
     """
     authenticate the remote user assuming a JWT was provided as an Authorization Bearer token.
 
@@ -192,12 +305,15 @@ def authenticate_via_jwt(svcname: str, env: Mapping, jwtcfg: Mapping, log: Logge
     :param function claim_to_agent_func:  a function that takes a JWT claimset dictionary and 
                           returns an Agent instance.  If not provided, 
                           :py:func:`make_agent_from_nistoar_claimset` will be executed.
+    :param JWTAuthCache cache:  a cache of previously verified tokens; if provided, a token found 
+                          in the cache is not decoded again, and newly verified tokens are added
+                          to it.
     :returns:  an :py:class:`Agent` instance representing the user
     """
     if not client_id:
         client_id = "(unknown)"
     if not svcname:
-        svnname = "nistoar"
+        svcname = "nistoar"
     agents = list(agents) if agents else []
 
     auth = env.get('HTTP_AUTHORIZATION', "x").split()
@@ -207,6 +323,12 @@ def authenticate_via_jwt(svcname: str, env: Mapping, jwtcfg: Mapping, log: Logge
             raise Unauthenticated("JWT token not provided")
         return Agent(svcname, Agent.UNKN, Agent.ANONYMOUS, Agent.PUBLIC, agents)
 
+    reqagents = list(agents)
+    if cache:
+        out = cache.get(auth[1], svcname, reqagents, client_id)
+        if out:
+            return out
+
     try:
         userinfo = jwt.decode(auth[1], jwtcfg.get("key", ""),
                               algorithms=[jwtcfg.get("algorithm", "HS256")])
@@ -218,7 +340,7 @@ def authenticate_via_jwt(svcname: str, env: Mapping, jwtcfg: Mapping, log: Logge
                      invalid_reason="Invalid token can not be decoded")
 
     if not claim_to_agent_func:
-        claim_to_agent_func = make_agent_from_nistoar_claimset
+        claim_to_agent_func = _nistoar_claim_mapper
     out = claim_to_agent_func(svcname, userinfo, log, agents, client_id)
 
     # make sure the token has an expiration date
@@ -231,8 +353,66 @@ def authenticate_via_jwt(svcname: str, env: Mapping, jwtcfg: Mapping, log: Logge
         return Agent(out.vehicle, out.actor_type, out.actor, Agent.INVALID, agents,
                      invalid_reason=f"non-expiring token rejected")
 
+    if cache:
+        cache.put(auth[1], svcname, reqagents, client_id, out, userinfo.get('exp'))
     return out
 
+class NISTOARClaimMapper:
+    """
+    a callable that creates an Agent instance representing the end user from a JWT claim set 
+    assuming it originated from a NIST-OAR JWT service.  An instance can be passed as the 
+    ``claim_to_agent_func`` argument to :py:func:`authenticate_via_jwt`.  
+
+    The rules for mapping claims onto Agent properties--which claims are consumed to set the 
+    identity and which are passed on as extra properties--are built once when the instance is 
+    created; thus, an application should create its instance when it is loaded and use it for all 
+    of its requests.  
+    """
+    NIST_DOMAIN = "nist.gov"
+    NIST_GROUP = "nist"
+    CONSUMED_CLAIMS = ("userEmail", "sub", "agclass", "vehicle")
+
+    def __init__(self):
+        self._suffix = "@" + self.NIST_DOMAIN
+        self._sufflen = len(self._suffix)
+        self._consumed = frozenset(self.CONSUMED_CLAIMS)
+
+    def __call__(self, svcname: str, userinfo: Mapping, log: Logger, agents=None,
+                 client_id: str=None) -> Agent:
+        """
+        create the Agent representing the user described by the given claim set.  See 
+        :py:func:`make_agent_from_nistoar_claimset` for a description of the arguments.
+        """
+        subj = userinfo.get('sub')
+        email = userinfo.get('userEmail')
+        group = Agent.PUBLIC
+        if not subj:
+            log.warning("User token is missing subject identifier; defaulting to anonymous")
+            subj = Agent.ANONYMOUS
+        elif subj.endswith(self._suffix):
+            group = self.NIST_GROUP
+            subj = subj[:-1*self._sufflen]
+        elif email and email.endswith(self._suffix):
+            group = self.NIST_GROUP
+
+        umd = dict((k,v) for k,v in userinfo.items() if k not in self._consumed)
+
+        # token may contain the client_id; if so, use it.
+        client_id = umd.get('client_id', client_id)
+        if client_id:
+            agents.append(client_id)
+        agclass = group
+        if umd.get('client_id'):
+            agclass = umd['client_id'].split(':')[0]  # a unique ID may follow :
+
+        # we allow the token to provide agent information 
+        umd.setdefault('actortype', Agent.USER)
+        umd.setdefault('agents', agents)
+
+        return Agent(vehicle=svcname, actorid=subj, agclass=agclass, groups=[group], email=email, **umd)
+
+_nistoar_claim_mapper = NISTOARClaimMapper()
+
 def make_agent_from_nistoar_claimset(svcname: str, userinfo: Mapping, log: Logger, agents=None,
                                      client_id: str=None) -> Agent:
     """
@@ -242,7 +422,7 @@ def make_agent_from_nistoar_claimset(svcname: str, userinfo: Mapping, log: Logge
     This implementation will use information encoded in the token for key properties of the output
     agent.  In addition to the actor ID (taken from the token's subject), the token may contain a 
     client_id, the agent type, the agent class.  Other non-standard properties may be transfered 
-    over as well.
+    over as well.  (See also :py:class:`NISTOARClaimMapper`.)
 
     :param str   svcname:  a name to provide as the agent software vehicle
     :param dict userinfo:  a dictionary containing the JST claimset data
@@ -252,33 +432,4 @@ def make_agent_from_nistoar_claimset(svcname: str, userinfo: Mapping, log: Logge
                            on behalf of.  By default, if None or empty, no agents will be attached 
                            to the returned Agent.
     """
-    subj = userinfo.get('sub')
-    email = userinfo.get('userEmail')
-    group = Agent.PUBLIC
-    if not subj:
-        log.warning("User token is missing subject identifier; defaulting to anonymous")
-        subj = Agent.ANONYMOUS
-    elif subj.endswith("@nist.gov"):
-        group = "nist"
-        subj = subj[:-1*len("@nist.gov")]
-    elif email and email.endswith("@nist.gov"):
-        group = "nist"
-
-    umd = dict((k,v) for k,v in userinfo.items()
-                         if k not in ["userEmail", "sub", "agclass", "vehicle"])
-
-    # token may contain the client_id; if so, use it.
-    client_id = umd.get('client_id', client_id)
-    if client_id:
-        agents.append(client_id)
-    agclass = group
-    if umd.get('client_id'):
-        agclass = umd['client_id'].split(':')[0]  # a unique ID may follow :
-
-    # we allow the token to provide agent information 
-    umd.setdefault('actortype', Agent.USER)
-    umd.setdefault('agents', agents)
-    
-    return Agent(vehicle=svcname, actorid=subj, agclass=agclass, groups=[group], email=email, **umd)
-
-
+    return _nistoar_claim_mapper(svcname, userinfo, log, agents, client_id)
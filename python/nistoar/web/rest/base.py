@@ -23,7 +23,8 @@ from nistoar.pdr.utils.prov import Agent
 
 __all__ = ["Handler", "NotFoundHandler", "ServiceApp", "Unauthenticated", "WSGIServiceApp", 
            "AuthenticatedWSGIApp", "WSGIAppSuite", "Agent",
-           "authenticate_via_authkey", "authenticate_via_proxy_x509", "authenticate_via_jwt" ]
+           "authenticate_via_authkey", "authenticate_via_proxy_x509", "authenticate_via_jwt",
+           "JWTAuthCache", "NISTOARClaimMapper" ]
 
 class Handler(object):
     """
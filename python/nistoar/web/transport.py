@@ -0,0 +1,353 @@
+"""
+a common HTTP transport for the outbound requests made by OAR service clients.
+
+Clients should make their HTTP requests through this module (either via the module-level
+:py:func:`request`, :py:func:`get`, :py:func:`post`, etc. functions, which use a shared,
+process-wide :py:class:`HTTPTransport` instance, or via an :py:class:`HTTPTransport` instance of
+their own) rather than calling ``requests.get()`` and friends directly.  The transport provides:
+
+* a pool of persistent connections per remote host (via one ``requests.Session`` per host) so that
+  TCP/TLS connections are reused across requests; because the sessions are shared by all of the
+  clients using the transport, they do not keep cookies set by the servers;
+* default connect and read timeouts so that a hung service cannot hang its client indefinitely;
+* automatic retries with jittered exponential backoff for idempotent requests (GET, HEAD,
+  OPTIONS, PUT, DELETE) that fail with a connection error or a transient server error status;
+* per-endpoint counters of request latency, errors, and retries that can be dumped by an operator
+  (see :py:meth:`HTTPTransport.stats` and :py:func:`install_stats_dumper`).
+
+The shared transport can be configured at application start-up via :py:func:`configure`; it
+accepts the following parameters:
+
+``pool_maxsize``
+     the maximum number of connections to keep open to any single host (default: 10)
+``connect_timeout``
+     the default number of seconds to wait to establish a connection (default: 10)
+``read_timeout``
+     the default number of seconds to wait for a response from the server (default: 120)
+``retries``
+     the maximum number of times to retry a failed idempotent request (default: 2)
+``backoff_factor``
+     the base delay in seconds for retrying; the delay before retry number *n* is chosen randomly
+     between 0 and ``backoff_factor * 2**n`` (default: 0.5)
+``backoff_max``
+     the maximum delay in seconds between retries (default: 10)
+``retry_statuses``
+     the list of response status codes that trigger a retry (default: [502, 503, 504])
+``max_endpoints``
+     the maximum number of distinct endpoints to keep statistics for; requests to further
+     endpoints are tallied under a per-host wildcard endpoint (default: 500)
+``hosts``
+     a dictionary mapping host names (with port, if non-standard) to dictionaries that override
+     any of the above parameters for requests to that host
+"""
+import time, random, threading, json, logging, signal
+from http.cookiejar import DefaultCookiePolicy
+from collections import OrderedDict
+from collections.abc import Mapping
+from urllib.parse import urlsplit
+
+import requests
+from requests.adapters import HTTPAdapter
+
+__all__ = [ "HTTPTransport", "EndpointStats", "get_transport", "configure", "request",
+            "get", "post", "put", "head", "delete", "install_stats_dumper" ]
+
+IDEMPOTENT_METHODS = frozenset("GET HEAD OPTIONS PUT DELETE".split())
+
+DEF_POOL_MAXSIZE = 10
+DEF_CONNECT_TIMEOUT = 10
+DEF_READ_TIMEOUT = 120
+DEF_RETRIES = 2
+DEF_BACKOFF_FACTOR = 0.5
+DEF_BACKOFF_MAX = 10
+DEF_RETRY_STATUSES = (502, 503, 504)
+DEF_MAX_ENDPOINTS = 500
+
+class EndpointStats(object):
+    """
+    counters describing the requests made to a particular service endpoint.  The counters are 
+    updated and read under a lock so that they remain consistent when requests to the endpoint 
+    are made from several threads.
+    """
+    __slots__ = ("count", "errors", "retries", "total_time", "max_time", "last_status", "_lock")
+
+    def __init__(self):
+        self.count = 0
+        self.errors = 0
+        self.retries = 0
+        self.total_time = 0.0
+        self.max_time = 0.0
+        self.last_status = None
+        self._lock = threading.Lock()
+
+    def record(self, elapsed: float, status: int=None, failed: bool=False):
+        """
+        record the completion of a request
+        :param float elapsed:  the time the request took in seconds
+        :param int    status:  the response status code (None if no response was received)
+        :param bool   failed:  True if the request should be counted as an error
+        """
+        with self._lock:
+            self.count += 1
+            self.total_time += elapsed
+            if elapsed > self.max_time:
+                self.max_time = elapsed
+            self.last_status = status
+            if failed:
+                self.errors += 1
+
+    def record_retry(self):
+        """
+        record that a request is being retried
+        """
+        with self._lock:
+            self.retries += 1
+
+    def to_dict(self) -> Mapping:
+        """
+        return these statistics as a JSON-encodable dictionary
+        """
+        with self._lock:
+            return OrderedDict([
+                ("count",       self.count),
+                ("errors",      self.errors),
+                ("retries",     self.retries),
+                ("mean_time",   (self.count and self.total_time / self.count) or 0.0),
+                ("max_time",    self.max_time),
+                ("last_status", self.last_status)
+            ])
+
+class _NoCookiesPolicy(DefaultCookiePolicy):
+    # a policy that refuses all cookies sent by servers
+    def set_ok(self, cookie, request):
+        return False
+
+class HTTPTransport(object):
+    """
+    a pooled, instrumented HTTP transport.  See the :py:mod:`module documentation
+    <nistoar.web.transport>` for the supported configuration parameters.
+    """
+
+    def __init__(self, config: Mapping=None):
+        """
+        create the transport
+        :param Mapping config:  the configuration for the transport
+        """
+        if not config:
+            config = {}
+        self.cfg = config
+        self._sessions = {}
+        self._stats = OrderedDict()
+        self._lock = threading.Lock()
+
+    def _param(self, host, name, defval):
+        return self.cfg.get('hosts', {}).get(host, {}).get(name, self.cfg.get(name, defval))
+
+    def session_for(self, url: str) -> requests.Session:
+        """
+        return the ``requests.Session`` used to send requests to the host in the given URL
+        """
+        host = urlsplit(url).netloc
+        with self._lock:
+            sess = self._sessions.get(host)
+            if not sess:
+                sess = requests.Session()
+                sess.cookies.set_policy(_NoCookiesPolicy())
+                adapter = HTTPAdapter(pool_connections=1,
+                                      pool_maxsize=self._param(host, 'pool_maxsize', DEF_POOL_MAXSIZE))
+                sess.mount("http://", adapter)
+                sess.mount("https://", adapter)
+                self._sessions[host] = sess
+        return sess
+
+    def _stats_for(self, method, url):
+        parts = urlsplit(url)
+        key = "%s %s%s" % (method, parts.netloc, parts.path or '/')
+        with self._lock:
+            if key not in self._stats:
+                if len(self._stats) >= self.cfg.get('max_endpoints', DEF_MAX_ENDPOINTS):
+                    key = "%s %s/*" % (method, parts.netloc)
+                if key not in self._stats:
+                    self._stats[key] = EndpointStats()
+            return self._stats[key]
+
+    def _backoff(self, host, attempt):
+        delay = self._param(host, 'backoff_factor', DEF_BACKOFF_FACTOR) * (2 ** attempt)
+        delay = min(delay, self._param(host, 'backoff_max', DEF_BACKOFF_MAX))
+        return random.uniform(0, delay)
+
+    def request(self, method: str, url: str, retries: int=None, **kwargs) -> requests.Response:
+        """
+        send an HTTP request.  Apart from those listed below, all keyword parameters are passed
+        to ``requests.Session.request()``.  If ``timeout`` is not given, the configured default
+        connect and read timeouts are applied.
+        :param str method:   the HTTP method to use
+        :param str    url:   the URL to send the request to
+        :param int retries:  the maximum number of times to retry the request if it fails with a
+                             connection error or a transient error status.  If not provided, the
+                             configured value will be used for idempotent methods; other methods
+                             will not be retried.
+        :raises requests.RequestException:  if the request could not be completed
+        """
+        method = method.upper()
+        host = urlsplit(url).netloc
+        if 'timeout' not in kwargs:
+            kwargs['timeout'] = (self._param(host, 'connect_timeout', DEF_CONNECT_TIMEOUT),
+                                 self._param(host, 'read_timeout', DEF_READ_TIMEOUT))
+        if retries is None:
+            retries = self._param(host, 'retries', DEF_RETRIES) if method in IDEMPOTENT_METHODS else 0
+        retry_on = self._param(host, 'retry_statuses', DEF_RETRY_STATUSES)
+
+        sess = self.session_for(url)
+        stats = self._stats_for(method, url)
+        attempt = 0
+        while True:
+            start = time.time()
+            try:
+                resp = sess.request(method, url, **kwargs)
+            except (requests.ConnectionError, requests.Timeout) as ex:
+                stats.record(time.time() - start, None, True)
+                if attempt >= retries:
+                    raise
+            except requests.RequestException as ex:
+                stats.record(time.time() - start, None, True)
+                raise
+            else:
+                stats.record(time.time() - start, resp.status_code, resp.status_code >= 500)
+                if resp.status_code not in retry_on or attempt >= retries:
+                    return resp
+                resp.close()
+
+            stats.record_retry()
+            time.sleep(self._backoff(host, attempt))
+            attempt += 1
+
+    def get(self, url: str, **kwargs) -> requests.Response:
+        """send a GET request (see :py:meth:`request`)"""
+        return self.request("GET", url, **kwargs)
+
+    def head(self, url: str, **kwargs) -> requests.Response:
+        """send a HEAD request (see :py:meth:`request`)"""
+        return self.request("HEAD", url, **kwargs)
+
+    def post(self, url: str, **kwargs) -> requests.Response:
+        """send a POST request (see :py:meth:`request`)"""
+        return self.request("POST", url, **kwargs)
+
+    def put(self, url: str, **kwargs) -> requests.Response:
+        """send a PUT request (see :py:meth:`request`)"""
+        return self.request("PUT", url, **kwargs)
+
+    def delete(self, url: str, **kwargs) -> requests.Response:
+        """send a DELETE request (see :py:meth:`request`)"""
+        return self.request("DELETE", url, **kwargs)
+
+    def stats(self) -> Mapping:
+        """
+        return the current request statistics as a JSON-encodable dictionary keyed by endpoint
+        (of the form "METHOD host/path")
+        """
+        with self._lock:
+            return OrderedDict((k, v.to_dict()) for k, v in self._stats.items())
+
+    def reset_stats(self):
+        """
+        clear all of the collected request statistics
+        """
+        with self._lock:
+            self._stats.clear()
+
+    def dump_stats(self, ostrm):
+        """
+        write the current request statistics as JSON to the given output stream
+        """
+        json.dump(self.stats(), ostrm, indent=2)
+        ostrm.write("\n")
+
+    def close(self):
+        """
+        close all pooled connections
+        """
+        with self._lock:
+            for sess in self._sessions.values():
+                sess.close()
+            self._sessions.clear()
+
+_transport = None
+_translock = threading.Lock()
+
+def get_transport() -> HTTPTransport:
+    """
+    return the shared, process-wide transport
+    """
+    global _transport
+    with _translock:
+        if not _transport:
+            _transport = HTTPTransport()
+        return _transport
+
+def configure(config: Mapping):
+    """
+    (re-)configure the shared, process-wide transport.  Any connections held by the previous
+    shared transport are closed.
+    """
+    global _transport
+    with _translock:
+        old = _transport
+        _transport = HTTPTransport(config)
+    if old:
+        old.close()
+
+def request(method: str, url: str, **kwargs) -> requests.Response:
+    """send a request via the shared transport (see :py:meth:`HTTPTransport.request`)"""
+    return get_transport().request(method, url, **kwargs)
+
+def get(url: str, **kwargs) -> requests.Response:
+    """send a GET request via the shared transport (see :py:meth:`HTTPTransport.request`)"""
+    return get_transport().request("GET", url, **kwargs)
+
+def head(url: str, **kwargs) -> requests.Response:
+    """send a HEAD request via the shared transport (see :py:meth:`HTTPTransport.request`)"""
+    return get_transport().request("HEAD", url, **kwargs)
+
+def post(url: str, **kwargs) -> requests.Response:
+    """send a POST request via the shared transport (see :py:meth:`HTTPTransport.request`)"""
+    return get_transport().request("POST", url, **kwargs)
+
+def put(url: str, **kwargs) -> requests.Response:
+    """send a PUT request via the shared transport (see :py:meth:`HTTPTransport.request`)"""
+    return get_transport().request("PUT", url, **kwargs)
+
+def delete(url: str, **kwargs) -> requests.Response:
+    """send a DELETE request via the shared transport (see :py:meth:`HTTPTransport.request`)"""
+    return get_transport().request("DELETE", url, **kwargs)
+
+def install_stats_dumper(log: logging.Logger=None, signum: int=signal.SIGUSR1) -> bool:
+    """
+    install a signal handler that will log the shared transport's request statistics whenever
+    the process receives the given signal.  This must be called from the main thread.  
+
+    The statistics are written from a separate thread so that the handler never waits on a lock
+    held by the code it interrupted.  Under uWSGI, the handler is inherited by the forked workers 
+    only if uWSGI is run with ``py-call-osafterfork`` (or ``lazy-apps``) enabled; the signal 
+    should then be sent to a worker's PID (the master handles SIGUSR1 itself).
+    :param Logger log:  the logger to write the statistics to (default: this module's logger)
+    :param int signum:  the signal to respond to (default: SIGUSR1)
+    :return:  True if the handler was installed or False if it could not be (e.g. because this 
+              was not called from the main thread)
+    """
+    if not log:
+        log = logging.getLogger(__name__)
+
+    def _log_stats():
+        log.info("Outbound HTTP request statistics:\n%s", json.dumps(get_transport().stats(), indent=2))
+
+    def _dump(sig, frame):
+        threading.Thread(target=_log_stats, name="http-stats-dumper", daemon=True).start()
+
+    try:
+        signal.signal(signum, _dump)
+    except ValueError as ex:
+        log.warning("Unable to install HTTP request statistics dumper: %s", str(ex))
+        return False
+    return True
@@ -1,10 +1,19 @@
 """
 a module that manages the recording of web requests so that they can be played back
+
+When recording to a file, the :py:class:`WebRecorder` also maintains a sidecar index file (named
+after the record file with an ".idx" extension) that holds the byte offset of each record as a
+fixed-width entry.  The :py:class:`RequestLogParser` uses this index to count records and to jump
+directly to a record by its position without reading the file from the top.
 """
 import logging, os
 from io import StringIO
 
 RECORD_FORMAT = "=*= %(asctime)s %(name)s %(message)s"
+RECORD_MARK = "=*="
+INDEX_EXT = ".idx"
+INDEX_ENTRY_SIZE = 16
+_INDEX_ENTRY_FMT = "%015d\n"
 
 class WebRequest(object):
     """
@@ -122,7 +131,7 @@ class WebRequest(object):
         record this request to its recorder
         """
         if not self.recorder:
-            raise RuntimeException("Request Record not connected to a recorder (%s %s)",
+            raise RuntimeError("Request Record not connected to a recorder (%s %s)",
                                    self.op, self.resource)
         self.recorder.record(self)
 
@@ -146,12 +155,167 @@ class WebRequest(object):
     def __str__(self):
         return "WebRequest(%s %s)" % (self.op, self.resource)
 
+class RecordIndex(object):
+    """
+    an interface to the sidecar index of a request record file.  The index is a file of fixed-width
+    entries, one per record, each giving the byte offset of the start of the record within the 
+    record file; thus, the number of records and the location of any record can be determined 
+    without reading the record file.
+    """
+
+    def __init__(self, recordfile, idxfile=None):
+        """
+        :param str recordfile:  the path to the record file being indexed
+        :param str idxfile:     the path to the index file; if not provided, the name of the 
+                                record file with INDEX_EXT appended will be used.
+        """
+        self.recfile = recordfile
+        if not idxfile:
+            idxfile = recordfile + INDEX_EXT
+        self.idxfile = idxfile
+        self._mem = None
+
+    def count(self):
+        """
+        return the number of records represented in the index
+        """
+        if self._mem is not None:
+            return len(self._mem)
+        try:
+            return os.stat(self.idxfile).st_size // INDEX_ENTRY_SIZE
+        except FileNotFoundError:
+            return 0
+
+    def offset(self, n):
+        """
+        return the byte offset of the n-th record (where the first record is at position 0)
+        """
+        if self._mem is not None:
+            return self._mem[n]
+        with open(self.idxfile, 'rb') as fd:
+            fd.seek(n * INDEX_ENTRY_SIZE)
+            return int(fd.read(INDEX_ENTRY_SIZE))
+
+    def _scan(self, fd, pos, size):
+        # return the offsets of the records starting at or after pos and before size
+        out = []
+        fd.seek(pos)
+        mark = RECORD_MARK.encode()
+        for line in fd:
+            if pos >= size:
+                break
+            if line.startswith(mark):
+                out.append(pos)
+            pos += len(line)
+        return out
+
+    def _is_record_start(self, fd, pos):
+        fd.seek(pos)
+        return fd.read(len(RECORD_MARK)) == RECORD_MARK.encode()
+
+    def tail(self, size=None):
+        """
+        check that the index is consistent with the record file and return the offsets of any 
+        records that were appended after the last indexed one.  None is returned if the index is 
+        missing or does not describe the record file (e.g. because the record file was replaced 
+        or was written without an index); in that case, the index should be rebuilt.
+        :param int size:  the number of bytes of the record file to consider; if not provided,
+                          the current size of the file is used.
+        :rtype: list
+        """
+        if size is None:
+            size = os.stat(self.recfile).st_size
+        n = self.count()
+        if n == 0:
+            return [] if size == 0 else None
+
+        first = self.offset(0)
+        last = self.offset(n-1)
+        if last >= size:
+            return None
+        with open(self.recfile, 'rb') as fd:
+            recs = self._scan(fd, 0, first+1)
+            if not recs or recs[0] != first or not self._is_record_start(fd, last):
+                return None
+            return self._scan(fd, last, size)[1:]
+
+    def rebuild(self, size=None):
+        """
+        recreate the index by scanning the record file.  If the index cannot be written, the 
+        offsets will be held in memory for the life of this instance.
+        :param int size:  the number of bytes of the record file to index; if not provided,
+                          the current size of the file is used.
+        """
+        if size is None:
+            size = os.stat(self.recfile).st_size
+        with open(self.recfile, 'rb') as fd:
+            offsets = self._scan(fd, 0, size)
+
+        tmpfile = self.idxfile + ".tmp"
+        try:
+            with open(tmpfile, 'w') as fd:
+                for off in offsets:
+                    fd.write(_INDEX_ENTRY_FMT % off)
+            os.replace(tmpfile, self.idxfile)
+            self._mem = None
+        except OSError:
+            self._mem = offsets
+
+class IndexedFileHandler(logging.FileHandler):
+    """
+    a logging handler that writes request records to a file while maintaining a 
+    :py:class:`RecordIndex` for it.  If the record file already exists but its index is missing
+    or out of date, the index is rebuilt before the first new record is written.  The index 
+    assumes that this handler is the only writer to the record file.
+    """
+
+    def __init__(self, filename, mode='a', encoding=None, delay=False):
+        super(IndexedFileHandler, self).__init__(filename, mode, encoding, delay)
+        self.index = RecordIndex(self.baseFilename)
+        self._idxfd = None
+
+    def emit(self, record):
+        pos = None
+        if self.index:
+            try:
+                if self.stream is None:
+                    self.stream = self._open()
+                self.stream.flush()
+                pos = self.stream.tell()
+                if self._idxfd is None:
+                    if self.index.tail(pos) != []:
+                        self.index.rebuild(pos)
+                    self._idxfd = open(self.index.idxfile, 'a')
+            except Exception:
+                # carry on recording without the index; readers will rebuild it as needed
+                self.index = None
+                pos = None
+                self.handleError(record)
+
+        super(IndexedFileHandler, self).emit(record)
+        if pos is not None:
+            try:
+                self._idxfd.write(_INDEX_ENTRY_FMT % pos)
+                self._idxfd.flush()
+            except Exception:
+                self.handleError(record)
+
+    def close(self):
+        self.acquire()
+        try:
+            if self._idxfd:
+                self._idxfd.close()
+                self._idxfd = None
+        finally:
+            self.release()
+        super(IndexedFileHandler, self).close()
+
 class WebRecorder(object):
     """
     a class that will record messages sent to a web service
     """
 
-    def __init__(self, recordfile=None, svcname=None, level=logging.DEBUG):
+    def __init__(self, recordfile=None, svcname=None, level=logging.DEBUG, index=True):
         """
         Create a WebRecorder instance.  If a filename is not provided, no messages will be 
         recorded (unless a handler is added via add_handler()).  
@@ -160,10 +324,14 @@ class WebRecorder(object):
                                     appears in the output record, just before the request method.
                                     The default, if not provided, is "WebRec"
         :param int level:         the logging level for accepting requests by method
+        :param bool index:        if True (default), maintain an index of the records written to 
+                                    the record file (see :py:class:`IndexedFileHandler`)
         """
         if not svcname:
             svcname = "WebRec"
         self.svcname = svcname
+        self.reclog = None
+        self.index = index
         self._handler = None
         self._recfile = None
         if recordfile:
@@ -188,7 +356,10 @@ class WebRecorder(object):
         is at construction), it does nothing.  Normally, this is called after a close_file().
         """
         if not self._handler and self._recfile:
-            self._handler = logging.FileHandler(self._recfile)
+            if self.index:
+                self._handler = IndexedFileHandler(self._recfile)
+            else:
+                self._handler = logging.FileHandler(self._recfile)
             self._handler.setFormatter(logging.Formatter(RECORD_FORMAT))
             self._handler.setLevel(logging.DEBUG)
             self.add_handler(self._handler)
@@ -314,13 +485,19 @@ class RequestLogParser(object):
     a parser that creates replayable request records from a logfile
     """
 
-    def __init__(self, recordfile):
+    def __init__(self, recordfile, useindex=True):
         """
         Instantiate the parser for a given record log file
+        :param str recordfile:  the path to the record file to parse
+        :param bool useindex:   if True (default), use the file's sidecar index (see 
+                                :py:class:`RecordIndex`) to locate records, creating or updating
+                                it as necessary; if False, records are located by reading the 
+                                file from the top.
         """
         if not os.path.exists(recordfile):
             raise IOError("File not found: " + recordfile)
         self._recfile = recordfile
+        self._index = RecordIndex(recordfile) if useindex else None
 
     class _byrecord(object):
         def __init__(self, fd):
@@ -388,10 +565,22 @@ class RequestLogParser(object):
 
         return out
 
+    def _locate(self):
+        # return the number of indexed records and the offsets of unindexed ones that follow
+        tail = self._index.tail()
+        if tail is None:
+            self._index.rebuild()
+            tail = []
+        return self._index.count(), tail
+
     def count_records(self):
         """
         count and return the number of records in this file
         """
+        if self._index:
+            nidx, tail = self._locate()
+            return nidx + len(tail)
+
         nl = 0
         with open(self._recfile) as fd:
             byrec = self._byrecord(fd)
@@ -410,8 +599,13 @@ class RequestLogParser(object):
         :rtype list:  an array of WebRequest records
         """
         out = []
+        total = None
+        if self._index:
+            nidx, tail = self._locate()
+            total = nidx + len(tail)
         if start < 0:
-            total = self.count_records()
+            if total is None:
+                total = self.count_records()
             start = total + start
         if start < 0 and count > 0 and start+count > 0:
             count += start
@@ -419,18 +613,22 @@ class RequestLogParser(object):
         if start < 0:
             return out
 
+        pos = 0
+        p = 0
+        if total is not None:
+            if start >= total or count == 0:
+                return out
+            pos = self._index.offset(start) if start < nidx else tail[start-nidx]
+            p = start
+
         with open(self._recfile) as fd:
+            fd.seek(pos)
             byrec = self._byrecord(fd)
-            p = 0
             for rec in byrec.records():
                 if count >= 0 and p-start >= count:
                     break
                 if p >= start:
-                    try:
-                        out.append(self._parse_record(rec))
-                    except Exception as ex:
-                        raise
-                        # pass  # log?
+                    out.append(self._parse_record(rec))
                 p += 1
 
         return out
@@ -390,6 +390,39 @@ class TestJobQueue(test.TestCase):
         self.assertTrue(not (self.jobdir/"pdr0:XX01.json").exists())
         self.assertTrue(not (self.jobdir/"pdr0:XX02.json").exists())
 
+    def test_submit_covered(self):
+        def covered(waiting):
+            seen.append(waiting)
+            return ["finalize"] in waiting
+        statefile = self.jobdir/"pdr0:XX01.json"
+
+        # a pending run covers a new request
+        seen = []
+        self.jobq.submit("pdr0:XX01", ["finalize"], trigger=False)
+        self.assertIsNone(self.jobq.submit("pdr0:XX01", ["finalize"], trigger=False, covered=covered))
+        self.assertEqual(seen, [[["finalize"]]])
+        self.assertTrue(not jobmgt.Job.from_state_file(statefile).info.get('relaunch'))
+
+        # a run in progress does not
+        job = jobmgt.Job.from_state_file(statefile)
+        job.mark_running(os.getpid())
+        job.save_to(statefile)
+        seen = []
+        self.jobq.submit("pdr0:XX01", ["finalize"], trigger=False, covered=covered)
+        self.assertEqual(seen, [[]])
+        job = jobmgt.Job.from_state_file(statefile)
+        self.assertEqual(job.info['relaunch']['args'], ["finalize"])
+
+        # but the relaunch queued behind it does
+        self.jobq.submit("pdr0:XX01", ["finalize"], trigger=False, covered=covered)
+        self.assertEqual(seen[-1], [["finalize"]])
+        job = jobmgt.Job.from_state_file(statefile)
+        self.assertTrue(not job.info['relaunch'].get('relaunch'))
+
+        self.jobq.submit("pdr0:XX01", ["publish"], trigger=False, covered=lambda w: ["publish"] in w)
+        job = jobmgt.Job.from_state_file(statefile)
+        self.assertEqual(job.info['relaunch']['relaunch']['args'], ["publish"])
+
     def test_restore_queue(self):
         self.assertEqual(self.jobq.processed, 0)
         self.assertEqual(self.jobq.pending, 0)
@@ -416,7 +449,94 @@ class TestJobQueue(test.TestCase):
         self.assertEqual(self.jobq.processed, 3)
         self.assertEqual(self.jobq.pending, 0)
 
-        
+    def test_index(self):
+        self.assertTrue(self.jobq.index.exists())
+        self.assertEqual(self.jobq.jobs_in_state(), [])
+
+        self.jobq.submit("pdr0:XX01", trigger=False)
+        self.jobq.submit("pdr0:XX02", trigger=False)
+        self.assertEqual(sorted(self.jobq.jobs_in_state(jobmgt.PENDING)), ["pdr0:XX01", "pdr0:XX02"])
+        self.assertEqual(self.jobq.jobs_in_state(jobmgt.EXITED), [])
+
+        self.jobq.run_queued()
+        self.jobq.runner.runthread.join(5)
+        self.assertEqual(sorted(self.jobq.jobs_in_state(jobmgt.EXITED)), ["pdr0:XX01", "pdr0:XX02"])
+        summary = self.jobq.index.jobs()["pdr0:XX01"]
+        self.assertGreater(summary['pid'], 0)
+        self.assertGreater(summary['comptime'], 0)
+
+        # completed jobs are archived rather than deleted
+        self.jobq.clean(3600)
+        self.assertTrue((self.jobdir/"pdr0:XX01.json").exists())
+        self.jobq.clean(0)
+        self.assertTrue(not (self.jobdir/"pdr0:XX01.json").exists())
+        self.assertEqual(self.jobq.jobs_in_state(), [])
+        archived = os.listdir(self.jobdir/"_archive")
+        self.assertEqual(len(archived), 2)
+        self.assertTrue(any(f.startswith("pdr0:XX02.") for f in archived))
+
+        self.jobq.cfg['retention'] = {"archive": False}
+        self.jobq.submit("pdr0:XX01")
+        self.jobq.runner.runthread.join(5)
+        self.jobq.clean(0)
+        self.assertTrue(not (self.jobdir/"pdr0:XX01.json").exists())
+        self.assertEqual(len(os.listdir(self.jobdir/"_archive")), 2)
+
+    def test_owners(self):
+        self.jobq.submit("pdr0:XX01", owner="alice", trigger=False)
+        self.jobq.submit("pdr0:XX02", owner="alice", trigger=False)
+        self.jobq.submit("pdr0:XX03", trigger=False)
+        self.assertEqual(self.jobq.get_job("pdr0:XX01").owner, "alice")
+        self.assertIsNone(self.jobq.get_job("pdr0:XX03").owner)
+        self.assertEqual(self.jobq.owner_stats()['alice']['waiting'], 2)
+
+        self.jobq.run_queued()
+        self.jobq.runner.runthread.join(5)
+        stats = self.jobq.owner_stats()
+        self.assertEqual(stats['alice']['waiting'], 0)
+        self.assertEqual(stats['alice']['running'], 0)
+        self.assertEqual(stats['alice']['completed'], 2)
+        self.assertGreater(stats['alice']['total_runtime'], 0)
+        self.assertEqual(stats['']['completed'], 1)
+
+    def test_limits(self):
+        self.jobq.runner.cfg['kill_grace'] = 1
+        self.jobq.runner.cfg['limits'] = {"walltime": 1}
+        self.jobq.submit("pdr0:XX01", config={"sleep": 30}, trigger=False)
+        self.jobq.submit("pdr0:XX02", config={"spin": 5}, limits={"cpu": 1, "walltime": 20}, trigger=False)
+        self.jobq.run_queued()
+        self.jobq.runner.runthread.join(30)
+
+        job = self.jobq.get_job("pdr0:XX01")
+        self.assertEqual(job.state, jobmgt.KILLED)
+        self.assertEqual(job.info['limits'], {"walltime": 1})
+        self.assertIn("wall-clock", job.info['errors'][-1])
+
+        job = self.jobq.get_job("pdr0:XX02")
+        self.assertEqual(job.state, jobmgt.EXITED)
+        self.assertEqual(job.info['limits'], {"cpu": 1, "walltime": 20})
+        self.assertEqual(job.info['exitcode'], 28)
+        self.assertIn("CPU time limit", job.info['errors'][0])
+
+    def test_restore_without_index(self):
+        job1 = jobmgt.Job("nistoar.jobmgt.testproc", "pdr0-XXXX")
+        job1.save_to(jobmgt.job_state_file(self.jobdir, "pdr0-XXXX"))
+        job2 = jobmgt.Job("nistoar.jobmgt.testproc", "pdr0-YYYY")
+        job2.mark_complete(0, time.time())
+        job2.save_to(jobmgt.job_state_file(self.jobdir, "pdr0-YYYY"))
+        job3 = jobmgt.Job("nistoar.jobmgt.testproc", "pdr0-ZZZZ")
+        job3.mark_running(os.getpid())
+        job3.save_to(jobmgt.job_state_file(self.jobdir, "pdr0-ZZZZ"))
+        os.remove(self.jobdir/"_index.jsonl")
+
+        self.jobq = jobmgt.JobQueue("test", self.jobdir, "nistoar.jobmgt.testproc", resume=False)
+        self.assertTrue(self.jobq.index.exists())
+        self.assertEqual(self.jobq.pending, 2)
+        self.assertEqual(sorted(self.jobq.jobs_in_state()), ["pdr0-XXXX", "pdr0-ZZZZ"])
+        self.assertTrue((self.jobdir/"_archive").is_dir())
+        self.assertTrue(not (self.jobdir/"pdr0-YYYY.json").exists())
+
+
 
 if __name__ == "__main__":
     test.main()
@@ -0,0 +1,106 @@
+import os, json, tempfile, shutil
+from pathlib import Path
+import unittest as test
+
+from nistoar.jobmgt import index, PENDING, RUNNING, EXITED
+
+tmpdir = None
+def setUpModule():
+    global tmpdir
+    tmpdir = tempfile.TemporaryDirectory(prefix="_test_jobmgt_index.")
+
+def tearDownModule():
+    tmpdir.cleanup()
+
+class TestQueueIndex(test.TestCase):
+
+    def setUp(self):
+        self.jobdir = Path(tmpdir.name) / "queue"
+        self.jobdir.mkdir()
+        self.idx = index.QueueIndex(self.jobdir, 10)
+
+    def tearDown(self):
+        shutil.rmtree(self.jobdir)
+
+    def test_missing(self):
+        self.assertFalse(self.idx.exists())
+        self.assertIsNone(self.idx.jobs())
+        self.assertFalse(self.idx.record("goob", {"state": PENDING}))
+        self.assertFalse(self.idx.remove("goob"))
+
+    def test_rebuild(self):
+        self.idx.rebuild({"goob": {"state": EXITED, "comptime": 5.0, "config": {}, "relaunch": {}},
+                          "gurn": {"state": RUNNING, "pid": 12}})
+        self.assertTrue(self.idx.exists())
+        self.assertTrue((self.jobdir/index.SNAPSHOT_FILE).is_file())
+        self.assertEqual(self.idx.jobs(), {"goob": {"state": EXITED, "comptime": 5.0, "relaunch": False},
+                                           "gurn": {"state": RUNNING, "pid": 12}})
+
+        # another instance (e.g. in another process) sees the same
+        self.assertEqual(index.QueueIndex(self.jobdir).jobs(), self.idx.jobs())
+
+    def test_record(self):
+        self.idx.rebuild({})
+        self.assertEqual(self.idx.jobs(), {})
+
+        other = index.QueueIndex(self.jobdir)
+        self.assertTrue(other.record("goob", {"state": PENDING, "priority": 1, "args": ["a"]}))
+        self.assertTrue(other.record("gurn", {"state": PENDING}))
+        self.assertEqual(self.idx.jobs(), {"goob": {"state": PENDING, "priority": 1},
+                                           "gurn": {"state": PENDING}})
+
+        # only the new entries are read
+        offset = self.idx._offset
+        self.assertTrue(other.record("goob", {"state": RUNNING, "pid": 8}))
+        self.assertTrue(other.remove("gurn"))
+        self.assertEqual(self.idx.jobs(), {"goob": {"state": RUNNING, "pid": 8}})
+        self.assertGreater(self.idx._offset, offset)
+        self.assertEqual(self.idx._count, 4)
+
+        # a partially written entry is ignored
+        with open(self.jobdir/index.JOURNAL_FILE, 'a') as fd:
+            fd.write('{"id": "gurn", "sta')
+        self.assertEqual(list(self.idx.jobs().keys()), ["goob"])
+
+    def test_compact(self):
+        self.idx.rebuild({"goob": {"state": EXITED}})
+        for i in range(11):
+            self.idx.record("job%d" % i, {"state": PENDING})
+        jobs = self.idx.jobs()
+        self.assertEqual(len(jobs), 12)
+        self.assertEqual(self.idx._count, 0)
+        with open(self.jobdir/index.JOURNAL_FILE) as fd:
+            self.assertEqual(len(fd.readlines()), 1)
+        self.assertEqual(len(json.load(open(self.jobdir/index.SNAPSHOT_FILE))['jobs']), 12)
+
+        # a reader that started before the compaction catches up
+        self.assertEqual(index.QueueIndex(self.jobdir).jobs(), jobs)
+        self.idx.record("goob", {"state": PENDING})
+        self.assertEqual(index.QueueIndex(self.jobdir).jobs()['goob'], {"state": PENDING})
+
+    def test_interrupted_compact(self):
+        self.idx.rebuild({"goob": {"state": PENDING}})
+        self.idx.record("gurn", {"state": PENDING})
+        self.idx.jobs()
+        with open(self.jobdir/index.JOURNAL_FILE) as fd:
+            journal = fd.read()
+
+        # simulate a crash after the snapshot is written but before the journal is replaced
+        self.idx.compact()
+        with open(self.jobdir/index.JOURNAL_FILE, 'w') as fd:
+            fd.write(journal)
+        index.QueueIndex(self.jobdir).record("gurn", {"state": RUNNING, "pid": 3})
+
+        self.assertEqual(index.QueueIndex(self.jobdir).jobs(),
+                         {"goob": {"state": PENDING}, "gurn": {"state": RUNNING, "pid": 3}})
+
+        # an unrelated snapshot invalidates the index
+        os.remove(self.jobdir/index.SNAPSHOT_FILE)
+        index.QueueIndex(self.jobdir).rebuild({})
+        with open(self.jobdir/index.JOURNAL_FILE, 'w') as fd:
+            fd.write(journal)
+        self.assertIsNone(index.QueueIndex(self.jobdir).jobs())
+
+
+if __name__ == '__main__':
+    test.main()
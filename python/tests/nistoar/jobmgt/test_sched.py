@@ -0,0 +1,113 @@
+import queue
+import unittest as test
+
+from nistoar.jobmgt import Job, sched
+
+class Clock:
+    def __init__(self, now=1000.0):
+        self.now = now
+    def __call__(self):
+        return self.now
+
+def mkjob(dataid, owner=None, priority=0, reqtime=1000.0):
+    job = Job("nistoar.jobmgt.testproc", dataid, state_data={"reqtime": reqtime, "priority": priority})
+    if owner:
+        job.info['owner'] = owner
+    return job
+
+class TestFairShareQueue(test.TestCase):
+
+    def setUp(self):
+        self.clock = Clock()
+        self.q = sched.FairShareQueue({"aging_interval": 100}, self.clock)
+
+    def test_empty(self):
+        self.assertTrue(self.q.empty())
+        self.assertEqual(self.q.qsize(), 0)
+        with self.assertRaises(queue.Empty):
+            self.q.get()
+
+    def test_fair_share(self):
+        for i in range(10):
+            self.q.put_nowait(mkjob("a%d" % i, "alice", reqtime=1000.0+i))
+        self.q.put_nowait(mkjob("b0", "bob", reqtime=1020.0))
+        self.q.put_nowait(mkjob("b1", "bob", reqtime=1021.0))
+        self.q.put_nowait(mkjob("c0", reqtime=1030.0))
+        self.assertEqual(self.q.qsize(), 13)
+        self.assertFalse(self.q.empty())
+
+        # each owner gets a turn while they have a job running
+        order = [self.q.get().data_id for i in range(4)]
+        self.assertEqual(order, ["a0", "b0", "c0", "a1"])
+
+        # the owner with the least running next
+        done = mkjob("b0", "bob")
+        self.q.job_done(done, 5.0)
+        self.assertEqual(self.q.get().data_id, "b1")
+
+        # ties among running counts are broken by recent usage
+        self.q.job_done(mkjob("a0", "alice"), 50.0)
+        self.q.job_done(mkjob("c0"), 1.0)
+        self.q.put_nowait(mkjob("c1", reqtime=1040.0))
+        self.assertEqual(self.q.get().data_id, "c1")
+        self.assertEqual(self.q.get().data_id, "a2")
+        self.assertEqual(self.q.qsize(), 7)
+
+    def test_priority_and_aging(self):
+        self.q.put_nowait(mkjob("a0", "alice", priority=-1, reqtime=1000.0))
+        self.q.put_nowait(mkjob("b0", "bob", priority=1, reqtime=1000.0))
+        self.q.put_nowait(mkjob("b1", "bob", priority=0, reqtime=1001.0))
+        self.assertEqual(self.q.get().data_id, "b0")
+        self.assertEqual(self.q.get().data_id, "b1")
+
+        self.q.put_nowait(mkjob("b2", "bob", priority=0, reqtime=1200.0))
+        self.q.put_nowait(mkjob("b3", "bob", priority=1, reqtime=1200.0))
+        self.clock.now = 1210.0
+        # a0 has waited long enough to be promoted to the level of b3 and has an idle owner
+        self.assertEqual(self.q.get().data_id, "a0")
+        self.assertEqual(self.q.get().data_id, "b3")
+
+    def test_aging_keeps_fair_share(self):
+        for i in range(3):
+            self.q.put_nowait(mkjob("a%d" % i, "alice", reqtime=1000.0))
+        self.assertEqual(self.q.get().data_id, "a0")
+
+        # alice's jobs have waited long, but not beyond the priority of bob's new job
+        self.clock.now = 2000.0
+        self.q.put_nowait(mkjob("b0", "bob", reqtime=2000.0))
+        self.assertEqual(self.q.get().data_id, "b0")
+
+    def test_weights(self):
+        self.q = sched.FairShareQueue({"weights": {"alice": 2}}, self.clock)
+        for i in range(4):
+            self.q.put_nowait(mkjob("a%d" % i, "alice", reqtime=1000.0+i))
+            self.q.put_nowait(mkjob("b%d" % i, "bob", reqtime=1000.5+i))
+        order = [self.q.get().data_id for i in range(6)]
+        self.assertEqual(order, ["a0", "b0", "a1", "b1", "a2", "a3"])
+        stats = self.q.owner_stats()
+        self.assertEqual(stats['alice']['running'], 2 * stats['bob']['running'])
+
+    def test_owner_stats(self):
+        self.q.put_nowait(mkjob("a0", "alice", reqtime=990.0))
+        self.q.put_nowait(mkjob("a1", "alice", reqtime=1000.0))
+        self.q.put_nowait(mkjob("c0", reqtime=1000.0))
+        self.clock.now = 1010.0
+        job = self.q.get()
+        self.q.job_done(job, 4.0)
+        self.q.get()
+
+        stats = self.q.owner_stats()
+        self.assertEqual(list(stats.keys()), ["alice", ""])
+        self.assertEqual(stats['alice']['waiting'], 1)
+        self.assertEqual(stats['alice']['running'], 0)
+        self.assertEqual(stats['alice']['completed'], 1)
+        self.assertEqual(stats['alice']['mean_wait'], 20.0)
+        self.assertEqual(stats['alice']['total_runtime'], 4.0)
+        self.assertEqual(stats['']['waiting'], 0)
+        self.assertEqual(stats['']['running'], 1)
+        self.assertEqual(stats['']['max_wait'], 10.0)
+        self.assertEqual(stats['']['mean_runtime'], 0.0)
+
+
+if __name__ == '__main__':
+    test.main()
@@ -86,8 +86,8 @@ class TestNPSExternalReviewClient(test.TestCase):
         self.assertIn("XYZ789", pub_url2)
 
     # submit: success, all required fields
-    @patch("nistoar.midas.dap.extrev.nps1.requests.get")
-    @patch("nistoar.midas.dap.extrev.nps1.requests.post")
+    @patch("nistoar.midas.dap.extrev.nps1.transport.get")
+    @patch("nistoar.midas.dap.extrev.nps1.transport.post")
     @patch("nistoar.midas.dap.extrev.nps1.get_nsd_auth_token")
     def test_submit_success(self, mock_token, mock_post, mock_get):
         mock_token.return_value = "token123"
@@ -113,7 +113,7 @@ class TestNPSExternalReviewClient(test.TestCase):
         # Response returned
         self.assertEqual(result.get('phase'), "in progress")
 
-        # Check that requests.post was called with expected headers and payload
+        # Check that transport.post was called with expected headers and payload
         args, kwargs = mock_post.call_args
         url = args[0]
         self.assertTrue(url.endswith("/DataSet/SubmitDataset"))
@@ -130,8 +130,8 @@ class TestNPSExternalReviewClient(test.TestCase):
         self.assertEqual(payload["reviewReason"], "Data change (major)")
 
     # submit: no reviewers provided, fallback owner
-    @patch("nistoar.midas.dap.extrev.nps1.requests.get")
-    @patch("nistoar.midas.dap.extrev.nps1.requests.post")
+    @patch("nistoar.midas.dap.extrev.nps1.transport.get")
+    @patch("nistoar.midas.dap.extrev.nps1.transport.post")
     @patch("nistoar.midas.dap.extrev.nps1.get_nsd_auth_token")
     def test_submit_fallback_owner(self, mock_token, mock_post, mock_get):
         mock_token.return_value = "tok"
@@ -160,7 +160,7 @@ class TestNPSExternalReviewClient(test.TestCase):
             cli._get_token()
 
     # submit: http 401 unauthorized
-    @patch("nistoar.midas.dap.extrev.nps1.requests.post")
+    @patch("nistoar.midas.dap.extrev.nps1.transport.post")
     @patch("nistoar.midas.dap.extrev.nps1.get_nsd_auth_token", return_value="TTT")
     def test_submit_401(self, mock_token, mock_post):
         mock_post.return_value = fake_response(status=401, reason="Unauthorized")
@@ -170,7 +170,7 @@ class TestNPSExternalReviewClient(test.TestCase):
         self.assertIn("Unauthorized", str(cm.exception))
 
     # submit: http 403 forbidden
-    @patch("nistoar.midas.dap.extrev.nps1.requests.post")
+    @patch("nistoar.midas.dap.extrev.nps1.transport.post")
     @patch("nistoar.midas.dap.extrev.nps1.get_nsd_auth_token", return_value="TTT")
     def test_submit_403(self, mock_token, mock_post):
         mock_post.return_value = fake_response(status=403, reason="Forbidden")
@@ -180,7 +180,7 @@ class TestNPSExternalReviewClient(test.TestCase):
         self.assertIn("Forbidden", str(cm.exception))
 
     # submit: http 500 (other error)
-    @patch("nistoar.midas.dap.extrev.nps1.requests.post")
+    @patch("nistoar.midas.dap.extrev.nps1.transport.post")
     @patch("nistoar.midas.dap.extrev.nps1.get_nsd_auth_token", return_value="TTT")
     def test_submit_500(self, mock_token, mock_post):
         mock_post.return_value = fake_response(status=500, reason="Internal Server Error", json_data={"error": "fail"})
@@ -190,8 +190,8 @@ class TestNPSExternalReviewClient(test.TestCase):
         self.assertIn("NPS API error", str(cm.exception))
         self.assertIn("Internal Server Error", str(cm.exception))
 
-    # submit: actual requests.post throws (network error)
-    @patch("nistoar.midas.dap.extrev.nps1.requests.post", side_effect=Exception("network fail"))
+    # submit: the transport.post call throws (network error)
+    @patch("nistoar.midas.dap.extrev.nps1.transport.post", side_effect=Exception("network fail"))
     @patch("nistoar.midas.dap.extrev.nps1.get_nsd_auth_token", return_value="TTT")
     def test_submit_requests_error(self, mock_token, mock_post):
         cli = NPSExternalReviewClient(GOOD_CFG)
@@ -200,8 +200,8 @@ class TestNPSExternalReviewClient(test.TestCase):
         self.assertIn("Failed to POST to NPS", str(cm.exception))
 
     # submit: people service used to look up submitter
-    @patch("nistoar.midas.dap.extrev.nps1.requests.get")
-    @patch("nistoar.midas.dap.extrev.nps1.requests.post")
+    @patch("nistoar.midas.dap.extrev.nps1.transport.get")
+    @patch("nistoar.midas.dap.extrev.nps1.transport.post")
     @patch("nistoar.midas.dap.extrev.nps1.get_nsd_auth_token", return_value="TTT")
     def test_submit_uses_people_service(self, mock_token, mock_post, mock_get):
         # Prepare a mock PeopleService
@@ -1,5 +1,6 @@
-import json
+import json, base64, threading, time
 import unittest as test
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
 from unittest.mock import patch, Mock, create_autospec
 from typing import Mapping
 from pathlib import Path
@@ -17,9 +18,113 @@ keypath = datadir / 'clientAdmin.key'
 capath = datadir / 'serverCa.crt'
 pfrespfile = datadir / "webdav-propfind.xml"
 
+class StandInFileManager:
+    """
+    a stand-in for the file manager's temporary-password endpoint (at /auth) and its WebDAV 
+    interface (at /remote.php/dav/files/oar_api) that counts the passwords it hands out and 
+    the connections and requests it receives.
+    """
+    davbase = "/remote.php/dav/files/oar_api"
+
+    def __init__(self):
+        self.auth_delay = 0
+        self.auth_calls = 0
+        self.valid = set()
+        self.requests = 0
+        self.connections = 0
+        self.rejected = 0
+        self._lock = threading.Lock()
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0), self._make_handler())
+        self.server.daemon_threads = True
+        self.baseurl = "http://127.0.0.1:%d" % self.server.server_address[1]
+
+    def start(self):
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+
+    def stop(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+    def revoke(self):
+        with self._lock:
+            self.valid.clear()
+
+    def _make_handler(self):
+        svc = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def log_message(self, *args):
+                pass
+
+            def setup(self):
+                super().setup()
+                with svc._lock:
+                    svc.connections += 1
+
+            def send(self, code, body=b"", ctype=None):
+                self.send_response(code)
+                if ctype:
+                    self.send_header("Content-Type", ctype)
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                if body and self.command != "HEAD":
+                    self.wfile.write(body)
+
+            def handle_one_request(self):
+                # dispatch every method to the same handler
+                self.raw_requestline = self.rfile.readline(65537)
+                if not self.raw_requestline:
+                    self.close_connection = True
+                    return
+                if not self.parse_request():
+                    return
+                with svc._lock:
+                    svc.requests += 1
+                length = int(self.headers.get("Content-Length") or 0)
+                if length:
+                    self.rfile.read(length)
+                self.dispatch()
+                self.wfile.flush()
+
+            def dispatch(self):
+                if self.path == "/auth" and self.command == "POST":
+                    if svc.auth_delay:
+                        time.sleep(svc.auth_delay)
+                    with svc._lock:
+                        svc.auth_calls += 1
+                        pw = "temp%d" % svc.auth_calls
+                        svc.valid.add(pw)
+                    return self.send(200, json.dumps({"temporary_password": pw}).encode(),
+                                     "application/json")
+
+                if not self.path.startswith(svc.davbase):
+                    return self.send(404)
+                creds = self.headers.get("Authorization", "")
+                try:
+                    user, pw = base64.b64decode(creds.split()[-1]).decode().split(':', 1)
+                except Exception:
+                    user, pw = None, None
+                if user != "oar_api" or pw not in svc.valid:
+                    with svc._lock:
+                        svc.rejected += 1
+                    return self.send(401, b"Unauthorized")
+
+                if self.command == "MKCOL":
+                    return self.send(201)
+                if self.command == "PUT":
+                    return self.send(201)
+                if self.command in ("HEAD", "DELETE"):
+                    return self.send(200 if self.command == "HEAD" else 204)
+                return self.send(405)
+
+        return Handler
+
 class FMWebDAVClientTest(test.TestCase):
 
     def setUp(self):
+        fmwd._pwcaches.clear()
         self.config = {
             'service_endpoint': 'https://goober/remote.php/dav/files/oar_api',
             'authentication': {
@@ -148,12 +253,14 @@ class FMWebDAVClientTest(test.TestCase):
         with self.cli.AuthenticatedSession(self.cli) as c:
             self.assertIsNotNone(c.wdcli)
             self.assertIsNotNone(self.cli.wdcli)
-        self.assertIsNone(self.cli.wdcli)
+        wdcli = self.cli.wdcli
+        self.assertIsNotNone(wdcli)
 
+        # the underlying client (and its connections) are reused
         with self.cli.open_session() as c:
             self.assertIsNotNone(c.wdcli)
-            self.assertIsNotNone(self.cli.wdcli)
-        self.assertIsNone(self.cli.wdcli)
+            self.assertIs(self.cli.wdcli, wdcli)
+        self.assertIs(self.cli.wdcli, wdcli)
 
     def test_exists(self):
         with self.assertRaises(fmwd.FileManagerCommError):
@@ -243,7 +350,114 @@ class FMWebDAVClientTest(test.TestCase):
         
 
 
-        
+
+
+class FMWebDAVClientSessionTest(test.TestCase):
+
+    def setUp(self):
+        fmwd._pwcaches.clear()
+        self.svc = StandInFileManager()
+        self.svc.start()
+        self.config = {
+            'service_endpoint': self.svc.baseurl + StandInFileManager.davbase,
+            'authentication': {
+                'client_cert_path': certpath,
+                'client_key_path':  keypath,
+                'client_auth_url':  self.svc.baseurl + "/auth"
+            }
+        }
+
+    def tearDown(self):
+        self.svc.stop()
+
+    def test_reuse(self):
+        cli = fmwd.FMWebDAVClient(self.config)
+        self.assertEqual(cli.stats['auth_calls'], 0)
+        for i in range(3):
+            with cli.open_session():
+                cli.ensure_directory("mds3-0001")
+                self.assertTrue(cli.exists("mds3-0001"))
+                cli.wdcli.upload_to(b"{}", "mds3-0001/scan.json")
+                cli.delete_resource("mds3-0001")
+
+        self.assertEqual(self.svc.auth_calls, 1)
+        self.assertEqual(self.svc.rejected, 0)
+        stats = cli.stats
+        self.assertEqual(stats['auth_calls'], 1)
+        self.assertEqual(stats['reauthentications'], 0)
+        self.assertEqual(stats['requests'], self.svc.requests - 1)
+        self.assertEqual(stats['connections'], 1)
+        self.assertEqual(stats['reused'], stats['requests'] - 1)
+
+        # another client with the same identity reuses the password
+        cli2 = fmwd.FMWebDAVClient(self.config)
+        with cli2.open_session():
+            self.assertTrue(cli2.exists("mds3-0001"))
+        self.assertEqual(self.svc.auth_calls, 1)
+
+        cli.disconnect()
+        self.assertIsNone(cli.wdcli)
+        self.assertEqual(cli.stats['connections'], 0)
+
+    def test_reauth_on_401(self):
+        cli = fmwd.FMWebDAVClient(self.config)
+        with cli.open_session():
+            self.assertTrue(cli.exists("mds3-0001"))
+        self.assertEqual(self.svc.auth_calls, 1)
+
+        self.svc.revoke()
+        with cli.open_session():
+            cli.ensure_directory("mds3-0001")
+            self.assertTrue(cli.exists("mds3-0001"))
+        self.assertEqual(self.svc.auth_calls, 2)
+        self.assertEqual(self.svc.rejected, 1)
+        self.assertEqual(cli.stats['reauthentications'], 1)
+        self.assertEqual(cli.stats['auth_calls'], 2)
+        self.assertEqual(cli.wdcli.webdav.password, "temp2")
+
+        # an application password is not renewed
+        cfg = deepcopy(self.config)
+        cfg['authentication'] = {'user': 'oar_api', 'pass': 'goober'}
+        cli = fmwd.FMWebDAVClient(cfg)
+        with self.assertRaises(fmwd.wd3c.ResponseErrorCode):
+            cli.exists("mds3-0001")
+        self.assertEqual(self.svc.auth_calls, 2)
+        self.assertEqual(cli.stats['reauthentications'], 0)
+
+    def test_expiry(self):
+        self.config['authentication']['password_lifetime'] = 0.2
+        cli = fmwd.FMWebDAVClient(self.config)
+        with cli.open_session():
+            self.assertTrue(cli.exists("mds3-0001"))
+            time.sleep(0.3)
+            self.assertTrue(cli.exists("mds3-0001"))
+        self.assertEqual(self.svc.auth_calls, 2)
+        self.assertEqual(self.svc.rejected, 0)
+
+        cli.authenticate(force=True)
+        self.assertEqual(self.svc.auth_calls, 3)
+        self.assertEqual(cli.wdcli.webdav.password, "temp3")
+
+    def test_concurrent_refresh(self):
+        clis = [fmwd.FMWebDAVClient(self.config) for i in range(6)]
+        for cli in clis:
+            cli.authenticate()
+        self.assertEqual(self.svc.auth_calls, 1)
+
+        self.svc.revoke()
+        self.svc.auth_delay = 0.2
+        results = []
+        def work(cli):
+            results.append(cli.exists("mds3-0001"))
+        threads = [threading.Thread(target=work, args=(c,)) for c in clis]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+
+        self.assertEqual(results, [True] * len(clis))
+        self.assertEqual(self.svc.auth_calls, 2)
+        self.assertEqual(clis[0].stats['auth_calls'], 2)
 
 
 if __name__ == '__main__':
@@ -10,7 +10,7 @@ from nistoar.midas.dap.fm import service as fm
 from nistoar.midas.dap.fm.clients import NextcloudApi, FMWebDAVClient
 from nistoar.midas.dap.fm.exceptions import *
 from nistoar.base.config import ConfigurationException
-from nistoar.midas.dap.fm import sim
+from nistoar.midas.dap.fm import sim, watch
 from nistoar import jobmgt 
 from nistoar.midas.dap.fm.scan import base as scan, simjobexec, BasicScanner, BasicScannerFactory
 
@@ -178,8 +178,24 @@ class BasicScannerTest(test.TestCase):
 
         scanfile = self.sp.root_dir/self.sp.system_folder/"scan-report-fred.json"
         self.assertTrue(scanfile.is_file())
+        prog = self.sp.get_scan_progress("fred")
+        self.assertEqual(prog['phase'], scan.FAST_PHASE)
+        self.assertFalse(prog['is_complete'])
+        self.assertEqual(prog['file_count'], 2)
+        self.assertEqual(prog['folder_count'], 1)
+        self.assertEqual(prog['usage'], 2)
+        self.assertIsNone(prog['eta'])
         
         c = self.scanner.slow_scan(c)
+        prog = self.sp.get_scan_progress("fred")
+        self.assertEqual(prog['phase'], scan.COMPLETE_PHASE)
+        self.assertTrue(prog['is_complete'])
+        self.assertEqual(prog['file_count'], 2)
+        self.assertEqual(prog['files_to_examine'], 3)
+        self.assertEqual(prog['files_examined'], 3)
+        self.assertEqual(prog['files_checksummed'], 2)
+        self.assertEqual(prog['bytes_examined'], 2)
+        self.assertEqual(prog['eta'], 0)
         self.assertEqual(c['scan_id'], "fred")
         self.assertEqual(c['space_id'], self.sp.id)
         self.assertEqual(c['fm_space_path'], '/'.join([self.sp.id,self.sp.id]))
@@ -227,6 +243,53 @@ class BasicScannerTest(test.TestCase):
         self.assertEqual(c['contents'][2]['path'], "junk")
         self.assertEqual(c['accumulated_size'], 2)
 
+    def test_init_changed_content(self):
+        skip = [ re.compile(r"^\."), re.compile(r"^#"), re.compile(r"^HIDE$") ]
+        self.scanner = BasicScanner(self.sp, "fred", skip)
+        journal = watch.ChangeJournal(self.scanner.system_dir)
+        journal.record(watch.RESCAN, '')
+
+        # no previous scan
+        with patch.object(fmsvc, 'is_watching', return_value=True):
+            self.assertIsNone(self.scanner.init_changed_content())
+
+        content = {'contents': self.scanner.init_scannable_content(), 'journal_seq': journal.last_seq}
+        content = self.scanner.slow_scan(self.scanner.fast_scan(content))
+        with open(self.scanner.system_dir / scan.GOOD_SCAN_FILE, 'w') as fd:
+            json.dump(content, fd)
+
+        # make some changes
+        with open(self.scanner.user_dir/'junk', 'w') as fd:
+            fd.write("goob\n")
+        os.mkdir(self.scanner.user_dir/'new')
+        with open(self.scanner.user_dir/'new'/'f.txt', 'w') as fd:
+            fd.write("gurn\n")
+        os.remove(self.scanner.user_dir/'TRASH'/'oops')
+        journal.record_all([(watch.MODIFIED, 'junk', watch.FILE, None),
+                            (watch.CREATED, 'new', watch.COLLECTION, None),
+                            (watch.CREATED, 'new/f.txt', watch.FILE, None),
+                            (watch.DELETED, 'TRASH/oops', watch.FILE, None)])
+
+        # the journal is not trusted without a watcher running
+        self.assertIsNone(self.scanner.init_changed_content())
+
+        with patch.object(fmsvc, 'is_watching', return_value=True):
+            self.assertIsNone(self.scanner.init_changed_content(0))
+            files, changed = self.scanner.init_changed_content()
+        self.assertEqual(set(f['path'] for f in files), set("TRASH junk new new/f.txt".split()))
+        self.assertEqual(set(changed), set("junk new new/f.txt".split()))
+        trash = [f for f in files if f['path'] == "TRASH"][0]
+        self.assertIn('fileid', trash)
+
+        # only the changed files are examined
+        content = {'contents': files, 'changed_paths': changed}
+        with patch.object(self.scanner, 'slow_scan_file', wraps=self.scanner.slow_scan_file) as ssf:
+            content = self.scanner.slow_scan(self.scanner.fast_scan(content))
+            self.assertEqual(ssf.call_count, 3)
+        junk = [f for f in content['contents'] if f['path'] == "junk"][0]
+        self.assertEqual(junk['size'], 5)
+        self.assertEqual(content['accumulated_size'], 10)
+
     def _set_scan_queue(self):
         scan.set_slow_scan_queue(jobdir, resume=False)
         scan.slow_scan_queue.mod = simjobexec
@@ -267,6 +330,56 @@ class BasicScannerTest(test.TestCase):
 
 
 
+class ScanProgressTest(test.TestCase):
+
+    def setUp(self):
+        self.scanmd = {
+            "scan_id": "fred",
+            "contents": [
+                { "path": "a", "resource_type": "collection", "size": 0 },
+                { "path": "a/b.txt", "resource_type": "file", "size": 300 },
+                { "path": "c.txt", "resource_type": "file", "size": 100 }
+            ]
+        }
+
+    def test_ctor(self):
+        prog = scan.ScanProgress(self.scanmd)
+        self.assertEqual(prog.phase, scan.FAST_PHASE)
+        rec = prog.to_dict()
+        self.assertEqual(rec['scan_id'], "fred")
+        self.assertEqual(rec['file_count'], 2)
+        self.assertEqual(rec['folder_count'], 1)
+        self.assertEqual(rec['usage'], 400)
+        self.assertFalse(rec['is_complete'])
+        self.assertIsNone(rec['eta'])
+
+    def test_examine(self):
+        prog = scan.ScanProgress(self.scanmd)
+        prog.start_examining(2, 400)
+        self.assertEqual(prog.phase, scan.SLOW_PHASE)
+        self.assertIsNone(prog.eta)
+
+        prog._examine_start -= 10
+        prog.examined(self.scanmd['contents'][2], True)
+        self.assertEqual(prog.files_examined, 1)
+        self.assertEqual(prog.bytes_examined, 100)
+        self.assertEqual(prog.files_checksummed, 1)
+        self.assertGreater(prog.eta, 29)
+        self.assertLess(prog.eta, 31)
+
+        prog.examined(self.scanmd['contents'][0])
+        self.assertEqual(prog.bytes_examined, 100)
+        self.assertEqual(prog.files_checksummed, 1)
+        self.assertEqual(prog.eta, 0)
+
+        self.scanmd['contents'].pop()
+        prog.finish(self.scanmd)
+        rec = prog.to_dict()
+        self.assertTrue(rec['is_complete'])
+        self.assertEqual(rec['phase'], scan.COMPLETE_PHASE)
+        self.assertEqual(rec['file_count'], 1)
+        self.assertEqual(rec['usage'], 300)
+        self.assertEqual(rec['eta'], 0)
 
 
 if __name__ == "__main__":
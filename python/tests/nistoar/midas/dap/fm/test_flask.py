@@ -245,6 +245,27 @@ class TestFlaskApp(test.TestCase):
         self.assertIn('size', files[0])
         self.assertIn('checksum', files[0])
 
+        # page through the report
+        resp = self.client.get("/mfm1/spaces/"+spid+"/scans/"+scid+"?offset=1&limit=2",
+                               headers=self.authhdrs)
+        self.assertEqual(resp.status_code, 200)
+        page = resp.json
+        self.assertEqual(page['page'], {"offset": 1, "limit": 2, "total": 5})
+        self.assertEqual([f['path'] for f in page['contents']],
+                         [f['path'] for f in rep['contents'][1:3]])
+        resp = self.client.get("/mfm1/spaces/"+spid+"/scans/"+scid+"?limit=-1", headers=self.authhdrs)
+        self.assertEqual(resp.status_code, 400)
+
+        # check progress
+        resp = self.client.get("/mfm1/spaces/"+spid+"/scans/"+scid+"/progress", headers=self.authhdrs)
+        self.assertEqual(resp.status_code, 200)
+        prog = resp.json
+        self.assertEqual(prog['scan_id'], scid)
+        self.assertTrue(prog['is_complete'])
+        self.assertEqual(prog['file_count'], len(files))
+        resp = self.client.get("/mfm1/spaces/"+spid+"/scans/goob/progress", headers=self.authhdrs)
+        self.assertEqual(resp.status_code, 404)
+
     def test_perms(self):
         
         self._set_scan_queue()
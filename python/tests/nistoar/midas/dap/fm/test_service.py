@@ -236,6 +236,60 @@ class MIDASFileManagerServiceTest(test.TestCase):
             sp.get_scan(scid)
         sp.delete_scan(scid)
 
+    def test_scan_progress_and_pages(self):
+        self._set_scan_queue()
+        id = "mdst:XXX2"
+        sp = self.cli.create_space_for(id, 'ava1')
+        upldir = sp.root_dir/sp.uploads_folder
+        os.mkdir(upldir/"data")
+        for name in "a.txt b.txt data/c.txt data/d.txt".split():
+            with open(upldir/name, 'w') as fd:
+                fd.write("hello\n")
+
+        scid = sp.launch_scan()['scan_id']
+        sp._get_scan_queue().runner.runthread.join(2.0)
+
+        prog = sp.get_scan_progress(scid)
+        self.assertTrue(prog['is_complete'])
+        self.assertEqual(prog['file_count'], 4)
+        self.assertEqual(prog['folder_count'], 1)
+        self.assertEqual(prog['usage'], 24)
+        self.assertIsNone(sp.get_scan_progress("goob"))
+
+        # summarizing a syncing space reads the progress record rather than the report
+        summ = sp._load_summary()
+        summ['syncing'] = "syncing"
+        sp._cache_fm_summary(summ)
+        with patch.object(sp, 'get_scan') as get_scan:
+            md = sp.summarize()
+            get_scan.assert_not_called()
+        self.assertEqual(md['syncing'], "synced")
+        self.assertEqual(md['file_count'], 4)
+        self.assertEqual(md['usage'], 24)
+        self.assertNotIn('scan_progress', md)
+
+        # fetch the report in pages
+        full = sp.get_scan(scid)
+        self.assertNotIn('page', full)
+        paths = [f['path'] for f in full['contents']]
+        self.assertEqual(len(paths), 5)
+
+        page = sp.get_scan(scid, 0, 2)
+        self.assertEqual(page['scan_id'], scid)
+        self.assertEqual(page['page'], {"offset": 0, "limit": 2, "total": 5})
+        self.assertEqual([f['path'] for f in page['contents']], paths[:2])
+        page = sp.get_scan(scid, 4, 2)
+        self.assertEqual([f['path'] for f in page['contents']], paths[4:])
+        page = sp.get_scan(scid, prefix="data/")
+        self.assertEqual([f['path'] for f in page['contents']], ["data/c.txt", "data/d.txt"])
+        self.assertEqual(page['page']['total'], 2)
+        self.assertEqual(len(sp.get_scan(scid)['contents']), 5)
+
+        sp.delete_scan(scid)
+        self.assertIsNone(sp.get_scan_progress(scid))
+        with self.assertRaises(FileNotFoundError):
+            sp.get_scan(scid, 0, 2)
+
     def test_format_previous_files(self):
         files = [
             { "size": 16340,  "checksum": "XXXX", "name": "README.txt" },
@@ -0,0 +1,253 @@
+import os, json, time, shutil, tempfile
+import unittest as test
+from pathlib import Path
+
+from nistoar.midas.dap.fm import watch
+
+tmpdir = None
+def setUpModule():
+    global tmpdir
+    tmpdir = tempfile.TemporaryDirectory(prefix="_test_fm_watch.")
+
+def tearDownModule():
+    tmpdir.cleanup()
+
+class TestChangeJournal(test.TestCase):
+
+    def setUp(self):
+        self.sysdir = Path(tmpdir.name) / "sys"
+        self.sysdir.mkdir()
+        self.jrnl = watch.ChangeJournal(self.sysdir, 10)
+
+    def tearDown(self):
+        shutil.rmtree(self.sysdir)
+
+    def test_record(self):
+        self.assertEqual(self.jrnl.last_seq, 0)
+        self.assertIsNone(self.jrnl.changes_since(0))
+
+        self.assertEqual(self.jrnl.record(watch.RESCAN, '', watch.COLLECTION), 1)
+        self.assertEqual(self.jrnl.record(watch.CREATED, 'a.txt', watch.FILE), 2)
+        self.assertEqual(self.jrnl.record_all([(watch.MODIFIED, 'a.txt', watch.FILE, None),
+                                               (watch.MOVED, 'a.txt', watch.FILE, 'b.txt')]), 4)
+        self.assertEqual(self.jrnl.last_seq, 4)
+
+        # a second instance (e.g. in another process) sees the same journal
+        jrnl = watch.ChangeJournal(self.sysdir)
+        self.assertEqual(jrnl.last_seq, 4)
+        changes = jrnl.changes_since(2)
+        self.assertEqual([c['seq'] for c in changes], [3, 4])
+        self.assertEqual(changes[1]['op'], watch.MOVED)
+        self.assertEqual(changes[1]['dest'], "b.txt")
+        self.assertEqual(jrnl.changes_since(4), [])
+
+        # changes before the rescan marker are unknown
+        self.assertIsNone(jrnl.changes_since(0))
+        self.assertEqual(len(jrnl.changes_since(1)), 3)
+
+        # a sequence number from a different journal
+        self.assertIsNone(jrnl.changes_since(5))
+
+        self.assertEqual(jrnl.record(watch.DELETED, 'b.txt', watch.FILE), 5)
+        self.assertEqual(self.jrnl.last_seq, 5)
+
+    def test_partial_write(self):
+        self.jrnl.record(watch.CREATED, 'a.txt', watch.FILE)
+        with open(self.jrnl.path, 'a') as fd:
+            fd.write('{"seq": 2, "op": "crea')
+        self.assertEqual(self.jrnl.last_seq, 1)
+        self.assertEqual(len(self.jrnl.changes_since(0)), 1)
+
+    def test_compact(self):
+        for i in range(10):
+            self.jrnl.record(watch.CREATED, 'f%d' % i, watch.FILE)
+        self.assertEqual(len(self.jrnl.changes_since(0)), 10)
+
+        self.jrnl.record(watch.CREATED, 'f10', watch.FILE)
+        self.assertEqual(self.jrnl.last_seq, 11)
+        self.assertIsNone(self.jrnl.changes_since(0))
+        self.assertIsNone(self.jrnl.changes_since(5))
+        changes = self.jrnl.changes_since(6)
+        self.assertEqual([c['seq'] for c in changes], [7, 8, 9, 10, 11])
+        self.assertEqual(self.jrnl.record(watch.CREATED, 'f11', watch.FILE), 12)
+
+    def test_net_changes(self):
+        changes = [
+            {"op": watch.CREATED,  "path": "a",      "type": watch.COLLECTION},
+            {"op": watch.CREATED,  "path": "a/x",    "type": watch.FILE},
+            {"op": watch.MODIFIED, "path": "b.txt",  "type": watch.FILE},
+            {"op": watch.DELETED,  "path": "c.txt",  "type": watch.FILE},
+            {"op": watch.MOVED,    "path": "d", "dest": "e", "type": watch.COLLECTION},
+            {"op": watch.CREATED,  "path": "g/y",    "type": watch.FILE},
+            {"op": watch.DELETED,  "path": "g",      "type": watch.COLLECTION},
+            {"op": watch.MODIFIED, "path": "a/x",    "type": watch.FILE}
+        ]
+        changed, removed = watch.net_changes(changes)
+        self.assertEqual(list(changed.items()), [("a", watch.COLLECTION), ("b.txt", watch.FILE),
+                                                 ("e", watch.COLLECTION), ("a/x", watch.FILE)])
+        self.assertEqual(removed, set(["c.txt", "d", "g"]))
+
+        changed, removed = watch.net_changes(changes + [
+            {"op": watch.DELETED, "path": "a", "type": watch.COLLECTION},
+            {"op": watch.CREATED, "path": "c.txt", "type": watch.FILE}
+        ])
+        self.assertEqual(set(changed), set(["b.txt", "e", "c.txt"]))
+        self.assertEqual(removed, set(["a", "d", "g"]))
+
+class SpaceWatcherTestBase(test.TestCase):
+    config = {}
+
+    def setUp(self):
+        self.root = Path(tmpdir.name) / "spaces"
+        self.mkspace("mds3:0001")
+        self.watcher = watch.SpaceWatcher(self.root, self.config)
+
+    def tearDown(self):
+        self.watcher.close()
+        shutil.rmtree(self.root)
+
+    def mkspace(self, id):
+        os.makedirs(self.root / id / id / "data")
+        os.makedirs(self.root / id / (id + "-sys"))
+        self.write(id, "data/a.txt", "a")
+        self.write(id, "b.txt", "b")
+
+    def write(self, id, path, content):
+        with open(self.root / id / id / path, 'w') as fd:
+            fd.write(content)
+
+    def journal(self, id="mds3:0001"):
+        return watch.ChangeJournal(self.root / id / (id + "-sys"))
+
+    def changes(self, since, id="mds3:0001"):
+        return [(c['op'], c['path']) + ((c['dest'],) if 'dest' in c else ())
+                for c in self.journal(id).changes_since(since)]
+
+    def net_changes(self, since, id="mds3:0001"):
+        changed, removed = watch.net_changes(self.journal(id).changes_since(since))
+        return set(changed), removed
+
+class TestPollingSpaceWatcher(SpaceWatcherTestBase):
+    config = { "use_inotify": False, "poll_interval": 5 }
+
+    def test_ctor(self):
+        self.assertFalse(self.watcher.using_inotify)
+        self.assertEqual(self.watcher.rescan_interval, 5)
+
+    def test_rescan(self):
+        self.assertEqual(self.watcher.rescan(), 1)
+        self.assertEqual(self.journal().last_seq, 1)
+        self.assertIsNone(self.journal().changes_since(0))
+        self.assertTrue((self.root/"mds3:0001"/"mds3:0001-sys"/watch.SNAPSHOT_FILE).is_file())
+        self.assertEqual(self.watcher.rescan(), 0)
+
+        os.makedirs(self.root / "mds3:0001" / "mds3:0001" / "sub" / "deep")
+        self.write("mds3:0001", "sub/deep/c.txt", "c")
+        self.write("mds3:0001", ".hidden", "c")
+        self.write("mds3:0001", "b.txt", "bigger")
+        os.remove(self.root / "mds3:0001" / "mds3:0001" / "data" / "a.txt")
+        self.assertEqual(self.watcher.rescan("mds3:0001"), 3)
+        self.assertEqual(self.changes(1), [("modified", "b.txt"), ("deleted", "data/a.txt"),
+                                           ("created", "sub")])
+
+        shutil.rmtree(self.root / "mds3:0001" / "mds3:0001" / "sub")
+        self.assertEqual(self.watcher.rescan(), 1)
+        self.assertEqual(self.changes(4), [("deleted", "sub")])
+
+        # a restarted watcher picks up where the last left off
+        self.watcher.close()
+        self.write("mds3:0001", "data/a.txt", "a")
+        self.mkspace("mds3:0002")
+        self.watcher = watch.SpaceWatcher(self.root, self.config)
+        self.assertEqual(self.watcher.rescan(), 2)
+        self.assertEqual(self.changes(5), [("created", "data/a.txt")])
+        self.assertIsNone(self.journal("mds3:0002").changes_since(0))
+
+class TestInotifySpaceWatcher(SpaceWatcherTestBase):
+
+    def setUp(self):
+        if not watch.inotify_available():
+            self.skipTest("inotify not available")
+        super().setUp()
+        self.watcher.rescan()
+        self.upd = self.root / "mds3:0001" / "mds3:0001"
+
+    def events(self):
+        count = 0
+        while True:
+            n = self.watcher.process_events(0.2)
+            if not n:
+                return count
+            count += n
+
+    def test_ctor(self):
+        self.assertTrue(self.watcher.using_inotify)
+        self.assertEqual(self.watcher.rescan_interval, watch.DEF_RESCAN_INTERVAL)
+
+    def test_files(self):
+        self.write("mds3:0001", "c.txt", "c")
+        self.write("mds3:0001", "b.txt", "bb")
+        self.write("mds3:0001", ".c.txt.part", "c")
+        os.rename(self.upd / ".c.txt.part", self.upd / "d.txt")
+        os.rename(self.upd / "b.txt", self.upd / "data" / "b.txt")
+        os.remove(self.upd / "data" / "a.txt")
+        self.events()
+        changes = self.changes(1)
+        self.assertEqual(changes[0], ("created", "c.txt"))
+        self.assertIn(("created", "d.txt"), changes)
+        self.assertIn(("moved", "b.txt", "data/b.txt"), changes)
+        self.assertEqual(changes[-1], ("deleted", "data/a.txt"))
+        self.assertEqual(self.net_changes(1), (set(["c.txt", "d.txt", "data/b.txt"]),
+                                               set(["b.txt", "data/a.txt"])))
+
+        # nothing was missed
+        self.assertEqual(self.watcher.rescan(), 0)
+
+    def test_folders(self):
+        os.makedirs(self.upd / "sub" / "deep")
+        self.write("mds3:0001", "sub/deep/c.txt", "c")
+        self.events()
+        self.assertEqual(self.changes(1)[0], ("created", "sub"))
+
+        # new folders are watched
+        self.write("mds3:0001", "sub/deep/d.txt", "d")
+        os.rename(self.upd / "sub", self.upd / "moved")
+        self.write("mds3:0001", "moved/deep/e.txt", "e")
+        shutil.move(str(self.upd / "data"), tmpdir.name)
+        self.events()
+        changes = self.changes(1)
+        self.assertIn(("moved", "sub", "moved"), changes)
+        self.assertEqual(changes[-1], ("deleted", "data"))
+        self.assertEqual(self.net_changes(1), (set(["moved", "moved/deep/e.txt"]), set(["sub", "data"])))
+        shutil.rmtree(Path(tmpdir.name) / "data")
+
+        shutil.rmtree(self.upd / "moved")
+        self.events()
+        self.assertEqual(self.changes(1)[-1], ("deleted", "moved"))
+        self.assertEqual(self.watcher.rescan(), 0)
+
+    def test_new_space(self):
+        self.mkspace("mds3:0002")
+        self.events()
+        self.assertEqual(self.journal("mds3:0002").last_seq, 1)
+
+        self.write("mds3:0002", "c.txt", "c")
+        self.events()
+        self.assertEqual(self.changes(1, "mds3:0002"), [("created", "c.txt")])
+
+    def test_run(self):
+        self.assertFalse(watch.is_watching(self.root))
+        self.watcher.start()
+        try:
+            time.sleep(0.2)
+            self.assertTrue(watch.is_watching(self.root))
+            self.write("mds3:0001", "c.txt", "c")
+            time.sleep(0.3)
+            self.assertEqual(self.net_changes(1), (set(["c.txt"]), set()))
+        finally:
+            self.watcher.stop()
+        self.assertFalse(watch.is_watching(self.root))
+
+
+if __name__ == '__main__':
+    test.main()
@@ -190,6 +190,70 @@ class TestFMFSFileComps(test.TestCase):
             self.cmps._update_files_from_scan(scan)
         
 
+    def test_update_files_from_scan_incremental(self):
+        self.cmps._fmcli = self.fm
+        self.cmps._update_files_from_scan(read_scan())
+        self.assertEqual(self.cmps.count, 9)
+        self.assertEqual(self.cmps.get_ids_in_subcoll("previews"), ["302", "303", "301"])
+        self.cmps.set_order_in_subcoll("previews", ["301", "302", "303"])
+        fmd = self.cmps.get_file_by_id("196")
+        fmd['title'] = "The Cube"
+        self.cmps.set_file_at(fmd)
+
+        with patch.object(self.cmps, '_cache_file_md', wraps=self.cmps._cache_file_md) as cache, \
+             patch.object(self.cmps, '_cache_children', wraps=self.cmps._cache_children) as chldn:
+            # nothing changed:  nothing is written
+            stat = self.cmps._update_files_from_scan(read_scan())
+            self.assertEqual(stat['file_count'], 7)
+            self.assertEqual(stat['usage'], 4997166)
+            cache.assert_not_called()
+            chldn.assert_not_called()
+
+            # only changed files are written
+            scan = read_scan()
+            scan['contents'][0]['checksum'] = "abcdef"
+            scan['contents'][1]['size'] = "152641"
+            scan['contents'][2]['etag'] = "goob"
+            self.cmps._update_files_from_scan(scan)
+            self.assertEqual(sorted(c.args[0]['@id'] for c in cache.call_args_list),
+                             ["196", "203", "229"])
+            chldn.assert_not_called()
+            fmd = self.cmps.get_file_by_id("196")
+            self.assertEqual(fmd['checksum']['hash'], "abcdef")
+            self.assertEqual(fmd['title'], "The Cube")
+            self.assertEqual(self.cmps.get_file_by_id("203")['size'], 152641)
+            self.assertNotIn('__etag', self.cmps.get_file_by_id("229"))
+            self.assertEqual(self.cmps._get_file_by_id("229")['__etag'], "goob")
+
+            # a move rewrites the file and the folders it moved between
+            cache.reset_mock()
+            scan['contents'][-3]['path'] = "analysis/ngc7793-cont.gif"
+            self.cmps._update_files_from_scan(scan)
+            self.assertEqual(sorted(c.args[0]['@id'] for c in cache.call_args_list),
+                             ["284", "301", "file_0"])
+            chldn.assert_not_called()
+            self.assertTrue(self.cmps.path_exists("analysis/ngc7793-cont.gif"))
+            self.assertFalse(self.cmps.path_exists("previews/ngc7793-cont.gif"))
+            self.assertEqual(self.cmps.get_ids_in_subcoll("previews"), ["302", "303"])
+
+            # removals and additions
+            cache.reset_mock()
+            scan['contents'].pop(0)
+            scan['contents'].append({"fileid": "400", "path": "new/data.csv", "size": "10",
+                                     "resource_type": "file"})
+            stat = self.cmps._update_files_from_scan(scan)
+            self.assertEqual(stat['file_count'], 7)
+            self.assertEqual(stat['folder_count'], 3)
+            chldn.assert_called_once()
+            self.assertFalse(self.cmps.exists("196"))
+            self.assertFalse(self.cmps.path_exists("ngc7793-HIcube.fits"))
+            self.assertTrue(self.cmps.path_is_collection("new"))
+            self.assertEqual(self.cmps.get_file_by_path("new/data.csv")['size'], 10)
+            self.assertEqual(len(cache.call_args_list), 2)
+
+        self.assertEqual(self.cmps.count, 10)
+        self.assertEqual(self.cmps.get_ids_in_subcoll("previews"), ["302", "303"])
+
     def test_new_id(self):
         self.assertTrue(not self.cmps._seqp.exists())
         self.assertEqual(self.cmps._new_id(), "file_0")
@@ -402,6 +402,93 @@ class TestDAPNERDmReviewValidator(test.TestCase):
         res = self.val.validate(self.nerd, willUpload=True, resourceType="portal")
         self.assertEqual(res.count_applied(), 21)
         self.assertEqual(res.count_passed(), 21)
+
+    def test_validate_cached(self):
+        val = CountingReviewValidator()
+        res = val.validate(self.nerd)
+        self.assertEqual(res.count_applied(), 11)
+        self.assertEqual(res.count_passed(), 9)
+        self.assertEqual(val.calls["test_title"], 1)
+        self.assertEqual(val.calls["test_files"], 1)
+
+        # nothing changed: no test is re-run
+        res = val.validate(self.nerd)
+        self.assertEqual(res.count_applied(), 11)
+        self.assertEqual(res.count_passed(), 9)
+        self.assertTrue(all(c == 1 for c in val.calls.values()))
+
+        # only the tests examining the title are re-run
+        self.nerd["title"] = "John Doe"
+        res = val.validate(self.nerd)
+        self.assertEqual(res.count_applied(), 11)
+        self.assertEqual(res.count_passed(), 8)
+        self.assertEqual(val.calls["test_title"], 2)
+        self.assertEqual(val.calls["test_files"], 1)
+        self.assertEqual(val.calls["test_description"], 1)
+
+        # a change to a file does not re-run the tests that examine only links
+        files = [c for c in self.nerd['components'] if is_type(c, "DataFile")]
+        self.assertTrue(files)
+        files[0]['description'] = "a changed file"
+        val.validate(self.nerd)
+        self.assertEqual(val.calls["test_files"], 2)
+        self.assertEqual(val.calls["test_has_data"], 2)
+        self.assertEqual(val.calls["test_links"], 1)
+        self.assertEqual(val.calls["test_title"], 2)
+
+        # changing the review metadata or the types wanted re-runs all tests
+        val.calls = {}
+        res = val.validate(self.nerd, willUpload=True)
+        self.assertTrue(all(c == 1 for c in val.calls.values()))
+        res = val.validate(self.nerd, rev.REQ, willUpload=True)
+        self.assertTrue(all(c == 2 for c in val.calls.values()))
+
+        # a different record is reviewed separately
+        other = deepcopy(self.nerd)
+        other["@id"] = "mds3:0001"
+        val.validate(other, rev.REQ, willUpload=True)
+        self.assertTrue(all(c == 3 for c in val.calls.values()))
+        val.validate(self.nerd, rev.REQ, willUpload=True)
+        self.assertTrue(all(c == 3 for c in val.calls.values()))
+
+        val.forget(self.nerd["@id"])
+        val.validate(self.nerd, rev.REQ, willUpload=True)
+        self.assertTrue(all(c == 4 for c in val.calls.values()))
+        val.validate(other, rev.REQ, willUpload=True)
+        self.assertTrue(all(c == 4 for c in val.calls.values()))
+        self.assertEqual(len(val.calls), len(val.the_test_methods()))
+
+    def test_validate_nocache(self):
+        val = CountingReviewValidator({"review_cache_size": 0})
+        val.validate(self.nerd)
+        res = val.validate(self.nerd)
+        self.assertEqual(res.count_applied(), 11)
+        self.assertEqual(res.count_passed(), 9)
+        self.assertTrue(all(c == 2 for c in val.calls.values()))
+
+        val = CountingReviewValidator({"review_cache_size": 1})
+        other = deepcopy(self.nerd)
+        other["@id"] = "mds3:0001"
+        val.validate(self.nerd)
+        val.validate(other)
+        val.validate(self.nerd)
+        self.assertTrue(all(c == 3 for c in val.calls.values()))
+
+class CountingReviewValidator(rev.DAPNERDmReviewValidator):
+    """
+    a review validator that counts the number of times each of its tests are run
+    """
+    def __init__(self, config=None):
+        super(CountingReviewValidator, self).__init__(config)
+        self.calls = {}
+        for test in self.the_test_methods():
+            setattr(self, test, self._counting(test, getattr(self, test)))
+
+    def _counting(self, name, meth):
+        def counted(*args, **kw):
+            self.calls[name] = self.calls.get(name, 0) + 1
+            return meth(*args, **kw)
+        return counted
         
 
 
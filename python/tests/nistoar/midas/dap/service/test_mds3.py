@@ -95,6 +95,11 @@ class TestMDS3DAPService(test.TestCase):
         self.assertTrue(self.svc._valid8r)
         self.assertEqual(self.svc._minnerdmver, (0, 6))
 
+        # the validator is shared across service instances
+        valid8r = self.svc._valid8r
+        self.create_service()
+        self.assertIs(self.svc._valid8r, valid8r)
+
     def test_ids_for(self):
         self.create_service()
         self.assertEqual(self.svc._aipid_for("ncnr0:goob"), "ncnr0-goob")
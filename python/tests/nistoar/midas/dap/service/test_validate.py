@@ -38,10 +38,20 @@ class TestLenientSchemaLoader(test.TestCase):
         self.assertIn("properties", typedef)
         self.assertNotIn("required", typedef)
 
-        
-
-
-
+class TestSharedValidator(test.TestCase):
+
+    def test_get_lenient_validator(self):
+        v = val.get_lenient_validator(pdr.def_schema_dir, "_")
+        self.assertTrue(isinstance(v, val.SharedValidator))
+        self.assertIs(val.get_lenient_validator(pdr.def_schema_dir, "_"), v)
+        self.assertIsNot(val.get_lenient_validator(pdr.def_schema_dir, "$"), v)
+
+        schemauri = const.CORE_SCHEMA_URI.rstrip("#") + "#/definitions/ContactInfo"
+        contact = {"@type": "vcard:Contact", "fn": "Gurn Cranston",
+                   "hasEmail": "mailto:gurn.cranston@gmail.com"}
+        self.assertEqual(v.validate(contact, schemauri=schemauri, strict=True, raiseex=False), [])
+        contact['fn'] = 3
+        self.assertGreater(len(v.validate(contact, schemauri=schemauri, strict=True, raiseex=False)), 0)
 
                          
 if __name__ == '__main__':
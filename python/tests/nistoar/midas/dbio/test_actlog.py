@@ -0,0 +1,94 @@
+import os, json
+import unittest as test
+
+from nistoar.midas.dbio import actlog
+from nistoar.pdr.utils.prov import Action, Agent
+
+ava = Agent("dbio", Agent.USER, "nist0:ava1", "nist")
+bob = Agent("dbio", Agent.USER, "nist0:bob", "nist")
+
+def patch(obj, who=ava, msg="updated", subj="mds3:0001", subacts=None, ts=0.0):
+    return Action(Action.PATCH, subj, who, msg, obj, ts, subacts).to_dict()
+
+class TestActLog(test.TestCase):
+
+    def test_merge_objects(self):
+        self.assertEqual(actlog.merge_objects(None, {"a": 1}), {"a": 1})
+        self.assertEqual(actlog.merge_objects({"a": 1}, None), {"a": 1})
+        self.assertEqual(actlog.merge_objects({"a": 1, "b": {"c": 1, "d": 2}}, {"b": {"c": 3}, "e": 4}),
+                         {"a": 1, "b": {"c": 3, "d": 2}, "e": 4})
+        self.assertEqual(actlog.merge_objects([1, 2], [3]), [1, 2, 3])
+        self.assertEqual(actlog.merge_objects({"a": 1}, "goob"), "goob")
+
+    def test_compact_runs(self):
+        acts = [
+            Action(Action.CREATE, "mds3:0001", ava, "created").to_dict(),
+            patch({"title": "a"}, ts=1.0),
+            patch({"title": "b", "keywords": ["x"]}, msg="retitled", ts=2.0),
+            patch({"title": "c"}, ts=3.0),
+            patch({"title": "d"}, who=bob, ts=4.0),
+            Action(Action.COMMENT, "mds3:0001", bob, "looks good").to_dict(),
+            patch({"title": "e"}, ts=5.0),
+        ]
+        out = actlog.compact_actions(acts)
+        self.assertEqual([a['type'] for a in out],
+                         [Action.CREATE, Action.PATCH, Action.PATCH, Action.COMMENT, Action.PATCH])
+        self.assertEqual(out[0], acts[0])
+        self.assertEqual(out[1]['object'], {"title": "c", "keywords": ["x"]})
+        self.assertEqual(out[1]['message'], "updated; retitled")
+        self.assertEqual(out[1]['timestamp'], 3.0)
+        self.assertEqual(out[1]['compacted'], {"count": 3, "since": 1.0})
+        self.assertEqual(out[1]['agent'], acts[1]['agent'])
+        self.assertEqual(out[2], acts[4])
+        self.assertEqual(out[4], acts[6])
+
+        # merged actions can be read back as Actions
+        self.assertEqual(Action.from_dict(out[1]).object, {"title": "c", "keywords": ["x"]})
+
+    def test_compact_incompatible_objects(self):
+        acts = [patch({"title": "a"}), patch(None), patch([{"op": "add"}]), patch([{"op": "remove"}])]
+        out = actlog.compact_actions(acts)
+        self.assertEqual(len(out), 2)
+        self.assertEqual(out[0]['object'], {"title": "a"})
+        self.assertEqual(out[0]['compacted']['count'], 2)
+        self.assertEqual(out[1]['object'], [{"op": "add"}, {"op": "remove"}])
+
+    def test_compact_subactions(self):
+        def sub(acttype, part, obj=None):
+            return Action(acttype, "mds3:0001#data."+part, ava, "updating data."+part, obj)
+        acts = [
+            patch(None, subacts=[sub(Action.PATCH, "title", {"title": "a"})], ts=1.0),
+            patch(None, subacts=[sub(Action.PATCH, "authors", {"authors": [1]})], ts=2.0),
+            patch(None, subacts=[sub(Action.PATCH, "title", {"title": "b"})], ts=3.0),
+            patch(None, subacts=[sub(Action.DELETE, "authors")], ts=4.0),
+            patch(None, subacts=[sub(Action.PATCH, "authors", {"authors": [2]})], ts=5.0),
+        ]
+        out = actlog.compact_actions(acts)
+        self.assertEqual(len(out), 1)
+        subs = out[0]['subactions']
+        self.assertEqual([(s['type'], s['subject'].split('.')[-1]) for s in subs],
+                         [("PATCH", "title"), ("PATCH", "authors"), ("DELETE", "authors"),
+                          ("PATCH", "authors")])
+        self.assertEqual(subs[0]['object'], {"title": "b"})
+        self.assertEqual(subs[3]['object'], {"authors": [2]})
+
+    def test_pack_history(self):
+        acts = [patch({"title": "a" * 1000}) for i in range(10)]
+        packed = actlog.pack_history(acts)
+        self.assertIsInstance(packed, str)
+        self.assertLess(len(packed), actlog.log_size(acts) / 10)
+        self.assertEqual(actlog.unpack_history(packed), acts)
+
+        archive = {"id": "mds3:0001", "compressed_history": packed}
+        self.assertEqual(actlog.expand_archive(archive), {"id": "mds3:0001", "history": acts})
+        archive = {"id": "mds3:0001", "history": acts}
+        self.assertIs(actlog.expand_archive(archive), archive)
+
+    def test_log_size(self):
+        acts = [patch({"title": "a"}), patch({"title": "b"})]
+        self.assertEqual(actlog.log_size(acts), sum(len(json.dumps(a)) for a in acts))
+        self.assertEqual(actlog.log_size([]), 0)
+
+
+if __name__ == '__main__':
+    test.main()
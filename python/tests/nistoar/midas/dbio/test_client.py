@@ -1,6 +1,7 @@
 import os, json, logging
 from pathlib import Path
 import unittest as test
+from unittest.mock import Mock
 
 from nistoar.midas.dbio import inmem, base
 from nistoar.pdr.utils.prov import Action, Agent
@@ -246,6 +247,63 @@ class TestDBClient(test.TestCase):
         with self.assertRaises(base.NotAuthorized):
             cli.record_action(Action(Action.COMMENT, "mds3:0001", testuser, "crikey"))
             
+    def test_batched_actions(self):
+        testuser = Agent("dbio", Agent.USER, self.user, "nist")
+        cli = self.fact.create_client(base.DRAFT_PROJECTS, {"action_log": {"batch_writes": True}},
+                                      self.user)
+        self.assertTrue(cli._upsert(base.DRAFT_PROJECTS, {"id": "mds3:0001", "owner": self.user}))
+        cli._save_actions_data = Mock(wraps=cli._save_actions_data)
+
+        cli.record_action(Action(Action.CREATE, "mds3:0001", testuser, "created"))
+        cli.record_action(Action(Action.COMMENT, "mds3:0001", testuser, "i'm hungry"))
+        self.assertEqual(cli._select_actions_for("mds3:0001"), [])
+        with self.assertRaises(base.ObjectNotFound):
+            cli.record_action(Action(Action.COMMENT, "bob", testuser, "created"))
+
+        cli.free()
+        self.assertEqual(cli._save_actions_data.call_count, 1)
+        acts = cli._select_actions_for("mds3:0001")
+        self.assertEqual([a['type'] for a in acts], [Action.CREATE, Action.COMMENT])
+
+        cli.free()
+        self.assertEqual(cli._save_actions_data.call_count, 1)
+
+    def test_close_actionlog_compacted(self):
+        testuser = Agent("dbio", Agent.USER, self.user, "nist")
+        cli = self.fact.create_client(base.DRAFT_PROJECTS, {"action_log": {"compress": True}}, self.user)
+        prec = base.ProjectRecord(base.DRAFT_PROJECTS,
+                                  {"id": "pdr0:2222", "name": "brains", "owner": self.user}, cli)
+        cli._db[cli._projcoll]["pdr0:2222"] = prec.to_dict()
+
+        cli.record_action(Action(Action.CREATE, "pdr0:2222", testuser, "created"))
+        for i in range(5):
+            cli.record_action(Action(Action.PATCH, "pdr0:2222", testuser, "updated",
+                                     {"title": "draft %d" % i}))
+        cli.record_action(Action(Action.COMMENT, "pdr0:2222", testuser, "i'm hungry"))
+        cli.record_action(Action(Action.PATCH, "pdr0:2222", testuser, "updated", {"title": "final"}))
+        size = cli.action_log_size("pdr0:2222")
+        self.assertEqual(size['actions'], 8)
+        self.assertEqual(size['archived'], 0)
+
+        cli._close_actionlog_with(prec, Action(Action.PROCESS, "pdr0:2222", testuser, "done!",
+                                               {"name": "submit"}))
+        stored = cli._db['history']["pdr0:2222"][0]
+        self.assertNotIn('history', stored)
+        self.assertIn('compressed_history', stored)
+
+        hist = cli.get_history_for("pdr0:2222")[0]['history']
+        self.assertEqual([a['type'] for a in hist],
+                         [Action.CREATE, Action.PATCH, Action.COMMENT, Action.PATCH, Action.PROCESS])
+        self.assertEqual(hist[1]['object'], {"title": "draft 4"})
+        self.assertEqual(hist[1]['compacted']['count'], 5)
+        self.assertNotIn('compacted', hist[3])
+
+        size = cli.action_log_size("pdr0:2222")
+        self.assertEqual(size['actions'], 0)
+        self.assertEqual(size['bytes'], 0)
+        self.assertEqual(size['archived'], 1)
+        self.assertGreater(size['archived_bytes'], 0)
+
     def test_close_actionlog_with(self):
         testuser = Agent("dbio", Agent.USER, self.user, "nist")
         
@@ -1,4 +1,4 @@
-import os, json, logging, tempfile
+import os, json, logging, tempfile, threading
 from pathlib import Path
 import unittest as test
 
@@ -311,6 +311,78 @@ class TestFSBasedDBClient(test.TestCase):
         rec_ids = [r.id for r in recs]
         self.assertEqual(len(rec_ids), 0)
 
+    def test_adv_select_records(self):
+        for id, name, state in [("pdr0:0002", "test 1", "create"), ("pdr0:0003", "test 2", "edit")]:
+            rec = base.ProjectRecord(base.DMP_PROJECTS, {"id": id, "name": name,
+                                                         "status": {"state": state}}, self.cli)
+            self.cli._write_rec(base.DMP_PROJECTS, id, rec.to_dict())
+        rec = base.ProjectRecord(base.DMP_PROJECTS, {"id": "goob", "name": "test 2", "owner": "alice"},
+                                 self.cli)
+        self.cli._write_rec(base.DMP_PROJECTS, "goob", rec.to_dict())
+
+        with self.assertRaises(SyntaxError):
+            list(self.cli.adv_select_records({'$a,nkd': [{'name': 'test 2'}]}, base.ACLs.READ))
+
+        recs = list(self.cli.adv_select_records({"$and": [{"name": "test 2"}]}, base.ACLs.READ))
+        self.assertEqual([r.id for r in recs], ["pdr0:0003"])
+        recs = list(self.cli.adv_select_records({"$and": [{"$or": [{"name": "test 1"},
+                                                                   {"name": "test 2"}]}]},
+                                                base.ACLs.READ))
+        self.assertEqual(sorted(r.id for r in recs), ["pdr0:0002", "pdr0:0003"])
+
+    def test_search_records(self):
+        def put(cli, id, title, owner=self.user, **data):
+            rec = base.ProjectRecord(base.DMP_PROJECTS, {"id": id, "name": title, "owner": owner,
+                                                         "data": data}, cli)
+            cli._upsert(base.DMP_PROJECTS, rec.to_dict())
+
+        put(self.cli, "pdr0:0001", "Optical wafers", theme=["Physics"])
+        put(self.cli, "pdr0:0002", "Thermal wafers", description="includes optical data")
+        jpath = self.cli._search_journal_for(base.DMP_PROJECTS)
+        self.assertFalse(jpath.exists())
+
+        res = self.cli.search_records("optical")
+        self.assertEqual([r.id for r in res.records], ["pdr0:0001", "pdr0:0002"])
+        self.assertEqual(res.facets['theme'], {"Physics": 1})
+        self.assertTrue(jpath.is_file())
+        with open(jpath) as fd:
+            self.assertEqual(len(fd.readlines()), 2)
+
+        # saves by any client get appended to the journal
+        other = fsbased.FSBasedDBClient(self.outdir.name, self.cfg, base.DMP_PROJECTS, self.user)
+        put(other, "pdr0:0003", "Optical lenses")
+        other._delete_from(base.DMP_PROJECTS, "pdr0:0002")
+        with open(jpath) as fd:
+            self.assertEqual(len(fd.readlines()), 4)
+        res = self.cli.search_records("optical")
+        self.assertEqual(sorted(r.id for r in res.records), ["pdr0:0001", "pdr0:0003"])
+
+        # a process new to the journal replays it all
+        fsbased._search_cache.clear()
+        res = self.cli.search_records("optical")
+        self.assertEqual(sorted(r.id for r in res.records), ["pdr0:0001", "pdr0:0003"])
+        self.assertEqual(self.cli.search_records("wafer*").total, 1)
+
+        # the journal is compacted once it gets long
+        for i in range(3):
+            put(self.cli, "pdr0:0003", "Optical lenses, take %d" % i)
+        mincompact = fsbased._MIN_COMPACT_LINES
+        fsbased._MIN_COMPACT_LINES = 2
+        try:
+            self.assertEqual(self.cli.search_records("take").total, 1)
+        finally:
+            fsbased._MIN_COMPACT_LINES = mincompact
+        with open(jpath) as fd:
+            self.assertEqual(len(fd.readlines()), 2)
+        self.assertEqual(self.cli.search_records("optical").total, 2)
+
+        # the journal can be rebuilt from the records
+        with open(jpath, 'a') as fd:
+            fd.write('{"id": "pdr0:0001", "entry": null}\n')
+        self.assertEqual(self.cli.search_records("optical").total, 1)
+        self.assertEqual(self.cli.reindex_search(), 2)
+        self.assertEqual(self.cli.search_records("optical").total, 2)
+
     def test_action_log_io(self):
         with self.assertRaises(ValueError):
             self.cli._save_action_data({'goob': 'gurn'})
@@ -358,6 +430,35 @@ class TestFSBasedDBClient(test.TestCase):
         self.assertEqual(self.cli._select_actions_for("goob:gurn"), [])
         self.assertEqual(self.cli._select_actions_for("grp0001"), [])
 
+    def test_save_actions_data(self):
+        with self.assertRaises(ValueError):
+            self.cli._save_actions_data([{'subject': 'goob:gurn'}, {'goob': 'gurn'}])
+
+        self.cli._save_action_data({'subject': 'goob:gurn', 'foo': 'bar'})
+        self.cli._save_actions_data([{'subject': 'goob:gurn', 'bob': 'alice'},
+                                     {'subject': 'grp0001', 'dylan': 'bob'},
+                                     {'subject': 'goob:gurn', 'alice': 'bob'}])
+        self.assertEqual(self.cli._select_actions_for("goob:gurn"),
+                         [{'subject': 'goob:gurn', 'foo': 'bar'}, {'subject': 'goob:gurn', 'bob': 'alice'},
+                          {'subject': 'goob:gurn', 'alice': 'bob'}])
+        self.assertEqual(self.cli._select_actions_for("grp0001"), [{'subject': 'grp0001', 'dylan': 'bob'}])
+
+    def test_save_actions_data_concurrently(self):
+        def save(who):
+            for i in range(20):
+                self.cli._save_actions_data([{'subject': 'goob:gurn', 'who': who, 'i': i, 'pad': "x"*5000}
+                                             for j in range(5)])
+        threads = [threading.Thread(target=save, args=(w,)) for w in range(4)]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+
+        acts = self.cli._select_actions_for("goob:gurn")
+        self.assertEqual(len(acts), 400)
+        for w in range(4):
+            self.assertEqual([a['i'] for a in acts if a['who'] == w], [i for i in range(20) for j in range(5)])
+
     def test_save_history(self):
         with self.assertRaises(ValueError):
             self.cli._save_history({'goob': 'gurn'})
@@ -377,6 +377,67 @@ class TestInMemoryDBClient(test.TestCase):
         self.assertEqual(recs[0].id, "pdr0:0006")
         self.assertEqual(recs[1].id, "pdr0:0003")
 
+    def test_search_records(self):
+        def put(id, title, owner=self.user, state="edit", modified=1.0, **data):
+            rec = base.ProjectRecord(base.DMP_PROJECTS, {"id": id, "name": title, "owner": owner,
+                                                         "status": {"state": state, "modified": modified},
+                                                         "data": data}, self.cli)
+            self.cli._upsert(base.DMP_PROJECTS, rec.to_dict())
+
+        put("pdr0:0001", "Optical wafers", modified=3.0, theme=["Physics"])
+        put("pdr0:0002", "Thermal wafers", modified=2.0, theme=["Physics", "Chemistry"],
+            description="includes optical data")
+        put("pdr0:0003", "Neutron scattering", state="published", modified=1.0, keywords=["wafers"])
+        put("pdr0:0004", "Optical fibers", owner="nist0:bob")
+
+        res = self.cli.search_records("optical")
+        self.assertEqual([r.id for r in res.records], ["pdr0:0001", "pdr0:0002"])
+        self.assertTrue(isinstance(res.records[0], base.ProjectRecord))
+        self.assertGreater(res.scores[0], res.scores[1])
+        self.assertEqual(res.total, 2)
+        self.assertEqual(res.facets['status.state'], {"edit": 2})
+        self.assertEqual(res.facets['theme'], {"Physics": 2, "Chemistry": 1})
+        self.assertEqual(res.facets['owner'], {self.user: 2})
+
+        # no query: everything, most recently modified first
+        res = self.cli.search_records()
+        self.assertEqual([r.id for r in res.records], ["pdr0:0001", "pdr0:0002", "pdr0:0003"])
+        self.assertEqual(res.scores, [0.0, 0.0, 0.0])
+
+        res = self.cli.search_records("wafer*", status_state="published")
+        self.assertEqual([r.id for r in res.records], ["pdr0:0003"])
+        self.assertEqual(res.facets['status.state'], {"published": 1})
+        res = self.cli.search_records("wafers", theme=["Chemistry", "Biology"], facets=["theme"])
+        self.assertEqual([r.id for r in res.records], ["pdr0:0002"])
+        self.assertEqual(list(res.facets.keys()), ["theme"])
+        self.assertEqual(self.cli.search_records("goob").total, 0)
+        self.assertEqual(self.cli.search_constraint_names(), ["status_state", "owner", "theme"])
+
+        # pagination
+        res = self.cli.search_records("wafers", page=2, size=2)
+        self.assertEqual(res.total, 3)
+        self.assertEqual(res.pages, 2)
+        self.assertEqual(len(res.records), 1)
+        self.assertEqual(self.cli.search_records("wafers", page=3, size=2).records, [])
+        with self.assertRaises(ValueError):
+            self.cli.search_records("wafers", page=0)
+        with self.assertRaises(ValueError):
+            self.cli.search_records("wafers", size="goob")
+
+        # the index follows saves and deletions
+        put("pdr0:0005", "Optical lenses")
+        self.assertEqual(self.cli.search_records("optical").total, 3)
+        self.cli._delete_from(base.DMP_PROJECTS, "pdr0:0001")
+        res = self.cli.search_records("optical")
+        self.assertEqual([r.id for r in res.records], ["pdr0:0005", "pdr0:0002"])
+
+        # other users see only what they are authorized to
+        bob = self.cli.client_for(base.DMP_PROJECTS, "nist0:bob")
+        self.assertEqual([r.id for r in bob.search_records("optical").records], ["pdr0:0004"])
+
+        self.assertEqual(self.cli.reindex_search(), 4)
+        self.assertEqual(self.cli.search_records("optical").total, 2)
+
     def test_select_records_by_ids(self):
         # Inject some data into the database
         id1 = "pdr0:0002"
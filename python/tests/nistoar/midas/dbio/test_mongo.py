@@ -592,6 +592,55 @@ class TestMongoDBClient(test.TestCase):
 
         
 
+    def test_search_records(self):
+        # the collection gets dropped after each test, taking its text index with it
+        mongo._text_indexed.clear()
+        def put(id, title, owner=self.user, state="edit", modified=1.0, **data):
+            rec = base.ProjectRecord(base.DMP_PROJECTS, {"id": id, "name": title, "owner": owner,
+                                                         "status": {"state": state, "modified": modified},
+                                                         "data": data}, self.cli)
+            self.cli._upsert(base.DMP_PROJECTS, rec.to_dict())
+
+        put("pdr0:0001", "Optical wafers", modified=3.0, theme=["Physics"])
+        put("pdr0:0002", "Thermal wafers", modified=2.0, theme=["Physics", "Chemistry"],
+            description="includes optical data")
+        put("pdr0:0003", "Neutron scattering", state="published", modified=1.0, keywords=["wafers"])
+        put("pdr0:0004", "Optical fibers", owner="nist0:bob")
+
+        res = self.cli.search_records("optical")
+        self.assertIn(self.cli.SEARCH_INDEX_NAME, self.cli.native[base.DMP_PROJECTS].index_information())
+        self.assertEqual([r.id for r in res.records], ["pdr0:0001", "pdr0:0002"])
+        self.assertTrue(isinstance(res.records[0], base.ProjectRecord))
+        self.assertGreater(res.scores[0], res.scores[1])
+        self.assertEqual(res.total, 2)
+        self.assertEqual(res.facets['status.state'], {"edit": 2})
+        self.assertEqual(res.facets['theme'], {"Physics": 2, "Chemistry": 1})
+        self.assertEqual(res.facets['owner'], {self.user: 2})
+
+        res = self.cli.search_records()
+        self.assertEqual([r.id for r in res.records], ["pdr0:0001", "pdr0:0002", "pdr0:0003"])
+
+        res = self.cli.search_records("wafers", status_state="published")
+        self.assertEqual([r.id for r in res.records], ["pdr0:0003"])
+        res = self.cli.search_records("optical wafers")
+        self.assertEqual(sorted(r.id for r in res.records), ["pdr0:0001", "pdr0:0002"])
+
+        # prefix words are matched with regular expressions
+        res = self.cli.search_records("wafer*", theme="Chemistry")
+        self.assertEqual([r.id for r in res.records], ["pdr0:0002"])
+        self.assertEqual(self.cli.search_records("afer*").total, 0)
+        self.assertEqual(self.cli.search_records("optical wafer*").total, 2)
+
+        res = self.cli.search_records("wafers", page=2, size=2)
+        self.assertEqual(res.total, 3)
+        self.assertEqual(len(res.records), 1)
+
+        bob = self.cli.client_for(base.DMP_PROJECTS, "nist0:bob")
+        self.assertEqual([r.id for r in bob.search_records("optical").records], ["pdr0:0004"])
+
+        self.assertEqual(self.cli.reindex_search(), 4)
+        self.assertEqual(self.cli.search_records("optical").total, 2)
+
     def test_action_log_io(self):
         self.assertEqual(self.cli.native['prov_action_log'].count_documents({}), 0)
         self.cli._save_action_data({'subject': 'goob:gurn', 'foo': 'bar', 'timestamp': 8})
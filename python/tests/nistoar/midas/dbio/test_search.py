@@ -0,0 +1,150 @@
+import os, json
+import unittest as test
+
+from nistoar.midas.dbio import search
+
+def rec(id, title, owner="nist0:ava1", state="edit", modified=1.0, **data):
+    return {"id": id, "name": title, "owner": owner, "acls": {"read": [owner]},
+            "status": {"state": state, "modified": modified}, "data": data}
+
+class TestSearchFuncs(test.TestCase):
+
+    def test_tokenize(self):
+        self.assertEqual(search.tokenize("The Optical Properties of a Ga-As wafer"),
+                         ["optical", "properties", "ga", "wafer"])
+        self.assertEqual(search.tokenize(""), [])
+
+    def test_parse_query(self):
+        self.assertEqual(search.parse_query("Optical wafer"), (["optical", "wafer"], []))
+        self.assertEqual(search.parse_query("optic* wafer"), (["wafer"], ["optic"]))
+        self.assertEqual(search.parse_query("the *"), ([], []))
+        self.assertEqual(search.parse_query(None), ([], []))
+
+    def test_values_at(self):
+        data = {"name": "goob", "data": {"authors": [{"fn": "Ava"}, {"fn": "Bob"}, {"orcid": "x"}],
+                                         "keywords": ["a", "b", None],
+                                         "contactPoint": {"fn": "Cal"}}}
+        self.assertEqual(search.values_at(data, "name"), ["goob"])
+        self.assertEqual(search.values_at(data, "data.authors[].fn"), ["Ava", "Bob"])
+        self.assertEqual(search.values_at(data, "data.keywords"), ["a", "b"])
+        self.assertEqual(search.values_at(data, "data.contactPoint.fn"), ["Cal"])
+        self.assertEqual(search.values_at(data, "data.contactPoint"), [])
+        self.assertEqual(search.values_at(data, "data.title"), [])
+        self.assertEqual(search.values_at(data, "name.goob"), [])
+
+    def test_make_entry(self):
+        entry = search.make_entry(rec("mdm1:0001", "Optical wafers", keywords=["optics", "wafers"],
+                                      theme=["Physics"], description="a study of wafers"))
+        self.assertEqual(entry['id'], "mdm1:0001")
+        self.assertEqual(entry['owner'], "nist0:ava1")
+        self.assertEqual(entry['acls'], {"read": ["nist0:ava1"]})
+        self.assertFalse(entry['deactivated'])
+        self.assertEqual(entry['modified'], 1.0)
+        self.assertEqual(entry['facets'], {"status.state": ["edit"], "owner": ["nist0:ava1"],
+                                           "theme": ["Physics"]})
+        self.assertEqual(entry['terms']['optical'], 5)
+        self.assertEqual(entry['terms']['wafers'], 5 + 3 + 1)
+        self.assertEqual(entry['terms']['physics'], 2)
+        self.assertEqual(entry['terms']['study'], 1)
+
+        entry = search.make_entry(rec("mdm1:0001", "Optical wafers", keywords=["optics"]),
+                                  {"kw": {"paths": ["data.keywords"]}}, {"owner": "owner"})
+        self.assertEqual(entry['terms'], {"optics": 1})
+        self.assertEqual(entry['facets'], {"owner": ["nist0:ava1"]})
+
+    def test_constraint_name(self):
+        self.assertEqual(search.constraint_name("status.state"), "status_state")
+        self.assertEqual(search.constraint_name("owner"), "owner")
+
+    def test_count_facets(self):
+        entries = [search.make_entry(r) for r in [
+            rec("a", "x", state="edit", theme=["Physics", "Physics"]),
+            rec("b", "x", state="published", theme=["Physics", "Chemistry"]),
+            rec("c", "x", state="edit", owner="nist0:bob")
+        ]]
+        counts = search.count_facets(entries, ["status.state", "theme", "goob"])
+        self.assertEqual(list(counts.keys()), ["status.state", "theme", "goob"])
+        self.assertEqual(list(counts['status.state'].items()), [("edit", 2), ("published", 1)])
+        self.assertEqual(list(counts['theme'].items()), [("Physics", 2), ("Chemistry", 1)])
+        self.assertEqual(counts['goob'], {})
+
+
+class TestSearchIndex(test.TestCase):
+
+    def setUp(self):
+        self.idx = search.SearchIndex(search.make_entry(r) for r in [
+            rec("a", "Optical properties of wafers", keywords=["optics"]),
+            rec("b", "Thermal properties of wafers", description="includes optical measurements"),
+            rec("c", "Neutron scattering", keywords=["neutrons", "wafers"])
+        ])
+
+    def test_ctor(self):
+        self.assertEqual(len(self.idx), 3)
+        self.assertIn("a", self.idx)
+        self.assertNotIn("d", self.idx)
+        self.assertEqual(self.idx.get("c")['id'], "c")
+        self.assertIsNone(self.idx.get("d"))
+        self.assertEqual(set(e['id'] for e in self.idx.entries()), {"a", "b", "c"})
+        self.assertEqual(len(search.SearchIndex()), 0)
+
+    def test_search(self):
+        self.assertEqual(self.idx.search([]), {"a": 0.0, "b": 0.0, "c": 0.0})
+        self.assertEqual(self.idx.search(["goob"]), {})
+
+        # a match in the title outranks a match in the description
+        scores = self.idx.search(["optical"])
+        self.assertEqual(set(scores), {"a", "b"})
+        self.assertGreater(scores["a"], scores["b"])
+
+        # all words must match
+        self.assertEqual(set(self.idx.search(["optical", "thermal"])), {"b"})
+        self.assertEqual(set(self.idx.search(["wafers"])), {"a", "b", "c"})
+
+        self.assertEqual(set(self.idx.search([], ["opt"])), {"a", "b"})
+        self.assertEqual(set(self.idx.search(["wafers"], ["neut"])), {"c"})
+        self.assertEqual(self.idx.search([], ["zz"]), {})
+
+    def test_add_remove(self):
+        self.idx.add(search.make_entry(rec("a", "Neutron imaging")))
+        self.assertEqual(len(self.idx), 3)
+        self.assertEqual(set(self.idx.search(["optical"])), {"b"})
+        self.assertEqual(set(self.idx.search(["neutron"])), {"a", "c"})
+
+        self.idx.remove("c")
+        self.idx.remove("d")
+        self.assertEqual(len(self.idx), 2)
+        self.assertEqual(set(self.idx.search(["neutron"])), {"a"})
+        self.assertNotIn("scattering", self.idx._postings)
+
+        self.idx.remove("a")
+        self.idx.remove("b")
+        self.assertEqual(self.idx._postings, {})
+        self.assertEqual(self.idx._totlen, 0)
+
+
+class TestSearchResults(test.TestCase):
+
+    class Rec:
+        def __init__(self, id):
+            self.id = id
+        def to_dict(self):
+            return {"id": self.id}
+
+    def test_results(self):
+        res = search.SearchResults([self.Rec("a"), self.Rec("b")], 5, 1, 2, scores=[2.0, 1.0])
+        self.assertEqual(res.pages, 3)
+        self.assertEqual(res.facets, {})
+        out = res.to_dict()
+        self.assertEqual(out['total'], 5)
+        self.assertEqual(out['page'], 1)
+        self.assertEqual(out['size'], 2)
+        self.assertEqual(out['pages'], 3)
+        self.assertEqual(out['records'], [{"id": "a", "score": 2.0}, {"id": "b", "score": 1.0}])
+
+        res = search.SearchResults([], 0, 1, 25)
+        self.assertEqual(res.pages, 0)
+        self.assertEqual(res.to_dict()['records'], [])
+
+
+if __name__ == '__main__':
+    test.main()
@@ -486,7 +486,7 @@ class TestMIDASProjectApp(test.TestCase):
         
         self.resp = []
         
-        with patch("nistoar.midas.export.exporters.pdf_exporter.trml2pdf.parseString", return_value=b"%PDF-1.4\ntest pdf content"):
+        with patch("nistoar.midas.export.exporters.pdf_exporter.render_rml", return_value=b"%PDF-1.4\ntest pdf content"):
             with patch("nistoar.midas.export.exporters.pdf_exporter.preppy.getModule") as mock_preppy:
                 mock_template = Mock()
                 mock_template.get.return_value = "<document>PDF Content</document>"
@@ -551,7 +551,7 @@ class TestMIDASProjectApp(test.TestCase):
             self.resp = []
         
         
-        with patch("nistoar.midas.export.exporters.pdf_exporter.trml2pdf.parseString", return_value=b"%PDF-1.4\ncombined pdf content"):
+        with patch("nistoar.midas.export.exporters.pdf_exporter.render_rml", return_value=b"%PDF-1.4\ncombined pdf content"):
             with patch("nistoar.midas.export.exporters.pdf_exporter.preppy.getModule") as mock_preppy:
                 mock_template = Mock()
                 mock_template.get.return_value = "<document>Combined PDF Content</document>"
@@ -614,7 +614,7 @@ class TestMIDASProjectApp(test.TestCase):
             record_ids.append(self.body2dict(body)['id'])
             self.resp = []
 
-        with patch("nistoar.midas.export.exporters.pdf_exporter.trml2pdf.parseString",
+        with patch("nistoar.midas.export.exporters.pdf_exporter.render_rml",
                    return_value=b"%PDF-1.4\npost export content"):
             with patch("nistoar.midas.export.exporters.pdf_exporter.preppy.getModule") as mock_preppy:
                 mock_template = Mock()
@@ -666,7 +666,7 @@ class TestMIDASProjectApp(test.TestCase):
         record_id = self.body2dict(body)['id']
         self.resp = []
 
-        with patch("nistoar.midas.export.exporters.pdf_exporter.trml2pdf.parseString",
+        with patch("nistoar.midas.export.exporters.pdf_exporter.render_rml",
                    return_value=b"%PDF-1.4\nsingle post content"):
             with patch("nistoar.midas.export.exporters.pdf_exporter.preppy.getModule") as mock_preppy:
                 mock_template = Mock()
@@ -698,6 +698,31 @@ class TestMIDASProjectApp(test.TestCase):
                     pdf_content = b''.join(body) if isinstance(body, list) else body
                     self.assertTrue(pdf_content.startswith(b'%PDF'))
 
+    def test_export_workers_under_uwsgi(self):
+        record_id = self.create_record("uwsgi export").id
+        self.cfg['export'] = {"max_workers": 4}
+        self.app = prj.MIDASProjectApp(self.svcfact, rootlog.getChild("dmpapi"), self.cfg)
+        result = {"format": "pdf", "filename": "export.pdf", "mimetype": "application/pdf",
+                  "file_extension": ".pdf", "bytes": b"%PDF-1.4\nuwsgi content"}
+
+        def export(workers):
+            self.resp = []
+            path = ":export"
+            req = { 'REQUEST_METHOD': 'POST', 'PATH_INFO': self.rootpath + path }
+            req['wsgi.input'] = StringIO(json.dumps({"ids": [record_id], "format": "pdf"}))
+            with patch.object(prj, "export_run", return_value=dict(result)) as run:
+                hdlr = self.app.create_handler(req, self.start, path, nistr)
+                hdlr.handle()
+            self.assertIn("200 ", self.resp[0])
+            self.assertEqual(run.call_args.kwargs['max_workers'], workers)
+
+        with patch.object(prj, "_under_uwsgi", False):
+            export(4)
+        with patch.object(prj, "_under_uwsgi", True):
+            export(1)
+            self.cfg['export']['fork_under_uwsgi'] = True
+            export(4)
+
     def test_export_post_empty_ids(self):
         """POST /:export with empty ids returns 400"""
         path = ":export"
@@ -755,6 +780,110 @@ class TestMIDASProjectApp(test.TestCase):
         body = hdlr.handle()
         self.assertIn("400 ", self.resp[0])
 
+    def test_export_get_ndjson(self):
+        """GET /:export streams the matched records as NDJSON"""
+        self.create_record("goob")
+        self.create_record("gurn")
+        self.create_record("foo")
+        path = ":export"
+        req = {
+            'REQUEST_METHOD': 'GET',
+            'PATH_INFO': self.rootpath + path,
+            'QUERY_STRING': "name=goob,gurn"
+        }
+        hdlr = self.app.create_handler(req, self.start, path, nistr)
+        with patch.object(hdlr.svc, 'free') as free:
+            body = hdlr.handle()
+            self.assertIn("200 ", self.resp[0])
+            self.assertIn("Content-Type: application/x-ndjson", self.resp)
+            self.assertIn('Content-Disposition: attachment; filename="export.ndjson"', self.resp)
+
+            # the service is not freed until the response is closed
+            self.assertFalse(free.called)
+            lines = b"".join(body).decode().splitlines()
+            body.close()
+            self.assertTrue(free.called)
+
+        recs = [json.loads(line) for line in lines]
+        self.assertEqual(sorted(r['name'] for r in recs), ["goob", "gurn"])
+
+    def test_export_get_csv_columns(self):
+        """GET /:export?format=csv streams the requested columns"""
+        prec = self.create_record("goob", {"resourceType": "data"})
+        path = ":export"
+        req = {
+            'REQUEST_METHOD': 'GET',
+            'PATH_INFO': self.rootpath + path,
+            'QUERY_STRING': "format=csv&columns=id,name,meta.resourceType,acls.read"
+        }
+        hdlr = self.app.create_handler(req, self.start, path, nistr)
+        body = hdlr.handle()
+        self.assertIn("200 ", self.resp[0])
+        self.assertIn("Content-Type: text/csv", self.resp)
+        lines = b"".join(body).decode().splitlines()
+        body.close()
+        self.assertEqual(lines[0], "id,name,meta.resourceType,acls.read")
+        self.assertEqual(lines[1], prec.id + ',goob,data,"[""nstr1""]"')
+
+        self.resp = []
+        req['QUERY_STRING'] = "format=docx"
+        hdlr = self.app.create_handler(req, self.start, path, nistr)
+        body = hdlr.handle()
+        self.assertIn("400 ", self.resp[0])
+
+    def test_export_post_zip(self):
+        """POST /:export with format=zip streams a zip of the records"""
+        import zipfile, io
+        prec1 = self.create_record("goob")
+        prec2 = self.create_record("gurn")
+        path = ":export"
+        req = {
+            'REQUEST_METHOD': 'POST',
+            'PATH_INFO': self.rootpath + path
+        }
+        req['wsgi.input'] = StringIO(json.dumps({"ids": [prec1.id, prec2.id], "format": "zip"}))
+        hdlr = self.app.create_handler(req, self.start, path, nistr)
+        body = hdlr.handle()
+        self.assertIn("200 ", self.resp[0])
+        self.assertIn("Content-Type: application/zip", self.resp)
+        content = b"".join(body)
+        body.close()
+
+        with zipfile.ZipFile(io.BytesIO(content)) as zf:
+            names = [p.id.replace(':', '_') + ".json" for p in (prec1, prec2)]
+            self.assertEqual(sorted(zf.namelist()), names)
+            self.assertEqual(json.loads(zf.read(names[1]))['name'], "gurn")
+
+    def test_export_post_stream_filter(self):
+        """POST /:export may select streamed records with an advanced search filter"""
+        self.create_record("goob")
+        self.create_record("gurn")
+        path = ":export"
+        req = {
+            'REQUEST_METHOD': 'POST',
+            'PATH_INFO': self.rootpath + path
+        }
+        req['wsgi.input'] = StringIO(json.dumps({"filter": {"$and": [{"name": "gurn"}]},
+                                                 "format": "csv", "columns": ["name"]}))
+        hdlr = self.app.create_handler(req, self.start, path, nistr)
+        body = hdlr.handle()
+        self.assertIn("200 ", self.resp[0])
+        self.assertEqual(b"".join(body).decode().splitlines(), ["name", "gurn"])
+        body.close()
+
+        self.resp = []
+        req['wsgi.input'] = StringIO(json.dumps({"format": "ndjson"}))
+        hdlr = self.app.create_handler(req, self.start, path, nistr)
+        body = hdlr.handle()
+        self.assertIn("400 ", self.resp[0])
+
+        self.resp = []
+        req['wsgi.input'] = StringIO(json.dumps({"ids": ["mdm1:0003"], "format": "csv",
+                                                 "columns": "name"}))
+        hdlr = self.app.create_handler(req, self.start, path, nistr)
+        body = hdlr.handle()
+        self.assertIn("400 ", self.resp[0])
+
     def test_get_name(self):
         path = "mdm1:0003/name"
         req = {
@@ -1295,6 +1424,55 @@ class TestMIDASProjectApp(test.TestCase):
         self.assertIn("bob", names)
         self.assertIn("carole", names)
         
+    def test_fulltext_search(self):
+        """GET /:search returns ranked pages of records with facet counts"""
+        self.create_record("optical wafers")
+        self.create_record("thermal wafers")
+        self.create_record("neutron scattering")
+        path = ":search"
+        req = {
+            'REQUEST_METHOD': 'GET',
+            'PATH_INFO': self.rootpath + path,
+            'QUERY_STRING': "q=wafers&size=1"
+        }
+        hdlr = self.app.create_handler(req, self.start, path, nistr)
+        self.assertTrue(isinstance(hdlr, prj.ProjectSelectionHandler))
+        body = hdlr.handle()
+        self.assertIn("200 ", self.resp[0])
+        res = self.body2dict(body)
+        self.assertEqual(res['total'], 2)
+        self.assertEqual(res['pages'], 2)
+        self.assertEqual(len(res['records']), 1)
+        self.assertIn(res['records'][0]['name'], ["optical wafers", "thermal wafers"])
+        self.assertIn("score", res['records'][0])
+        self.assertEqual(res['facets']['status.state'], {"edit": 2})
+
+        self.resp = []
+        req['QUERY_STRING'] = "q=optic*&facets=owner"
+        body = hdlr.handle()
+        self.assertIn("200 ", self.resp[0])
+        res = self.body2dict(body)
+        self.assertEqual([r['name'] for r in res['records']], ["optical wafers"])
+        self.assertEqual(list(res['facets'].keys()), ["owner"])
+
+        self.resp = []
+        req['QUERY_STRING'] = "status_state=published"
+        body = hdlr.handle()
+        self.assertIn("200 ", self.resp[0])
+        self.assertEqual(self.body2dict(body)['total'], 0)
+
+        # parameters that are not facet constraints are ignored
+        self.resp = []
+        req['QUERY_STRING'] = "q=wafers&query=x&perms=y&size=5"
+        body = hdlr.handle()
+        self.assertIn("200 ", self.resp[0])
+        self.assertEqual(self.body2dict(body)['total'], 2)
+
+        self.resp = []
+        req['QUERY_STRING'] = "q=wafers&page=0"
+        body = hdlr.handle()
+        self.assertIn("400 ", self.resp[0])
+
     def test_getput_data(self):
         path = "mdm1:0003/data"
         req = {
@@ -386,7 +386,7 @@ class TestMIDASProjectAppMongo(test.TestCase):
             'QUERY_STRING': f'id={id1}&format=pdf'
         }
         
-        with patch("nistoar.midas.export.exporters.pdf_exporter.trml2pdf.parseString", return_value=b"%PDF-1.4\nmongo test content"):
+        with patch("nistoar.midas.export.exporters.pdf_exporter.render_rml", return_value=b"%PDF-1.4\nmongo test content"):
             with patch("nistoar.midas.export.exporters.pdf_exporter.preppy.getModule") as mock_preppy:
                 mock_template = Mock()
                 mock_template.get.return_value = "<document>MongoDB PDF Content</document>"
@@ -433,7 +433,7 @@ class TestMIDASProjectAppMongo(test.TestCase):
             'QUERY_STRING': f'id={id1},{id2}&format=pdf'
         }
         
-        with patch("nistoar.midas.export.exporters.pdf_exporter.trml2pdf.parseString", return_value=b"%PDF-1.4\nmongo combined content"):
+        with patch("nistoar.midas.export.exporters.pdf_exporter.render_rml", return_value=b"%PDF-1.4\nmongo combined content"):
             with patch("nistoar.midas.export.exporters.pdf_exporter.preppy.getModule") as mock_preppy:
                 mock_template = Mock()
                 mock_template.get.return_value = "<document>Combined MongoDB Content</document>"
@@ -504,7 +504,7 @@ class TestMIDASProjectAppMongo(test.TestCase):
             record_ids.append(self.body2dict(body)['id'])
             self.resp = []
 
-        with patch("nistoar.midas.export.exporters.pdf_exporter.trml2pdf.parseString",
+        with patch("nistoar.midas.export.exporters.pdf_exporter.render_rml",
                    return_value=b"%PDF-1.4\nmongo post content"):
             with patch("nistoar.midas.export.exporters.pdf_exporter.preppy.getModule") as mock_preppy:
                 mock_template = Mock()
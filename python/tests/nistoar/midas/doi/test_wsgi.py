@@ -8,6 +8,7 @@ from unittest.mock import Mock
 from nistoar.midas.doi import wsgi as doim
 from nistoar.doi.resolving import DOIInfo, DOIDoesNotExist, DOIResolverError
 from nistoar.nerdm.convert.doi import DOIResolver
+from nistoar.pdr.describe.doicache import CachingDOIResolver
 import nistoar.doi.resolving.common as res
 
 tmpdir = tempfile.TemporaryDirectory(prefix="_test_project.")
@@ -289,6 +290,70 @@ class TestDOI2NERDmHandler(test.TestCase):
         body = hdlr.handle()
         self.assertIn("401 ", self.resp[0])
 
+    def test_do_POST(self):
+        def resolve(doi):
+            if doi == "10.88888/goober":
+                raise DOIDoesNotExist(doi)
+            if doi == "10.88888/fail":
+                raise DOIResolverError()
+            return sampleref
+        self.resolver.to_reference = Mock(side_effect=resolve)
+        dois = ["10.10/XXX", "doi:10.88888/goober", "https://doi.org/10.88888/fail"]
+        req = {
+            "REQUEST_METHOD": "POST",
+            "PATH_INFO": "ref/",
+            "wsgi.input": StringIO(json.dumps(dois))
+        }
+
+        # a resolver that does not support batches
+        hdlr = doim.DOI2NERDmHandler(self.resolver, "ref/", req, self.start, log=rootlog)
+        body = hdlr.handle()
+        self.assertIn("200 ", self.resp[0])
+        refs = self.body2data(body)
+        self.assertEqual(list(refs.keys()), dois)
+        self.assertEqual(refs["10.10/XXX"]['citation'], 'ibid')
+        self.assertEqual(refs["doi:10.88888/goober"]['@id'], 'doi:10.88888/goober')
+        self.assertNotIn("title", refs["doi:10.88888/goober"])
+        self.assertIsNone(refs["https://doi.org/10.88888/fail"])
+
+        # a caching resolver
+        self.resp = []
+        cachingres = CachingDOIResolver(self.resolver)
+        req['wsgi.input'] = StringIO(json.dumps(dois + ["10.10/XXX"]))
+        hdlr = doim.DOI2NERDmHandler(cachingres, "ref/", req, self.start, log=rootlog)
+        body = hdlr.handle()
+        self.assertIn("200 ", self.resp[0])
+        refs2 = self.body2data(body)
+        self.assertEqual(refs2, refs)
+        self.assertEqual(self.resolver.to_reference.call_count, 3+3)
+
+        self.resp = []
+        self.resolver.to_authors = Mock(side_effect=DOIDoesNotExist("10.10/XXX"))
+        req['PATH_INFO'] = "authors"
+        req['wsgi.input'] = StringIO(json.dumps(["10.10/XXX"]))
+        hdlr = doim.DOI2NERDmHandler(cachingres, "authors", req, self.start, log=rootlog)
+        body = hdlr.handle()
+        self.assertIn("200 ", self.resp[0])
+        self.assertEqual(self.body2data(body), {"10.10/XXX": None})
+
+        # bad input
+        for path, input in [("ref/", "10.10/XXX"), ("ref/", ["ark:/88434/mds2-2106"]),
+                            ("goob/", ["10.10/XXX"])]:
+            self.resp = []
+            req['PATH_INFO'] = path
+            req['wsgi.input'] = StringIO(json.dumps(input))
+            hdlr = doim.DOI2NERDmHandler(cachingres, path, req, self.start, log=rootlog)
+            body = hdlr.handle()
+            self.assertTrue(self.resp[0].startswith("4"), path+": "+self.resp[0])
+
+        self.resp = []
+        req['PATH_INFO'] = "ref/"
+        req['wsgi.input'] = StringIO(json.dumps(["10.10/XXX", "10.10/YYY"]))
+        hdlr = doim.DOI2NERDmHandler(cachingres, "ref/", req, self.start, log=rootlog,
+                                     config={"max_batch_size": 1})
+        hdlr.handle()
+        self.assertIn("413 ", self.resp[0])
+
 class TestDOI2NERDmApp(test.TestCase):
 
     def start(self, status, headers=None, extup=None):
@@ -317,6 +382,7 @@ class TestDOI2NERDmApp(test.TestCase):
 
     def test_ctor(self):
         self.assertTrue(self.app._doires)
+        self.assertTrue(isinstance(self.app._doires, CachingDOIResolver))
 
     def test_create_handler(self):
         doi = "10.88888/goober"
@@ -19,7 +19,7 @@ class ExportFlowTest(test.TestCase):
     def tearDown(self):
         self.tmp.cleanup()
 
-    @patch("nistoar.midas.export.exporters.pdf_exporter.trml2pdf.parseString", return_value=b"%PDF%")
+    @patch("nistoar.midas.export.exporters.pdf_exporter.render_rml", return_value=b"%PDF%")
     @patch("nistoar.midas.export.exporters.pdf_exporter.preppy.getModule")
     def test_export_single_from_path(self, mock_get_module, _):
         mock_template = Mock()
@@ -37,7 +37,7 @@ class ExportFlowTest(test.TestCase):
         self.assertIn("bytes", result)
         self.assertIsInstance(result["bytes"], (bytes, bytearray))
 
-    @patch("nistoar.midas.export.exporters.pdf_exporter.trml2pdf.parseString", return_value=b"%PDF%")
+    @patch("nistoar.midas.export.exporters.pdf_exporter.render_rml", return_value=b"%PDF%")
     @patch("nistoar.midas.export.exporters.pdf_exporter.preppy.getModule")
     def test_run_batch_two_inputs(self, mock_get_module, _):
         mock_template = Mock()
@@ -155,7 +155,7 @@ class ExportFlowProjectRecordTest(test.TestCase):
     def tearDown(self):
         self.tmp.cleanup()
 
-    @patch("nistoar.midas.export.exporters.pdf_exporter.trml2pdf.parseString", return_value=b"%PDF%")
+    @patch("nistoar.midas.export.exporters.pdf_exporter.render_rml", return_value=b"%PDF%")
     @patch("nistoar.midas.export.exporters.pdf_exporter.preppy.getModule")
     def test_export_single_project_record(self, mock_get_module, _):
         mock_template = Mock()
@@ -173,7 +173,7 @@ class ExportFlowProjectRecordTest(test.TestCase):
         self.assertEqual(result["filename"], "alpha.pdf")
         self.assertIn("bytes", result)
 
-    @patch("nistoar.midas.export.exporters.pdf_exporter.trml2pdf.parseString", return_value=b"%PDF%")
+    @patch("nistoar.midas.export.exporters.pdf_exporter.render_rml", return_value=b"%PDF%")
     @patch("nistoar.midas.export.exporters.pdf_exporter.preppy.getModule")
     def test_run_with_iterator_of_project_records(self, mock_get_module, _):
         mock_template = Mock()
@@ -206,7 +206,7 @@ class ExportFlowProjectRecordTest(test.TestCase):
         self.assertTrue(outpath.is_file())
 
 
-    @patch("nistoar.midas.export.exporters.pdf_exporter.trml2pdf.parseString", return_value=b"%PDF%")
+    @patch("nistoar.midas.export.exporters.pdf_exporter.render_rml", return_value=b"%PDF%")
     @patch("nistoar.midas.export.exporters.pdf_exporter.preppy.getModule")
     def test_export_with_project_records_missing_name_uses_id_then_random(self, mock_get_module, _):
         mock_template = Mock()
@@ -582,7 +582,7 @@ class ExportFlowProjectRecordTest(test.TestCase):
         self.assertIn("2500", dap_csv)  # file_count
         self.assertIn("batch.coord@nist.gov", dap_csv)
     
-    @patch("nistoar.midas.export.exporters.pdf_exporter.trml2pdf.parseString", return_value=b"%PDF%")
+    @patch("nistoar.midas.export.exporters.pdf_exporter.render_rml", return_value=b"%PDF%")
     @patch("nistoar.midas.export.exporters.pdf_exporter.preppy.getModule")
     def test_export_bytes_output_single(self, mock_get_module, _):
         """Test that single record export without file generation produces usable PDF bytes"""
@@ -611,7 +611,7 @@ class ExportFlowProjectRecordTest(test.TestCase):
         self.assertTrue(pdf_bytes.startswith(b'%PDF'))
         self.assertIsInstance(pdf_bytes, (bytes, bytearray))
 
-    @patch("nistoar.midas.export.exporters.pdf_exporter.trml2pdf.parseString", return_value=b"%PDF%")
+    @patch("nistoar.midas.export.exporters.pdf_exporter.render_rml", return_value=b"%PDF%")
     @patch("nistoar.midas.export.exporters.pdf_exporter.preppy.getModule")
     def test_export_bytes_output_batch_no_file(self, mock_get_module, _):
         """Test that batch export without file generation produces usable PDF bytes"""
@@ -655,7 +655,7 @@ class ExportFlowProjectRecordTest(test.TestCase):
         
 
 
-    @patch("nistoar.midas.export.exporters.pdf_exporter.trml2pdf.parseString", return_value=b"%PDF%")
+    @patch("nistoar.midas.export.exporters.pdf_exporter.render_rml", return_value=b"%PDF%")
     @patch("nistoar.midas.export.exporters.pdf_exporter.preppy.getModule")
     def test_export_bytes_vs_file_comparison(self, mock_get_module, _):
         """Compare bytes output vs file output to ensure they're consistent"""
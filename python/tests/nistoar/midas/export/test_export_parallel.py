@@ -0,0 +1,146 @@
+import unittest as test
+from io import BytesIO
+from pathlib import Path
+import tempfile
+
+from pypdf import PdfReader
+
+from nistoar.midas.export.export import run, export, _render_batch
+from nistoar.midas.export.utils.loader import normalize_input
+from nistoar.midas.export.utils import templates
+
+
+class ParallelExportTest(test.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.outdir = Path(self.tmp.name) / "out"
+        self.spooldir = Path(self.tmp.name) / "spool"
+        self.json_path = Path(__file__).parent / "data" / "exampleDMP.json"
+        self.progress = []
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def _progress(self, stage, done, total):
+        self.progress.append((stage, done, total))
+
+    def test_parallel_pdf_to_file(self):
+        result = run(
+            input_data=[self.json_path] * 3,
+            output_format="pdf",
+            output_directory=self.outdir,
+            template_name="dmp_pdf_template.prep",
+            max_workers=2,
+            spool_dir=self.spooldir,
+            progress=self._progress,
+        )
+        outpath = self.outdir / "exampleDMP.pdf"
+        self.assertEqual(result["path"], str(outpath))
+        self.assertTrue(outpath.is_file())
+        self.assertEqual(sorted(p.name for p in self.spooldir.iterdir()),
+                         ["000000.pdf", "000001.pdf", "000002.pdf"])
+
+        recpages = len(PdfReader(BytesIO(export(self.json_path, "pdf")["bytes"])).pages)
+        self.assertGreater(len(PdfReader(str(outpath)).pages), 3 * recpages)
+
+        self.assertIn(("render", 0, 3), self.progress)
+        self.assertIn(("render", 3, 3), self.progress)
+        self.assertIn(("concat", 4, 4), self.progress)
+        self.assertEqual(self.progress[-1], ("write", 1, 1))
+        for stage in ("load", "render", "report", "concat", "write"):
+            self.assertIn(stage, result["timings"])
+
+    def test_parallel_pdf_to_bytes(self):
+        result = run(
+            input_data=[self.json_path, {"bad": "record"}, self.json_path],
+            output_format="pdf",
+            template_name="dmp_pdf_template.prep",
+            max_workers=3,
+        )
+        self.assertTrue(result["bytes"].startswith(b"%PDF"))
+        self.assertNotIn("path", result)
+        self.assertIn("render", result["timings"])
+
+    def test_render_batch(self):
+        infos = [normalize_input(self.json_path, index=0), normalize_input(self.json_path, index=2)]
+        infos.insert(1, {"input_type": "text", "payload": "goob", "filename": "goob"})
+        self.spooldir.mkdir()
+        results = _render_batch(infos, "pdf", None, "dmp_pdf_template.prep", self.spooldir, 4)
+        self.assertEqual(len(results), 3)
+        self.assertIsInstance(results[1], Exception)
+        self.assertEqual(results[0]["path"], str(self.spooldir / "000004.pdf"))
+        self.assertEqual(results[2]["path"], str(self.spooldir / "000006.pdf"))
+        self.assertNotIn("bytes", results[2])
+
+        with self.assertRaises(ValueError):
+            _render_batch(infos, "goob", None, None, None, 0)
+
+    def test_parallel_markdown(self):
+        result = run([self.json_path] * 2, "markdown", max_workers=2)
+        record = export(self.json_path, "markdown")["text"].rstrip()
+        self.assertEqual(result["text"].count(record), 2)
+
+
+class TemplateCacheTest(test.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.prep = Path(self.tmp.name) / "hello.prep"
+        self.prep.write_text("{{def(name)}}Hello {{name}}!")
+        templates.clear_template_cache()
+
+    def tearDown(self):
+        templates.clear_template_cache()
+        self.tmp.cleanup()
+
+    def test_load_template(self):
+        mod = templates.load_template(self.prep)
+        self.assertEqual(mod.get("Bob"), "Hello Bob!")
+        self.assertIs(templates.load_template(self.prep), mod)
+
+        # a change to the template source forces a recompile
+        self.prep.write_text("{{def(name)}}Goodbye {{name}}!")
+        mod = templates.load_template(self.prep)
+        self.assertEqual(mod.get("Bob"), "Goodbye Bob!")
+
+    def test_disk_cache(self):
+        cachedir = Path(self.tmp.name) / "cache"
+        mod = templates.load_template(self.prep, cachedir)
+        self.assertEqual(mod.get("Bob"), "Hello Bob!")
+        cached = list(cachedir.iterdir())
+        self.assertEqual(len(cached), 1)
+        self.assertTrue(cached[0].name.startswith("hello-"))
+        self.assertTrue(cached[0].name.endswith(templates.CACHED_TEMPLATE_EXT))
+
+        # another process (simulated by clearing the in-process cache) loads the saved compilation
+        templates.clear_template_cache()
+        cached[0].write_bytes(cached[0].read_bytes())
+        mtime = cached[0].stat().st_mtime_ns
+        mod2 = templates.load_template(self.prep, cachedir)
+        self.assertIsNot(mod2, mod)
+        self.assertEqual(mod2.get("Bob"), "Hello Bob!")
+        self.assertEqual(cached[0].stat().st_mtime_ns, mtime)
+
+        # a change to the source is saved under a new key
+        self.prep.write_text("{{def(name)}}Goodbye {{name}}!")
+        self.assertEqual(templates.load_template(self.prep, cachedir).get("Bob"), "Goodbye Bob!")
+        self.assertEqual(len(list(cachedir.iterdir())), 2)
+
+    def test_disk_cache_corrupted(self):
+        cachedir = Path(self.tmp.name) / "cache"
+        templates.load_template(self.prep, cachedir)
+        cached = next(cachedir.iterdir())
+        cached.write_bytes(b"goob")
+        templates.clear_template_cache()
+        self.assertEqual(templates.load_template(self.prep, cachedir).get("Bob"), "Hello Bob!")
+        self.assertNotEqual(cached.read_bytes(), b"goob")
+
+    def test_cached_run(self):
+        cachedir = Path(self.tmp.name) / "cache"
+        json_path = Path(__file__).parent / "data" / "exampleDMP.json"
+        result = run([json_path] * 2, "markdown", template_cache_dir=cachedir)
+        self.assertEqual(result["text"].count(export(json_path, "markdown")["text"].rstrip()), 2)
+        self.assertTrue(any(p.name.startswith("dmp_markdown_template-") for p in cachedir.iterdir()))
+
+
+if __name__ == "__main__":
+    test.main()
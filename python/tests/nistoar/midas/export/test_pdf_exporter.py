@@ -6,7 +6,7 @@ from nistoar.midas.export.exporters.pdf_exporter import PDFExporter
 
 
 class PDFExporterTest(test.TestCase):
-    @patch("nistoar.midas.export.exporters.pdf_exporter.trml2pdf.parseString")
+    @patch("nistoar.midas.export.exporters.pdf_exporter.render_rml")
     @patch("nistoar.midas.export.exporters.pdf_exporter.preppy.getModule")
     def test_render_json_ok(self, mock_get_module, mock_parse_string):
         # Mock preppy template.get(...) to return RML XML
@@ -14,7 +14,7 @@ class PDFExporterTest(test.TestCase):
         mock_template.get.return_value = "<document>rml</document>"
         mock_get_module.return_value = mock_template
 
-        # Mock trml2pdf
+        # Mock the RML rendering
         mock_parse_string.return_value = b"%PDF-sample%"
 
         exporter = PDFExporter(template_roots=["/tmp/does-not-matter"])
@@ -36,6 +36,31 @@ class PDFExporterTest(test.TestCase):
         with self.assertRaises(TypeError):
             exporter.render("json", ["not-a-dict"], "x")
 
+    @patch("nistoar.midas.export.exporters.pdf_exporter.render_rml")
+    @patch("nistoar.midas.export.exporters.pdf_exporter.preppy.getModule")
+    def test_render_many(self, mock_get_module, mock_render_rml):
+        mock_template = Mock()
+        mock_template.get.side_effect = lambda data: "<document>%s</document>" % data["title"]
+        mock_get_module.return_value = mock_template
+        mock_render_rml.side_effect = lambda rml: rml.encode()
+
+        exporter = PDFExporter(template_roots=["/tmp/does-not-matter"])
+        items = [("json", {"data": {"title": "one"}}, "a"),
+                 ("json", ["not-a-dict"], "b"),
+                 ("markdown", {"title": "three"}, "c"),
+                 ("json", {"title": "A & B"}, "d")]
+        results = list(exporter.render_many(items, "dmp_pdf_template.prep"))
+
+        self.assertEqual(len(results), 4)
+        self.assertEqual(results[0]["filename"], "a.pdf")
+        self.assertEqual(results[0]["bytes"], b"<document>one</document>")
+        self.assertIsInstance(results[1], TypeError)
+        self.assertIsInstance(results[2], TypeError)
+        self.assertEqual(results[3]["bytes"], b"<document>A &amp; B</document>")
+
+        # the template was loaded only once for the whole sequence
+        self.assertEqual(mock_get_module.call_count, 1)
+
 
 if __name__ == "__main__":
     test.main()
@@ -0,0 +1,99 @@
+import unittest as test
+import io
+import json
+import zipfile
+
+from nistoar.midas.export import stream
+
+
+def make_records(n):
+    for i in range(n):
+        yield {
+            "id": "mdm1:%04d" % i,
+            "name": "rec%d" % i,
+            "owner": "nstr1",
+            "status": {"state": "edit"},
+            "data": {"title": "Record, number %d" % i, "keywords": ["a", "b"]},
+            "meta": {"resourceType": "data"},
+        }
+
+
+class _Record:
+    def __init__(self, data):
+        self._data = data
+
+    def to_dict(self):
+        return dict(self._data)
+
+
+class StreamTest(test.TestCase):
+
+    def test_lookup(self):
+        rec = next(make_records(1))
+        self.assertEqual(stream.lookup(rec, "status.state"), "edit")
+        self.assertEqual(stream.lookup(rec, "data.keywords.1"), "b")
+        self.assertIsNone(stream.lookup(rec, "data.keywords.5"))
+        self.assertIsNone(stream.lookup(rec, "data.title.goob"))
+        self.assertIsNone(stream.lookup(rec, "meta.goob"))
+
+    def test_ndjson(self):
+        chunks = list(stream.stream_ndjson(make_records(3)))
+        self.assertEqual(len(chunks), 1)
+        recs = [json.loads(line) for line in b"".join(chunks).decode().splitlines()]
+        self.assertEqual([r["id"] for r in recs], ["mdm1:0000", "mdm1:0001", "mdm1:0002"])
+
+        self.assertEqual(list(stream.stream_ndjson([])), [])
+
+    def test_chunking(self):
+        chunks = list(stream.stream_ndjson(make_records(100), chunk_size=1000))
+        self.assertGreater(len(chunks), 10)
+        for chunk in chunks[:-1]:
+            self.assertGreaterEqual(len(chunk), 1000)
+            self.assertLess(len(chunk), 1500)
+        self.assertEqual(len(b"".join(chunks).splitlines()), 100)
+
+    def test_lazy(self):
+        consumed = []
+
+        def records():
+            for rec in make_records(100):
+                consumed.append(rec["id"])
+                yield rec
+
+        chunks = stream.stream_ndjson(records(), chunk_size=1000)
+        next(chunks)
+        self.assertLess(len(consumed), 10)
+
+    def test_csv(self):
+        out = b"".join(stream.stream_csv(make_records(2), ["id", "data.title", "data.keywords",
+                                                           "meta.resourceType", "meta.goob"]))
+        lines = out.decode().splitlines()
+        self.assertEqual(lines[0], "id,data.title,data.keywords,meta.resourceType,meta.goob")
+        self.assertEqual(lines[1], 'mdm1:0000,"Record, number 0","[""a"",""b""]",data,')
+        self.assertEqual(len(lines), 3)
+
+        lines = b"".join(stream.stream_csv([_Record(next(make_records(1)))])).decode().splitlines()
+        self.assertEqual(lines[0], ",".join(stream.DEF_CSV_COLUMNS))
+        self.assertEqual(lines[1], "mdm1:0000,rec0,nstr1,edit,")
+
+    def test_zip(self):
+        recs = list(make_records(20)) + [{"id": "mdm1:0003", "name": "dup"}, {"name": "noid"}]
+        content = b"".join(stream.stream_zip(recs, chunk_size=500))
+        with zipfile.ZipFile(io.BytesIO(content)) as zf:
+            names = zf.namelist()
+            self.assertEqual(len(names), 22)
+            self.assertEqual(names[0], "mdm1_0000.json")
+            self.assertEqual(names[20], "mdm1_0003.20.json")
+            self.assertEqual(names[21], "record21.json")
+            self.assertEqual(json.loads(zf.read("mdm1_0003.json"))["name"], "rec3")
+            self.assertIsNone(zf.testzip())
+
+    def test_stream_records(self):
+        self.assertEqual(b"".join(stream.stream_records(make_records(1), "csv", ["name"])),
+                         b"name\r\nrec0\r\n")
+        with self.assertRaises(ValueError):
+            stream.stream_records(make_records(1), "pdf")
+
+
+if __name__ == "__main__":
+    test.main()
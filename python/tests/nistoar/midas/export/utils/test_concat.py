@@ -1,5 +1,18 @@
 import unittest
-from nistoar.midas.export.utils.concat import concat_csv, REGISTRY
+import tempfile
+from io import BytesIO
+from pathlib import Path
+from nistoar.midas.export.utils.concat import concat_csv, concat_pdf, REGISTRY
+
+
+def _blank_pdf(npages):
+    from pypdf import PdfWriter
+    writer = PdfWriter()
+    for i in range(npages):
+        writer.add_blank_page(width=72, height=72)
+    buf = BytesIO()
+    writer.write(buf)
+    return buf.getvalue()
 
 
 class TestConcatCSV(unittest.TestCase):
@@ -82,5 +95,35 @@ class TestConcatCSV(unittest.TestCase):
         self.assertEqual(REGISTRY["csv"], concat_csv)
 
 
+class TestConcatPDF(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.tmpdir = Path(self.tmp.name)
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_concat_pdf_bytes_and_paths(self):
+        from pypdf import PdfReader
+        spooled = self.tmpdir / "000001.pdf"
+        spooled.write_bytes(_blank_pdf(2))
+        rendered_results = [{"bytes": _blank_pdf(1)}, {"path": str(spooled)}]
+
+        result = concat_pdf(rendered_results, "merged")
+        self.assertEqual(result["filename"], "merged.pdf")
+        self.assertNotIn("path", result)
+        self.assertEqual(len(PdfReader(BytesIO(result["bytes"])).pages), 3)
+
+        result = concat_pdf(rendered_results, "merged.pdf", output_dir=self.tmpdir / "out")
+        self.assertNotIn("bytes", result)
+        self.assertEqual(result["path"], str(self.tmpdir / "out" / "merged.pdf"))
+        self.assertEqual(len(PdfReader(result["path"]).pages), 3)
+
+    def test_concat_pdf_invalid_input(self):
+        with self.assertRaises(TypeError):
+            concat_pdf([{"text": "not a pdf"}], "output")
+
+
 if __name__ == '__main__':
     unittest.main()
@@ -0,0 +1,70 @@
+import unittest as test
+from io import BytesIO
+
+import trml2pdf
+from pypdf import PdfReader
+
+from nistoar.midas.export.utils import rml
+from nistoar.midas.export.exporters.pdf_exporter import PDFExporter
+
+RML = """<?xml version="1.0"?>
+<document filename="test.pdf">
+  <template pageSize="(21cm, 29.7cm)">
+    <pageTemplate id="main">
+      <frame id="first" x1="2cm" y1="2cm" width="17cm" height="25.7cm"/>
+    </pageTemplate>
+  </template>
+  <stylesheet>
+    <initialize><name id="org" value="NIST"/></initialize>
+    <paraStyle name="Title" fontName="Helvetica-Bold" fontSize="18"/>
+    <paraStyle name="Body" parent="Title" fontName="Helvetica" fontSize="10"/>
+  </stylesheet>
+  <story>
+    <para style="Title">%s</para>
+    <name id="org" value="%s"/>
+    <para style="Body">Prepared by <getName id="org"/></para>
+  </story>
+</document>
+"""
+
+def _text(pdf):
+    return "".join(p.extract_text() for p in PdfReader(BytesIO(pdf)).pages)
+
+
+class RenderRmlTest(test.TestCase):
+
+    def setUp(self):
+        rml.clear_rml_cache()
+
+    def tearDown(self):
+        rml.clear_rml_cache()
+
+    def test_render_rml(self):
+        pdf = rml.render_rml(RML % ("A Plan", "MML"))
+        self.assertTrue(pdf.startswith(b"%PDF"))
+        self.assertEqual(_text(pdf), _text(trml2pdf.parseString(RML % ("A Plan", "MML"))))
+        self.assertIn("A Plan", _text(pdf))
+        self.assertEqual(rml.rml_cache_info(), {"hits": 0, "misses": 1, "stylesheets": 1})
+
+    def test_styles_reused(self):
+        rml.render_rml(RML % ("One", "MML"))
+        pdf = rml.render_rml(RML % ("Two", "PML"))
+        self.assertEqual(rml.rml_cache_info(), {"hits": 1, "misses": 1, "stylesheets": 1})
+        self.assertIn("Two", _text(pdf))
+
+        # names set by a document's story do not leak into the shared styles
+        self.assertEqual([s.names for s in rml._STYLES.values()], [{"org": "NIST"}])
+
+    def test_render_many(self):
+        exporter = PDFExporter()
+        payload = {"title": "A Data Management Plan", "startDate": "2024-01-01"}
+        results = list(exporter.render_many([("json", payload, "rec%d" % i) for i in range(3)],
+                                            "dmp_pdf_template.prep"))
+        self.assertEqual([r["filename"] for r in results], ["rec0.pdf", "rec1.pdf", "rec2.pdf"])
+        self.assertEqual(_text(results[2]["bytes"]),
+                         _text(exporter.render("json", payload, "rec", "dmp_pdf_template.prep")["bytes"]))
+        self.assertEqual(rml.rml_cache_info()["misses"], 1)
+
+
+if __name__ == "__main__":
+    test.main()
@@ -5,6 +5,7 @@ import unittest as test
 from pymongo import MongoClient
 
 from nistoar.nsd import service as serv
+from nistoar.nsd.sync import syncer as sync
 from nistoar.base.config import ConfigurationException
 
 tmpdir = tempfile.TemporaryDirectory(prefix="_test_project.")
@@ -74,6 +75,38 @@ class TestMongoPeopleService(test.TestCase):
         self.assertEqual(self.svc._cli[dbname]['Orgs'].count_documents({"orG_LVL_ID": self.svc.GRP_LVL_ID}), 2)
         self.assertEqual(self.svc._cli[dbname]['People'].count_documents({}), 4)
         
+    def test_apply_people_diff(self):
+        self.svc.load(self.cfg, rootlog)
+        people = self.svc._cli[dbname]['People']
+        self.assertEqual(people.count_documents({}), 4)
+        p = people.find_one({"peopleID": 10}, {"_id": False})
+        p['phoneNumber'] = "(301) 975-0000"
+        n = dict(p)
+        n['peopleID'] = 1000
+
+        with open(datadir/"person.json") as fd:
+            base = sync.people_version(json.load(fd))
+        self.assertEqual(self.svc._people_version(), base)
+
+        # a matching count is not enough; the diff must be relative to the loaded data
+        diff = { "base_count": 4, "count": 4, "base_version": "goober", "version": "gurn",
+                 "added": [n], "changed": [p], "removed": [11] }
+        self.assertFalse(self.svc.apply_people_diff(diff))
+        del diff['base_version']
+        self.assertFalse(self.svc.apply_people_diff(diff))
+        self.assertEqual(people.count_documents({"peopleID": 1000}), 0)
+
+        diff['base_version'] = base
+        self.assertTrue(self.svc.apply_people_diff(diff))
+        self.assertEqual(people.count_documents({}), 4)
+        self.assertEqual(self.svc.get_person(1000)['phoneNumber'], "(301) 975-0000")
+        self.assertEqual(self.svc.get_person(10)['phoneNumber'], "(301) 975-0000")
+        self.assertIsNone(self.svc.get_person(11))
+        self.assertEqual(self.svc._people_version(), "gurn")
+
+        # the same diff does not apply twice
+        self.assertFalse(self.svc.apply_people_diff(diff))
+
     def test_OUs(self):
         self.svc.load(self.cfg, rootlog, False)
         ous = self.svc.OUs()
@@ -0,0 +1,168 @@
+import os, json, pdb, logging, tempfile, threading
+from pathlib import Path
+from copy import deepcopy
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+import unittest as test
+
+from nistoar.nsd.sync import syncer as sync
+from nistoar.nsd import NSDException
+
+datadir = Path(__file__).parents[1] / "data"
+tmpdir = tempfile.TemporaryDirectory(prefix="_test_nsdsync.")
+
+with open(datadir/"orgs.json") as fd:
+    orgs = json.load(fd)
+with open(datadir/"person.json") as fd:
+    people = json.load(fd)
+
+class SimNSDHandler(BaseHTTPRequestHandler):
+    """
+    a stand-in for the NSD service; it serves the records in the class's ``people`` list
+    """
+    people = people
+    failous = []
+    requests = []
+
+    def _send_json(self, data, code=200, reason="OK"):
+        body = json.dumps(data).encode('utf-8')
+        self.send_response(code, reason)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_GET(self):
+        if self.path.endswith("/"+sync.ORGANIZATIONS):
+            return self._send_json(orgs)
+        self._send_json({}, 404, "Not Found")
+
+    def do_POST(self):
+        if not self.path.endswith("/"+sync.PEOPLE):
+            return self._send_json({}, 404, "Not Found")
+        query = json.loads(self.rfile.read(int(self.headers['Content-Length'])))
+        ous = query.get(sync.PEOP_OUORGID_SEL, [])
+        type(self).requests.append((ous, query['pageIndex']))
+        if any(ou in type(self).failous for ou in ous):
+            return self._send_json({}, 500, "Internal Error")
+
+        match = [p for p in type(self).people if p["ouOrgID"] in ous]
+        start = (query['pageIndex'] - 1) * query['pageSize']
+        self._send_json({ "totalCount": len(match),
+                          "userInfo": match[start:start+query['pageSize']] })
+
+    def log_message(self, *args):
+        pass
+
+server = None
+def setUpModule():
+    global server
+    server = ThreadingHTTPServer(("localhost", 0), SimNSDHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+
+def tearDownModule():
+    if server:
+        server.shutdown()
+        server.server_close()
+    tmpdir.cleanup()
+
+class TestParallelSync(test.TestCase):
+
+    def setUp(self):
+        self.outdir = Path(tempfile.mkdtemp(dir=tmpdir.name))
+        SimNSDHandler.people = deepcopy(people)
+        SimNSDHandler.failous = []
+        SimNSDHandler.requests = []
+        self.cfg = {
+            "dir": str(self.outdir),
+            "max_workers": 3,
+            "page_size": 1,
+            "source": {
+                "service_endpoint": "http://localhost:%d/" % server.server_port,
+                "token": "goober"
+            }
+        }
+        self.syncer = sync.NSDSyncer(self.cfg)
+
+    def read_people(self):
+        with open(self.outdir/"people.json") as fd:
+            return json.load(fd)
+
+    def test_cache_data(self):
+        self.syncer.cache_data()
+        self.assertTrue((self.outdir/"orgs.json").is_file())
+        self.assertTrue((self.outdir/"people-index.json").is_file())
+        self.assertFalse((self.outdir/"people-diff.json").exists())
+        self.assertFalse((self.outdir/"_syncwork").exists())
+
+        data = self.read_people()
+        self.assertEqual(len(data), 4)
+        self.assertEqual(set([p['peopleID'] for p in data]), set([p['peopleID'] for p in people]))
+
+        # one request for each of 3 empty OUs, plus 4 pages for the populated one
+        self.assertEqual(len(SimNSDHandler.requests), 7)
+
+    def test_restrict_ous(self):
+        self.syncer.cache_data(forous=["03"])
+        self.assertEqual(len(self.read_people()), 4)
+        self.assertEqual(set(r[0][0] for r in SimNSDHandler.requests), set([3]))
+
+    def test_diff(self):
+        self.syncer.cache_data()
+
+        SimNSDHandler.people[0]['phoneNumber'] = "(301) 975-0000"
+        removed = SimNSDHandler.people.pop(1)
+        added = deepcopy(SimNSDHandler.people[1])
+        added['peopleID'] = 1000
+        SimNSDHandler.people.append(added)
+
+        self.assertEqual(self.syncer.sync_people(self.outdir, [1, 2, 3, 4], "goober"),
+                         {"added": 1, "changed": 1, "removed": 1})
+
+        with open(self.outdir/"people-diff.json") as fd:
+            diff = json.load(fd)
+        self.assertEqual(diff['base_count'], 4)
+        self.assertEqual(diff['count'], 4)
+        self.assertEqual(diff['base_version'], sync.index_version(sync._index_people(people)))
+        self.assertEqual([p['peopleID'] for p in diff['added']], [1000])
+        self.assertEqual([p['peopleID'] for p in diff['changed']], [people[0]['peopleID']])
+        self.assertEqual(diff['changed'][0]['phoneNumber'], "(301) 975-0000")
+        self.assertEqual(diff['removed'], [removed['peopleID']])
+
+        data = self.read_people()
+        self.assertEqual(len(data), 4)
+        self.assertEqual(diff['version'], sync.people_version(data))
+        self.assertIn(1000, [p['peopleID'] for p in data])
+
+    def test_resume(self):
+        SimNSDHandler.people[0]['ouOrgID'] = 4
+        SimNSDHandler.failous = [4]
+        with self.assertRaises(NSDException):
+            self.syncer.cache_data()
+        self.assertFalse((self.outdir/"people.json").exists())
+
+        with open(self.outdir/"_syncwork"/"checkpoint.json") as fd:
+            ckpt = json.load(fd)
+        self.assertEqual(ckpt['ous'], [1, 2, 3, 4])
+        self.assertEqual(ckpt['done'], [1, 2, 3])
+
+        # resuming only requests the incomplete OU
+        SimNSDHandler.failous = []
+        SimNSDHandler.requests = []
+        self.syncer.cache_data()
+        self.assertEqual(set(r[0][0] for r in SimNSDHandler.requests), set([4]))
+        self.assertEqual(len(self.read_people()), 4)
+        self.assertFalse((self.outdir/"_syncwork").exists())
+
+    def test_diff_people(self):
+        previdx = sync._index_people(people)
+        newpeople = deepcopy(people[1:])
+        newpeople[0]['room'] = "B101"
+        newidx = sync._index_people(newpeople)
+        diff = sync.diff_people(previdx, newidx, newpeople)
+        self.assertEqual(diff['added'], [])
+        self.assertEqual([p['peopleID'] for p in diff['changed']], [people[1]['peopleID']])
+        self.assertEqual(diff['removed'], [people[0]['peopleID']])
+
+
+if __name__ == '__main__':
+    test.main()
@@ -200,7 +200,7 @@ class SimRMMHandler(object):
         else:
             aipids = self.arch.aipids(coll)
 
-        nonsearch="include exclude".split()
+        nonsearch="include exclude page size".split()
         out = { "ResultCount": 0, "PageSize": 0, "ResultData": [] }
         for id in aipids:
             try:
@@ -245,11 +245,25 @@ class SimRMMHandler(object):
                 return self.send_error(404, aipids[0] + " does not exist in "+coll)
             elif path and (not params or not params['@id']):
                 out = out["ResultData"][0]
+
+        elif 'page' in params and 'size' in params:
+            # return just the requested page (first page = 1)
+            size = int(params['size'][0])
+            start = (int(params['page'][0]) - 1) * size
+            out["ResultData"] = out["ResultData"][start:start+size]
+            out["PageSize"] = len(out["ResultData"])
             
+        out = json.dumps(out, indent=2) + "\n"
+        etag = '"%s"' % hashlib.md5(out.encode()).hexdigest()
+        self.add_header('ETag', etag)
+        if self._env.get('HTTP_IF_NONE_MATCH') == etag:
+            self.set_response(304, "Not Modified")
+            self.end_headers()
+            return []
+
         self.set_response(200, "Identifier exists")
         self.add_header('Content-Type', 'application/json')
         self.end_headers()
-        out = json.dumps(out, indent=2) + "\n"
         return [ out.encode() ]
 
 
@@ -0,0 +1,213 @@
+import os, pdb, sys, json, requests, logging, time, re
+import unittest as test
+
+from nistoar.testing import *
+from nistoar.pdr.describe import cache, rmm
+
+testdir = os.path.join(os.path.dirname(os.path.abspath(__file__)))
+datadir = os.path.join(testdir, 'data')
+basedir = os.path.dirname(os.path.dirname(os.path.dirname(
+    os.path.dirname(os.path.dirname(testdir)))))
+
+port = 9091
+baseurl = "http://localhost:{0}/".format(port)
+
+uwsgi_opts = "--plugin python3"
+if os.environ.get("OAR_UWSGI_OPTS") is not None:
+    uwsgi_opts = os.environ['OAR_UWSGI_OPTS']
+
+def startService():
+    tdir = tmpdir()
+    pidfile = os.path.join(tdir,"simsrv"+str(port)+".pid")
+
+    wpy = "python/tests/nistoar/pdr/describe/sim_describe_svc.py"
+    cmd = "uwsgi --daemonize {0} {1} --http-socket :{2} " \
+          "--wsgi-file {3} --pidfile {4}"
+    cmd = cmd.format(os.path.join(tdir,"simsrv.log"), uwsgi_opts, port,
+                     os.path.join(basedir, wpy), pidfile)
+    os.system(cmd)
+    time.sleep(0.5)
+
+def stopService():
+    tdir = tmpdir()
+    cmd = "uwsgi --stop {0}".format(os.path.join(tdir, "simsrv"+str(port)+".pid"))
+    os.system(cmd)
+    time.sleep(1)
+
+loghdlr = None
+rootlog = None
+def setUpModule():
+    global loghdlr
+    global rootlog
+    ensure_tmpdir()
+    rootlog = logging.getLogger()
+    loghdlr = logging.FileHandler(os.path.join(tmpdir(),"test_simsrv.log"))
+    loghdlr.setLevel(logging.DEBUG)
+    rootlog.addHandler(loghdlr)
+    startService()
+
+def tearDownModule():
+    global loghdlr
+    if loghdlr:
+        if rootlog:
+            rootlog.removeHandler(loghdlr)
+            loghdlr.flush()
+            loghdlr.close()
+        loghdlr = None
+    stopService()
+    rmtmpdir()
+
+class CountingSession(requests.Session):
+    """
+    a Session that records the status of each response it receives
+    """
+    def __init__(self):
+        super(CountingSession, self).__init__()
+        self.statuses = []
+
+    def get(self, url, **kw):
+        resp = super(CountingSession, self).get(url, **kw)
+        self.statuses.append(resp.status_code)
+        return resp
+
+class DownSession(requests.Session):
+    """
+    a Session that simulates an unreachable service
+    """
+    def get(self, url, **kw):
+        raise requests.ConnectionError("service is down")
+
+class TestMetadataCache(test.TestCase):
+
+    def setUp(self):
+        self.tf = Tempfiles()
+        self.cachedir = self.tf.mkdir("rmmcache")
+        self.cache = cache.MetadataCache(self.cachedir, 2)
+
+    def tearDown(self):
+        self.tf.clean()
+
+    def test_ctor(self):
+        self.assertEqual(self.cache.cachedir, self.cachedir)
+        self.assertEqual(self.cache.capacity, 2)
+        with self.assertRaises(cache.StateException):
+            cache.MetadataCache(os.path.join(self.cachedir, "goob"))
+
+    def test_put_get(self):
+        self.assertIsNone(self.cache.get("http://a/1"))
+        self.cache.put("http://a/1", {"a": 1}, '"abc"')
+        ent = self.cache.get("http://a/1")
+        self.assertEqual(ent['body'], {"a": 1})
+        self.assertEqual(ent['etag'], '"abc"')
+        self.assertIsNone(ent['lastmod'])
+        self.assertEqual(len(os.listdir(self.cachedir)), 1)
+
+    def test_lru(self):
+        self.cache.put("http://a/1", {"a": 1})
+        self.cache.put("http://a/2", {"a": 2})
+        self.cache.get("http://a/1")
+        self.cache.put("http://a/3", {"a": 3})
+        self.assertEqual(list(self.cache._mem.keys()), ["http://a/1", "http://a/3"])
+
+        # evicted from memory but still on disk
+        self.assertEqual(self.cache.get("http://a/2")['body'], {"a": 2})
+        self.assertEqual(list(self.cache._mem.keys()), ["http://a/3", "http://a/2"])
+
+        self.cache.clear_memory()
+        self.assertEqual(len(self.cache._mem), 0)
+        self.assertEqual(self.cache.get("http://a/3")['body'], {"a": 3})
+
+    def test_forget(self):
+        self.cache.put("http://a/1", {"a": 1})
+        self.cache.forget("http://a/1")
+        self.assertIsNone(self.cache.get("http://a/1"))
+        self.assertEqual(len(os.listdir(self.cachedir)), 0)
+
+    def test_memory_only(self):
+        self.cache = cache.MetadataCache()
+        self.cache.put("http://a/1", {"a": 1})
+        self.assertEqual(self.cache.get("http://a/1")['body'], {"a": 1})
+
+class TestCachingMetadataClient(test.TestCase):
+
+    def setUp(self):
+        self.tf = Tempfiles()
+        self.cachedir = self.tf.mkdir("rmmcache")
+        self.sess = CountingSession()
+        self.cli = cache.CachingMetadataClient(baseurl, self.cachedir, session=self.sess)
+
+    def tearDown(self):
+        self.tf.clean()
+
+    def test_revalidate(self):
+        data = self.cli.describe("ark:/88434/mds003r0x6")
+        self.assertEqual(data['@id'], 'ark:/88434/mds003r0x6')
+        self.assertNotIn('_id', data)
+        self.assertEqual(self.sess.statuses, [200])
+
+        data = self.cli.describe("ark:/88434/mds003r0x6")
+        self.assertEqual(data['@id'], 'ark:/88434/mds003r0x6')
+        self.assertNotIn('_id', data)
+        self.assertEqual(self.sess.statuses, [200, 304])
+
+    def test_max_age(self):
+        self.cli = cache.CachingMetadataClient(baseurl, self.cachedir, {'max_age': 3600},
+                                               session=self.sess)
+        data = self.cli.describe("ark:/88434/mds2-2110")
+        self.assertEqual(data['@id'], 'ark:/88434/mds2-2110')
+        data = self.cli.describe("ark:/88434/mds2-2110")
+        self.assertEqual(data['@id'], 'ark:/88434/mds2-2110')
+        self.assertEqual(self.sess.statuses, [200])
+
+    def test_offline(self):
+        data = self.cli.describe("ark:/88434/mds00sxbvh", "1.0.4")
+        self.assertEqual(data['version'], '1.0.4')
+        self.assertEqual(len(data.get('releaseHistory',{}).get('hasRelease',[])), 5)
+        self.assertEqual(len(self.sess.statuses), 2)
+
+        # a new client with a cold memory cache reads from disk
+        sess = CountingSession()
+        cli = cache.CachingMetadataClient(baseurl, self.cachedir, {'offline': True}, session=sess)
+        data = cli.describe("ark:/88434/mds00sxbvh", "1.0.4")
+        self.assertEqual(data['version'], '1.0.4')
+        self.assertEqual(len(data.get('releaseHistory',{}).get('hasRelease',[])), 5)
+        self.assertEqual(len(sess.statuses), 0)
+
+        with self.assertRaises(rmm.RMMServerError):
+            cli.describe("ark:/88434/mds2-2110")
+
+    def test_serve_stale(self):
+        data = self.cli.describe("ark:/88434/mds2-2110")
+        self.assertEqual(data['@id'], 'ark:/88434/mds2-2110')
+
+        # an unreachable service
+        cli = cache.CachingMetadataClient(baseurl, self.cachedir, session=DownSession())
+        data = cli.describe("ark:/88434/mds2-2110")
+        self.assertEqual(data['@id'], 'ark:/88434/mds2-2110')
+        with self.assertRaises(rmm.RMMServerError):
+            cli.describe("ark:/88434/mds2-2106")
+
+        cli = cache.CachingMetadataClient(baseurl, self.cachedir, {'serve_stale_on_error': False},
+                                          session=DownSession())
+        with self.assertRaises(rmm.RMMServerError):
+            cli.describe("ark:/88434/mds2-2110")
+
+    def test_notfound(self):
+        with self.assertRaises(rmm.IDNotFound):
+            self.cli.describe("ark:/88434/mds2-0000")
+        self.assertEqual(len(os.listdir(self.cachedir)), 0)
+
+    def test_iter_search(self):
+        recs = list(self.cli.iter_search(pagesize=3))
+        self.assertEqual(len(recs), 7)
+        self.assertEqual(len(self.sess.statuses), 3)
+        ids = set([d['ediid'] for d in recs if 'ediid' in d])
+        self.assertEqual(len(ids), 7)
+
+        recs = list(self.cli.iter_search())
+        self.assertEqual(len(recs), 7)
+        self.assertEqual(len(self.sess.statuses), 4)
+
+
+if __name__ == '__main__':
+    test.main()
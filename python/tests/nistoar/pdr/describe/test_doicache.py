@@ -0,0 +1,221 @@
+import os, sys, pdb, json, threading, time, re
+import unittest as test
+from socketserver import ThreadingMixIn
+from wsgiref.simple_server import WSGIServer, WSGIRequestHandler, make_server
+
+import requests
+
+from nistoar.testing import *
+from nistoar.doi import DOIDoesNotExist, DOIResolutionException
+from nistoar.doi.resolving import DOIResolverError
+from nistoar.pdr.describe import doicache
+
+class _ThreadingWSGIServer(ThreadingMixIn, WSGIServer):
+    daemon_threads = True
+
+class _QuietHandler(WSGIRequestHandler):
+    def log_message(self, *args):
+        pass
+
+class StandInDOIService(object):
+    """
+    a stand-in for the DOI resolver and Crossref services that returns NERDm metadata for a
+    fixed set of DOIs, counting the requests made to it
+    """
+    def __init__(self, delay=0):
+        self.delay = delay
+        self.failing = set()
+        self.requests = []
+        self.dois = {
+            "10.1126/science.169.3946.635": "The Structure of Ordinary Water",
+            "10.1364/oe.24.014100": "Microfluidic optical sorting",
+            "10.18434/mds2-2106": "Sample Data"
+        }
+        for i in range(8):
+            self.dois["10.88434/bulk-%d" % i] = "Bulk Paper %d" % i
+
+    def __call__(self, env, start_resp):
+        self.requests.append(env.get('PATH_INFO'))
+        if self.delay:
+            time.sleep(self.delay)
+        kind, doi = env.get('PATH_INFO', '/').strip('/').split('/', 1)
+        doi = doi.lower()
+        if doi in self.failing:
+            start_resp("503 Service Unavailable", [])
+            return []
+        if doi not in self.dois:
+            start_resp("404 Not Found", [])
+            return []
+
+        if kind == "authors":
+            out = [{"@type": "foaf:Person", "fn": "Author of "+doi}]
+        else:
+            out = {"@id": "doi:"+doi, "title": self.dois[doi], "location": "https://doi.org/"+doi,
+                   "citation": self.dois[doi] + " (2024)"}
+        start_resp("200 OK", [("Content-Type", "application/json")])
+        return [json.dumps(out).encode()]
+
+class StandInResolver(object):
+    """
+    a DOIResolver that converts DOIs by consulting the stand-in service
+    """
+    def __init__(self, baseurl):
+        self.baseurl = baseurl
+
+    def _get(self, kind, doi):
+        resp = requests.get(self.baseurl + kind + '/' + doi)
+        if resp.status_code == 404:
+            raise DOIDoesNotExist(doi)
+        if resp.status_code != 200:
+            raise DOIResolverError()
+        return resp.json()
+
+    def to_reference(self, doi):
+        return self._get("ref", doi)
+
+    def to_authors(self, doi):
+        return self._get("authors", doi)
+
+server = None
+svc = None
+baseurl = None
+def setUpModule():
+    global server, svc, baseurl
+    ensure_tmpdir()
+    svc = StandInDOIService()
+    server = make_server("localhost", 0, svc, _ThreadingWSGIServer, _QuietHandler)
+    baseurl = "http://localhost:%d/" % server.server_port
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+
+def tearDownModule():
+    if server:
+        server.shutdown()
+        server.server_close()
+    rmtmpdir()
+
+class TestCachingDOIResolver(test.TestCase):
+
+    def setUp(self):
+        svc.requests = []
+        svc.failing = set()
+        svc.delay = 0
+        self.tf = Tempfiles()
+        self.cachedir = self.tf.mkdir("doicache")
+        self.resolver = doicache.CachingDOIResolver(StandInResolver(baseurl),
+                                                    {"dir": self.cachedir, "max_workers": 8})
+
+    def tearDown(self):
+        doicache._caches.clear()
+        self.tf.clean()
+
+    def test_doi_key(self):
+        self.assertEqual(doicache.doi_key("10.1364/OE.24.014100"), "10.1364/oe.24.014100")
+        self.assertEqual(doicache.doi_key("doi:10.1364/OE.24.014100"), "10.1364/oe.24.014100")
+        self.assertEqual(doicache.doi_key("https://doi.org/10.1364/OE.24.014100"),
+                         "10.1364/oe.24.014100")
+        self.assertEqual(doicache.doi_key("http://dx.doi.org/10.1364/OE.24.014100"),
+                         "10.1364/oe.24.014100")
+
+    def test_ctor(self):
+        self.assertEqual(self.resolver.ttl, doicache.DEF_TTL)
+        self.assertEqual(self.resolver.not_found_ttl, doicache.DEF_NOT_FOUND_TTL)
+        self.assertEqual(self.resolver.max_workers, 8)
+        self.assertEqual(self.resolver.cache.cachedir, self.cachedir)
+
+        # resolvers persisting to the same directory share a cache
+        other = doicache.CachingDOIResolver(StandInResolver(baseurl), {"dir": self.cachedir})
+        self.assertIs(other.cache, self.resolver.cache)
+
+    def test_to_reference(self):
+        ref = self.resolver.to_reference("10.1364/OE.24.014100")
+        self.assertEqual(ref['title'], "Microfluidic optical sorting")
+        self.assertEqual(len(svc.requests), 1)
+
+        ref['title'] = "Goob"
+        ref = self.resolver.to_reference("doi:10.1364/OE.24.014100")
+        self.assertEqual(ref['title'], "Microfluidic optical sorting")
+        self.assertEqual(len(svc.requests), 1)
+
+        auths = self.resolver.to_authors("10.1364/OE.24.014100")
+        self.assertEqual(auths[0]['fn'], "Author of 10.1364/oe.24.014100")
+        self.resolver.to_authors("https://doi.org/10.1364/OE.24.014100")
+        self.assertEqual(len(svc.requests), 2)
+
+        # the cache is persisted
+        self.resolver.cache.clear_memory()
+        ref = self.resolver.to_reference("10.1364/OE.24.014100")
+        self.assertEqual(ref['title'], "Microfluidic optical sorting")
+        self.assertEqual(len(svc.requests), 2)
+
+    def test_ttl(self):
+        self.resolver.ttl = 0.2
+        self.resolver.to_reference("10.18434/mds2-2106")
+        self.resolver.to_reference("10.18434/mds2-2106")
+        self.assertEqual(len(svc.requests), 1)
+        time.sleep(0.3)
+        self.resolver.to_reference("10.18434/mds2-2106")
+        self.assertEqual(len(svc.requests), 2)
+
+    def test_not_found(self):
+        self.resolver.not_found_ttl = 0.2
+        with self.assertRaises(DOIDoesNotExist):
+            self.resolver.to_reference("10.88888/goober")
+        with self.assertRaises(DOIDoesNotExist):
+            self.resolver.to_reference("10.88888/goober")
+        self.assertEqual(len(svc.requests), 1)
+
+        time.sleep(0.3)
+        with self.assertRaises(DOIDoesNotExist):
+            self.resolver.to_reference("10.88888/goober")
+        self.assertEqual(len(svc.requests), 2)
+
+    def test_errors(self):
+        svc.failing.add("10.18434/mds2-2106")
+        with self.assertRaises(DOIResolutionException):
+            self.resolver.to_reference("10.18434/mds2-2106")
+        with self.assertRaises(DOIResolutionException):
+            self.resolver.to_reference("10.18434/mds2-2106")
+        self.assertEqual(len(svc.requests), 2)
+
+        # expired metadata is served when the services fail
+        svc.failing = set()
+        self.resolver.ttl = 0.1
+        self.resolver.to_reference("10.18434/mds2-2106")
+        time.sleep(0.2)
+        svc.failing.add("10.18434/mds2-2106")
+        self.assertEqual(self.resolver.to_reference("10.18434/mds2-2106")['title'], "Sample Data")
+
+        self.resolver.stale_ok = False
+        with self.assertRaises(DOIResolutionException):
+            self.resolver.to_reference("10.18434/mds2-2106")
+
+    def test_resolve_batch(self):
+        dois = ["10.88434/bulk-%d" % i for i in range(8)]
+        svc.delay = 0.2
+        start = time.time()
+        refs = self.resolver.resolve_batch(dois + ["doi:10.88434/BULK-3", "10.88888/goober"])
+        elapsed = time.time() - start
+        svc.delay = 0
+
+        self.assertLess(elapsed, 0.2 * 8)
+        self.assertEqual(len(svc.requests), 9)
+        self.assertEqual(list(refs.keys()), dois + ["doi:10.88434/BULK-3", "10.88888/goober"])
+        self.assertEqual(refs["10.88434/bulk-0"]['title'], "Bulk Paper 0")
+        self.assertEqual(refs["doi:10.88434/BULK-3"]['title'], "Bulk Paper 3")
+        self.assertIsInstance(refs["10.88888/goober"], DOIDoesNotExist)
+
+        # now all are cached
+        refs = self.resolver.resolve_batch(dois + ["10.88888/goober"])
+        self.assertEqual(len(svc.requests), 9)
+        self.assertEqual(refs["10.88434/bulk-7"]['title'], "Bulk Paper 7")
+
+        auths = self.resolver.resolve_batch(dois[:2], doicache.AUTHORS)
+        self.assertEqual(auths["10.88434/bulk-1"][0]['fn'], "Author of 10.88434/bulk-1")
+        self.assertEqual(len(svc.requests), 11)
+
+        with self.assertRaises(ValueError):
+            self.resolver.resolve_batch(dois, "goob")
+
+
+if __name__ == '__main__':
+    test.main()
@@ -66,6 +66,26 @@ def tearDownModule():
     stopService()
     rmtmpdir()
 
+class UnpagedSession(requests.Session):
+    """
+    a Session that simulates a search service that ignores the requested page
+    """
+    def __init__(self, recs=None):
+        super(UnpagedSession, self).__init__()
+        self.recs = recs
+        self.urls = []
+
+    def get(self, url, **kw):
+        self.urls.append(url)
+        recs = self.recs
+        if recs is None:
+            # a new set of records each time
+            recs = [{"@id": "ark:/88434/mds2-%d%d" % (len(self.urls), i)} for i in range(3)]
+        resp = requests.Response()
+        resp.status_code = 200
+        resp._content = json.dumps({"ResultData": recs}).encode()
+        return resp
+
 class TestMetadataClient(test.TestCase):
 
     def setUp(self):
@@ -229,6 +249,34 @@ class TestMetadataClient(test.TestCase):
         self.assertEqual(data['isPartOf'], 'ark:/88434/mds00sxbvh/pdr:v/1.0.3')
         self.assertIn('@context', data)
         
+class TestIterSearch(test.TestCase):
+
+    def test_repeated_ids(self):
+        sess = UnpagedSession([{"@id": "ark:/88434/mds2-%d" % i} for i in range(3)])
+        cli = rmm.MetadataClient(baseurl, session=sess)
+        recs = list(cli.iter_search(pagesize=3))
+        self.assertEqual([r['@id'] for r in recs], ["ark:/88434/mds2-0", "ark:/88434/mds2-1",
+                                                    "ark:/88434/mds2-2"])
+        self.assertEqual(len(sess.urls), 2)
+        self.assertIn("page=2", sess.urls[-1])
+
+    def test_repeated_page(self):
+        sess = UnpagedSession([{"title": "goob"}, {"title": "gurn"}])
+        cli = rmm.MetadataClient(baseurl, session=sess)
+        recs = list(cli.iter_search(pagesize=2))
+        self.assertEqual(len(recs), 2)
+        self.assertEqual(len(sess.urls), 2)
+
+    def test_max_pages(self):
+        sess = UnpagedSession()
+        cli = rmm.MetadataClient(baseurl, session=sess)
+        cli.SEARCH_MAX_PAGES = 4
+        recs = []
+        with self.assertRaises(rmm.RMMServerError):
+            for rec in cli.iter_search(pagesize=3):
+                recs.append(rec)
+        self.assertEqual(len(recs), 12)
+        self.assertEqual(len(sess.urls), 4)
 
 if __name__ == '__main__':
     test.main()
@@ -241,11 +241,22 @@ class SimDistribHandler(object):
             path = path[len("_aip/"):].strip('/')
             filepath = os.path.join(self.arch.dir, path)
             if os.path.isfile(filepath):
-                self.set_response(200, "Bag file found")
+                size = os.stat(filepath).st_size
+                rng = self.parse_range(self._env.get('HTTP_RANGE'), size)
+                if rng:
+                    self.set_response(206, "Partial content")
+                    self.add_header('Content-Range', "bytes %d-%d/%d" % (rng[0], rng[1], size))
+                    self.add_header('Content-Length', str(rng[1] - rng[0] + 1))
+                else:
+                    self.set_response(200, "Bag file found")
+                    self.add_header('Content-Length', str(size))
                 self.add_header('Content-Type', "application/zip")
+                self.add_header('Accept-Ranges', "bytes")
                 self.end_headers()
                 if forhead:
                     return []
+                if rng:
+                    return self.iter_file(filepath, rng[0], rng[1] - rng[0] + 1)
                 return self.iter_file(filepath)
             else:
                 return self.send_error(404, "bag file does not exist")
@@ -391,13 +402,27 @@ class SimDistribHandler(object):
         else:
             return self.send_error(404, "resource does not exist")
             
-    def iter_file(self, loc):
+    def parse_range(self, hdr, size):
+        # support only a single "bytes=start-end" (or "bytes=-suffixlen") range
+        m = re.match(r'^bytes=(\d*)-(\d*)$', hdr or '')
+        if not m or not (m.group(1) or m.group(2)):
+            return None
+        if not m.group(1):
+            return (max(size - int(m.group(2)), 0), size - 1)
+        end = (m.group(2) and int(m.group(2))) or size - 1
+        return (int(m.group(1)), min(end, size - 1))
+
+    def iter_file(self, loc, offset=0, length=None):
         # this is the backup, inefficient way to send a file
         with open(loc, 'rb') as fd:
-            buf = fd.read(5000000)
+            fd.seek(offset)
+            if length is None:
+                length = os.stat(loc).st_size - offset
+            buf = fd.read(min(5000000, length))
             while buf:
                 yield buf
-                buf = fd.read(5000000)
+                length -= len(buf)
+                buf = fd.read(min(5000000, length))
         
             
 archdir = uwsgi.opt.get("archive_dir", def_archdir)
@@ -203,6 +203,25 @@ class TestBagDistribClient(test.TestCase):
         with self.assertRaises(client.DistribResourceNotFound):
             cli.save_bag("goob.zip", tmpdir())
 
+    def test_read_bag_file(self):
+        cli = bagclient.BagDistribClient("pdr2210", self.svc)
+        data = cli.read_bag_file("pdr2210.1_0.mbag0_3-1.zip", "multibag/member-bags.tsv")
+        self.assertTrue(data.startswith(b"pdr2210.1_0.mbag0_3-0\n"))
+
+        with self.assertRaises(client.DistribResourceNotFound):
+            cli.read_bag_file("pdr2210.1_0.mbag0_3-1.zip", "multibag/goob.txt")
+        with self.assertRaises(client.DistribResourceNotFound):
+            cli.read_bag_file("goob.zip", "multibag/member-bags.tsv")
+        with self.assertRaises(ValueError):
+            cli.read_bag_file("pdr2210.1_0.mbag0_3-1.7z", "multibag/member-bags.tsv")
+
+    def test_member_bags_for(self):
+        cli = bagclient.BagDistribClient("pdr2210", self.svc)
+        self.assertEqual(cli.member_bags_for("pdr2210.1_0.mbag0_3-1.zip"),
+                         ["pdr2210.1_0.mbag0_3-0", "pdr2210.1_0.mbag0_3-1"])
+        self.assertEqual(cli.member_bags_for("pdr2210.2.mbag0_3-2.zip"),
+                         ["pdr2210.1_0.mbag0_3-0", "pdr2210.1_0.mbag0_3-1", "pdr2210.2.mbag0_3-2"])
+
         
 
 
@@ -1554,6 +1554,46 @@ class TestBuilder2(test.TestCase):
         data = read_nerd(mdfile)
         self.assertNotEqual(data['size'], 5)
 
+    def test_ensure_comp_metadata_parallel(self):
+        datafiles = [ "trial1.json", "trial2.json" ]
+        nomd_datafile = os.path.join("trial3", "trial3a.json") 
+        serbag = bldr.BagBuilder(self.tf.root, "serialbag", self.cfg)
+        self.tf.track("serialbag")
+        try:
+            for bag in (serbag, self.bag):
+                for df in datafiles:
+                    bag.add_data_file(df, os.path.join(datadir, df))
+                bag.add_data_file(nomd_datafile, os.path.join(datadir, nomd_datafile),
+                                  register=False)
+                bag.update_metadata_for("trial2.json", {"size": 5})
+
+            def nerdm_of(bag):
+                return dict((df, read_nerd(bag.bag.nerd_file_for(df)))
+                            for df in datafiles + [nomd_datafile, "trial3"])
+
+            serbag.ensure_comp_metadata()
+            self.bag.ensure_comp_metadata(workers=4)
+            out = nerdm_of(self.bag)
+            self.assertEqual(out, nerdm_of(serbag))
+            self.assertEqual(out["trial2.json"]['size'], 5)
+            self.assertIn("checksum", out[nomd_datafile])
+
+            for bag in (serbag, self.bag):
+                bag.update_metadata_for("trial1.json", {"size": 5})
+                bag.ensure_comp_metadata(True, workers=(4 if bag is self.bag else 1))
+            out = nerdm_of(self.bag)
+            self.assertEqual(out, nerdm_of(serbag))
+            self.assertNotEqual(out["trial1.json"]['size'], 5)
+            self.assertNotEqual(out["trial2.json"]['size'], 5)
+        finally:
+            serbag.disconnect_logfile()
+
+        # log messages are batched
+        with open(os.path.join(self.bag.bagdir, "publish.log")) as fd:
+            log = fd.read()
+        self.assertIn("Adding file metadata (1): trial3/trial3a.json", log)
+        self.assertIn("Updating file metadata (3): ", log)
+
     def test_ensure_bagit_ver(self):
         self.assertTrue(not os.path.exists( self.bag.bagdir ))
         self.bag.ensure_bagit_ver()
@@ -7,6 +7,7 @@ import nistoar.pdr.preserve.bagit.builder as bldr
 import nistoar.pdr.preserve.bagit.tools.enhance as tools
 import nistoar.pdr.exceptions as exceptions
 from nistoar.pdr.utils import read_nerd
+from nistoar.doi import DOIDoesNotExist
 
 # datadir = tests/nistoar/pdr/preserv/data
 datadir = os.path.join(
@@ -47,6 +48,29 @@ rescfg = {
     "email": "datasupport@nist.gov"
 }
 
+class StandInBatchResolver(object):
+    """
+    a DOI resolver that supports batch resolution and records the DOIs it is asked to resolve
+    """
+    def __init__(self):
+        self.batches = []
+        self.singles = []
+
+    def to_reference(self, doi):
+        self.singles.append(doi)
+        raise DOIDoesNotExist(doi)
+
+    def resolve_batch(self, dois, kind="ref"):
+        self.batches.append(list(dois))
+        out = OrderedDict()
+        for doi in dois:
+            if "goober" in doi:
+                out[doi] = DOIDoesNotExist(doi)
+            else:
+                out[doi] = { "@id": "doi:"+doi.split("doi.org/")[-1], "title": "Paper "+doi,
+                             "citation": "Paper "+doi+" (2024)", "location": doi }
+        return out
+
 class TestAuthorFetcher(test.TestCase):
 
     testbag = os.path.join(datadir, "samplembag")
@@ -252,6 +276,32 @@ class TestEnrichReferences(test.TestCase):
         self.assertFalse(enh.merge_enhanced_ref("doi:88888/baddoi", False))
         
 
+    def test_prefetch(self):
+        enh = tools.ReferenceEnhancer(rescfg, self.log).enhancer_for(self.bag)
+        enh.doir = StandInBatchResolver()
+        doiu = "https://doi.org/10.1364/OE.24.014100"
+        self.assertIn(doiu, enh.refs)
+        self.assertNotIn('citation', enh.refs[doiu])
+
+        enh.enhance_existing()
+        self.assertEqual(enh.doir.batches, [[doiu]])
+        self.assertEqual(enh.doir.singles, [])
+        self.assertEqual(enh.refs[doiu]['title'], "Paper "+doiu)
+        self.assertIn('citation', enh.refs[doiu])
+
+        # already enhanced references are not resolved again unless overridden
+        enh.prefetch([doiu, "doi:10.88888/new", "doi:10.88888/goober"])
+        self.assertEqual(enh.doir.batches[-1], ["doi:10.88888/new", "doi:10.88888/goober"])
+        self.assertTrue(enh.merge_enhanced_ref("doi:10.88888/new"))
+        self.assertFalse(enh.merge_enhanced_ref("doi:10.88888/goober"))
+        self.assertEqual(enh.doir.singles, [])
+        self.assertEqual(enh.refs["https://doi.org/10.88888/new"]['title'],
+                         "Paper doi:10.88888/new")
+        self.assertNotIn("https://doi.org/10.88888/goober", enh.refs)
+
+        enh.prefetch([doiu], True)
+        self.assertEqual(enh.doir.batches[-1], [doiu])
+
     @test.skipIf("doi" not in os.environ.get("OAR_TEST_INCLUDE",""),
                  "kindly skipping doi service checks")
     def test_enhance_existing(self):
@@ -4,6 +4,7 @@ from copy import deepcopy
 
 from nistoar.testing import *
 from nistoar.pdr.public.resolve.handlers import ready as handler
+from nistoar.pdr.public.resolve.cache import LRUCache
 
 class TestResolverReady(test.TestCase):
 
@@ -286,9 +287,29 @@ class TestResolverReady(test.TestCase):
         self.assertEqual("\n".join(body), "")
         self.resp = []
 
+    def test_handle_json_caches(self):
+        class App(object):
+            name = "Resolver"
+            md_cache = LRUCache({"capacity": 5})
+            aip_cache = None
+        App.md_cache.hits = 3
+
+        req = {
+            'REQUEST_METHOD': "GET",
+            'PATH_INFO': '/',
+            'QUERY_STRING': "format=json"
+        }
+        self.hdlr = handler.ResolverReady('', req, self.start, app=App())
+
+        body = self.tostr( self.hdlr.handle() )
+        self.assertEqual(self.resp[0], "200 OK")
+        data = json.loads("\n".join(body))
+        self.assertEqual(data['status'], "ready")
+        self.assertEqual(list(data['caches'].keys()), ["metadata"])
+        self.assertEqual(data['caches']['metadata'],
+                         {"size": 0, "capacity": 5, "hits": 3, "misses": 0})
+
 
-        
-        
 
 
 if __name__ == '__main__':
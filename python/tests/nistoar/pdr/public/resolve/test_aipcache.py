@@ -0,0 +1,149 @@
+import os, sys, pdb, json, logging, threading, time
+import unittest as test
+from socketserver import ThreadingMixIn
+from wsgiref.simple_server import WSGIServer, WSGIRequestHandler, make_server
+
+from nistoar.pdr import distrib
+from nistoar.pdr.public.resolve import aipcache
+
+testdir = os.path.dirname(os.path.abspath(__file__))
+distribdir = os.path.join(os.path.dirname(os.path.dirname(testdir)), "distrib")
+datadir = os.path.join(distribdir, "data")
+
+def import_file(path, name=None):
+    if not name:
+        name = os.path.splitext(os.path.basename(path))[0]
+    import importlib.util as imputil
+    spec = imputil.spec_from_file_location(name, path)
+    out = imputil.module_from_spec(spec)
+    sys.modules["sim_distrib_srv"] = out
+    spec.loader.exec_module(out)
+    return out
+
+dstrb = import_file(os.path.join(distribdir, "sim_distrib_srv.py"))
+
+class _ThreadingWSGIServer(ThreadingMixIn, WSGIServer):
+    daemon_threads = True
+
+class _QuietHandler(WSGIRequestHandler):
+    def log_message(self, *args):
+        pass
+
+class CountingSimDistrib(dstrb.SimDistrib):
+    """
+    the simulated distribution service, counting the requests made for each path
+    """
+    def __init__(self, archdir, baseurl='/'):
+        super(CountingSimDistrib, self).__init__(archdir, baseurl)
+        self.requests = []
+
+    def handle_request(self, env, start_resp):
+        self.requests.append((env.get('REQUEST_METHOD'), env.get('PATH_INFO'), env.get('HTTP_RANGE')))
+        return super(CountingSimDistrib, self).handle_request(env, start_resp)
+
+server = None
+simapp = None
+baseurl = None
+def setUpModule():
+    global server, simapp, baseurl
+    simapp = CountingSimDistrib(datadir)
+    server = make_server("localhost", 0, simapp, _ThreadingWSGIServer, _QuietHandler)
+    baseurl = "http://localhost:%d" % server.server_port
+    simapp.baseurl = baseurl + "/"
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+
+def tearDownModule():
+    if server:
+        server.shutdown()
+        server.server_close()
+
+class TestAIPMetadataCache(test.TestCase):
+
+    def setUp(self):
+        simapp.requests = []
+        self.cache = aipcache.AIPMetadataCache(baseurl, {"capacity": 10})
+
+    def test_ctor(self):
+        self.assertTrue(isinstance(self.cache.svc, distrib.RESTServiceClient))
+        self.assertEqual(self.cache.capacity, 10)
+        self.assertEqual(self.cache.latest_ttl, aipcache.DEF_LATEST_TTL)
+        self.assertEqual(self.cache.size, 0)
+        self.assertEqual(self.cache.hits, 0)
+        self.assertEqual(self.cache.misses, 0)
+
+    def test_head_for(self):
+        head = self.cache.head_for("pdr2210", "1.0")
+        self.assertEqual(head['name'], "pdr2210.1_0.mbag0_3-1.zip")
+        self.assertEqual(self.cache.misses, 1)
+        nreqs = len(simapp.requests)
+
+        head['name'] = "goob"
+        head = self.cache.head_for("pdr2210", "1.0")
+        self.assertEqual(head['name'], "pdr2210.1_0.mbag0_3-1.zip")
+        self.assertEqual(self.cache.hits, 1)
+        self.assertEqual(len(simapp.requests), nreqs)
+
+        head = self.cache.head_for("pdr2210")
+        self.assertEqual(head['name'], "pdr2210.3_1_3.mbag0_3-5.zip")
+
+        with self.assertRaises(distrib.DistribResourceNotFound):
+            self.cache.head_for("goober", "1.0")
+
+    def test_latest_ttl(self):
+        self.cache.latest_ttl = 0.2
+        self.cache.head_for("pdr2210")
+        self.cache.head_for("pdr2210")
+        self.assertEqual(self.cache.hits, 1)
+
+        time.sleep(0.3)
+        self.cache.head_for("pdr2210")
+        self.assertEqual(self.cache.hits, 1)
+        self.assertEqual(self.cache.misses, 2)
+
+    def test_members_of(self):
+        head = self.cache.head_for("pdr2210", "2")
+        self.assertEqual(self.cache.members_of("pdr2210", head),
+                         ["pdr2210.1_0.mbag0_3-0", "pdr2210.1_0.mbag0_3-1", "pdr2210.2.mbag0_3-2"])
+
+        # only parts of the bag were retrieved
+        gets = [r for r in simapp.requests if r[0] == "GET" and r[1].endswith(head['name'])]
+        self.assertTrue(len(gets) > 0)
+        self.assertTrue(all(r[2] for r in gets))
+
+        simapp.requests = []
+        self.cache.members_of("pdr2210", head)
+        self.assertEqual(simapp.requests, [])
+
+    def test_dists_for_version(self):
+        dists = self.cache.dists_for_version("pdr2210", "1.0")
+        self.assertEqual([d['name'] for d in dists],
+                         ["pdr2210.1_0.mbag0_3-0.zip", "pdr2210.1_0.mbag0_3-1.zip"])
+
+        simapp.requests = []
+        dists = self.cache.dists_for_version("pdr2210", "1.0")
+        self.assertEqual(len(dists), 2)
+        self.assertEqual(simapp.requests, [])
+
+        dists = self.cache.dists_for_version("pdr2210")
+        self.assertEqual(len(dists), 4)
+
+    def test_capacity(self):
+        self.cache.capacity = 2
+        self.cache.head_for("pdr2210", "1.0")
+        self.cache.head_for("pdr2210", "2")
+        self.cache.head_for("pdr2210", "1.0")
+        self.cache.head_for("pdr1010", "1")
+        self.assertEqual(self.cache.size, 2)
+
+        # "2" was the least recently used
+        self.cache.head_for("pdr2210", "1.0")
+        self.assertEqual(self.cache.hits, 2)
+        self.cache.head_for("pdr2210", "2")
+        self.assertEqual(self.cache.hits, 2)
+
+        self.cache.clear()
+        self.assertEqual(self.cache.size, 0)
+
+
+if __name__ == '__main__':
+    test.main()
@@ -0,0 +1,157 @@
+import os, sys, pdb, json, logging, threading, time
+import unittest as test
+from socketserver import ThreadingMixIn
+from wsgiref.simple_server import WSGIServer, WSGIRequestHandler, make_server
+
+from nistoar.pdr.exceptions import IDNotFound
+from nistoar.pdr.describe import rmm
+from nistoar.pdr.public.resolve import mdcache
+
+testdir = os.path.dirname(os.path.abspath(__file__))
+describedir = os.path.join(os.path.dirname(os.path.dirname(testdir)), "describe")
+
+def import_file(path, name=None):
+    if not name:
+        name = os.path.splitext(os.path.basename(path))[0]
+    import importlib.util as imputil
+    spec = imputil.spec_from_file_location(name, path)
+    out = imputil.module_from_spec(spec)
+    sys.modules["sim_describe_svc"] = out
+    spec.loader.exec_module(out)
+    return out
+
+simsvc = import_file(os.path.join(describedir, "sim_describe_svc.py"))
+
+class _ThreadingWSGIServer(ThreadingMixIn, WSGIServer):
+    daemon_threads = True
+
+class _QuietHandler(WSGIRequestHandler):
+    def log_message(self, *args):
+        pass
+
+class CountingSimRMM(simsvc.SimRMM):
+    """
+    the simulated RMM service, counting the requests made to it
+    """
+    def __init__(self, archdir):
+        super(CountingSimRMM, self).__init__(archdir)
+        self.requests = []
+
+    def handle_request(self, env, start_resp):
+        self.requests.append(env.get('PATH_INFO'))
+        return super(CountingSimRMM, self).handle_request(env, start_resp)
+
+server = None
+simapp = None
+baseurl = None
+def setUpModule():
+    global server, simapp, baseurl
+    simapp = CountingSimRMM(simsvc.def_archdir)
+    server = make_server("localhost", 0, simapp, _ThreadingWSGIServer, _QuietHandler)
+    baseurl = "http://localhost:%d/" % server.server_port
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+
+def tearDownModule():
+    if server:
+        server.shutdown()
+        server.server_close()
+
+class TestReleasedMetadataCache(test.TestCase):
+
+    def setUp(self):
+        simapp.requests = []
+        self.cache = mdcache.ReleasedMetadataCache(baseurl, config={"capacity": 10})
+
+    def test_ctor(self):
+        self.assertEqual(self.cache.capacity, 10)
+        self.assertEqual(self.cache.latest_ttl, mdcache.DEF_LATEST_TTL)
+        self.assertEqual(self.cache.size, 0)
+        self.assertEqual(self.cache.stats(),
+                         {"size": 0, "capacity": 10, "hits": 0, "misses": 0})
+
+    def test_describe(self):
+        nerdm = self.cache.describe("ark:/88434/mds2-2106")
+        self.assertEqual(nerdm['@id'], "ark:/88434/mds2-2106")
+        self.assertEqual(nerdm['version'], "1.6.0")
+        self.assertEqual(len(simapp.requests), 1)
+
+        nerdm['title'] = "Goob"
+        nerdm = self.cache.describe("ark:/88434/mds2-2106")
+        self.assertNotEqual(nerdm['title'], "Goob")
+        self.assertEqual(len(simapp.requests), 1)
+        self.assertEqual(self.cache.hits, 1)
+        self.assertEqual(self.cache.misses, 1)
+
+        nerdm = self.cache.describe("ark:/88434/mds2-2106", "1.0.0")
+        self.assertEqual(nerdm['version'], "1.0.0")
+        nreqs = len(simapp.requests)
+        self.cache.describe("ark:/88434/mds2-2106", "1.0.0")
+        self.assertEqual(len(simapp.requests), nreqs)
+
+        with self.assertRaises(IDNotFound):
+            self.cache.describe("ark:/88434/mds2-9999")
+
+    def test_latest_ttl(self):
+        self.cache.latest_ttl = 0.2
+        self.cache.describe("ark:/88434/mds2-2106")
+        self.cache.describe("ark:/88434/mds2-2106", "1.0.0")
+        time.sleep(0.3)
+        self.cache.describe("ark:/88434/mds2-2106")
+        self.cache.describe("ark:/88434/mds2-2106", "1.0.0")
+        self.assertEqual(self.cache.misses, 3)
+        self.assertEqual(self.cache.hits, 1)
+
+    def test_describe_releases(self):
+        rel = self.cache.describe_releases("ark:/88434/mds2-2106")
+        self.assertEqual(rel['@id'], "ark:/88434/mds2-2106/pdr:v")
+        self.cache.describe_releases("ark:/88434/mds2-2106")
+        self.assertEqual(len(simapp.requests), 1)
+
+    def test_describe_component(self):
+        cli = rmm.MetadataClient(baseurl)
+        for dsid, path, version in [("ark:/88434/mds2-2106", "pdr:f/Readme.txt", None),
+                                    ("ark:/88434/mds2-2106", "cmps/Readme.txt", "1.0.0"),
+                                    ("ark:/88434/mds003r0x6", "pdr:see/nvd.nist.gov", None),
+                                    ("ark:/88434/mds003r0x6", "pdr:see/nvd.nist.gov", "1.0.0")]:
+            self.assertEqual(self.cache.describe_component(dsid, path, version),
+                             cli.describe(dsid+'/'+path, version))
+
+        # all components of a dataset version are served from one retrieval
+        simapp.requests = []
+        self.cache.describe_component("ark:/88434/mds2-2106", "pdr:f/Readme.txt")
+        self.cache.describe_component("ark:/88434/mds2-2106", "pdr:f/Readme.txt", "1.0.0")
+        self.assertEqual(simapp.requests, [])
+
+        with self.assertRaises(IDNotFound):
+            self.cache.describe_component("ark:/88434/mds2-2106", "pdr:f/goob.txt")
+
+    def test_describe_component_delims(self):
+        # a file can be requested with either file delimiter, regardless of which the record uses
+        nerdm = self.cache.describe("ark:/88434/mds2-2106")
+        for cmp in nerdm['components']:
+            if cmp.get('@id', '').startswith("cmps/"):
+                cmp['@id'] = "pdr:f/" + cmp['@id'][len("cmps/"):]
+        self.cache._put(("ark:/88434/mds2-2106", None), { "nerdm": nerdm, "comps": None })
+
+        for path in ["pdr:f/Readme.txt", "cmps/Readme.txt"]:
+            cmp = self.cache.describe_component("ark:/88434/mds2-2106", path)
+            self.assertEqual(cmp['@id'], "ark:/88434/mds2-2106/pdr:f/Readme.txt")
+            self.assertEqual(cmp['filepath'], "Readme.txt")
+
+        with self.assertRaises(IDNotFound):
+            self.cache.describe_component("ark:/88434/mds2-2106", "cmps/goob.txt")
+
+    def test_capacity(self):
+        self.cache.capacity = 1
+        self.cache.describe("ark:/88434/mds2-2106")
+        self.cache.describe("ark:/88434/mds2-2107")
+        self.assertEqual(self.cache.size, 1)
+        self.cache.describe("ark:/88434/mds2-2106")
+        self.assertEqual(self.cache.hits, 0)
+
+        self.cache.clear()
+        self.assertEqual(self.cache.size, 0)
+
+
+if __name__ == '__main__':
+    test.main()
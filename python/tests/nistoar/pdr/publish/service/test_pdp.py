@@ -583,6 +583,57 @@ class TestPDPublishingService(test.TestCase):
         self.pubsvc.publish(sipid, ncnrag)
         self.assertEqual(self.pubsvc.status_of(sipid).state, status.PUBLISHED)
 
+    def test_process_request(self):
+        nerd = utils.read_json(str(simplenerd))
+        sipid = self.pubsvc.accept_resource_metadata(nerd, ncnrag, sipid="ncnr0:hello", create=True)
+        self.assertFalse(self.pubsvc.asynchronous)
+
+        with self.assertRaises(ValueError):
+            self.pubsvc.process_request(sipid, "goob", ncnrag)
+        with self.assertRaises(pdp.SIPNotFoundError):
+            self.pubsvc.process_request("ncnr0:goob", "finalize", ncnrag)
+
+        self.pubsvc.process_request(sipid, "finalize", ncnrag)
+        sts = self.pubsvc.status_of(sipid)
+        self.assertEqual(sts.state, status.FINALIZED)
+        self.assertNotIn('progress', sts.user_export())
+
+        self.pubsvc.process_request(sipid, "publish", ncnrag)
+        self.assertEqual(self.pubsvc.status_of(sipid).state, status.PUBLISHED)
+
+    def test_async_finalize(self):
+        self.cfg['async_queue_dir'] = "pubqueue"
+        self.pubsvc = pdp.PDPublishingService(self.cfg, 'pdp0')
+        self.assertTrue(self.pubsvc.asynchronous)
+        self.assertTrue(os.path.isdir(os.path.join(self.workdir, "pubqueue")))
+
+        jcfg = self.pubsvc._job_config()
+        self.assertEqual(jcfg['factory'], "nistoar.pdr.publish.service.pdp.PDPublishingService")
+        self.assertEqual(jcfg['convention'], "pdp0")
+        self.assertNotIn('async_queue_dir', jcfg['service'])
+        self.assertEqual(jcfg['service']['sip_status_dir'], self.pubsvc.statusdir)
+
+        nerd = utils.read_json(str(simplenerd))
+        nerd['version'] = "1.0.0+ (in edit)"
+        sipid = self.pubsvc.accept_resource_metadata(nerd, ncnrag, sipid="ncnr0:hello", create=True)
+
+        self.pubsvc.finalize(sipid, ncnrag)
+        sts = self.pubsvc.status_of(sipid)
+        self.assertIn(sts.state, [status.PROCESSING, status.FINALIZED])
+
+        # a repeated request is merged into the one already queued
+        self.pubsvc.finalize(sipid, ncnrag)
+
+        for i in range(100):
+            if self.pubsvc.status_of(sipid).state != status.PROCESSING:
+                break
+            time.sleep(0.2)
+        sts = self.pubsvc.status_of(sipid)
+        self.assertEqual(sts.state, status.FINALIZED)
+        self.assertNotIn('progress', sts.user_export())
+        bnerd = NISTBag(self.bagparent / sipid).nerdm_record(True)
+        self.assertEqual(bnerd['version'], '1.0.0')
+
                          
 if __name__ == '__main__':
     test.main()
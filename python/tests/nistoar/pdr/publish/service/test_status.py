@@ -1,4 +1,4 @@
-import os, pdb, sys, json
+import os, pdb, sys, json, time
 import unittest as test
 from copy import deepcopy
 
@@ -398,8 +398,99 @@ class TestSIPStatus(test.TestCase):
         data = self.read_data(self.status._cachefile)
         self.assertEqual(data['user']['state'], status.PROCESSING)
         self.assertEqual(data['user']['message'], "started")
+        self.assertNotIn('progress', data['user'])
 
+    def test_record_progress_detail(self):
+        self.status.start("goob1")
+        self.status.record_progress("queued", phase="queued", percent=0)
+        prog = self.read_data(self.status._cachefile)['user']['progress']
+        self.assertEqual(prog['phase'], "queued")
+        self.assertEqual(prog['percent'], 0)
+        self.assertNotIn('eta', prog)
+        since = prog['since']
+
+        time.sleep(0.1)
+        self.status.record_progress("finalizing", phase="finalizing", percent=50)
+        prog = self.read_data(self.status._cachefile)['user']['progress']
+        self.assertEqual(prog['phase'], "finalizing")
+        self.assertEqual(prog['since'], since)
+        self.assertGreater(prog['eta'], prog['updated'])
+        self.assertLess(prog['eta'], prog['updated'] + 1)
+
+        self.status.record_progress("nearly done", percent=90, eta=5.0)
+        prog = self.status.user_export()['progress']
+        self.assertEqual(prog['phase'], "finalizing")
+        self.assertEqual(prog['eta'], 5.0)
+
+        # progress is dropped once processing is over
+        self.status.update(status.FINALIZED)
+        self.assertNotIn('progress', self.read_data(self.status._cachefile)['user'])
+
+
+
+class TestStatusStores(test.TestCase):
+
+    def setUp(self):
+        self.tf = Tempfiles()
+        self.cachedir = self.tf.mkdir("status")
+        self.filecfg = { 'cachedir': self.cachedir }
+        self.dbcfg = { 'cachedir': self.cachedir, 'store': 'sqlite' }
+
+    def tearDown(self):
+        self.tf.clean()
 
+    def load_sips(self, cfg):
+        for id, agent, state in [("ark:/88434/pdp0-0001", "hank", status.PENDING),
+                                 ("pdp0-0002", "gurn", status.FINALIZED),
+                                 ("pdp0-0003", "hank", status.PUBLISHED)]:
+            stat = status.SIPStatus(id, cfg)
+            stat.start("pdp0", agent)
+            stat.update(state)
+
+    def test_open_store(self):
+        self.assertTrue(isinstance(status.open_store(self.filecfg), status.FileStatusStore))
+        store = status.open_store(self.dbcfg)
+        self.assertTrue(isinstance(store, status.SQLiteStatusStore))
+        self.assertIs(status.open_store(self.dbcfg), store)
+        self.assertTrue(os.path.isfile(os.path.join(self.cachedir, "_sipstatus.sqlite")))
+        with self.assertRaises(status.ConfigurationException):
+            status.open_store({'cachedir': self.cachedir, 'store': 'goob'})
+
+    def test_sqlite_status(self):
+        stat = status.SIPStatus("ark:/88434/pdp0-0001", self.dbcfg)
+        self.assertEqual(stat.state, status.NOT_FOUND)
+        stat.start("pdp0", "hank")
+        stat.record_progress("going", "finalizing", 50)
+        self.assertFalse(os.path.exists(stat._cachefile))
+
+        stat = status.SIPStatus("ark:/88434/pdp0-0001", self.dbcfg)
+        self.assertEqual(stat.state, status.PROCESSING)
+        self.assertEqual(stat.message, "going")
+        self.assertEqual(stat.authorized_agents, ["hank"])
+
+        stat.revert()
+        self.assertEqual(status.SIPStatus("pdp0-0001", self.dbcfg).state, status.NOT_FOUND)
+
+    def test_requests(self):
+        for cfg in (self.filecfg, self.dbcfg):
+            self.load_sips(cfg)
+            self.assertEqual(status.SIPStatus.requests(cfg), ["pdp0-0001", "pdp0-0002", "pdp0-0003"])
+            self.assertEqual(status.SIPStatus.requests(cfg, "hank"), ["pdp0-0001", "pdp0-0003"])
+            self.assertEqual(status.SIPStatus.requests(cfg, ["hank", "gurn"], offset=1, limit=1),
+                             ["pdp0-0002"])
+            self.assertEqual(status.SIPStatus.requests(cfg, "hank", status.PUBLISHED), ["pdp0-0003"])
+            self.assertEqual(status.SIPStatus.requests(cfg, siptype="goob"), [])
+            self.assertEqual(status.SIPStatus.requests(cfg, []), [])
+
+    def test_import_from(self):
+        self.load_sips(self.filecfg)
+        filestore = status.FileStatusStore(self.cachedir)
+        dbstore = status.SQLiteStatusStore(os.path.join(self.cachedir, "_migrated.sqlite"))
+        self.assertEqual(dbstore.import_from(filestore), 3)
+        self.assertEqual(dbstore.select(["gurn"]), ["pdp0-0002"])
+        self.assertEqual(dbstore.load("pdp0-0002"), filestore.load("pdp0-0002"))
+        self.assertEqual(dbstore.import_from(filestore), 0)
+        self.assertEqual(dbstore.import_from(filestore, True), 3)
 
         
 
@@ -202,7 +202,165 @@ class TestJsonIO(test.TestCase):
         self.assertIn('@id', self.td)
         self.assertEqual(self.td['foo'], 'bar')
 
-    
+    def test_lock_registry(self):
+        lfs = [utils.LockedFile(self.tf("f%d.json" % i)) for i in range(20)]
+        same = utils.LockedFile(self.tf("f0.json"), 'w')
+        self.assertIs(same._thread_lock, lfs[0]._thread_lock)
+        self.assertIn(os.path.abspath(self.tf("f5.json")), utils.LockedFile._thread_locks)
+
+        # locks are dropped once no longer referenced
+        lfs = None
+        self.assertNotIn(os.path.abspath(self.tf("f5.json")), utils.LockedFile._thread_locks)
+        self.assertIn(os.path.abspath(self.tf("f0.json")), utils.LockedFile._thread_locks)
+        same = None
+        self.assertNotIn(os.path.abspath(self.tf("f0.json")), utils.LockedFile._thread_locks)
+
+        for i in range(100):
+            utils.write_json({"i": i}, self.tf("f%d.json" % i))
+            utils.read_json(self.tf("f%d.json" % i))
+        self.assertNotIn(os.path.abspath(self.tf("f50.json")), utils.LockedFile._thread_locks)
+
+class TestAtomicWrite(test.TestCase):
+    # this class injects faults into JSON writes to show that files are never left torn
+
+    def setUp(self):
+        self.tf = Tempfiles()
+        self.jdir = self.tf.mkdir("jsondata")
+        self.jfile = os.path.join(self.jdir, "data.json")
+        self.data = {"@id": "goob", "vals": list(range(2000))}
+        utils.write_json(self.data, self.jfile)
+        self.env = dict(os.environ, PYTHONPATH=os.pathsep.join(sys.path))
+
+    def tearDown(self):
+        self.tf.clean()
+
+    def leftovers(self):
+        return [f for f in os.listdir(self.jdir) if f not in ("data.json", ".data.json.lock")]
+
+    def test_write(self):
+        self.assertEqual(utils.read_json(self.jfile), self.data)
+        self.assertEqual(self.leftovers(), [])
+        mode = os.stat(self.jfile).st_mode & 0o777
+        self.assertEqual(mode & 0o600, 0o600)
+
+        # new files are created according to the umask in effect at the time of the write
+        newfile = os.path.join(self.jdir, "new.json")
+        prev = os.umask(0o027)
+        try:
+            utils.write_json({"a": 1}, newfile)
+        finally:
+            os.umask(prev)
+        self.assertEqual(os.stat(newfile).st_mode & 0o777, 0o640)
+        os.remove(newfile)
+
+        os.chmod(self.jfile, 0o640)
+        utils.write_json({"a": 1}, self.jfile, nolock=True, fsync=False, dirsync=True)
+        self.assertEqual(utils.read_json(self.jfile), {"a": 1})
+        self.assertEqual(os.stat(self.jfile).st_mode & 0o777, 0o640)
+
+        with self.assertRaises(utils.StateException):
+            utils.write_json({"a": 1}, os.path.join(self.jdir, "goob", "data.json"))
+
+    def test_serialization_failure(self):
+        # fails after a partial write
+        bad = {"vals": list(range(2000)), "zzz": object()}
+        with self.assertRaises(utils.StateException):
+            utils.write_json(bad, self.jfile)
+        self.assertEqual(utils.read_json(self.jfile), self.data)
+        self.assertEqual(self.leftovers(), [])
+
+    def test_crash_before_replace(self):
+        # the process dies after the data is written out but before it replaces the file
+        script = "\n".join([
+            "import os",
+            "import nistoar.pdr.utils.io as utils",
+            "os.replace = lambda s, d: os._exit(3)",
+            "utils.write_json({'crashed': True}, %s)" % repr(self.jfile)
+        ])
+        proc = subprocess.run([sys.executable, "-c", script], env=self.env)
+        self.assertEqual(proc.returncode, 3)
+        self.assertEqual(utils.read_json(self.jfile), self.data)
+        self.assertEqual(len(self.leftovers()), 1)
+
+        self.assertEqual(utils.recover_writes(self.jdir, min_age=3600), [])
+        self.assertEqual(len(self.leftovers()), 1)
+        removed = utils.recover_writes(self.jdir)
+        self.assertEqual(len(removed), 1)
+        self.assertEqual(self.leftovers(), [])
+        self.assertEqual(utils.read_json(self.jfile), self.data)
+
+    def test_killed_writers(self):
+        # writers killed at arbitrary points never leave a torn file
+        script = "\n".join([
+            "import nistoar.pdr.utils.io as utils",
+            "i = 0",
+            "while True:",
+            "    i += 1",
+            "    utils.write_json({'@id': 'goob', 'i': i, 'vals': list(range(20000))}, %s, fsync=False)"
+            % repr(self.jfile)
+        ])
+        for n in range(5):
+            proc = subprocess.Popen([sys.executable, "-c", script], env=self.env)
+            time.sleep(0.3 + 0.05 * n)
+            proc.kill()
+            proc.wait()
+
+            data = utils.read_json(self.jfile)
+            self.assertEqual(data['@id'], "goob")
+            self.assertIn(len(data['vals']), (2000, 20000))
+
+        utils.recover_writes(self.jdir)
+        self.assertEqual(self.leftovers(), [])
+
+    def test_sidecar_lock(self):
+        # writers (via write_json or LockedFile) across processes share the lock on a sidecar file
+        lockfile = os.path.join(self.jdir, ".data.json.lock")
+        self.assertTrue(os.path.isfile(lockfile))
+        script = "\n".join([
+            "import fcntl",
+            "with open(%s, 'a') as fd:" % repr(lockfile),
+            "    try:",
+            "        fcntl.lockf(fd, fcntl.LOCK_EX|fcntl.LOCK_NB)",
+            "    except OSError:",
+            "        exit(5)"
+        ])
+        with utils.LockedFile(self.jfile, 'r+'):
+            proc = subprocess.run([sys.executable, "-c", script], env=self.env)
+            self.assertEqual(proc.returncode, 5)
+        proc = subprocess.run([sys.executable, "-c", script], env=self.env)
+        self.assertEqual(proc.returncode, 0)
+
+        # a write from another process waits for the LockedFile to be released
+        script = "\n".join([
+            "import nistoar.pdr.utils.io as utils",
+            "utils.write_json({'@id': 'gurn'}, %s)" % repr(self.jfile)
+        ])
+        with utils.LockedFile(self.jfile, 'r+') as fd:
+            proc = subprocess.Popen([sys.executable, "-c", script], env=self.env)
+            time.sleep(0.5)
+            self.assertIsNone(proc.poll())
+            self.assertEqual(json.load(fd), self.data)
+        self.assertEqual(proc.wait(), 0)
+        self.assertEqual(utils.read_json(self.jfile), {'@id': 'gurn'})
+
+        self.assertEqual(utils.remove_lock_files(self.jdir), [lockfile])
+        self.assertEqual(os.listdir(self.jdir), ["data.json"])
+        self.assertEqual(utils.read_json(self.jfile), {'@id': 'gurn'})
+        self.assertEqual(os.listdir(self.jdir), ["data.json"])
+
+    def test_recover_writes(self):
+        subdir = self.tf.mkdir("jsondata/sub")
+        for d in (self.jdir, subdir):
+            with open(os.path.join(d, ".rec.json.ab_12x.writing"), 'w') as fd:
+                fd.write('{"a": ')
+        with open(os.path.join(self.jdir, "rec.json.writing"), 'w') as fd:
+            fd.write('{"a": ')
+
+        self.assertEqual(len(utils.recover_writes(self.jdir)), 1)
+        self.assertEqual(sorted(self.leftovers()), ["rec.json.writing", "sub"])
+        self.assertEqual(len(utils.recover_writes(self.jdir, True)), 1)
+        self.assertEqual(os.listdir(subdir), [])
+        self.assertEqual(utils.recover_writes(os.path.join(self.jdir, "goob")), [])
 
 
 if __name__ == '__main__':
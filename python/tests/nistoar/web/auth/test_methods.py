@@ -1,4 +1,4 @@
-import os, sys, pdb, json, logging, re, tempfile
+import os, sys, pdb, json, logging, re, tempfile, time
 import unittest as test
 from copy import deepcopy
 import jwt
@@ -64,6 +64,26 @@ class TestAuthFuncs(test.TestCase):
         self.assertEqual(who.get_prop("email"), "fed@nist.gov")
         self.assertEqual(who.get_prop("OU"), "61")
 
+    def test_claim_mapper(self):
+        mapper = auth.NISTOARClaimMapper()
+        info = {"sub": "fed", "userEmail": "fed@nist.gov", "OU": "61", "vehicle": "gurn"}
+        who = mapper("midas", info, rootlog, ["dmptool"], "dmp")
+        self.assertEqual(who.vehicle, "midas")
+        self.assertEqual(who.agent_class, "nist")
+        self.assertEqual(who.actor, "fed")
+        self.assertEqual(who.delegated, ("dmptool", "dmp",))
+        self.assertEqual(who.get_prop("email"), "fed@nist.gov")
+        self.assertEqual(who.get_prop("OU"), "61")
+
+        config = { "key": "XXXXX", "algorithm": "HS256", "require_expiration": False }
+        token = jwt.encode({"sub": "fed@nist.gov"}, config['key'], algorithm="HS256")
+        req = { 'REQUEST_METHOD': 'GET', 'HTTP_AUTHORIZATION': "Bearer "+token }
+        who = auth.authenticate_via_jwt("midas", req, config, rootlog, ['goob'], "dmptool",
+                                        claim_to_agent_func=mapper)
+        self.assertEqual(who.agent_class, "nist")
+        self.assertEqual(who.actor, "fed")
+        self.assertEqual(who.delegated, ("goob", "dmptool",))
+
     def test_authenticate_via_jwt(self):
         config = { "key": "XXXXX", "algorithm": "HS256", "require_expiration": False,
                    'client_agents': {'gurn': ['goob', 'gomer']},
@@ -122,6 +142,62 @@ class TestAuthFuncs(test.TestCase):
         self.assertEqual(who.get_prop("email"), "fed@nist.gov")
         self.assertEqual(who.get_prop("OU"), "61")
 
+    def test_authenticate_via_jwt_cached(self):
+        config = { "key": "XXXXX", "algorithm": "HS256" }
+        cache = auth.JWTAuthCache({"capacity": 2})
+        req = { 'REQUEST_METHOD': 'GET', 'PATH_INFO': '/midas/dmp' }
+        token = jwt.encode({"sub": "fed@nist.gov", "exp": time.time() + 3600},
+                           config['key'], algorithm="HS256")
+        req['HTTP_AUTHORIZATION'] = "Bearer "+token
+
+        who = auth.authenticate_via_jwt("midas", req, config, rootlog, ['goob'], "dmptool", cache=cache)
+        self.assertEqual(who.actor, "fed")
+        self.assertEqual(who.delegated, ("goob", "dmptool",))
+        self.assertEqual(cache.size, 1)
+
+        # a cached token is not decoded again
+        badconfig = { "key": "YYYYY", "algorithm": "HS256", 'raise_on_invalid': True }
+        who.set_prop("goob", "gurn")
+        who = auth.authenticate_via_jwt("midas", req, badconfig, rootlog, ['goob'], "dmptool",
+                                        cache=cache)
+        self.assertEqual(who.actor, "fed")
+        self.assertEqual(who.delegated, ("goob", "dmptool",))
+        self.assertIsNone(who.get_prop("goob"))
+
+        # the cache distinguishes the request context
+        who = auth.authenticate_via_jwt("midas", req, config, rootlog, [], "dmptool", cache=cache)
+        self.assertEqual(who.delegated, ("dmptool",))
+        self.assertEqual(cache.size, 2)
+
+        self.assertEqual(cache.revoke(token), 2)
+        self.assertEqual(cache.size, 0)
+        with self.assertRaises(auth.Unauthenticated):
+            auth.authenticate_via_jwt("midas", req, badconfig, rootlog, ['goob'], "dmptool", cache=cache)
+
+        auth.authenticate_via_jwt("midas", req, config, rootlog, ['goob'], "dmptool", cache=cache)
+        self.assertEqual(cache.revoke_subject("goob"), 0)
+        self.assertEqual(cache.revoke_subject("fed"), 1)
+
+        # invalid tokens are not cached
+        req['HTTP_AUTHORIZATION'] = "Bearer goober"
+        badconfig['raise_on_invalid'] = False
+        who = auth.authenticate_via_jwt("midas", req, badconfig, rootlog, [], "dmptool", cache=cache)
+        self.assertEqual(who.agent_class, "invalid")
+        self.assertEqual(cache.size, 0)
+
+    def test_jwt_cache_expiration(self):
+        cache = auth.JWTAuthCache({"ttl": 60})
+        who = auth.Agent("midas", auth.Agent.USER, "fed", "nist")
+        cache.put("token", "midas", [], "dmptool", who, time.time() + 0.2)
+        self.assertEqual(cache.get("token", "midas", [], "dmptool").actor, "fed")
+        time.sleep(0.3)
+        self.assertIsNone(cache.get("token", "midas", [], "dmptool"))
+        self.assertEqual(cache.size, 0)
+
+        cache = auth.JWTAuthCache({"capacity": 0})
+        cache.put("token", "midas", [], "dmptool", who)
+        self.assertIsNone(cache.get("token", "midas", [], "dmptool"))
+
     def test_authenticate_via_authkey(self):
         config = { "authorized": [{"auth_key": "XXXXX", "user": "oarop", "client": "dmptool"}],
                    'client_agents': {'gurn': ['goob', 'gomer']},
@@ -0,0 +1,205 @@
+import os, sys, pdb, json, logging, threading, signal, time
+import unittest as test
+from io import StringIO
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+
+import requests
+from nistoar.web import transport
+
+class FlakyHandler(BaseHTTPRequestHandler):
+    """
+    a handler that fails the first ``failures`` requests with a 503
+    """
+    failures = 0
+    count = 0
+
+    def _respond(self):
+        type(self).count += 1
+        if type(self).count <= type(self).failures:
+            self.send_response(503, "Unavailable")
+            self.send_header("Content-Length", "0")
+            self.end_headers()
+            return
+        body = json.dumps({"path": self.path, "cookie": self.headers.get("Cookie")}).encode()
+        self.send_response(200, "OK")
+        self.send_header("Set-Cookie", "sessid=goob; Path=/")
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_GET(self):
+        self._respond()
+
+    def do_POST(self):
+        self._respond()
+
+    def log_message(self, *args):
+        pass
+
+server = None
+baseurl = None
+def setUpModule():
+    global server, baseurl
+    server = ThreadingHTTPServer(("localhost", 0), FlakyHandler)
+    baseurl = "http://localhost:%d" % server.server_port
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+
+def tearDownModule():
+    if server:
+        server.shutdown()
+        server.server_close()
+
+class TestHTTPTransport(test.TestCase):
+
+    def setUp(self):
+        FlakyHandler.count = 0
+        FlakyHandler.failures = 0
+        self.tp = transport.HTTPTransport({"backoff_factor": 0.01, "pool_maxsize": 2})
+
+    def tearDown(self):
+        self.tp.close()
+
+    def test_get(self):
+        resp = self.tp.get(baseurl+"/goob?a=b")
+        self.assertEqual(resp.status_code, 200)
+        self.assertEqual(resp.json()['path'], "/goob?a=b")
+
+        stats = self.tp.stats()
+        key = "GET localhost:%d/goob" % server.server_port
+        self.assertIn(key, stats)
+        self.assertEqual(stats[key]['count'], 1)
+        self.assertEqual(stats[key]['errors'], 0)
+        self.assertEqual(stats[key]['last_status'], 200)
+
+    def test_session_reuse(self):
+        sess = self.tp.session_for(baseurl+"/goob")
+        self.assertIs(self.tp.session_for(baseurl+"/gurn"), sess)
+        self.assertIsNot(self.tp.session_for("http://example.com/gurn"), sess)
+
+    def test_no_cookies(self):
+        # cookies set by a server are not kept, so they do not leak from one client to another
+        resp = self.tp.get(baseurl+"/goob")
+        self.assertEqual(resp.cookies.get("sessid"), "goob")
+        self.assertEqual(len(self.tp.session_for(baseurl).cookies), 0)
+        self.assertIsNone(self.tp.get(baseurl+"/gurn").json()['cookie'])
+
+        # cookies given with a request are still sent
+        resp = self.tp.get(baseurl+"/gurn", cookies={"user": "bob"})
+        self.assertEqual(resp.json()['cookie'], "user=bob")
+        self.assertIsNone(self.tp.get(baseurl+"/gurn").json()['cookie'])
+
+    def test_retry_idempotent(self):
+        FlakyHandler.failures = 2
+        resp = self.tp.get(baseurl+"/goob")
+        self.assertEqual(resp.status_code, 200)
+        self.assertEqual(FlakyHandler.count, 3)
+
+        stats = self.tp.stats()["GET localhost:%d/goob" % server.server_port]
+        self.assertEqual(stats['count'], 3)
+        self.assertEqual(stats['errors'], 2)
+        self.assertEqual(stats['retries'], 2)
+
+    def test_retries_exhausted(self):
+        FlakyHandler.failures = 5
+        resp = self.tp.get(baseurl+"/goob", retries=1)
+        self.assertEqual(resp.status_code, 503)
+        self.assertEqual(FlakyHandler.count, 2)
+
+    def test_no_retry_post(self):
+        FlakyHandler.failures = 1
+        resp = self.tp.post(baseurl+"/goob", json={})
+        self.assertEqual(resp.status_code, 503)
+        self.assertEqual(FlakyHandler.count, 1)
+
+    def test_connection_error(self):
+        with self.assertRaises(requests.ConnectionError):
+            self.tp.get("http://localhost:9/goob", retries=1)
+        stats = self.tp.stats()["GET localhost:9/goob"]
+        self.assertEqual(stats['count'], 2)
+        self.assertEqual(stats['errors'], 2)
+        self.assertIsNone(stats['last_status'])
+
+    def test_max_endpoints(self):
+        self.tp = transport.HTTPTransport({"max_endpoints": 2})
+        for p in "a b c d".split():
+            self.tp.get(baseurl+"/"+p)
+        stats = self.tp.stats()
+        self.assertEqual(len(stats), 3)
+        self.assertEqual(stats["GET localhost:%d/*" % server.server_port]['count'], 2)
+
+    def test_dump_stats(self):
+        self.tp.get(baseurl+"/goob")
+        out = StringIO()
+        self.tp.dump_stats(out)
+        self.assertIn("GET localhost:%d/goob" % server.server_port, json.loads(out.getvalue()))
+
+        self.tp.reset_stats()
+        self.assertEqual(self.tp.stats(), {})
+
+class TestEndpointStats(test.TestCase):
+
+    def test_record_threaded(self):
+        stats = transport.EndpointStats()
+        def work():
+            for i in range(2000):
+                stats.record(0.01, 200, i % 2 == 0)
+                stats.record_retry()
+        threads = [threading.Thread(target=work) for t in range(4)]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+
+        data = stats.to_dict()
+        self.assertEqual(data['count'], 8000)
+        self.assertEqual(data['errors'], 4000)
+        self.assertEqual(data['retries'], 8000)
+        self.assertAlmostEqual(data['mean_time'], 0.01)
+
+class TestSharedTransport(test.TestCase):
+
+    def tearDown(self):
+        transport.configure({})
+
+    def test_configure(self):
+        transport.configure({"read_timeout": 5})
+        tp = transport.get_transport()
+        self.assertEqual(tp.cfg['read_timeout'], 5)
+        self.assertIs(transport.get_transport(), tp)
+
+        resp = transport.get(baseurl+"/goob")
+        self.assertEqual(resp.status_code, 200)
+        self.assertIn("GET localhost:%d/goob" % server.server_port, tp.stats())
+
+    @test.skipIf(not hasattr(signal, "SIGUSR1"), "SIGUSR1 not supported on this platform")
+    def test_install_stats_dumper(self):
+        out = StringIO()
+        log = logging.getLogger("test_transport.stats")
+        log.setLevel(logging.INFO)
+        hdlr = logging.StreamHandler(out)
+        log.addHandler(hdlr)
+        prev = signal.getsignal(signal.SIGUSR1)
+        try:
+            self.assertTrue(transport.install_stats_dumper(log))
+            transport.get(baseurl+"/goob")
+            os.kill(os.getpid(), signal.SIGUSR1)
+            for i in range(50):
+                if out.getvalue():
+                    break
+                time.sleep(0.1)
+            self.assertIn("GET localhost:%d/goob" % server.server_port, out.getvalue())
+
+            # not allowed outside of the main thread
+            result = []
+            t = threading.Thread(target=lambda: result.append(transport.install_stats_dumper(log)))
+            t.start()
+            t.join()
+            self.assertEqual(result, [False])
+        finally:
+            signal.signal(signal.SIGUSR1, prev)
+            log.removeHandler(hdlr)
+
+
+if __name__ == '__main__':
+    test.main()
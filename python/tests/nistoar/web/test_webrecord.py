@@ -13,6 +13,7 @@ class TestWebRecorder(test.TestCase):
     def setUp(self):
         self.tf = Tempfiles()
         self.recfile = self.tf.track("webrec.log")
+        self.tf.track("webrec.log"+webrec.INDEX_EXT)
         self.rcrdr = webrec.WebRecorder(self.recfile)
 
     def tearDown(self):
@@ -380,6 +381,68 @@ class TestWebRecorder(test.TestCase):
         self.assertEqual(rec.resource, "/foo/bar/goob")
         self.assertEqual(len(rec.headers), 0)
 
+    def test_index(self):
+        idxfile = self.recfile + webrec.INDEX_EXT
+        self.rcrdr.recHEAD("/foo/gurn")
+        self.rcrdr.recPOST("/foo/bar", body="a\nb\nc\n")
+        self.rcrdr.recGET("/foo/goob")
+        self.assertTrue(os.path.isfile(idxfile))
+        self.assertEqual(os.stat(idxfile).st_size, 3 * webrec.INDEX_ENTRY_SIZE)
+
+        idx = webrec.RecordIndex(self.recfile)
+        self.assertEqual(idx.count(), 3)
+        self.assertEqual(idx.offset(0), 0)
+        self.assertEqual(idx.tail(), [])
+        with open(self.recfile) as fd:
+            fd.seek(idx.offset(2))
+            self.assertIn("/foo/goob", fd.readline())
+
+        parser = webrec.RequestLogParser(self.recfile)
+        self.assertEqual(parser.count_records(), 3)
+        recs = parser.parse(1, 1)
+        self.assertEqual(len(recs), 1)
+        self.assertEqual(recs[0].resource, "/foo/bar")
+        self.assertEqual(recs[0].body, "a\nb\nc\n\n\n")
+        self.assertEqual([r.resource for r in parser.parse(-2)], ["/foo/bar", "/foo/goob"])
+        self.assertEqual(parser.parse(3), [])
+
+        noidx = webrec.RequestLogParser(self.recfile, False)
+        self.assertEqual([str(r) for r in noidx.parse()], [str(r) for r in parser.parse()])
+
+    def test_index_repair(self):
+        idxfile = self.recfile + webrec.INDEX_EXT
+        self.rcrdr.recHEAD("/foo/gurn")
+        self.rcrdr.recGET("/foo/goob")
+        self.rcrdr.close_file()
+
+        # records appended without the index are found after the indexed ones
+        unindexed = webrec.WebRecorder(self.recfile, "Unindexed", index=False)
+        unindexed.recGET("/foo/bar")
+        unindexed.close_file()
+        tail = webrec.RecordIndex(self.recfile).tail()
+        self.assertEqual(len(tail), 1)
+        with open(self.recfile) as fd:
+            fd.seek(tail[0])
+            self.assertIn("Unindexed.GET /foo/bar", fd.readline())
+
+        parser = webrec.RequestLogParser(self.recfile)
+        self.assertEqual(parser.count_records(), 3)
+        self.assertEqual(parser.parse(2)[0].resource, "/foo/bar")
+
+        # a missing index is rebuilt
+        os.remove(idxfile)
+        self.assertEqual(parser.count_records(), 3)
+        self.assertEqual(os.stat(idxfile).st_size, 3 * webrec.INDEX_ENTRY_SIZE)
+        self.assertEqual(parser.parse(1)[0].resource, "/foo/goob")
+
+        # the recorder brings an out-of-date index up to date before adding to it
+        with open(idxfile, 'w') as fd:
+            fd.write("%015d\n" % 5)
+        self.rcrdr.open_file()
+        self.rcrdr.recDELETE("/foo/gurn")
+        self.assertEqual(os.stat(idxfile).st_size, 4 * webrec.INDEX_ENTRY_SIZE)
+        self.assertEqual(webrec.RecordIndex(self.recfile).tail(), [])
+        self.assertEqual([r.op for r in parser.parse()], ["HEAD", "GET", "GET", "DELETE"])
 
 
 if __name__ == '__main__':
@@ -0,0 +1,146 @@
+#! /usr/bin/env python3
+#
+import os, sys, time, argparse, tempfile, threading, zipfile, re, shutil
+from http.server import ThreadingHTTPServer, SimpleHTTPRequestHandler
+
+description="""measure the cost of determining the member bags of a large, zip-serialized head bag,
+comparing a full download of the bag (as done prior to the AIP metadata cache) with extraction of just
+the member list via HTTP range requests.  A head bag of the requested size is generated and served
+from a local stand-in for the distribution service."""
+epilog=""
+def_progname = "aipresolvebench"
+
+def define_options(progname, parser=None):
+    """
+    define command-line arguments
+    """
+    if not parser:
+        parser = argparse.ArgumentParser(progname, None, description, epilog)
+
+    parser.add_argument("-s", "--size", dest="sizemb", metavar="MB", type=int, default=2048,
+                        help="the approximate size of the generated head bag in megabytes")
+    parser.add_argument("-w", "--work-dir", dest="workdir", metavar="DIR", type=str,
+                        help="the directory to generate the bag in (default: a temporary directory)")
+    parser.add_argument("-r", "--requests", dest="nreqs", metavar="N", type=int, default=3,
+                        help="the number of times to time the ranged extraction")
+
+    return parser
+
+def find_nistoar_code():
+    execdir = os.path.dirname(os.path.abspath(__file__))
+    return os.path.join(os.path.dirname(execdir), "python")
+
+try:
+    import nistoar.pdr
+except ImportError:
+    sys.path.insert(0, find_nistoar_code())
+from nistoar.pdr import distrib
+
+AIPID = "mds2-9999"
+BAGNAME = AIPID + ".1_0_0.mbag0_4-0"
+
+def make_bag(outdir, sizemb):
+    """
+    write a zip-serialized head bag containing a data file of the given size
+    """
+    bagfile = os.path.join(outdir, BAGNAME+".zip")
+    chunk = os.urandom(1024 * 1024)
+    with zipfile.ZipFile(bagfile, 'w', zipfile.ZIP_STORED, allowZip64=True) as zf:
+        with zf.open(BAGNAME+"/data/big.dat", 'w', force_zip64=True) as fd:
+            for i in range(sizemb):
+                fd.write(chunk)
+        zf.writestr(BAGNAME+"/bagit.txt", "BagIt-Version: 0.97\nTag-File-Character-Encoding: UTF-8\n")
+        zf.writestr(BAGNAME+"/multibag/member-bags.tsv", BAGNAME+"\n")
+    return bagfile
+
+class RangeHandler(SimpleHTTPRequestHandler):
+    """
+    a file server (standing in for the distribution service) that supports single-range requests
+    """
+    def send_head(self):
+        rng = re.match(r'^bytes=(\d+)-(\d+)$', self.headers.get('Range', ''))
+        path = self.translate_path(self.path)
+        if not rng or not os.path.isfile(path):
+            return super(RangeHandler, self).send_head()
+
+        size = os.stat(path).st_size
+        start, end = int(rng.group(1)), min(int(rng.group(2)), size-1)
+        fd = open(path, 'rb')
+        fd.seek(start)
+        self.send_response(206, "Partial Content")
+        self.send_header("Content-Type", "application/zip")
+        self.send_header("Content-Range", "bytes %d-%d/%d" % (start, end, size))
+        self.send_header("Content-Length", str(end - start + 1))
+        self.end_headers()
+        self._remaining = end - start + 1
+        return fd
+
+    def copyfile(self, source, outputfile):
+        remaining = getattr(self, '_remaining', None)
+        if remaining is None:
+            return super(RangeHandler, self).copyfile(source, outputfile)
+        outputfile.write(source.read(remaining))
+
+    def log_message(self, *args):
+        pass
+
+def serve(rootdir):
+    handler = lambda *args, **kw: RangeHandler(*args, directory=rootdir, **kw)
+    server = ThreadingHTTPServer(("localhost", 0), handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+def full_download(svc, size, tmpdir):
+    # the previous behavior:  the head bag is downloaded in full and the member list read from it
+    cli = distrib.BagDistribClient(AIPID, svc)
+    with tempfile.TemporaryDirectory(dir=tmpdir) as td:
+        cli.save_bag(BAGNAME+".zip", td)
+        with zipfile.ZipFile(os.path.join(td, BAGNAME+".zip")) as zf:
+            return zf.read(BAGNAME+"/multibag/member-bags.tsv").decode().split()
+
+def ranged_read(svc, size, tmpdir):
+    # the current behavior:  only the zip directory and the member list are retrieved
+    return distrib.BagDistribClient(AIPID, svc).member_bags_for(BAGNAME+".zip", size)
+
+def timeit(func, *args):
+    start = time.time()
+    out = func(*args)
+    if out != [BAGNAME]:
+        raise RuntimeError("Unexpected member bag list: %s" % str(out))
+    return time.time() - start
+
+def main(progname, args):
+    opts = define_options(progname).parse_args(args)
+    workdir = opts.workdir
+    if workdir and not os.path.isdir(workdir):
+        print("%s: work directory not found: %s" % (progname, workdir), file=sys.stderr)
+        return 2
+
+    rootdir = tempfile.mkdtemp(prefix="aipbench", dir=workdir)
+    server = None
+    try:
+        aipdir = os.path.join(rootdir, "_aip")
+        os.mkdir(aipdir)
+        print("generating %d MB head bag..." % opts.sizemb)
+        bagfile = make_bag(aipdir, opts.sizemb)
+        size = os.stat(bagfile).st_size
+
+        server = serve(rootdir)
+        svc = distrib.RESTServiceClient("http://localhost:%d" % server.server_port)
+
+        before = timeit(full_download, svc, size, rootdir)
+        after = [timeit(ranged_read, svc, size, rootdir) for i in range(opts.nreqs)]
+
+        print("time to determine the member bags of a %.1f GB head bag:" % (size / 1024**3))
+        print("  %-22s %8.3fs" % ("full download:", before))
+        print("  %-22s %8.3fs (mean of %d)" % ("ranged extraction:", sum(after)/len(after), len(after)))
+        return 0
+
+    finally:
+        if server:
+            server.shutdown()
+            server.server_close()
+        shutil.rmtree(rootdir, ignore_errors=True)
+
+if __name__ == "__main__":
+    sys.exit(main(def_progname, sys.argv[1:]))
@@ -0,0 +1,89 @@
+#! /usr/bin/env python3
+#
+import os, sys, time, argparse, logging
+
+description="""measure the throughput (requests per second) of the JWT authentication layer used by the
+authenticated web services, comparing decoding the token on every request with serving repeat requests
+from the verified token cache.  Each simulated request presents the same token, as a polling client
+would."""
+epilog=""
+def_progname = "authbench"
+
+def define_options(progname, parser=None):
+    """
+    define command-line arguments
+    """
+    if not parser:
+        parser = argparse.ArgumentParser(progname, None, description, epilog)
+
+    parser.add_argument("-n", "--requests", dest="nreqs", metavar="N", type=int, default=20000,
+                        help="the number of requests to authenticate for each measurement")
+    parser.add_argument("-t", "--tokens", dest="ntokens", metavar="N", type=int, default=1,
+                        help="the number of distinct tokens (clients) to cycle through")
+
+    return parser
+
+def find_nistoar_code():
+    execdir = os.path.dirname(os.path.abspath(__file__))
+    return os.path.join(os.path.dirname(execdir), "python")
+
+try:
+    import nistoar.web
+except ImportError:
+    sys.path.insert(0, find_nistoar_code())
+import jwt
+from nistoar.web.rest import AuthenticatedWSGIApp, Agent, authenticate_via_jwt, JWTAuthCache
+
+KEY = "benchmark-secret-key-of-sufficient-length"
+
+class BenchApp(AuthenticatedWSGIApp):
+    """
+    a minimal authenticated app that authenticates users as the MIDAS and NSD apps do
+    """
+    def __init__(self, config, log, usecache):
+        super(BenchApp, self).__init__(config, log, "/", "bench")
+        self.jwt_cache = None
+        if usecache:
+            self.jwt_cache = JWTAuthCache(self.cfg['authentication'].get('cache'))
+
+    def authenticate_user(self, env, agents=None, client_id=None) -> Agent:
+        return authenticate_via_jwt("bench", env, self.cfg['authentication'], self.log, agents, client_id,
+                                    cache=self.jwt_cache)
+
+    def handle_path_request(self, path, env, start_resp, who=None):
+        return []
+
+def measure(app, envs, nreqs):
+    start = time.time()
+    for i in range(nreqs):
+        who = app.authenticate(envs[i % len(envs)])
+    elapsed = time.time() - start
+    if who.actor == Agent.ANONYMOUS or who.agent_class == Agent.INVALID:
+        raise RuntimeError("Authentication failed: "+str(who))
+    return nreqs / elapsed
+
+def main(progname, args):
+    opts = define_options(progname).parse_args(args)
+    log = logging.getLogger(progname)
+    log.addHandler(logging.NullHandler())
+    log.propagate = False
+
+    config = { "authentication": { "key": KEY, "algorithm": "HS256" } }
+    exp = time.time() + 3600
+    envs = []
+    for i in range(opts.ntokens):
+        token = jwt.encode({"sub": "fed%d@nist.gov" % i, "userEmail": "fed%d@nist.gov" % i,
+                            "exp": exp}, KEY, algorithm="HS256")
+        envs.append({ "REQUEST_METHOD": "GET", "PATH_INFO": "/bench",
+                      "HTTP_AUTHORIZATION": "Bearer "+token, "HTTP_OAR_CLIENT_ID": "benchclient" })
+
+    before = measure(BenchApp(config, log, False), envs, opts.nreqs)
+    after = measure(BenchApp(config, log, True), envs, opts.nreqs)
+
+    print("authentication throughput (%d requests, %d token(s)):" % (opts.nreqs, opts.ntokens))
+    print("  %-20s %10.0f req/s" % ("decode every time:", before))
+    print("  %-20s %10.0f req/s" % ("verified cache:", after))
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main(def_progname, sys.argv[1:]))
@@ -0,0 +1,96 @@
+#! /usr/bin/env python3
+#
+import os, sys, time, argparse, tempfile, logging, json
+
+description="""measure how long BagBuilder.ensure_comp_metadata() takes to describe the data files
+in a bag, serially and with a pool of worker threads.  For each size, two identical bags are filled
+with small synthetic data files that have no metadata yet; the file metadata are then created in one
+bag serially and in the other in parallel, and the results are checked to be the same.  Finally, the
+file specs are re-examined (updstats=True) in both."""
+epilog=""
+def_progname = "bagcompbench"
+
+def define_options(progname, parser=None):
+    """
+    define command-line arguments
+    """
+    if not parser:
+        parser = argparse.ArgumentParser(progname, None, description, epilog)
+
+    parser.add_argument("sizes", metavar="N", type=int, nargs="*", default=[20000],
+                        help="the numbers of data files to put in the bags (default: 20000)")
+    parser.add_argument("-W", "--workers", dest="workers", metavar="N", type=int, default=8,
+                        help="the number of threads to use in the parallel mode (default: 8)")
+    parser.add_argument("-p", "--per-folder", dest="perfolder", metavar="N", type=int, default=500,
+                        help="the number of files to place in each folder (default: 500)")
+    parser.add_argument("-s", "--file-size", dest="filesize", metavar="BYTES", type=int, default=4096,
+                        help="the size of each data file (default: 4096)")
+    parser.add_argument("-w", "--work-dir", dest="workdir", metavar="DIR", type=str,
+                        help="the directory to create the bags under (default: system temp dir)")
+
+    return parser
+
+def find_nistoar_code():
+    execdir = os.path.dirname(os.path.abspath(__file__))
+    return os.path.join(os.path.dirname(execdir), "python")
+
+try:
+    import nistoar.pdr
+except ImportError:
+    sys.path.insert(0, find_nistoar_code())
+from nistoar.pdr.preserve.bagit.builder import BagBuilder
+
+def make_bag(parentdir, name, nfiles, perfolder, filesize):
+    """
+    create a bag containing the given number of data files without any file metadata
+    """
+    bldr = BagBuilder(parentdir, name, {}, id="ark:/88434/mds00bench",
+                      logger=logging.getLogger(def_progname).getChild(name))
+    bldr.ensure_bag_structure()
+    for i in range(nfiles):
+        folder = os.path.join(bldr.bag.data_dir, "set%04d" % (i // perfolder))
+        if i % perfolder == 0:
+            os.mkdir(folder)
+        with open(os.path.join(folder, "data%06d.csv" % i), 'wb') as fd:
+            fd.write((b"%d," % i) * (filesize // 8) + b"\n")
+    return bldr
+
+def read_file_md(bldr):
+    out = {}
+    for dirpath, dirs, files in os.walk(bldr.bag.metadata_dir):
+        for f in files:
+            if f == "nerdm.json":
+                with open(os.path.join(dirpath, f)) as fd:
+                    out[os.path.relpath(dirpath, bldr.bag.metadata_dir)] = json.load(fd)
+    return out
+
+def timeit(bldr, updstats, workers):
+    start = time.time()
+    bldr.ensure_comp_metadata(updstats, workers=workers)
+    return time.time() - start
+
+def main(progname, args):
+    opts = define_options(progname).parse_args(args)
+    logging.getLogger().addHandler(logging.NullHandler())
+
+    print("%8s %8s %12s %12s %12s %12s" % ("files", "workers", "serial", "parallel",
+                                           "reexam(ser)", "reexam(par)"))
+    for n in opts.sizes:
+        with tempfile.TemporaryDirectory(prefix="bagcompbench.", dir=opts.workdir) as workdir:
+            serial = make_bag(workdir, "serial", n, opts.perfolder, opts.filesize)
+            parallel = make_bag(workdir, "parallel", n, opts.perfolder, opts.filesize)
+
+            times = (timeit(serial, False, 1), timeit(parallel, False, opts.workers))
+            times += (timeit(serial, True, 1), timeit(parallel, True, opts.workers))
+            smd = read_file_md(serial)
+            if smd != read_file_md(parallel):
+                raise RuntimeError("Parallel mode produced different file metadata")
+            if len(smd) < n:
+                raise RuntimeError("Unexpected metadata count: %d < %d" % (len(smd), n))
+            serial.disconnect_logfile()
+            parallel.disconnect_logfile()
+            print("%8d %8d %11.2fs %11.2fs %11.2fs %11.2fs" % ((n, opts.workers) + times))
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main(def_progname, sys.argv[1:]))
@@ -0,0 +1,114 @@
+#! /usr/bin/env python3
+#
+import os, sys, time, argparse
+from copy import deepcopy
+from collections import OrderedDict
+
+description="""measure the per-request cost of reviewing a DAP (NERDm) record with many files as the
+DAPTool does after each edit, comparing a review by a freshly created reviewer (as done prior to the
+review result cache) with a review by the shared reviewer, which only re-runs the tests examining the
+sections of the record that changed."""
+epilog=""
+def_progname = "dapreviewbench"
+
+def define_options(progname, parser=None):
+    """
+    define command-line arguments
+    """
+    if not parser:
+        parser = argparse.ArgumentParser(progname, None, description, epilog)
+
+    parser.add_argument("-f", "--file-count", dest="nfiles", metavar="N", type=int, default=5000,
+                        help="the number of file components to include in the test record")
+    parser.add_argument("-a", "--author-count", dest="nauths", metavar="N", type=int, default=50,
+                        help="the number of authors to include in the test record")
+    parser.add_argument("-r", "--requests", dest="nreqs", metavar="N", type=int, default=10,
+                        help="the number of simulated edit-and-review requests to time")
+
+    return parser
+
+def find_nistoar_code():
+    execdir = os.path.dirname(os.path.abspath(__file__))
+    return os.path.join(os.path.dirname(execdir), "python")
+
+try:
+    import nistoar.midas
+except ImportError:
+    sys.path.insert(0, find_nistoar_code())
+from nistoar.midas.dap.review.nerdm import DAPNERDmReviewValidator
+
+def make_record(nfiles, nauths):
+    """
+    create a NERDm record with the given number of file components and authors
+    """
+    rec = OrderedDict([
+        ("@id", "ark:/88434/mds3-0001"),
+        ("@type", [ "nrdp:PublicDataResource" ]),
+        ("title", "A Record with Many Files"),
+        ("description", [ "This record is used to benchmark reviews.  It has many files.  "
+                          "It also has many authors." ]),
+        ("keyword", [ "benchmarks" ]),
+        ("topic", [ OrderedDict([("scheme", "https://data.nist.gov/od/dm/nist-themes/v1.1"),
+                                 ("tag", "Information Technology")]) ])
+    ])
+    rec['authors'] = [
+        OrderedDict([
+            ("@type", "foaf:Person"),
+            ("givenName", "Gurn"),
+            ("familyName", "Cranston%d" % i),
+            ("orcid", "0000-0000-0000-%04d" % i),
+            ("affiliation", [ OrderedDict([("title", "NIST")]) ])
+        ]) for i in range(nauths)
+    ]
+    rec['components'] = [
+        OrderedDict([
+            ("@id", "file/%05d" % i),
+            ("@type", [ "nrdp:DataFile", "dcat:Distribution" ]),
+            ("filepath", "data/file%05d.csv" % i),
+            ("downloadURL", "https://data.nist.gov/od/ds/mds3-0001/data/file%05d.csv" % i),
+            ("mediaType", "text/csv"),
+            ("size", 1024 + i)
+        ]) for i in range(nfiles)
+    ]
+    return rec
+
+def review_new(rec, i):
+    # the previous per-request behavior:  a new reviewer is created for each request, and all
+    # tests are run
+    rec['title'] = "A Record with Many Files, revision %d" % i
+    return DAPNERDmReviewValidator().validate(rec, willUpload=True)
+
+shared = DAPNERDmReviewValidator()
+def review_shared(rec, i):
+    # the current behavior:  the shared reviewer re-runs only the tests examining the title
+    rec['title'] = "A Record with Many Files, revision %d" % i
+    return shared.validate(rec, willUpload=True)
+
+def timeit(nreqs, func, rec):
+    times = []
+    for i in range(nreqs):
+        start = time.time()
+        res = func(rec, i)
+        times.append(time.time() - start)
+    return times, res
+
+def main(progname, args):
+    opts = define_options(progname).parse_args(args)
+
+    rec = make_record(opts.nfiles, opts.nauths)
+    before, bres = timeit(opts.nreqs, review_new, deepcopy(rec))
+    after, ares = timeit(opts.nreqs, review_shared, deepcopy(rec))
+    if (bres.count_applied(), bres.count_passed()) != (ares.count_applied(), ares.count_passed()):
+        raise RuntimeError("Review results differ: %d/%d vs. %d/%d passed" %
+                           (bres.count_passed(), bres.count_applied(),
+                            ares.count_passed(), ares.count_applied()))
+
+    print("per-request review time for a record with %d files and %d authors (%d requests):"
+          % (opts.nfiles, opts.nauths, opts.nreqs))
+    for label, times in (("all tests, new reviewer", before), ("changed, shared reviewer", after)):
+        print("  %-26s mean: %8.4fs   first: %8.4fs   last: %8.4fs"
+              % (label+":", sum(times)/len(times), times[0], times[-1]))
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main(def_progname, sys.argv[1:]))
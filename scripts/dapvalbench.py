@@ -0,0 +1,116 @@
+#! /usr/bin/env python3
+#
+import os, sys, time, argparse
+from copy import deepcopy
+from collections import OrderedDict
+
+description="""measure the per-request cost of validating updates to a DAP (NERDm) record with many
+files, comparing full validation by a freshly created validator (as done prior to the validator
+cache) with fragment validation by the shared, process-wide validator."""
+epilog=""
+def_progname = "dapvalbench"
+
+def define_options(progname, parser=None):
+    """
+    define command-line arguments
+    """
+    if not parser:
+        parser = argparse.ArgumentParser(progname, None, description, epilog)
+
+    parser.add_argument("-f", "--file-count", dest="nfiles", metavar="N", type=int, default=5000,
+                        help="the number of file components to include in the test record")
+    parser.add_argument("-r", "--requests", dest="nreqs", metavar="N", type=int, default=5,
+                        help="the number of simulated update requests to time")
+    parser.add_argument("-s", "--schema-dir", dest="schemadir", metavar="DIR", type=str,
+                        help="the directory containing the NERDm schemas (default: the PDR default)")
+
+    return parser
+
+def find_nistoar_code():
+    execdir = os.path.dirname(os.path.abspath(__file__))
+    return os.path.join(os.path.dirname(execdir), "python")
+
+try:
+    import nistoar.midas
+except ImportError:
+    sys.path.insert(0, find_nistoar_code())
+from nistoar.midas.dap.service import validate
+from nistoar.midas.dap.service.mds3 import NERDM_SCH_ID, NERDMPUB_DEF
+from nistoar.pdr import def_schema_dir
+
+def make_record(nfiles):
+    """
+    create a NERDm record with the given number of file components
+    """
+    rec = OrderedDict([
+        ("_schema", NERDM_SCH_ID),
+        ("_extensionSchemas", [ NERDMPUB_DEF + "PublicDataResource" ]),
+        ("@id", "ark:/88434/mds3-0001"),
+        ("@type", [ "nrdp:PublicDataResource" ]),
+        ("title", "A Record with Many Files"),
+        ("description", [ "This record is used to benchmark validation." ]),
+        ("contactPoint", OrderedDict([("@type", "vcard:Contact"), ("fn", "Gurn Cranston"),
+                                      ("hasEmail", "mailto:gurn.cranston@gmail.com")])),
+        ("keyword", [ "benchmarks" ])
+    ])
+    rec['components'] = [
+        OrderedDict([
+            ("@id", "file/%05d" % i),
+            ("@type", [ "nrdp:DataFile", "dcat:Distribution" ]),
+            ("filepath", "data/file%05d.csv" % i),
+            ("downloadURL", "https://data.nist.gov/od/ds/mds3-0001/data/file%05d.csv" % i),
+            ("mediaType", "text/csv"),
+            ("size", 1024 + i)
+        ]) for i in range(nfiles)
+    ]
+    return rec
+
+def validate_full(schemadir, rec):
+    # the previous per-request behavior:  a new validator is created for each request, and the
+    # whole record is validated
+    valid8r = validate.create_lenient_validator(schemadir, "_")
+    return valid8r.validate(rec, schemauri=NERDM_SCH_ID, strict=True, raiseex=False)
+
+def validate_fragments(schemadir, rec, changed):
+    # the current behavior:  the shared validator validates the resource-level metadata and the
+    # one file that changed
+    valid8r = validate.get_lenient_validator(schemadir, "_")
+    res = OrderedDict((k, v) for k, v in rec.items() if k not in ("authors", "references", "components"))
+    errs = valid8r.validate(res, schemauri=NERDM_SCH_ID, strict=True, raiseex=False)
+    errs += valid8r.validate(changed, schemauri=NERDM_SCH_ID + "/definitions/Component",
+                             strict=True, raiseex=False)
+    return errs
+
+def timeit(nreqs, func, *args):
+    times = []
+    for i in range(nreqs):
+        start = time.time()
+        errs = func(*args)
+        times.append(time.time() - start)
+        if errs:
+            raise RuntimeError("Unexpected validation errors: %s" % str(errs[0]))
+    return times
+
+def main(progname, args):
+    opts = define_options(progname).parse_args(args)
+    schemadir = opts.schemadir or def_schema_dir
+    if not schemadir or not os.path.isdir(schemadir):
+        print("%s: NERDm schema directory not found: %s" % (progname, schemadir), file=sys.stderr)
+        return 2
+
+    rec = make_record(opts.nfiles)
+    changed = deepcopy(rec['components'][opts.nfiles // 2])
+    changed['description'] = "an updated description"
+
+    before = timeit(opts.nreqs, validate_full, schemadir, rec)
+    after = timeit(opts.nreqs, validate_fragments, schemadir, rec, changed)
+
+    print("per-request validation time for a record with %d files (%d requests):"
+          % (opts.nfiles, opts.nreqs))
+    for label, times in (("full, new validator", before), ("fragment, shared validator", after)):
+        print("  %-28s mean: %8.4fs   first: %8.4fs   last: %8.4fs"
+              % (label+":", sum(times)/len(times), times[0], times[-1]))
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main(def_progname, sys.argv[1:]))
@@ -0,0 +1,160 @@
+#! /usr/bin/env python3
+#
+import os, sys, argparse, time, random, tempfile
+
+description="""measure the cost of full-text searches over a collection of synthetic DMP and DAP records,
+comparing DBClient.search_records() (ranked, paginated, and faceted) with a selection via
+adv_select_records(), which examines every record in the collection.  The time to build the search
+index from the stored records is also reported."""
+epilog=""
+def_progname = "dbiosearchbench"
+
+BACKENDS = ["inmem", "fsbased"]
+
+def define_options(progname, parser=None):
+    """
+    define command-line arguments
+    """
+    if not parser:
+        parser = argparse.ArgumentParser(progname, None, description, epilog)
+
+    parser.add_argument("-n", "--count", dest="count", metavar="N", type=int, default=50000,
+                        help="the number of records to load into the collection (default: 50000)")
+    parser.add_argument("-b", "--backend", dest="backend", metavar="NAME", type=str, default="inmem",
+                        help="the DBIO backend to use, one of %s (default: inmem)" % ", ".join(BACKENDS))
+    parser.add_argument("-q", "--queries", dest="nqueries", metavar="N", type=int, default=20,
+                        help="the number of queries to time for each kind of search (default: 20)")
+    parser.add_argument("-s", "--scans", dest="nscans", metavar="N", type=int, default=3,
+                        help="the number of full-scan selections to time (default: 3)")
+    parser.add_argument("-d", "--db-dir", dest="dbdir", metavar="DIR", type=str, default=None,
+                        help="the directory to store fsbased records in (default: a temporary directory)")
+
+    return parser
+
+def find_nistoar_code():
+    execdir = os.path.dirname(os.path.abspath(__file__))
+    return os.path.join(os.path.dirname(execdir), "python")
+
+try:
+    import nistoar.midas
+except ImportError:
+    sys.path.insert(0, find_nistoar_code())
+from nistoar.midas.dbio import base, inmem, fsbased
+
+USER = "nist0:bench"
+OWNERS = ["nist0:user%d" % i for i in range(20)]
+STATES = ["edit", "edit", "edit", "reviewed", "published"]
+THEMES = ["Physics", "Chemistry", "Materials", "Bioscience", "Information Technology", "Mathematics",
+          "Advanced Communications", "Manufacturing", "Buildings and Construction", "Forensic Science"]
+VOCAB = ("optical laser neutron thermal polymer alloy quantum spectroscopy calibration wafer "
+         "microscopy lattice catalyst sensor fiber turbulence combustion cryogenic diffraction "
+         "semiconductor battery genome protein isotope magnetic acoustic interferometer photonic "
+         "metrology composite ceramic nanoparticle superconducting thin film plasma robotics "
+         "cybersecurity cryptography dosimetry radiation fluid concrete corrosion fatigue").split()
+SYLLABLES = ("ba ce di fo gu ha je ki lo mu na pe qi ro su ta ve wi xo yu za be co du fa ge hi jo ku la "
+             "me ni po ru sa te vo wu").split()
+NAMES = ("Alice Bob Carol David Erin Frank Grace Heidi Ivan Judy Mallory Niaj Olivia Peggy Rupert "
+         "Sybil Trent Victor Walter").split()
+
+def make_filler(rand, count):
+    # the less distinctive words that fill out descriptions
+    return ["".join(rand.sample(SYLLABLES, 3)) for i in range(count)]
+
+def make_record(i, rand, filler):
+    words = rand.sample(VOCAB, 6)
+    owner = rand.choice(OWNERS)
+    rec = {
+        "id": "mdm1:%05d" % i,
+        "name": "%s %s study %d" % (words[0], words[1], i),
+        "owner": owner,
+        "deactivated": None,
+        "acls": {"read": [owner, USER], "write": [owner], "admin": [owner], "delete": [owner]},
+        "status": {"state": rand.choice(STATES), "modified": 1.7e9 + i, "created": 1.7e9 + i},
+        "data": {
+            "title": "Measurements of %s %s for %s applications" % tuple(words[:3]),
+            "keywords": words[2:5],
+            "theme": rand.sample(THEMES, 2),
+            "description": " ".join([words[0]] + [rand.choice(filler) for w in range(40)]),
+            "authors": [{"fn": "%s %s" % (rand.choice(NAMES), rand.choice(NAMES))} for a in range(4)],
+            "contactPoint": {"fn": "%s %s" % (rand.choice(NAMES), rand.choice(NAMES)),
+                             "hasEmail": "mailto:contact%d@nist.gov" % (i % 97)}
+        }
+    }
+    if i % 2:
+        # make half of the records look like DAPs
+        rec['data']['components'] = [{"filepath": "data/%s_%d.csv" % (words[5], f),
+                                      "title": "%s data, part %d" % (words[5], f)} for f in range(5)]
+    return rec
+
+def create_client(backend, dbdir):
+    cfg = {"superusers": []}
+    if backend == "fsbased":
+        return fsbased.FSBasedDBClientFactory({}, dbdir).create_client(base.DMP_PROJECTS, cfg, USER)
+    return inmem.InMemoryDBClientFactory({}).create_client(base.DMP_PROJECTS, cfg, USER)
+
+def timeit(func, n):
+    start = time.time()
+    for i in range(n):
+        out = func(i)
+    return (time.time() - start) / n, out
+
+def main(progname, args):
+    opts = define_options(progname).parse_args(args)
+    if opts.backend not in BACKENDS:
+        print("%s: unknown backend: %s" % (progname, opts.backend), file=sys.stderr)
+        return 1
+
+    tmpdir = None
+    dbdir = opts.dbdir
+    if opts.backend == "fsbased" and not dbdir:
+        tmpdir = tempfile.TemporaryDirectory(prefix="dbiosearch_")
+        dbdir = tmpdir.name
+
+    try:
+        cli = create_client(opts.backend, dbdir)
+        rand = random.Random(0)
+        filler = make_filler(rand, 5000)
+        start = time.time()
+        for i in range(opts.count):
+            cli._upsert(base.DMP_PROJECTS, make_record(i, rand, filler))
+        print("loaded %d records into %s backend in %.2fs" % (opts.count, opts.backend, time.time() - start))
+
+        start = time.time()
+        cli.reindex_search()
+        print("built search index in %.2fs" % (time.time() - start))
+        print()
+
+        queries = [" ".join(rand.sample(VOCAB, 1)) for q in range(opts.nqueries)]
+        pairs = [" ".join(rand.sample(VOCAB, 2)) for q in range(opts.nqueries)]
+        prefixes = [rand.choice(VOCAB)[:4] + "*" for q in range(opts.nqueries)]
+
+        def scan(i):
+            filt = {"$and": [{"status.state": "published", "owner": OWNERS[i % len(OWNERS)]}]}
+            return sum(1 for r in cli.adv_select_records(filt, base.ACLs.READ))
+
+        def searcher(qs, **kw):
+            return lambda i: cli.search_records(qs[i], base.ACLs.READ, **kw).total
+
+        print("%-24s %8s %10s %10s" % ("method", "queries", "avg time", "matches"))
+        tests = [
+            ("adv_select (full scan)", scan, opts.nscans),
+            ("search, 1 word",       searcher(queries), opts.nqueries),
+            ("search, 2 words",      searcher(pairs), opts.nqueries),
+            ("search, prefix",       searcher(prefixes), opts.nqueries),
+            ("search, constrained",  searcher(queries, status_state="published", theme="Physics"),
+                                     opts.nqueries),
+            ("search, page 10",      searcher(queries, page=10), opts.nqueries),
+            ("browse (no query)",    searcher([""] * opts.nqueries), opts.nqueries)
+        ]
+        for name, func, n in tests:
+            if n < 1:
+                continue
+            avg, matched = timeit(func, n)
+            print("%-24s %8d %9.1fms %10d" % (name, n, avg * 1000, matched))
+    finally:
+        if tmpdir:
+            tmpdir.cleanup()
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main(def_progname, sys.argv[1:]))
@@ -0,0 +1,152 @@
+#! /usr/bin/env python3
+#
+import os, sys, argparse, json, time, resource, tempfile, multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+
+description="""measure the rate at which synthetic DMP and DAP records are rendered into PDF documents
+and the peak memory (RSS) used to do so, comparing rendering each record with a fresh setup (as a
+newly started process would), rendering each record separately with nistoar.midas.export, and
+rendering all of the records through one Exporter.render_many() call.  Each method is run in its own
+process so that its peak RSS is measured independently."""
+epilog=""
+def_progname = "exportrenderbench"
+
+METHODS = ["cold", "single", "many"]
+
+def define_options(progname, parser=None):
+    """
+    define command-line arguments
+    """
+    if not parser:
+        parser = argparse.ArgumentParser(progname, None, description, epilog)
+
+    parser.add_argument("-n", "--count", dest="count", metavar="N", type=int, default=50,
+                        help="the number of records of each type to render (default: 50)")
+    parser.add_argument("-t", "--types", dest="types", metavar="TYPE[,TYPE]", type=str, default="dmp,dap",
+                        help="the comma-separated record types to render (default: dmp,dap)")
+    parser.add_argument("-m", "--methods", dest="methods", metavar="METHOD[,METHOD...]", type=str,
+                        default=",".join(METHODS),
+                        help="the comma-separated rendering methods to compare (default: %s)" %
+                             ",".join(METHODS))
+    parser.add_argument("-c", "--cache-dir", dest="cachedir", metavar="DIR", type=str, default=None,
+                        help="the directory to keep compiled templates in (default: a temporary directory)")
+
+    return parser
+
+def find_nistoar_code():
+    execdir = os.path.dirname(os.path.abspath(__file__))
+    return os.path.join(os.path.dirname(execdir), "python")
+
+try:
+    import nistoar.midas
+except ImportError:
+    sys.path.insert(0, find_nistoar_code())
+from nistoar.midas.export import export
+from nistoar.midas.export.exporters.pdf_exporter import PDFExporter
+from nistoar.midas.export.utils import templates, rml
+
+TEMPLATES = { "dmp": "dmp_pdf_template.prep", "dap": "dap_pdf_template.prep" }
+
+def make_records(rectype, count):
+    if rectype == "dmp":
+        exfile = os.path.join(os.path.dirname(export.__file__), "data", "exampleDMP.json")
+        with open(exfile) as fd:
+            example = json.load(fd)
+        for i in range(count):
+            rec = json.loads(json.dumps(example))
+            rec['id'] = "mdm1:%04d" % i
+            rec['data']['title'] = "Synthetic Data Management Plan, number %d" % i
+            yield rec
+        return
+
+    for i in range(count):
+        yield {
+            "id": "mds3:%04d" % i,
+            "data": {
+                "@id": "ark:/88434/mds3-%04d" % i,
+                "title": "Synthetic Data Asset Publication, number %d" % i,
+                "doi": "doi:10.18434/mds3-%04d" % i,
+                "authors": [{"fn": "Author %d" % a, "orcid": "0000-0000-0000-%04d" % a,
+                             "affiliation": [{"title": "NIST", "subunits": ["MML"]}]}
+                            for a in range(5)],
+                "keywords": ["keyword%d" % k for k in range(10)],
+                "components": [{"title": "file%d.csv" % f, "@type": ["nrdp:DataFile"],
+                                "filepath": "data/file%d.csv" % f, "size": 1024 * f} for f in range(20)],
+                "file_count": 20,
+                "accessLevel": "public",
+                "rights": "none",
+            }
+        }
+
+def render_cold(exporter, rectype, records):
+    # start each record from scratch, as a newly started process would
+    count = 0
+    for rec in records:
+        templates.clear_template_cache()
+        rml.clear_rml_cache()
+        exporter.render("json", rec, rec['id'], TEMPLATES[rectype])
+        count += 1
+    return count
+
+def render_single(exporter, rectype, records):
+    count = 0
+    for rec in records:
+        export.export(rec, "pdf", template_name=TEMPLATES[rectype])
+        count += 1
+    return count
+
+def render_many(exporter, rectype, records):
+    count = 0
+    for result in exporter.render_many((("json", rec, rec['id']) for rec in records), TEMPLATES[rectype]):
+        if isinstance(result, Exception):
+            raise result
+        count += 1
+    return count
+
+def measure(method, rectype, count, cachedir):
+    exporter = PDFExporter(template_cache_dir=cachedir if method == "many" else None)
+    render = globals()["render_" + method]
+    start = time.time()
+    done = render(exporter, rectype, make_records(rectype, count))
+    elapsed = time.time() - start
+    # ru_maxrss is in kilobytes on Linux (but bytes on macOS)
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    if sys.platform != "darwin":
+        peak *= 1024
+    return done, elapsed, peak
+
+def main(progname, args):
+    opts = define_options(progname).parse_args(args)
+    types = [t.strip() for t in opts.types.split(',')]
+    methods = [m.strip() for m in opts.methods.split(',')]
+    for name in types:
+        if name not in TEMPLATES:
+            print("%s: unknown record type: %s" % (progname, name), file=sys.stderr)
+            return 1
+    for name in methods:
+        if name not in METHODS:
+            print("%s: unknown method: %s" % (progname, name), file=sys.stderr)
+            return 1
+
+    tmpdir = None
+    cachedir = opts.cachedir
+    if not cachedir:
+        tmpdir = tempfile.TemporaryDirectory(prefix="prepcache_")
+        cachedir = tmpdir.name
+
+    try:
+        print("%-5s %-8s %8s %9s %10s %10s" % ("type", "method", "records", "time", "docs/sec", "peak RSS"))
+        ctx = multiprocessing.get_context("spawn")
+        for rectype in types:
+            for method in methods:
+                with ProcessPoolExecutor(max_workers=1, mp_context=ctx) as pool:
+                    done, elapsed, peak = pool.submit(measure, method, rectype, opts.count, cachedir).result()
+                print("%-5s %-8s %8d %8.2fs %10.1f %8.1fMB" %
+                      (rectype, method, done, elapsed, done / elapsed, peak / 1e6))
+    finally:
+        if tmpdir:
+            tmpdir.cleanup()
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main(def_progname, sys.argv[1:]))
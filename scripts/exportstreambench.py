@@ -0,0 +1,90 @@
+#! /usr/bin/env python3
+#
+import os, sys, argparse, json, time, tracemalloc
+
+description="""measure the peak memory used to export increasing numbers of synthetic project records,
+comparing the in-memory approach (collecting the records into a list and serializing it whole, as the
+JSON export does) with the streamed formats of nistoar.midas.export.stream.  The records are generated
+one at a time, as a database cursor would deliver them, and the output is discarded."""
+epilog=""
+def_progname = "exportstreambench"
+
+def define_options(progname, parser=None):
+    """
+    define command-line arguments
+    """
+    if not parser:
+        parser = argparse.ArgumentParser(progname, None, description, epilog)
+
+    parser.add_argument("-n", "--counts", dest="counts", metavar="N[,N...]", type=str,
+                        default="100,1000,5000,20000",
+                        help="the comma-separated record counts to export (default: 100,1000,5000,20000)")
+    parser.add_argument("-k", "--keywords", dest="kwcount", metavar="N", type=int, default=50,
+                        help="the number of keywords to put in each record, to vary the record size "
+                             "(default: 50)")
+    parser.add_argument("-c", "--chunk-size", dest="chunksize", metavar="BYTES", type=int, default=None,
+                        help="the size of the chunks to stream (default: 64 kB)")
+
+    return parser
+
+def find_nistoar_code():
+    execdir = os.path.dirname(os.path.abspath(__file__))
+    return os.path.join(os.path.dirname(execdir), "python")
+
+try:
+    import nistoar.midas
+except ImportError:
+    sys.path.insert(0, find_nistoar_code())
+from nistoar.midas.export import stream
+
+COLUMNS = ["id", "name", "owner", "status.state", "data.title", "data.keywords", "meta.resourceType"]
+
+def make_records(count, kwcount):
+    for i in range(count):
+        yield {
+            "id": "mdm1:%05d" % i,
+            "name": "record %d" % i,
+            "owner": "nstr1",
+            "status": {"state": "edit", "action": "update", "since": 1700000000.0 + i},
+            "acls": {"read": ["nstr1"], "write": ["nstr1"], "admin": ["nstr1"]},
+            "data": {"title": "A synthetic data management plan, number %d" % i,
+                     "description": "x" * 500, "keywords": ["keyword%d" % k for k in range(kwcount)]},
+            "meta": {"resourceType": "data", "foruser": "nstr1"}
+        }
+
+def in_memory(records, chunksize):
+    out = json.dumps(list(records)).encode('utf-8')
+    return len(out)
+
+def streamed(fmt):
+    def export(records, chunksize):
+        size = 0
+        for chunk in stream.stream_records(records, fmt, COLUMNS, chunksize):
+            size += len(chunk)
+        return size
+    return export
+
+def measure(export, count, kwcount, chunksize):
+    tracemalloc.start()
+    start = time.time()
+    size = export(make_records(count, kwcount), chunksize)
+    elapsed = time.time() - start
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return peak, size, elapsed
+
+def main(progname, args):
+    opts = define_options(progname).parse_args(args)
+    counts = [int(c) for c in opts.counts.split(',')]
+    chunksize = opts.chunksize or stream.DEF_CHUNK_SIZE
+    methods = [("json", in_memory)] + [(f, streamed(f)) for f in ("ndjson", "csv", "zip")]
+
+    print("%8s %-8s %12s %12s %9s" % ("records", "format", "peak mem", "output", "time"))
+    for count in counts:
+        for name, export in methods:
+            peak, size, elapsed = measure(export, count, opts.kwcount, chunksize)
+            print("%8d %-8s %10.1fMB %10.1fMB %8.2fs" % (count, name, peak / 1e6, size / 1e6, elapsed))
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main(def_progname, sys.argv[1:]))
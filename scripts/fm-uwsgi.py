@@ -47,6 +47,7 @@ except ImportError:
 
 from nistoar.base import config
 from nistoar.midas.dap.fm import flask
+from nistoar.web import transport
 
 try:
     import uwsgi
@@ -81,6 +82,8 @@ else:
 
 # setup logging according to the configuration
 config.configure_log(config=cfg)
+transport.configure(cfg.get('http_transport', {}))
+transport.install_stats_dumper()   # log outbound request statistics on SIGUSR1
 
 application = flask.create_app(cfg)
 logging.info("file manager's MIDAS layer ready")
@@ -0,0 +1,94 @@
+#! /usr/bin/env python3
+#
+import os, sys, time, argparse, tempfile, logging
+from copy import deepcopy
+
+description="""measure how the time to reconcile a file-manager scan report with the file components
+cached by the fmfs nerdstore scales with the number of files.  For each size, a synthetic scan report
+is reconciled into an empty store, then reconciled again unchanged, and then again after changing the
+checksums of and moving a fraction of the files."""
+epilog=""
+def_progname = "fmscanbench"
+
+def define_options(progname, parser=None):
+    """
+    define command-line arguments
+    """
+    if not parser:
+        parser = argparse.ArgumentParser(progname, None, description, epilog)
+
+    parser.add_argument("sizes", metavar="N", type=int, nargs="*", default=[1000, 10000, 50000],
+                        help="the numbers of files to include in the scan reports")
+    parser.add_argument("-p", "--per-folder", dest="perfolder", metavar="N", type=int, default=500,
+                        help="the number of files to place in each folder (default: 500)")
+    parser.add_argument("-c", "--change-fraction", dest="changefrac", metavar="F", type=float,
+                        default=0.01, help="the fraction of files to change and move between "+
+                                           "the last two reconciliations (default: 0.01)")
+    parser.add_argument("-w", "--work-dir", dest="workdir", metavar="DIR", type=str,
+                        help="the directory to create the stores under (default: system temp dir)")
+
+    return parser
+
+def find_nistoar_code():
+    execdir = os.path.dirname(os.path.abspath(__file__))
+    return os.path.join(os.path.dirname(execdir), "python")
+
+try:
+    import nistoar.midas
+except ImportError:
+    sys.path.insert(0, find_nistoar_code())
+from nistoar.midas.dap.nerdstore import fmfs, inmem
+
+def make_scan(nfiles, perfolder):
+    """
+    create a synthetic scan report describing the given number of files
+    """
+    contents = []
+    nfolders = max(1, (nfiles + perfolder - 1) // perfolder)
+    for f in range(nfolders):
+        contents.append({ "fileid": "d%d" % f, "path": "set%04d/" % f, "resource_type": "collection" })
+    for i in range(nfiles):
+        contents.append({ "fileid": "f%d" % i, "path": "set%04d/data%06d.csv" % (i // perfolder, i),
+                          "size": str(1024 + i), "resource_type": "file",
+                          "checksum": "%064x" % i, "etag": "e%d" % i })
+    return { "scan_id": "bench", "uploads_dir": "/", "is_complete": False, "contents": contents }
+
+def change_scan(scan, frac):
+    """
+    change the checksums of a fraction of the files in the scan and move as many others
+    """
+    out = deepcopy(scan)
+    files = [e for e in out['contents'] if e['resource_type'] == "file"]
+    step = max(1, int(1 / frac)) if frac > 0 else len(files) + 1
+    for i in range(0, len(files), step):
+        files[i]['checksum'] = "%064x" % (i + 1)
+        files[i]['etag'] += "x"
+        if i + 1 < len(files):
+            files[i+1]['path'] = files[i+1]['path'].replace("data", "moved")
+    return out
+
+def timeit(cmps, scan):
+    start = time.time()
+    cmps._update_files_from_scan(deepcopy(scan))
+    return time.time() - start
+
+def main(progname, args):
+    opts = define_options(progname).parse_args(args)
+    logging.getLogger().addHandler(logging.NullHandler())
+
+    print("%8s %12s %12s %12s" % ("files", "initial", "unchanged", "changed"))
+    for n in opts.sizes:
+        with tempfile.TemporaryDirectory(prefix="fmscanbench.", dir=opts.workdir) as workdir:
+            cmps = fmfs.FMFSFileComps(inmem.InMemoryResource("bench:0001"), workdir)
+            scan = make_scan(n, opts.perfolder)
+            changed = change_scan(scan, opts.changefrac)
+
+            times = (timeit(cmps, scan), timeit(cmps, scan), timeit(cmps, changed))
+            if cmps.count != len(scan['contents']):
+                raise RuntimeError("Unexpected component count: %d != %d" %
+                                   (cmps.count, len(scan['contents'])))
+            print("%8d %11.2fs %11.2fs %11.2fs" % ((n,) + times))
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main(def_progname, sys.argv[1:]))
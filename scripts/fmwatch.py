@@ -0,0 +1,67 @@
+#! /usr/bin/env python3
+#
+import os, sys, signal, argparse, logging
+
+description="""watch the file manager's user spaces for changes, recording them into each space's change
+journal so that scans of a space can examine just the files that changed.  This runs until it is
+interrupted or sent a TERM signal."""
+epilog=""
+def_progname = "fmwatch"
+
+def define_options(progname, parser=None):
+    """
+    define command-line arguments
+    """
+    if not parser:
+        parser = argparse.ArgumentParser(progname, None, description, epilog)
+
+    parser.add_argument("rootdir", metavar="DIR", type=str,
+                        help="the file manager's local storage root directory containing the spaces")
+    parser.add_argument("-P", "--poll", dest="poll", action="store_true", default=False,
+                        help="detect changes only by periodically rescanning the spaces (i.e. do not "+
+                             "use inotify)")
+    parser.add_argument("-i", "--rescan-interval", dest="interval", metavar="SECS", type=float,
+                        help="the number of seconds between rescans of the spaces (default: 600, or "+
+                             "30 when polling)")
+    parser.add_argument("-v", "--verbose", dest="verbose", action="store_true", default=False,
+                        help="print debug messages")
+
+    return parser
+
+def find_nistoar_code():
+    execdir = os.path.dirname(os.path.abspath(__file__))
+    return os.path.join(os.path.dirname(execdir), "python")
+
+try:
+    import nistoar.midas
+except ImportError:
+    sys.path.insert(0, find_nistoar_code())
+from nistoar.midas.dap.fm.watch import SpaceWatcher
+
+def main(progname, args):
+    opts = define_options(progname).parse_args(args)
+    logging.basicConfig(level=logging.DEBUG if opts.verbose else logging.INFO,
+                        format=progname+": %(levelname)s: %(message)s")
+    if not os.path.isdir(opts.rootdir):
+        print("%s: %s: not an existing directory" % (progname, opts.rootdir), file=sys.stderr)
+        return 1
+
+    cfg = { "use_inotify": not opts.poll }
+    if opts.interval:
+        cfg['rescan_interval'] = opts.interval
+        cfg['poll_interval'] = opts.interval
+    watcher = SpaceWatcher(opts.rootdir, cfg, logging.getLogger(progname))
+    signal.signal(signal.SIGTERM, lambda signum, frame: watcher.stop(0))
+
+    logging.getLogger(progname).info("watching %s (%s)", opts.rootdir,
+                                     "via inotify" if watcher.using_inotify else "by polling")
+    try:
+        watcher.run()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        watcher.close()
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main(def_progname, sys.argv[1:]))
@@ -0,0 +1,122 @@
+#! /usr/bin/env python3
+#
+import os, sys, argparse, heapq, queue, random
+from collections import OrderedDict
+
+description="""simulate the scheduling of jobs from a skewed workload--one owner submitting many long
+jobs at once while several others submit a few short ones over time--and compare how long each owner's
+jobs wait when run in strict priority order (as a plain priority queue does) versus with the fair-share
+scheduler of nistoar.jobmgt.sched.  No processes are launched; the jobs' run times are simulated."""
+epilog=""
+def_progname = "jobschedbench"
+
+def define_options(progname, parser=None):
+    """
+    define command-line arguments
+    """
+    if not parser:
+        parser = argparse.ArgumentParser(progname, None, description, epilog)
+
+    parser.add_argument("-s", "--slots", dest="slots", metavar="N", type=int, default=4,
+                        help="the number of jobs that may run simultaneously (default: 4)")
+    parser.add_argument("-H", "--heavy-jobs", dest="heavy", metavar="N", type=int, default=60,
+                        help="the number of jobs the heavy owner submits at the start (default: 60)")
+    parser.add_argument("-d", "--heavy-duration", dest="heavydur", metavar="SECS", type=float,
+                        default=600, help="the mean run time of the heavy owner's jobs (default: 600)")
+    parser.add_argument("-o", "--light-owners", dest="light", metavar="N", type=int, default=4,
+                        help="the number of light owners (default: 4)")
+    parser.add_argument("-j", "--light-jobs", dest="lightjobs", metavar="N", type=int, default=3,
+                        help="the number of jobs each light owner submits (default: 3)")
+    parser.add_argument("-D", "--light-duration", dest="lightdur", metavar="SECS", type=float,
+                        default=60, help="the mean run time of the light owners' jobs (default: 60)")
+    parser.add_argument("-r", "--seed", dest="seed", metavar="INT", type=int, default=1,
+                        help="the seed for the random workload (default: 1)")
+
+    return parser
+
+def find_nistoar_code():
+    execdir = os.path.dirname(os.path.abspath(__file__))
+    return os.path.join(os.path.dirname(execdir), "python")
+
+try:
+    import nistoar.jobmgt
+except ImportError:
+    sys.path.insert(0, find_nistoar_code())
+from nistoar.jobmgt import Job
+from nistoar.jobmgt.sched import FairShareQueue
+
+START = 1000.0
+
+class Clock:
+    def __init__(self):
+        self.now = START
+    def __call__(self):
+        return self.now
+
+def make_workload(opts):
+    """
+    return a list of (arrival time, owner, run time) tuples
+    """
+    rand = random.Random(opts.seed)
+    out = [(START, "heavy", rand.uniform(0.5, 1.5) * opts.heavydur) for i in range(opts.heavy)]
+    span = opts.heavy * opts.heavydur / opts.slots / 2
+    for o in range(opts.light):
+        for i in range(opts.lightjobs):
+            out.append((START + rand.uniform(0, span), "light%d" % o,
+                        rand.uniform(0.5, 1.5) * opts.lightdur))
+    out.sort(key=lambda w: w[0])
+    return out
+
+def simulate(workload, jq, clock, slots):
+    """
+    run the workload through the given queue and return the wait times of the jobs by owner
+    """
+    runtimes = {}
+    arrivals = list(reversed(workload))
+    running = []     # heap of (end time, seq, job)
+    waits = OrderedDict()
+    seq = 0
+    while arrivals or running or not jq.empty():
+        # advance the clock to the next arrival or completion
+        nexta = arrivals[-1][0] if arrivals else None
+        nextc = running[0][0] if running else None
+        if nextc is not None and (nexta is None or nextc <= nexta):
+            clock.now, _, job = heapq.heappop(running)
+            if hasattr(jq, 'job_done'):
+                jq.job_done(job, runtimes[job.data_id])
+        elif nexta is not None:
+            clock.now, owner, runtime = arrivals.pop()
+            job = Job("bench", "job%d" % seq, state_data={"reqtime": clock.now, "priority": 0,
+                                                           "owner": owner})
+            runtimes[job.data_id] = runtime
+            jq.put_nowait(job)
+            seq += 1
+
+        while len(running) < slots and not jq.empty():
+            job = jq.get()
+            waits.setdefault(job.info['owner'], []).append(clock.now - job.request_time)
+            heapq.heappush(running, (clock.now + runtimes[job.data_id], seq, job))
+            seq += 1
+    return waits, clock.now
+
+def main(progname, args):
+    opts = define_options(progname).parse_args(args)
+    workload = make_workload(opts)
+
+    clock = Clock()
+    prio, prioend = simulate(workload, queue.PriorityQueue(), clock, opts.slots)
+    clock = Clock()
+    fair, fairend = simulate(workload, FairShareQueue({}, clock), clock, opts.slots)
+
+    print("%-8s %6s %14s %14s %14s %14s" % ("owner", "jobs", "mean wait", "max wait",
+                                             "mean wait", "max wait"))
+    print("%-8s %6s %29s %29s" % ("", "", "(priority order)", "(fair-share)"))
+    for owner in sorted(prio.keys()):
+        pw, fw = prio[owner], fair[owner]
+        print("%-8s %6d %13.0fs %13.0fs %13.0fs %13.0fs" %
+              (owner, len(pw), sum(pw)/len(pw), max(pw), sum(fw)/len(fw), max(fw)))
+    print("%-8s %6s %29.0fs %28.0fs" % ("makespan", "", prioend - START, fairend - START))
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main(def_progname, sys.argv[1:]))
@@ -47,6 +47,7 @@ import nistoar.midas
 from nistoar.base import config
 from nistoar.midas.dbio import MongoDBClientFactory, InMemoryDBClientFactory, FSBasedDBClientFactory
 from nistoar.midas import wsgi
+from nistoar.web import transport
 
 try:
     import uwsgi
@@ -90,6 +91,8 @@ if uwsgi.opt.get("oar_log_file"):
     cfg["logfile"] = _dec(uwsgi.opt.get("oar_log_file"))
 
 config.configure_log(config=cfg)
+transport.configure(cfg.get('http_transport', {}))
+transport.install_stats_dumper()   # log outbound request statistics on SIGUSR1
 
 # Is there a client notification service running we should talk to?
 if uwsgi.opt.get('dbio_clinotif_config_file'):
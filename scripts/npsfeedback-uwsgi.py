@@ -46,6 +46,7 @@ import nistoar.midas
 from nistoar.base import config
 from nistoar.midas.dbio import MongoDBClientFactory, InMemoryDBClientFactory, FSBasedDBClientFactory
 from nistoar.midas.dap.extrev import wsgi
+from nistoar.web import transport
 
 try:
     import uwsgi
@@ -122,6 +123,8 @@ if workdir:
     cfg['working_dir'] = workdir
 
 config.configure_log(config=cfg)
+transport.configure(cfg.get('http_transport', {}))
+transport.install_stats_dumper()   # log outbound request statistics on SIGUSR1
 
 # setup the MIDAS database backend
 dbtype = _dec(uwsgi.opt.get("oar_midas_db_type"))
@@ -23,6 +23,7 @@ except ImportError:
 
 from nistoar.base import config
 from nistoar.nsd import wsgi, service
+from nistoar.web import transport
 
 try:
     import uwsgi
@@ -60,6 +61,8 @@ if workdir:
     cfg['working_dir'] = workdir
 
 config.configure_log(config=cfg)
+transport.configure(cfg.get('http_transport', {}))
+transport.install_stats_dumper()   # log outbound request statistics on SIGUSR1
 
 log = logging.getLogger("NSD")
 psvc = service.MongoPeopleService(cfg.get('db_url'))
@@ -42,6 +42,7 @@ except ImportError:
 
 from nistoar.pdr import config
 from nistoar.pdr.public.resolve import wsgi
+from nistoar.web import transport
 
 try:
     import uwsgi
@@ -73,6 +74,8 @@ else:
     raise config.ConfigurationException("resolver: nist-oar configuration not provided")
 
 config.configure_log(config=cfg)
+transport.configure(cfg.get('http_transport', {}))
+transport.install_stats_dumper()   # log outbound request statistics on SIGUSR1
 
 application = wsgi.app(cfg)
 logging.info("resolver ready")
@@ -0,0 +1,61 @@
+#! /usr/bin/env python3
+#
+import os, sys, argparse
+
+description="""import the SIP status files kept by a publishing service into an indexed SQLite status
+database.  After migrating, the service can be configured to use the database by setting the status
+"store" parameter to "sqlite" (and "dbfile", if the default location is not used)."""
+epilog=""
+def_progname = "sipstatusmigrate"
+
+def define_options(progname, parser=None):
+    """
+    define command-line arguments
+    """
+    if not parser:
+        parser = argparse.ArgumentParser(progname, None, description, epilog)
+
+    parser.add_argument("statusdir", metavar="DIR", type=str,
+                        help="the directory containing the SIP status files to import")
+    parser.add_argument("-d", "--db-file", dest="dbfile", metavar="FILE", type=str,
+                        help="the SQLite database file to import into (default: _sipstatus.sqlite "+
+                             "within DIR)")
+    parser.add_argument("-o", "--overwrite", dest="overwrite", action="store_true", default=False,
+                        help="replace records already in the database with those from the status files")
+    parser.add_argument("-q", "--quiet", dest="quiet", action="store_true", default=False,
+                        help="do not print a summary of the migration")
+
+    return parser
+
+def find_nistoar_code():
+    execdir = os.path.dirname(os.path.abspath(__file__))
+    return os.path.join(os.path.dirname(execdir), "python")
+
+try:
+    import nistoar.pdr
+except ImportError:
+    sys.path.insert(0, find_nistoar_code())
+from nistoar.pdr.publish.service import status
+
+def main(progname, args):
+    opts = define_options(progname).parse_args(args)
+    if not os.path.isdir(opts.statusdir):
+        print("%s: status directory not found: %s" % (progname, opts.statusdir), file=sys.stderr)
+        return 2
+
+    dbfile = opts.dbfile or os.path.join(opts.statusdir, "_sipstatus.sqlite")
+    try:
+        filestore = status.FileStatusStore(opts.statusdir)
+        dbstore = status.SQLiteStatusStore(dbfile)
+        found = len(filestore.select())
+        count = dbstore.import_from(filestore, opts.overwrite)
+    except Exception as ex:
+        print("%s: migration failed: %s" % (progname, str(ex)), file=sys.stderr)
+        return 1
+
+    if not opts.quiet:
+        print("imported %d of %d status records into %s" % (count, found, dbfile))
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main(def_progname, sys.argv[1:]))
@@ -0,0 +1,210 @@
+#! /usr/bin/env python3
+#
+import os, sys, time, argparse, logging, threading, importlib, math
+from datetime import datetime
+from concurrent.futures import ThreadPoolExecutor
+from socketserver import ThreadingMixIn
+from wsgiref.simple_server import WSGIServer, WSGIRequestHandler, make_server
+
+description="""replay web requests recorded by a WebRecorder (see the "record_to" service configuration
+parameter) against a locally started instance of one of the OAR web services (or against an already
+running service via --url), and report the latency percentiles and error rates observed for each
+endpoint.  Requests are re-issued with the relative timing they were recorded with, compressed by the
+speed-up factor."""
+epilog="""Errors are requests that failed to get a response or that got a 5xx response; 4xx responses are
+counted separately as they are often expected in recorded traffic."""
+def_progname = "webreplay"
+
+apps = {
+    "midas":    "nistoar.midas.wsgi",
+    "resolver": "nistoar.pdr.public.resolve.wsgi",
+    "nsd":      "nistoar.nsd.wsgi"
+}
+
+def define_options(progname, parser=None):
+    """
+    define command-line arguments
+    """
+    if not parser:
+        parser = argparse.ArgumentParser(progname, None, description, epilog)
+
+    parser.add_argument("recfile", metavar="RECFILE", type=str,
+                        help="the file of recorded requests to replay")
+    parser.add_argument("-a", "--app", dest="app", metavar="APP", type=str, choices=list(apps),
+                        default="midas", help="the service to start and replay against; one of "+
+                        ", ".join(apps) + " (default: midas)")
+    parser.add_argument("-c", "--config", dest="config", metavar="FILE", type=str,
+                        help="the configuration file (YAML or JSON) to start the service with")
+    parser.add_argument("-u", "--url", dest="url", metavar="URL", type=str,
+                        help="the base URL of an already running service to replay against; if "+
+                             "given, no service is started")
+    parser.add_argument("-j", "--concurrency", dest="concurrency", metavar="N", type=int, default=4,
+                        help="the maximum number of requests to have outstanding at a time")
+    parser.add_argument("-x", "--speed-up", dest="speedup", metavar="F", type=float, default=1.0,
+                        help="the factor by which to compress the recorded time between requests; "+
+                             "0 means issue requests as fast as possible (default: 1)")
+    parser.add_argument("-s", "--start", dest="start", metavar="N", type=int, default=0,
+                        help="the position of the first recorded request to replay (default: 0)")
+    parser.add_argument("-n", "--count", dest="count", metavar="N", type=int, default=-1,
+                        help="the maximum number of requests to replay (default: all)")
+    parser.add_argument("-d", "--depth", dest="depth", metavar="N", type=int, default=2,
+                        help="the number of leading path fields that identify an endpoint in the "+
+                             "report (default: 2)")
+
+    return parser
+
+def find_nistoar_code():
+    execdir = os.path.dirname(os.path.abspath(__file__))
+    return os.path.join(os.path.dirname(execdir), "python")
+
+try:
+    import nistoar.web
+except ImportError:
+    sys.path.insert(0, find_nistoar_code())
+import requests
+from nistoar.base import config as cfgmod
+from nistoar.web.webrecord import RequestLogParser
+
+SKIP_HEADERS = ("host", "content-length", "connection")
+
+class _ThreadingWSGIServer(ThreadingMixIn, WSGIServer):
+    daemon_threads = True
+
+class _QuietHandler(WSGIRequestHandler):
+    def log_message(self, *args):
+        pass
+
+def start_service(appname, config):
+    """
+    start the named service in a background thread and return the server
+    """
+    app = importlib.import_module(apps[appname]).app(config)
+    server = make_server("localhost", 0, app, _ThreadingWSGIServer, _QuietHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+def rectime(req):
+    return datetime.strptime(req.time, "%Y-%m-%d %H:%M:%S,%f").timestamp()
+
+def endpoint_for(req, depth):
+    path = req.resource.split('?', 1)[0].strip('/').split('/')
+    return "%s /%s" % (req.op, '/'.join(path[:depth]))
+
+def percentile(vals, pct):
+    # vals must be sorted
+    return vals[min(len(vals)-1, max(0, math.ceil(pct / 100.0 * len(vals)) - 1))]
+
+class Replayer(object):
+    """
+    re-issues recorded requests to a service and collects the outcomes by endpoint
+    """
+    def __init__(self, baseurl, concurrency=4, speedup=1.0, depth=2):
+        self.baseurl = baseurl.rstrip('/')
+        self.concurrency = concurrency
+        self.speedup = speedup
+        self.depth = depth
+        self.results = {}
+        self._lock = threading.Lock()
+        self._local = threading.local()
+
+    def _session(self):
+        if not hasattr(self._local, "session"):
+            self._local.session = requests.Session()
+        return self._local.session
+
+    def _send(self, req):
+        headers = {}
+        for line in req.headers:
+            name, _, val = line.partition(':')
+            if name.strip().lower() not in SKIP_HEADERS:
+                headers[name.strip()] = val.strip()
+
+        status = None
+        start = time.time()
+        try:
+            resp = self._session().request(req.op, self.baseurl + req.resource, headers=headers,
+                                           data=req.body.encode() or None, allow_redirects=False)
+            resp.content
+            status = resp.status_code
+        except requests.RequestException:
+            pass
+        elapsed = time.time() - start
+
+        with self._lock:
+            res = self.results.setdefault(endpoint_for(req, self.depth),
+                                          { "times": [], "errors": 0, "client_errors": 0 })
+            res['times'].append(elapsed)
+            if status is None or status >= 500:
+                res['errors'] += 1
+            elif status >= 400:
+                res['client_errors'] += 1
+
+    def replay(self, reqs):
+        """
+        replay the given requests, preserving their recorded relative timing (as compressed by
+        the speed-up factor), and return the elapsed time
+        """
+        t0 = rectime(reqs[0]) if reqs else 0
+        start = time.time()
+        with ThreadPoolExecutor(self.concurrency) as pool:
+            for req in reqs:
+                if self.speedup > 0:
+                    wait = start + (rectime(req) - t0) / self.speedup - time.time()
+                    if wait > 0:
+                        time.sleep(wait)
+                pool.submit(self._send, req)
+        return time.time() - start
+
+    def report(self, out=sys.stdout):
+        """
+        print the latency percentiles (in milliseconds) and error rates per endpoint
+        """
+        fmt = "%-40s %6s %8s %8s %8s %8s %7s %7s"
+        print(fmt % ("endpoint", "count", "p50", "p90", "p99", "max", "err%", "4xx%"), file=out)
+        for ep in sorted(self.results):
+            res = self.results[ep]
+            times = sorted(res['times'])
+            n = len(times)
+            print(fmt % (ep[:40], n,
+                         "%.1f" % (1000 * percentile(times, 50)), "%.1f" % (1000 * percentile(times, 90)),
+                         "%.1f" % (1000 * percentile(times, 99)), "%.1f" % (1000 * times[-1]),
+                         "%.1f" % (100.0 * res['errors'] / n), "%.1f" % (100.0 * res['client_errors'] / n)),
+                  file=out)
+
+def main(progname, args):
+    opts = define_options(progname).parse_args(args)
+    if not os.path.isfile(opts.recfile):
+        print("%s: record file not found: %s" % (progname, opts.recfile), file=sys.stderr)
+        return 2
+    if opts.concurrency < 1 or opts.speedup < 0:
+        print("%s: concurrency must be positive and speed-up non-negative" % progname, file=sys.stderr)
+        return 2
+
+    reqs = RequestLogParser(opts.recfile).parse(opts.start, opts.count)
+    if not reqs:
+        print("%s: no requests to replay" % progname, file=sys.stderr)
+        return 1
+
+    server = None
+    try:
+        baseurl = opts.url
+        if not baseurl:
+            logging.getLogger().addHandler(logging.NullHandler())
+            config = cfgmod.resolve_configuration(opts.config) if opts.config else {}
+            server = start_service(opts.app, config)
+            baseurl = "http://localhost:%d" % server.server_port
+
+        replayer = Replayer(baseurl, opts.concurrency, opts.speedup, opts.depth)
+        elapsed = replayer.replay(reqs)
+        print("replayed %d requests in %.2fs (%.1f req/s) with concurrency %d:" %
+              (len(reqs), elapsed, len(reqs)/elapsed, opts.concurrency))
+        replayer.report()
+        return 0
+
+    finally:
+        if server:
+            server.shutdown()
+            server.server_close()
+
+if __name__ == "__main__":
+    sys.exit(main(def_progname, sys.argv[1:]))